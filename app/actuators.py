@@ -0,0 +1,213 @@
+"""
+Stream lệnh động cơ (màn hình Motors) theo nhịp cố định, gộp theo giá trị mới nhất.
+
+Kéo slider gọi ``setMotorOutput`` hàng trăm lần/giây; gửi mỗi lần 1 lệnh thì link 9600 baud
+không kịp và hàng đợi TX trễ vài giây so với tay người điều khiển. ``ActuatorStreamer``:
+
+- ``set_output()`` chỉ ghi giá trị đích của từng động cơ (không gửi gì)
+- Thread stream gửi 1 frame gói mọi động cơ mỗi ``1 / rate_hz`` giây; frame trước chưa ghi xong
+  thì bỏ nhịp này (trong hàng đợi TX không bao giờ có quá 1 frame động cơ, nên không trễ dồn)
+- ``stop_all()`` huỷ frame đang chờ và gửi frame PWM tối thiểu ở PRIO_SAFETY, có rid + ACK
+- Dead-man: UI không gọi ``set_output()`` / ``refresh()`` quá ``deadman_s`` giây thì tự dừng
+  như ``stop_all()`` (UI treo, tab bị đóng, WebChannel mất kết nối...)
+- Hết động cơ nào quay (mọi đích = PWM tối thiểu, đã gửi) thì thread tự thoát
+
+Giao thức::
+
+    {"motors": [pwm1, pwm2, ...]}               stream, không ACK (binary: MSG_MOTORS)
+    {"motors": [pwm_min, ...], "rid": n}        dừng: drone trả ACK cùng rid
+
+    streamer = ActuatorStreamer(ctl, on_status=bridge.update_motor_status)
+    streamer.set_output(1, 30.0)      # động cơ 1, 30 %
+    streamer.refresh()                # UI giữ nguyên slider: vẫn còn người điều khiển
+    streamer.stop_all()
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.commands import PRIO_MISSION, PRIO_SAFETY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MOTORS = 8
+DEFAULT_RATE_HZ = 5.0       # JSON 8 động cơ ~60 byte -> ~300 B/s, 1/3 link 9600 baud
+DEFAULT_DEADMAN_S = 1.0
+PWM_MIN = 1000
+PWM_MAX = 2000
+
+STATE_IDLE = "idle"
+STATE_STREAMING = "streaming"
+STATE_STOPPED = "stopped"
+STATE_DEADMAN = "deadman"
+
+
+class ActuatorStreamer:
+    def __init__(self, controller, motors: int = DEFAULT_MOTORS, rate_hz: float = DEFAULT_RATE_HZ,
+                 deadman_s: float = DEFAULT_DEADMAN_S, pwm_min: int = PWM_MIN, pwm_max: int = PWM_MAX,
+                 on_status: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        controller -> GroundController (write_json / send_command)
+        motors     -> số động cơ trong mỗi frame (động cơ 1..motors)
+        rate_hz    -> số frame/giây khi đang stream
+        deadman_s  -> không có set_output/refresh quá lâu thì dừng mọi động cơ
+        on_status  -> nhận {"state", "outputs", "reason"?} khi trạng thái đổi (gọi từ thread bất kỳ)
+        """
+        if motors < 1 or rate_hz <= 0 or deadman_s <= 0:
+            raise ValueError("motors >= 1, rate_hz > 0, deadman_s > 0")
+        self.controller = controller
+        self.motors = int(motors)
+        self.period = 1.0 / float(rate_hz)
+        self.deadman_s = float(deadman_s)
+        self.pwm_min = int(pwm_min)
+        self.pwm_max = int(pwm_max)
+        self.on_status = on_status
+
+        self._cond = threading.Condition()
+        self._targets: List[int] = [self.pwm_min] * self.motors
+        self._sent: Optional[List[int]] = None      # frame cuối đã xếp hàng
+        self._pending = None                        # CommandFuture của frame đó
+        self._refreshed = 0.0
+        self._state = STATE_IDLE
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.stats = {"updates": 0, "frames": 0, "skipped": 0, "stops": 0, "deadman": 0}
+
+    @classmethod
+    def from_config(cls, controller, cfg: Optional[Dict[str, Any]], on_status=None) -> "ActuatorStreamer":
+        cfg = cfg or {}
+        return cls(controller, motors=cfg.get("count", DEFAULT_MOTORS), rate_hz=cfg.get("rate_hz", DEFAULT_RATE_HZ),
+                   deadman_s=cfg.get("deadman_s", DEFAULT_DEADMAN_S), pwm_min=cfg.get("pwm_min", PWM_MIN),
+                   pwm_max=cfg.get("pwm_max", PWM_MAX), on_status=on_status)
+
+    # ---- API (GUI thread) ----
+    def pwm(self, percent: float) -> int:
+        percent = min(max(float(percent), 0.0), 100.0)
+        return int(round(self.pwm_min + percent / 100.0 * (self.pwm_max - self.pwm_min)))
+
+    def set_output(self, index: int, percent: float) -> int:
+        """Đích của động cơ ``index`` (1..motors) theo %; trả PWM (µs). Chỉ gửi ở nhịp stream kế tiếp."""
+        if not 1 <= index <= self.motors:
+            raise ValueError(f"motor {index} ngoài 1..{self.motors}")
+        pwm = self.pwm(percent)
+        start = False
+        with self._cond:
+            if self._closed:
+                return self.pwm_min
+            self._targets[index - 1] = pwm
+            self._refreshed = time.monotonic()
+            self.stats["updates"] += 1
+            if pwm != self.pwm_min and self._state != STATE_STREAMING:
+                self._state = STATE_STREAMING
+                start = True
+                if self._thread is None:        # thread cũ chưa kịp thoát thì nó chạy tiếp
+                    thread = self._thread = threading.Thread(target=self._run, name="actuators", daemon=True)
+                    thread.start()
+        if start:
+            self._notify(STATE_STREAMING)
+        return pwm
+
+    def refresh(self):
+        """UI vẫn đang giữ slider (không đổi giá trị): gia hạn dead-man."""
+        with self._cond:
+            self._refreshed = time.monotonic()
+
+    def stop_all(self, reason: str = "stop"):
+        """Dừng ngay: bỏ frame stream đang chờ, gửi PWM tối thiểu trước mọi lệnh khác; trả Future (hoặc None)."""
+        with self._cond:
+            fut = self._stop_locked(STATE_STOPPED)
+        self._notify(STATE_STOPPED, reason)
+        return fut
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            if self._thread is not None:
+                self._stop_locked(STATE_STOPPED)
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2 * self.period + 1.0)
+
+    @property
+    def active(self) -> bool:
+        return self._state == STATE_STREAMING
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self.stats, state=self._state, outputs=list(self._targets),
+                        rate_hz=round(1.0 / self.period, 3), deadman_s=self.deadman_s)
+
+    # ---- nội bộ ----
+    def _stop_locked(self, state: str):
+        """Gọi khi giữ _cond. Xếp frame dừng ngay trong lock: thread stream không thể chen frame cũ vào sau."""
+        self._targets = [self.pwm_min] * self.motors
+        self._state = state
+        self.stats["stops"] += 1
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.cancel()                        # chưa ghi thì TX scheduler bỏ qua
+        self._sent = list(self._targets)
+        self._cond.notify_all()
+        ctl = self.controller
+        try:
+            return ctl.send_command({"motors": list(self._targets)}, PRIO_SAFETY)
+        except Exception as e:
+            logger.error(f"Lỗi gửi lệnh dừng động cơ: {e}")
+            return None
+
+    def _run(self):
+        deadline = time.monotonic()
+        reason = None
+        while True:
+            with self._cond:
+                while True:
+                    if self._state != STATE_STREAMING:
+                        self._thread = None
+                        return
+                    now = time.monotonic()
+                    if now - self._refreshed > self.deadman_s:
+                        self.stats["deadman"] += 1
+                        logger.warning(f"Dead-man: không có lệnh động cơ từ UI {now - self._refreshed:.1f}s, dừng")
+                        self._stop_locked(STATE_DEADMAN)
+                        self._thread = None
+                        reason = "deadman"
+                        break
+                    if now >= deadline:
+                        break
+                    self._cond.wait(deadline - now)
+                if reason is not None:
+                    break
+                deadline += self.period
+                if deadline < now:                  # bị trễ (GC, máy bận): không gửi bù
+                    deadline = now + self.period
+                if all(p == self.pwm_min for p in self._targets) and self._sent == self._targets:
+                    # mọi động cơ đã dừng và drone đã nhận frame dừng
+                    self._state = STATE_IDLE
+                    self._thread = None
+                    reason = "idle"
+                    break
+                if self._pending is not None and not self._pending.done():
+                    # link chậm hơn rate_hz: giữ giá trị mới nhất cho nhịp sau
+                    self.stats["skipped"] += 1
+                    continue
+                frame = list(self._targets)
+                try:
+                    self._pending = self.controller.write_json({"motors": frame}, PRIO_MISSION)
+                except Exception as e:
+                    logger.error(f"Lỗi gửi frame động cơ: {e}")
+                    self._pending = None
+                self._sent = frame
+                self.stats["frames"] += 1
+        self._notify(STATE_DEADMAN if reason == "deadman" else STATE_IDLE, reason)
+
+    def _notify(self, state: str, reason: Optional[str] = None):
+        if self.on_status is None:
+            return
+        info: Dict[str, Any] = {"state": state, "outputs": self.status()["outputs"]}
+        if reason:
+            info["reason"] = reason
+        try:
+            self.on_status(info)
+        except Exception as e:
+            logger.error(f"Lỗi callback trạng thái động cơ: {e}")
@@ -0,0 +1,192 @@
+"""
+Asyncio serial transport cho GroundController (transport="asyncio").
+
+Một event loop duy nhất trong 1 thread nền:
+- đọc fd serial ngay khi có byte (loop.add_reader), không poll theo timeout
+- timer (deadline heartbeat của LinkSupervisor) dùng loop.call_at, không vòng lặp sleep
+- ghi lệnh qua coroutine ``write`` (hoặc ``submit`` từ thread khác -> Future): os.write không chặn,
+  phần driver chưa nhận hết thì ghi tiếp khi fd ghi được (loop.add_writer), loop không bao giờ chặn
+  chờ link 9600 baud xả dữ liệu
+
+Nền tảng không hỗ trợ add_reader cho serial (Windows, ReplaySerial) dùng
+reader và writer chạy trong executor.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSerialTransport:
+    READ_SIZE = 4096
+
+    def __init__(self, ser, on_data: Callable[[bytes], None]):
+        self.ser = ser
+        self.on_data = on_data
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._fd: Optional[int] = None
+        self._fallback_task: Optional[asyncio.Task] = None
+        # [phần còn phải ghi, Future, tổng số byte] theo thứ tự write(); đầu hàng đang ghi dở
+        self._tx: deque = deque()
+        self._writer = False
+
+    # ---- lifecycle ----
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="serial-aio", daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def stop(self, timeout: float = 1.0):
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            return
+        loop.call_soon_threadsafe(self._shutdown)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._attach_reader()
+            self._ready.set()
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+            self._ready.set()
+
+    def _attach_reader(self):
+        fd = None
+        try:
+            fd = self.ser.fileno()
+            self.loop.add_reader(fd, self._on_readable)
+            self._fd = fd
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            # không có fd chọn được -> đọc chặn trong executor
+            self._fd = None
+            self._fallback_task = self.loop.create_task(self._read_fallback())
+        logger.info("Asyncio transport: %s", "add_reader" if self._fd is not None else "executor reader")
+
+    def _shutdown(self):
+        self._fail_tx(RuntimeError("asyncio transport stopped"))
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self._fallback_task:
+            self._fallback_task.cancel()
+        # cho task vừa huỷ chạy nốt 1 vòng trước khi dừng loop
+        self.loop.call_soon(self.loop.stop)
+
+    # ---- RX ----
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, self.READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(f"Lỗi đọc serial: {e}")
+            self._fail_tx(e)
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+            return
+        if data:
+            self._deliver(data)
+
+    async def _read_fallback(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not getattr(self.ser, "is_open", False):
+                # cổng đã đóng: read trả b"" ngay, lặp tiếp chỉ quay CPU + ngập executor
+                logger.info("Asyncio transport: cổng đã đóng, dừng executor reader")
+                return
+            try:
+                data = await loop.run_in_executor(None, self._blocking_read)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lỗi đọc serial: {e}")
+                await asyncio.sleep(0.2)
+                continue
+            if data:
+                self._deliver(data)
+
+    def _blocking_read(self) -> bytes:
+        if not getattr(self.ser, "is_open", False):
+            return b""
+        n = self.ser.in_waiting
+        return self.ser.read(n if n else 1)
+
+    def _deliver(self, data: bytes):
+        try:
+            self.on_data(data)
+        except Exception as e:
+            logger.error(f"Lỗi xử lý dữ liệu RX: {e}")
+
+    # ---- TX ----
+    async def write(self, data: bytes) -> int:
+        """Ghi bytes mà không chặn loop; xong khi mọi byte đã vào driver (không tcdrain)."""
+        if self._fd is None:
+            # không có fd chọn được: ser.write chặn tới write_timeout -> chạy trong executor
+            return await self.loop.run_in_executor(None, self.ser.write, data)
+        fut = self.loop.create_future()
+        self._tx.append([memoryview(data), fut, len(data)])
+        if len(self._tx) == 1:
+            self._flush_tx()
+        return await fut
+
+    def _flush_tx(self):
+        """Ghi hàng TX tới khi driver đầy; phần còn lại chờ fd ghi được (add_writer)."""
+        while self._tx:
+            item = self._tx[0]
+            view, fut, n = item
+            try:
+                sent = os.write(self._fd, view)
+            except BlockingIOError:
+                sent = 0
+            except OSError as e:
+                logger.error(f"Lỗi ghi serial: {e}")
+                self._fail_tx(e)
+                return
+            if sent < len(view):
+                item[0] = view[sent:]
+                if not self._writer:
+                    self.loop.add_writer(self._fd, self._flush_tx)
+                    self._writer = True
+                return
+            self._tx.popleft()
+            if not fut.done():
+                fut.set_result(n)
+        if self._writer:
+            self.loop.remove_writer(self._fd)
+            self._writer = False
+
+    def _fail_tx(self, error: BaseException):
+        if self._writer and self._fd is not None:
+            self.loop.remove_writer(self._fd)
+        self._writer = False
+        while self._tx:
+            fut = self._tx.popleft()[1]
+            if not fut.done():
+                fut.set_exception(error)
+
+    def submit(self, data: bytes) -> concurrent.futures.Future:
+        """Ghi từ thread bất kỳ; trả Future hoàn tất khi bytes đã vào driver."""
+        if self.loop is None or not self.loop.is_running():
+            fut: concurrent.futures.Future = concurrent.futures.Future()
+            fut.set_exception(RuntimeError("asyncio transport is not running"))
+            return fut
+        return asyncio.run_coroutine_threadsafe(self.write(data), self.loop)
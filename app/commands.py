@@ -0,0 +1,268 @@
+"""
+TX scheduler: 1 thread sở hữu cổng serial, gửi theo độ ưu tiên, chờ ACK và gửi lại.
+
+- PRIO_SAFETY (LAND, ON/OFF) luôn vượt PRIO_MISSION (offboard, waypoint),
+  PRIO_MISSION vượt PRIO_BULK (truyền khối lớn); cùng mức thì FIFO.
+- Lệnh reliable mang ``rid`` (1..65535); drone trả ack cùng rid, RX path gọi ``ack(rid, t)``.
+- Hết hạn ACK -> gửi lại với timeout nhân BACKOFF, tối đa ``retries`` lần rồi báo lỗi.
+- Mỗi lần submit trả ``CommandFuture``: result() = latency (s) từ lúc submit tới ACK
+  (hoặc tới khi ghi xong với lệnh không cần ACK).
+"""
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIO_SAFETY = 0
+PRIO_MISSION = 1
+PRIO_BULK = 2
+
+
+class CommandTimeout(TimeoutError):
+    """Hết số lần gửi lại mà không nhận được ACK."""
+
+
+class CommandFuture(concurrent.futures.Future):
+    def __init__(self, rid: Optional[int] = None, name: str = "", priority: int = PRIO_MISSION):
+        super().__init__()
+        self.rid = rid
+        self.name = name
+        self.priority = priority
+        self.attempts = 0
+        self.submitted = time.monotonic()
+        self.latency: Optional[float] = None
+
+
+class _Item:
+    __slots__ = ("data", "future", "order", "timeout", "retries", "deadline", "done")
+
+    def __init__(self, data: bytes, future: CommandFuture, order: int, timeout: float, retries: int):
+        self.data = data
+        self.future = future
+        self.order = order
+        self.timeout = timeout
+        self.retries = retries
+        self.deadline = float("inf")
+        self.done = False
+
+
+class TxScheduler:
+    ACK_TIMEOUT = 1.0
+    MAX_RETRIES = 3
+    BACKOFF = 2.0
+    LATENCY_WINDOW = 512
+
+    def __init__(self, write: Callable[[bytes], object], baudrate: Optional[int] = None,
+                 on_result: Optional[Callable[[CommandFuture], None]] = None,
+                 ack_timeout: float = ACK_TIMEOUT, retries: int = MAX_RETRIES):
+        """
+        write     -> hàm ghi bytes ra cổng (chạy trên thread scheduler, được phép chặn)
+        baudrate  -> cộng thời gian phát trên dây vào timeout ACK
+        on_result -> gọi khi 1 lệnh reliable hoàn tất (ACK hoặc lỗi)
+        """
+        self.write = write
+        self.baudrate = baudrate
+        self.on_result = on_result
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []                # (priority, order, item)
+        self._inflight: Dict[int, _Item] = {}        # rid -> item (đang chờ gửi hoặc chờ ACK)
+        self._order = itertools.count()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {"submitted": 0, "writes": 0, "acked": 0, "failed": 0, "retries": 0}
+        self._latency: deque = deque(maxlen=self.LATENCY_WINDOW)
+
+    # ---- lifecycle ----
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="tx-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Dừng thread; lệnh còn chờ bị huỷ với lỗi."""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+            leftover = [it for _, _, it in self._queue] + list(self._inflight.values())
+            self._queue.clear()
+            self._inflight.clear()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        for it in leftover:
+            if not it.done:
+                it.done = True
+                self._finish(it, error=RuntimeError("TX scheduler stopped"))
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # ---- API ----
+    def submit(self, data: bytes, priority: int = PRIO_MISSION, rid: Optional[int] = None,
+               name: str = "", timeout: Optional[float] = None,
+               retries: Optional[int] = None) -> CommandFuture:
+        """Xếp hàng ``data``; có rid => chờ ACK và gửi lại khi quá hạn."""
+        fut = CommandFuture(rid, name, priority)
+        if timeout is None:
+            timeout = self.ack_timeout
+            if self.baudrate:
+                # 1 lượt đi + 1 lượt về tối thiểu cho frame này trên link chậm
+                timeout += 2 * len(data) * 10.0 / self.baudrate
+        item = _Item(data, fut, next(self._order), timeout, self.retries if retries is None else retries)
+        old = None
+        with self._cond:
+            if not self._running:
+                fut.set_exception(RuntimeError("TX scheduler is not running"))
+                return fut
+            if rid is not None:
+                old = self._inflight.pop(rid, None)
+                if old is not None:
+                    # rid quay vòng trùng lệnh cũ còn treo -> lệnh cũ coi như mất
+                    old.done = True
+                    self._stats["failed"] += 1
+                self._inflight[rid] = item
+            self._stats["submitted"] += 1
+            heapq.heappush(self._queue, (priority, item.order, item))
+            self._cond.notify()
+        if old is not None:
+            self._finish(old, error=CommandTimeout(f"rid {rid} reused before ACK"))
+        return fut
+
+    def ack(self, rid: int, t: Optional[float] = None) -> bool:
+        """Gọi từ RX path khi nhận ACK; trả True nếu khớp 1 lệnh đang chờ."""
+        t = t or time.monotonic()
+        with self._cond:
+            item = self._inflight.pop(rid, None)
+            if item is None or item.done:
+                return False
+            item.done = True
+            self._stats["acked"] += 1
+        latency = max(0.0, t - item.future.submitted)
+        self._finish(item, latency=latency)
+        return True
+
+    def stats(self) -> Dict:
+        with self._cond:
+            out = dict(self._stats, queued=len(self._queue), inflight=len(self._inflight))
+            lat = sorted(self._latency)
+        if lat:
+            pick = lambda p: round(lat[min(len(lat) - 1, int(round(p / 100.0 * (len(lat) - 1))))] * 1e3, 2)
+            out.update(latency_ms_p50=pick(50), latency_ms_p90=pick(90), latency_ms_p99=pick(99),
+                       latency_ms_mean=round(statistics.fmean(lat) * 1e3, 2),
+                       latency_ms_max=round(lat[-1] * 1e3, 2))
+        return out
+
+    # ---- scheduler thread ----
+    def _next(self) -> Optional[_Item]:
+        """Chờ tới khi có frame cần gửi (mới hoặc gửi lại); None khi dừng."""
+        while True:
+            item = None
+            failed: List[_Item] = []
+            with self._cond:
+                if not self._running:
+                    return None
+                now = time.monotonic()
+                wake = self._expire(now, failed)
+                while self._queue:
+                    _, _, it = heapq.heappop(self._queue)
+                    if it.done:
+                        continue
+                    if it.future.cancelled():
+                        it.done = True
+                        if self._inflight.get(it.future.rid) is it:
+                            del self._inflight[it.future.rid]
+                        continue
+                    item = it
+                    break
+                if item is None and not failed:
+                    self._cond.wait(None if wake is None else max(0.0, wake - now))
+            # callback lỗi chạy ngoài lock
+            for it in failed:
+                f = it.future
+                self._finish(it, error=CommandTimeout(f"{f.name or 'command'} rid={f.rid}: "
+                                                      f"no ACK after {f.attempts} attempt(s)"))
+            if item is not None:
+                return item
+
+    def _expire(self, now: float, failed: List[_Item]) -> Optional[float]:
+        """Xếp lại lệnh quá hạn ACK (giữ order cũ => đi trước lệnh mới cùng mức); trả deadline gần nhất."""
+        wake = None
+        for rid, item in list(self._inflight.items()):
+            if item.deadline == float("inf"):
+                continue
+            if now >= item.deadline:
+                if item.future.attempts > item.retries:
+                    del self._inflight[rid]
+                    item.done = True
+                    self._stats["failed"] += 1
+                    failed.append(item)
+                    continue
+                item.deadline = float("inf")
+                self._stats["retries"] += 1
+                heapq.heappush(self._queue, (item.future.priority, item.order, item))
+                logger.debug("Gửi lại rid=%s (%s), lần %d", rid, item.future.name, item.future.attempts + 1)
+            elif wake is None or item.deadline < wake:
+                wake = item.deadline
+        return wake
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            fut = item.future
+            fut.attempts += 1
+            try:
+                self.write(item.data)
+                err = None
+            except Exception as e:
+                err = e
+                logger.error(f"Lỗi ghi serial: {e}")
+            now = time.monotonic()
+            with self._cond:
+                self._stats["writes"] += 1
+                if fut.rid is not None:
+                    if not item.done:
+                        # chờ ACK; lần gửi sau timeout dài hơn theo BACKOFF
+                        item.deadline = now + item.timeout * self.BACKOFF ** (fut.attempts - 1)
+                    continue
+                item.done = True
+            if err is not None:
+                self._finish(item, error=err)
+            else:
+                self._finish(item, latency=now - fut.submitted)
+
+    def _finish(self, item: _Item, latency: Optional[float] = None, error: Optional[BaseException] = None):
+        fut = item.future
+        if fut.done():
+            return
+        if error is None:
+            fut.latency = latency
+            if fut.rid is not None:
+                with self._cond:
+                    self._latency.append(latency)
+            fut.set_result(latency)
+        else:
+            fut.set_exception(error)
+        if fut.rid is not None and self.on_result:
+            try:
+                self.on_result(fut)
+            except Exception as e:
+                logger.error(f"TX result callback error: {e}")
@@ -1,3 +1,5 @@
+import asyncio
+import concurrent.futures
 import json
 import math
 import threading
@@ -6,15 +8,27 @@ import sys
 from typing import Optional, List, Dict, Any
 
 import serial
-from serial.tools import list_ports
 
-# Thay vì print() đơn giản, nên dùng logging
+from app.aio_transport import AsyncSerialTransport
+from app.commands import PRIO_MISSION, PRIO_SAFETY, CommandFuture, TxScheduler
+from app.devices import EVENT_ADD, EVENT_REMOVE, DeviceWatcher, PortInfo, get_watcher
+from app.geo import LocalFrame, validate_waypoints
+from app.geofence import Geofence
+from app.link import LinkSupervisor
+from app.metrics import Registry, get_registry
+from app.mission import MissionUploader
+from app.protocol import (
+    BinaryDecoder, FRAME_DELIMITER, MAX_RID, PROTO_BINARY, PROTO_JSON, PROTOCOL_VERSION, encode_json_message,
+)
+from app.replay import ReplaySerial, is_replay_port
+from app.rxbuffer import RxBuffer
+from app.telemetry import TelemetryDecoder, TelemetryRecord
+
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 @dataclass
 class Waypoint:
@@ -55,32 +69,30 @@ def _is_num(x) -> bool:
         return False
 
 
-def _clean_json_str(s: str) -> str:
-    start = s.find("{")
-    end = s.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return s[start:end + 1]
-    return ""
+PORT_SCAN_TIMEOUT = 3.0
 
 
 def _platform_default_ports():
     """Gợi ý vài cổng mặc định theo OS để thử lần lượt."""
     if sys.platform.startswith("win"):
-        # Thử vài COM phổ biến
-        return [f"COM{i}" for i in range(1, 21)]
+        # COM không có thứ tự ý nghĩa: để watcher ưu tiên cổng USB
+        return []
     # Linux / WSL / Mac
     return ["/dev/ttyUSB0", "/dev/ttyUSB1", "/dev/ttyACM0", "/dev/ttyACM1"]
 
 
 def _first_available_port(candidates=None) -> Optional[str]:
-    """Trả về COM/cổng serial đầu tiên trùng trong danh sách available."""
-    ports = [p.device for p in list_ports.comports()]
-    cand = candidates or _platform_default_ports()
-    for c in cand:
-        if c in ports:
-            return c
-    # nếu không trùng, cứ trả về cổng đầu tiên phát hiện
-    return ports[0] if ports else None
+    """Cổng đầu tiên trong candidates đang có (tra chỉ mục của DeviceWatcher), không thì cổng USB đầu tiên."""
+    watcher = get_watcher()
+    watcher.wait_ready(PORT_SCAN_TIMEOUT)
+    return watcher.first_available(candidates or _platform_default_ports())
+
+
+TRANSPORT_THREAD = "thread"
+TRANSPORT_ASYNCIO = "asyncio"
+
+MISSION_CHUNKED = "chunked"
+MISSION_LEGACY = "legacy"
 
 
 class GroundController:
@@ -88,41 +100,141 @@ class GroundController:
     DEFAULT_TIMEOUT = 0.2
     DEFAULT_WRITE_TIMEOUT = 0.5
     HEARTBEAT_TIMEOUT = 6.0
-    HEARTBEAT_GRACE = 2
-    HEARTBEAT_INTERVAL = 0.5
-
-    def __init__(self, port: Optional[str] = None, baudrate: int = DEFAULT_BAUDRATE, gui_bridge=None):
+    RX_BUFFER_SIZE = 8192
+    RECONNECT_BACKOFF = 0.25        # s, nhân đôi mỗi lần mở lại thất bại
+    RECONNECT_BACKOFF_MAX = 5.0
+
+    def __init__(self, port: Optional[str] = None, baudrate: int = DEFAULT_BAUDRATE, gui_bridge=None,
+                 decoder: Optional[TelemetryDecoder] = None, protocol: str = PROTO_JSON,
+                 transport: str = TRANSPORT_THREAD, hb_timeout: float = HEARTBEAT_TIMEOUT,
+                 mission_upload: str = MISSION_CHUNKED, frame: Optional[LocalFrame] = None,
+                 geofence: Optional[Geofence] = None, devices: Optional[DeviceWatcher] = None,
+                 vehicle_id: Optional[int] = None, ingest=None, metrics: Optional[Registry] = None):
         """
-        port=None  -> tự động dò cổng khả dụng
+        port=None  -> tự động dò cổng khả dụng (khi connect(), không phải lúc khởi tạo)
+        decoder    -> bộ giải mã telemetry (mặc định TelemetryDecoder)
+        protocol   -> "json" hoặc "binary" (binary được thương lượng, lỗi thì giữ JSON)
+        transport  -> "thread" (thread đọc + thread giám sát link) hoặc "asyncio" (1 event loop)
+        hb_timeout -> không nhận heartbeat quá số giây này => mất link
+        mission_upload -> "chunked" (chunk + delta + resume) hoặc "legacy" (1 dòng {"waypoints": [...]})
+        frame      -> gốc ENU (LocalFrame.from_config); mặc định gốc trong settings.example.toml
+        geofence   -> Geofence (kiểm mọi mẫu pose/GPS và mọi chặng mission trước khi gửi)
+        devices    -> DeviceWatcher: rút radio thì đóng cổng, cắm lại đúng radio (vid/pid/serial) thì nối lại
+        vehicle_id -> id drone, gắn vào mọi TelemetryRecord (VehicleManager)
+        ingest     -> IngestPipeline dùng chung: thread đọc chỉ đẩy chunk, decode/dispatch chạy ở pipeline
+        metrics    -> Registry (mặc định get_registry()), series gắn nhãn vehicle
         """
-        self.port = port or _first_available_port()
+        self.port = port
         self.baudrate = baudrate
         self.ser: Optional[serial.Serial] = None
         self.waypoints = []
+        self.frame = frame or LocalFrame()
+        self.geofence = geofence
+        self._fence_state = None            # (kind, zone) của vi phạm đang diễn ra
         self.received_thread: Optional[threading.Thread] = None
+        self.rx_buffer: Optional[RxBuffer] = None
         self.received = False
         self.gui_bridge = gui_bridge
+        self.vehicle_id = vehicle_id
+        self.ingest = ingest
+        self.decoder = decoder or TelemetryDecoder()
+        self.binary_decoder = BinaryDecoder()
+        # Flight recorder (tuỳ chọn): nhận mọi bản ghi telemetry đã giải mã
+        self.recorder = None
+        # TelemetryStream (tuỳ chọn): phát telemetry cho client WebSocket
+        self.stream = None
+        # ParamManager (tuỳ chọn): cache + đồng bộ tham số
+        self.params = None
+        # TelemetryHistory (tuỳ chọn): lịch sử nhiều mức cho vệt bay / biểu đồ
+        self.history = None
+        # ActuatorStreamer (tuỳ chọn): stream lệnh động cơ cho màn hình Motors
+        self.actuators = None
+
+        # Giao thức: luôn bắt đầu bằng JSON, chỉ chuyển binary khi drone xác nhận
+        self.protocol = PROTO_JSON
+        self._want_protocol = protocol
+
+        # Transport
+        self.transport = transport
+        self._aio: Optional[AsyncSerialTransport] = None
 
         # Heartbeat
-        self._last_hb = 0.0
-        self._link_ok = False
-        self._hb_timeout = self.HEARTBEAT_TIMEOUT
-        self._hb_thread: Optional[threading.Thread] = None
+        self._hb_timeout = hb_timeout
+        self.link = LinkSupervisor(self._hb_timeout, on_change=self._emit_link, on_stats=self._emit_link_stats)
 
         # Khoá ghi
         self._tx_lock = threading.Lock()
+        # connect() có thể được gọi từ thread khởi động và từ GUI cùng lúc
+        self._connect_lock = threading.Lock()
+
+        # TX scheduler: thread duy nhất ghi ra cổng, ưu tiên + ACK/gửi lại theo rid
+        self.tx = TxScheduler(self._write_raw, baudrate=baudrate, on_result=self._emit_command_result)
+        self._rid = 0
+        self._rid_lock = threading.Lock()
+
+        # Mission upload
+        self.mission_upload = mission_upload
+        self.mission = MissionUploader(self.send_command, on_progress=self._emit_mission_progress)
+
+        # Hot-plug: nhớ khoá vật lý của radio để nối lại sau khi cắm lại
+        self.devices = devices
+        self._device_key = None
+        self._active = False            # đã start() và chưa stop()
+        self._unplugged = False
+        self._reconnect_thread: Optional[threading.Thread] = None
+        if devices is not None:
+            devices.subscribe(self._on_device_event)
+
+        self._register_metrics(metrics or get_registry())
+
+    def _register_metrics(self, reg: Registry):
+        """Đường nóng chỉ cập nhật vài counter/histogram; số liệu đã có sẵn (RxBuffer, TX, link) đọc lúc snapshot."""
+        v = str(self.vehicle_id) if self.vehicle_id is not None else "default"
+        self._m_frames = reg.counter("gcs_rx_frames_total", "Frame/dòng telemetry decode được", vehicle=v)
+        self._m_bad = reg.counter("gcs_rx_decode_errors_total", "Frame/dòng bị bỏ (không decode được)", vehicle=v)
+        self._m_dispatch = reg.histogram("gcs_rx_dispatch_seconds", "Decode + dispatch 1 frame", vehicle=v)
+        self._m_bridge_errors = reg.counter("gcs_bridge_errors_total", "Lỗi khi đẩy dữ liệu sang GUI bridge",
+                                            vehicle=v)
+        self._m_tx_write = reg.histogram("gcs_tx_write_seconds", "Thời gian ghi 1 frame ra serial", vehicle=v)
+        self._m_tx_stalls = reg.counter("gcs_tx_write_timeouts_total", "Ghi serial quá write_timeout", vehicle=v)
+        self._m_ack = reg.histogram("gcs_command_ack_seconds", "Gửi lệnh -> nhận ACK", vehicle=v)
+
+        def rx(key):
+            return lambda: self.rx_stats().get(key)
+
+        reg.counter_fn("gcs_rx_bytes_total", rx("bytes_in"), "Bytes đọc từ serial", vehicle=v)
+        reg.counter_fn("gcs_rx_overflows_total", rx("overflows"), "RX buffer tràn (frame quá dài)", vehicle=v)
+        reg.counter_fn("gcs_rx_dropped_bytes_total", rx("dropped_bytes"), "Bytes bị bỏ khi RX buffer tràn",
+                       vehicle=v)
+        for dec, prefix in ((self.decoder, ""), (self.binary_decoder, "binary_")):
+            for reason in getattr(dec, "rejects", None) or ():
+                reg.counter_fn("gcs_rx_rejects_total", lambda d=dec, r=reason: d.rejects[r],
+                               "Dòng/frame bị loại theo lý do", vehicle=v, reason=prefix + reason)
+
+        def tx(key):
+            return lambda: self.tx.stats().get(key)
+
+        for key in ("submitted", "writes", "acked", "failed", "retries"):
+            reg.counter_fn(f"gcs_tx_{key}_total", tx(key), f"TX scheduler: {key}", vehicle=v)
+        reg.gauge_fn("gcs_tx_queued", tx("queued"), "Frame đang chờ ghi", vehicle=v)
+        reg.gauge_fn("gcs_tx_inflight", tx("inflight"), "Lệnh đang chờ ACK", vehicle=v)
+        reg.gauge_fn("gcs_link_up", lambda: 1 if self.link_ok else 0, "Heartbeat còn trong hb_timeout", vehicle=v)
+        reg.gauge_fn("gcs_link_rate_hz", lambda: self.link.stats()["rate_hz"], "Frame/giây nhận được", vehicle=v)
+        reg.gauge_fn("gcs_link_loss_ratio", lambda: self.link.stats()["loss"], "Tỉ lệ heartbeat mất", vehicle=v)
 
     # ================= Serial helpers =================
     def _print_available_ports(self):
-        ports = list_ports.comports()
+        ports = get_watcher().ports()
         if not ports:
-            print(" Không phát hiện cổng serial nào.")
+            logger.warning("Không phát hiện cổng serial nào.")
             return
-        print("Các cổng đang có:")
-        for p in ports:
-            print(f" - {p.device}: {p.description}")
+        logger.info("Các cổng đang có:\n%s", "\n".join(f" - {p.device}: {p.description}" for p in ports))
 
     def connect(self):
+        with self._connect_lock:
+            self._connect()
+
+    def _connect(self):
         if self.ser and getattr(self.ser, "is_open", False):
             return
 
@@ -133,7 +245,9 @@ class GroundController:
             if not self.port:
                 raise RuntimeError("Không tìm thấy cổng serial khả dụng.")
 
-            self.ser = serial.Serial(
+            # "replay:<file>?speed=..." -> phát lại capture/flight log thay cho cổng thật
+            factory = ReplaySerial.from_url if is_replay_port(self.port) else serial.Serial
+            self.ser = factory(
                 self.port,
                 self.baudrate,
                 timeout=self.DEFAULT_TIMEOUT,
@@ -147,6 +261,10 @@ class GroundController:
                 pass
 
             time.sleep(0.2)
+            self.tx.start()
+            if self.devices is not None:
+                info = self.devices.get(self.port)
+                self._device_key = info.key if info is not None else None
             logger.info(f"Đã kết nối LoRa tại {self.port} @ {self.baudrate}")
         except Exception as e:
             logger.error(f"Không thể kết nối: {e}")
@@ -161,217 +279,457 @@ class GroundController:
             pass
         self.ser = None
 
-    def write_line(self, line: str):
-        """Ghi 1 dòng kèm newline, thread-safe."""
+    def _write_raw(self, data: bytes):
+        """Ghi thật ra cổng; chỉ thread TX scheduler gọi (được phép chặn tới khi ghi xong)."""
+        ser = self.ser
+        if not (ser and ser.is_open):
+            raise RuntimeError("Serial chưa mở")
+        t0 = time.perf_counter()
+        try:
+            if self._aio is not None:
+                self._aio.submit(data).result(timeout=2 * self.DEFAULT_WRITE_TIMEOUT)
+            else:
+                with self._tx_lock:
+                    ser.write(data)
+                    ser.flush()
+        except (serial.SerialTimeoutException, concurrent.futures.TimeoutError):
+            self._m_tx_stalls.inc()
+            raise
+        finally:
+            self._m_tx_write.observe(time.perf_counter() - t0)
+
+    def write_bytes(self, data: bytes, priority: int = PRIO_MISSION) -> Optional[CommandFuture]:
+        """Xếp bytes thô vào TX scheduler; trả Future hoàn tất khi đã ghi xong."""
         if not (self.ser and self.ser.is_open):
-            print("Serial chưa mở khi ghi.")
-            return
-        with self._tx_lock:
+            logger.warning("Serial chưa mở khi ghi.")
+            return None
+        return self.tx.submit(data, priority)
+
+    def write_line(self, line: str, priority: int = PRIO_MISSION) -> Optional[CommandFuture]:
+        """Ghi 1 dòng kèm newline, thread-safe."""
+        return self.write_bytes((line.rstrip("\n") + "\n").encode("utf-8"), priority)
+
+    def _encode(self, obj: dict) -> Optional[bytes]:
+        """Ở chế độ binary dùng frame nếu message có dạng binary, không thì dòng JSON."""
+        if self.protocol == PROTO_BINARY:
             try:
-                self.ser.write((line.rstrip("\n") + "\n").encode("utf-8"))
-                self.ser.flush()
+                frame = encode_json_message(obj)
             except Exception as e:
-                print(f"Lỗi ghi serial: {e}")
-
-    def write_json(self, obj: dict):
+                logger.error(f"Lỗi encode frame: {e}")
+                frame = None
+            if frame is not None:
+                return frame
         try:
-            self.write_line(json.dumps(obj, ensure_ascii=False))
+            return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
         except Exception as e:
-            print(f"Lỗi serialize JSON: {e}")
+            logger.error(f"Lỗi serialize JSON: {e}")
+            return None
+
+    def write_json(self, obj: dict, priority: int = PRIO_MISSION) -> Optional[CommandFuture]:
+        """Gửi 1 message, không chờ ACK."""
+        data = self._encode(obj)
+        return self.write_bytes(data, priority) if data is not None else None
+
+    def next_rid(self) -> int:
+        with self._rid_lock:
+            self._rid = self._rid % MAX_RID + 1
+            return self._rid
+
+    def send_command(self, obj: dict, priority: int = PRIO_MISSION,
+                     retries: Optional[int] = None, timeout: Optional[float] = None,
+                     rid: Optional[int] = None) -> Optional[CommandFuture]:
+        """
+        Gửi message kèm rid mới và chờ drone ACK (gửi lại khi quá hạn).
+        Future: result() = latency submit->ACK (s); lỗi CommandTimeout nếu hết lượt gửi lại.
+        timeout: hạn ACK mỗi lượt (mặc định theo TX scheduler; tăng khi trả lời dài)
+        rid: lấy trước bằng next_rid() khi cần đăng ký chờ trả lời trước khi gửi
+        """
+        if not (self.ser and self.ser.is_open):
+            logger.warning("Serial chưa mở khi ghi.")
+            return None
+        if rid is None:
+            rid = self.next_rid()
+        data = self._encode(dict(obj, rid=rid))
+        if data is None:
+            return None
+        name = obj.get("cmd") or next(iter(obj), "")
+        return self.tx.submit(data, priority, rid=rid, name=name, timeout=timeout, retries=retries)
+
+    async def asend_json(self, obj: dict):
+        """Awaitable API (transport asyncio): gửi 1 message từ coroutine trên bất kỳ loop nào."""
+        fut = self.write_json(obj)
+        if fut is not None:
+            return await asyncio.wrap_future(fut)
+
+    def request_binary(self):
+        """Đề nghị drone chuyển sang binary framing; drone xác nhận bằng {"proto": ver}."""
+        if self.protocol != PROTO_BINARY:
+            self.write_json({"cmd": "proto", "ver": PROTOCOL_VERSION})
 
     # ================= Public API =================
     def start(self):
+        self._active = True
+        self._open()
+
+    def _open(self):
         self.connect()
+        # không biết drone còn giữ mission cũ không -> mission kế tiếp gửi full
+        self.mission.reset()
         if self.ser and self.ser.is_open:
-            print("[INFO] Gửi lệnh ON tới LoRa")
-            self.write_line("ON")
+            logger.info("Gửi lệnh ON tới LoRa")
+            self.write_line("ON", PRIO_SAFETY)
         else:
-            print("[ERROR] Serial không mở.")
+            logger.error("Serial không mở.")
 
     def stop(self):
+        self._active = False
+        self._stop_reader()
+
+        # động cơ đang chạy thử thì dừng trước khi đóng link
+        if self.actuators is not None and self.actuators.active:
+            self.actuators.stop_all("disconnect")
+
+        # OFF vượt mọi lệnh đang xếp hàng; asyncio: phải ghi xong trước khi dừng loop
+        if self.ser and self.ser.is_open:
+            logger.info("Gửi lệnh OFF tới LoRa")
+            fut = self.write_line("OFF", PRIO_SAFETY)
+            try:
+                fut.result(timeout=0.5)
+            except Exception as e:
+                logger.error(f"Lỗi ghi serial: {e}")
+        self.tx.stop()
+        self._close_port()
+        logger.info("Đã đóng serial")
+
+    def _stop_reader(self):
         # tắt nhận & reset hb
         self.received = False
-        self._last_hb = 0.0
-        if self._link_ok:
-            self._link_ok = False
-            self._emit_link(False)
 
         # chờ thread đọc dừng
-        if self.received_thread and self.received_thread.is_alive():
+        if self.received_thread and self.received_thread.is_alive() \
+                and self.received_thread is not threading.current_thread():
             try:
                 self.received_thread.join(timeout=0.8)
             except Exception:
                 pass
+        # chunk đã đẩy sang pipeline dùng chung vẫn có thể mang heartbeat
+        if self.ingest is not None:
+            self.ingest.flush(self)
+
+        # dừng giám sát link sau cùng (báo down nếu đang up): không heartbeat nào tới sau đó
+        self.link.stop()
+
+    def _close_port(self):
+        if self._aio is not None:
+            self._aio.stop()
+            self._aio = None
+        # OFF (hoặc rút radio) đưa cả hai đầu về JSON
+        self.protocol = PROTO_JSON
+        self._safe_close()
 
-        # dừng watchdog
-        if self._hb_thread and self._hb_thread.is_alive():
-            try:
-                # watchdog sẽ tự dừng vì self.received=False
-                self._hb_thread.join(timeout=0.8)
-            except Exception:
-                pass
+    # ================= Hot-plug =================
+    def _on_device_event(self, event: str, info: PortInfo):
+        """Thread watcher: rút radio -> dừng đọc, đóng cổng; cắm lại đúng radio -> nối lại nếu đang chạy."""
+        if event == EVENT_REMOVE:
+            if info.device != self.port or not (self.ser and self.ser.is_open):
+                return
+            logger.warning(f"Radio {info.device} bị rút; chờ cắm lại")
+            self._unplugged = True
+            self._stop_reader()
+            self._close_port()
+        elif event == EVENT_ADD:
+            if not self._unplugged or info.key is None or info.key != self._device_key:
+                return
+            if info.device != self.port:
+                logger.info(f"Radio xuất hiện lại ở {info.device} (trước là {self.port})")
+            self.port = info.device
+            if not self._active:
+                self._unplugged = False
+                return
+            # udev báo add trước khi node/quyền sẵn sàng, hoặc cổng còn bận: mở lại có thể thất bại
+            # -> thử lại (backoff) ở thread riêng cho tới khi mở được hoặc radio lại bị rút
+            if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+                return
+            self._reconnect_thread = threading.Thread(target=self._reconnect, args=(info.key,),
+                                                      name="radio-reconnect", daemon=True)
+            self._reconnect_thread.start()
+
+    def _reconnect(self, key):
+        delay = self.RECONNECT_BACKOFF
+        while self._active and self._unplugged:
+            info = self.devices.find_key(key)
+            if info is None:
+                return                  # lại bị rút: lần cắm sau sẽ thử tiếp
+            self.port = info.device
+            logger.info(f"Nối lại radio tại {self.port}")
+            self._open()
+            if self.ser and self.ser.is_open:
+                self._unplugged = False
+                self.read_position_from_drone()
+                return
+            logger.warning(f"Chưa mở lại được {self.port}, thử lại sau {delay:.2f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_BACKOFF_MAX)
 
-        if self.ser and self.ser.is_open:
-            print("[INFO] Gửi lệnh OFF tới LoRa")
-            self.write_line("OFF")
-        self._safe_close()
-        print("[INFO] Đã đóng serial")
+    def rx_stats(self) -> Dict[str, int]:
+        """Thống kê bộ đệm RX (bytes, frame, overflow)."""
+        return self.rx_buffer.stats() if self.rx_buffer is not None else {}
+
+    def command_stats(self) -> Dict[str, Any]:
+        """Thống kê TX: submitted/writes/acked/failed/retries, latency ACK p50/p90/p99."""
+        return self.tx.stats()
 
     def set_gui_bridge(self, bridge):
         self.gui_bridge = bridge
 
+    def set_recorder(self, recorder):
+        """Gắn FlightRecorder (hoặc None để tắt ghi)."""
+        self.recorder = recorder
+
+    def set_params(self, params):
+        """ParamManager nhận trả lời giao thức tham số ({"param": {...}})."""
+        self.params = params
+
+    def set_history(self, history):
+        """Gắn TelemetryHistory (lịch sử trong bộ nhớ cho vệt bay / biểu đồ) hoặc None."""
+        self.history = history
+
+    def set_actuators(self, actuators):
+        """Gắn ActuatorStreamer (setMotorOutput / stopAllMotors của LoraBridge) hoặc None."""
+        self.actuators = actuators
+
+    def set_stream(self, stream):
+        """Gắn TelemetryStream (WebSocket) hoặc None."""
+        self.stream = stream
+
     # ================= Link helper =================
     def _emit_link(self, ok: bool):
+        if self.stream is not None:
+            self.stream.publish_link(self.link.stats())
         if self.gui_bridge and hasattr(self.gui_bridge, "update_link"):
             try:
                 self.gui_bridge.update_link(bool(ok))
             except Exception as e:
-                print(f"GUI bridge error (update_link): {e}")
+                logger.error(f"GUI bridge error (update_link): {e}")
+                self._m_bridge_errors.inc()
 
-    def _hb_watch(self, interval=0.5, grace=2):
-        """Watchdog: nếu không thấy hb quá self._hb_timeout trong 'grace' lần => mất link."""
-        missed = 0
-        while self.received:
-            dt = time.monotonic() - self._last_hb
-            if dt > self._hb_timeout:
-                missed += 1
-                if self._link_ok and missed >= grace:
-                    self._link_ok = False
-                    self._emit_link(False)
-            else:
-                missed = 0
-                if not self._link_ok and self._last_hb > 0:
-                    self._link_ok = True
-                    self._emit_link(True)
-            time.sleep(interval)
+    def _emit_link_stats(self, stats: Dict[str, Any]):
+        if self.stream is not None:
+            self.stream.publish_link(stats)
+        if self.gui_bridge and hasattr(self.gui_bridge, "update_link_stats"):
+            try:
+                self.gui_bridge.update_link_stats(stats)
+            except Exception as e:
+                logger.error(f"GUI bridge error (update_link_stats): {e}")
+                self._m_bridge_errors.inc()
+
+    def _emit_command_result(self, fut: CommandFuture):
+        ok = not fut.cancelled() and fut.exception() is None
+        if ok:
+            self._m_ack.observe(fut.latency)
+            logger.debug("ACK %s rid=%s sau %.1f ms (%d lần gửi)", fut.name, fut.rid, fut.latency * 1e3, fut.attempts)
+        else:
+            logger.warning(f"Lệnh {fut.name} rid={fut.rid} thất bại: {fut.exception() if not fut.cancelled() else 'cancelled'}")
+        if self.gui_bridge and hasattr(self.gui_bridge, "update_command_result"):
+            try:
+                self.gui_bridge.update_command_result({
+                    "rid": fut.rid,
+                    "cmd": fut.name,
+                    "ok": ok,
+                    "latency_ms": round(fut.latency * 1e3, 2) if ok else None,
+                    "attempts": fut.attempts,
+                })
+            except Exception as e:
+                logger.error(f"GUI bridge error (update_command_result): {e}")
+                self._m_bridge_errors.inc()
+
+    def _emit_mission_progress(self, info: Dict[str, Any]):
+        if self.gui_bridge and hasattr(self.gui_bridge, "update_mission_progress"):
+            try:
+                self.gui_bridge.update_mission_progress(info)
+            except Exception as e:
+                logger.error(f"GUI bridge error (update_mission_progress): {e}")
+                self._m_bridge_errors.inc()
+
+    @property
+    def link_ok(self) -> bool:
+        return self.link.ok
+
+    # ================= Telemetry dispatch =================
+    def _dispatch_record(self, rec: TelemetryRecord):
+        """Đẩy 1 bản ghi telemetry đã giải mã sang GUI bridge."""
+        rec.vehicle = self.vehicle_id
+        if rec.proto is not None and rec.proto == PROTOCOL_VERSION and self._want_protocol == PROTO_BINARY:
+            self.protocol = PROTO_BINARY
+            logger.info(f"Chuyển sang binary framing v{rec.proto}")
+
+        if self.recorder is not None:
+            self.recorder.record(rec)
+
+        if self.stream is not None:
+            self.stream.publish_record(rec)
+
+        if self.history is not None:
+            self.history.record(rec)
+
+        if rec.hb:
+            self.link.heartbeat(rec.t)
+
+        if rec.param is not None and self.params is not None:
+            # trước tx.ack: dữ liệu trả lời phải có sẵn khi CommandFuture hoàn tất
+            self.params.on_reply(rec.param, rec.ack)
+
+        if rec.ack is not None:
+            self.tx.ack(rec.ack, rec.t)
+
+        if self.geofence is not None and (rec.local is not None or rec.gps is not None):
+            self._check_fence(rec)
+
+        bridge = self.gui_bridge
+        if not bridge:
+            return
+
+        if rec.local is not None and hasattr(bridge, "update_position"):
+            try:
+                bridge.update_position(*rec.local)
+            except Exception as e:
+                logger.error(f"GUI bridge error (pos): {e}")
+                self._m_bridge_errors.inc()
+
+        if rec.gps is not None and hasattr(bridge, "update_global_position"):
+            try:
+                bridge.update_global_position(*rec.gps)
+            except Exception as e:
+                logger.error(f"GUI bridge error (gps): {e}")
+                self._m_bridge_errors.inc()
+
+        if rec.has_battery and hasattr(bridge, "update_battery"):
+            try:
+                p = rec.battery_percent if rec.battery_percent is not None else -1.0
+                v = rec.battery_voltage if rec.battery_voltage is not None else float("nan")
+                bridge.update_battery(p, v)
+            except Exception as e:
+                logger.error(f"GUI bridge error (battery): {e}")
+                self._m_bridge_errors.inc()
+
+        if rec.speed is not None and hasattr(bridge, "update_speed"):
+            try:
+                bridge.update_speed(rec.speed)
+            except Exception as e:
+                logger.error(f"GUI bridge error (speed): {e}")
+                self._m_bridge_errors.inc()
+
+    def _check_fence(self, rec: TelemetryRecord):
+        """Chỉ báo khi trạng thái vi phạm đổi (vào vùng / đổi vùng / hết vi phạm)."""
+        if rec.local is not None:
+            br = self.geofence.check(*rec.local)
+        else:
+            br = self.geofence.check(*self.frame.to_enu(*rec.gps))
+        key = (br.kind, br.zone) if br is not None else None
+        if key == self._fence_state:
+            return
+        self._fence_state = key
+        if br is not None:
+            logger.warning(f"Geofence: {br}")
+            self._emit_geofence(dict(br.as_dict(), source="telemetry", active=True, t=rec.t))
+        else:
+            logger.info("Geofence: hết vi phạm")
+            self._emit_geofence({"source": "telemetry", "active": False, "t": rec.t})
+
+    def _emit_geofence(self, info: Dict[str, Any]):
+        if self.gui_bridge and hasattr(self.gui_bridge, "update_geofence_breach"):
+            try:
+                self.gui_bridge.update_geofence_breach(info)
+            except Exception as e:
+                logger.error(f"GUI bridge error (update_geofence_breach): {e}")
+                self._m_bridge_errors.inc()
 
     # ================= RX loop =================
+    def _rx(self, chunk: bytes):
+        """Chunk thô từ thread đọc / asyncio: decode tại chỗ hoặc đẩy sang pipeline dùng chung."""
+        if self.ingest is not None:
+            self.ingest.submit(self, chunk)
+        else:
+            self._on_rx_chunk(chunk)
+
+    def _on_rx_chunk(self, chunk: bytes):
+        """Tách frame hoàn chỉnh từ chunk vừa đọc, decode và dispatch."""
+        rx = self.rx_buffer
+        # Chỉ decode frame hoàn chỉnh; delimiter đổi ngay khi drone xác nhận binary
+        rx.delimiter = FRAME_DELIMITER if self.protocol == PROTO_BINARY else b"\n"
+        debug = logger.isEnabledFor(logging.DEBUG)
+        good = bad = 0
+        for frame in rx.feed(chunk):
+            now = time.monotonic()
+            if self.protocol == PROTO_BINARY:
+                rec = self.binary_decoder.decode(frame, now)
+            else:
+                rec = self.decoder.decode(str(frame, "utf-8", "replace"), now)
+            if rec is None:
+                # không phải JSON/frame hợp lệ -> bỏ qua
+                bad += 1
+                if debug:
+                    logger.debug("RX bỏ qua: %r", bytes(frame))
+                continue
+            if debug:
+                logger.debug("RX %s", rec)
+            good += 1
+            self._dispatch_record(rec)
+            self._m_dispatch.observe(time.monotonic() - now)
+            if self.protocol == PROTO_BINARY:
+                rx.delimiter = FRAME_DELIMITER
+        if good or bad:
+            self.link.frames(good, bad)
+            self._m_frames.inc(good)
+            self._m_bad.inc(bad)
+
     def read_position_from_drone(self):
         if not (self.ser and self.ser.is_open):
-            print("Chưa kết nối serial.")
+            logger.warning("Chưa kết nối serial.")
+            return
+        if self.received and (self._aio is not None or
+                              (self.received_thread and self.received_thread.is_alive())):
             return
 
         self.received = True
+        self.rx_buffer = RxBuffer(self.RX_BUFFER_SIZE)
+
+        if self.transport == TRANSPORT_ASYNCIO:
+            # 1 event loop: đọc theo sự kiện fd, deadline heartbeat là timer của loop
+            aio = AsyncSerialTransport(self.ser, self._rx)
+            aio.start()
+            # chỉ chuyển TX sang loop khi loop đã chạy (ON có thể còn trong hàng đợi)
+            self._aio = aio
+            self._aio.loop.call_soon_threadsafe(self.link.attach_loop, self._aio.loop)
+            logger.info("Bắt đầu nhận vị trí từ drone (asyncio)...")
+        else:
+            self.link.start()
+
+            self.received_thread = threading.Thread(target=self._read_loop, daemon=True)
+            self.received_thread.start()
+
+        if self._want_protocol == PROTO_BINARY:
+            self.request_binary()
+
+    def _read_loop(self):
+        logger.info("Bắt đầu nhận vị trí từ drone...")
+        while self.received:
+            try:
+                # nếu có sẵn bytes thì đọc nhanh; không thì chờ byte đầu tiên (tối đa timeout)
+                # rồi lấy nốt phần đã về, để ACK/heartbeat ngắn không phải đợi đủ 256 byte
+                n = self.ser.in_waiting
+                chunk = self.ser.read(n if n else 1)
+                if chunk and not n and self.ser.in_waiting:
+                    chunk += self.ser.read(self.ser.in_waiting)
 
-        # Khởi động watchdog duy nhất
-        if not self._hb_thread or not self._hb_thread.is_alive():
-            self._hb_thread = threading.Thread(target=self._hb_watch, daemon=True)
-            self._hb_thread.start()
-
-        def _read_loop():
-            print("Bắt đầu nhận vị trí từ drone...")
-            buffer = ""
-            while self.received:
-                try:
-                    # nếu có sẵn bytes thì đọc nhanh, giảm delay
-                    if self.ser.in_waiting:
-                        chunk = self.ser.read(self.ser.in_waiting)
-                    else:
-                        chunk = self.ser.read(256)
-
-                    if not chunk:
-                        continue
-
-                    buffer += chunk.decode('utf-8', errors='replace')
-
-                    while "\n" in buffer:
-                        line, buffer = buffer.split("\n", 1)
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        clean_line = _clean_json_str(line)
-                        if not clean_line:
-                            # không phải JSON hợp lệ -> bỏ qua
-                            continue
-
-                        # print(f"[RAW] {clean_line}")
-                        try:
-                            data = json.loads(clean_line)
-                        except json.JSONDecodeError:
-                            # print(f"Không decode được JSON: {clean_line}")
-                            continue
-
-                        # ---- Heartbeat ----
-                        try:
-                            if int(data.get("hb", 0)) == 1:
-                                self._last_hb = time.monotonic()
-                                if not self._link_ok:
-                                    self._link_ok = True
-                                    self._emit_link(True)
-                        except Exception:
-                            pass
-
-                        # ---- Local pose ----
-                        if all(k in data for k in ("x", "y", "z")) and _is_num(data["x"]) and _is_num(data["y"]) and _is_num(data["z"]):
-                            x, y, z = float(data["x"]), float(data["y"]), float(data["z"])
-                            # print(f"Local position: x={x}, y={y}, z={z}")
-                            if self.gui_bridge and hasattr(self.gui_bridge, "update_position"):
-                                try:
-                                    self.gui_bridge.update_position(x, y, z)
-                                except Exception as e:
-                                    print(f"GUI bridge error (pos): {e}")
-
-                        # ---- GPS ----
-                        if all(k in data for k in ("lat", "lon", "alt")) and _is_num(data["lat"]) and _is_num(data["lon"]) and _is_num(data["alt"]):
-                            lat, lon, alt = float(data["lat"]), float(data["lon"]), float(data["alt"])
-                            # print(f"Global position: lat={lat}, lon={lon}, alt={alt}")
-                            if self.gui_bridge and hasattr(self.gui_bridge, "update_global_position"):
-                                try:
-                                    self.gui_bridge.update_global_position(lat, lon, alt)
-                                except Exception as e:
-                                    print(f"GUI bridge error (gps): {e}")
-
-                        # ---- Battery ----
-                        try:
-                            percent = None
-                            voltage = None
-                            if "battery" in data and isinstance(data["battery"], dict):
-                                b = data["battery"]
-                                if "percent" in b and _is_num(b["percent"]):
-                                    pv = float(b["percent"])
-                                    percent = pv * 100.0 if pv <= 1.0 else pv
-                                if "voltage" in b and _is_num(b["voltage"]):
-                                    voltage = float(b["voltage"])
-                            if percent is None and "percent" in data and _is_num(data["percent"]):
-                                pv = float(data["percent"])
-                                percent = pv * 100.0 if pv <= 1.0 else pv
-                            if percent is None and "battery" in data and _is_num(data["battery"]):
-                                pv = float(data["battery"])
-                                percent = pv * 100.0 if pv <= 1.0 else pv
-                            if voltage is None and "voltage" in data and _is_num(data["voltage"]):
-                                voltage = float(data["voltage"])
-                            if voltage is None and "volt" in data and _is_num(data["volt"]):
-                                voltage = float(data["volt"])
-
-                            if self.gui_bridge and (percent is not None or voltage is not None) and hasattr(self.gui_bridge, "update_battery"):
-                                try:
-                                    p = float(percent) if percent is not None else -1.0
-                                    v = float(voltage) if voltage is not None else float("nan")
-                                    self.gui_bridge.update_battery(p, v)
-                                except Exception as e:
-                                    print(f"GUI bridge error (battery): {e}")
-                        except Exception as e:
-                            print(f"Battery parse error: {e}")
-
-                        # ---- Speed ----
-                        try:
-                            spd = None
-                            if "speed" in data and _is_num(data["speed"]):
-                                spd = float(data["speed"])
-                            elif "vel" in data and _is_num(data["vel"]):
-                                spd = float(data["vel"])
-                            if spd is not None and self.gui_bridge and hasattr(self.gui_bridge, "update_speed"):
-                                self.gui_bridge.update_speed(spd)
-                        except Exception as e:
-                            print(f"GUI bridge error (speed): {e}")
-
-                except Exception as e:
-                    print(f"Lỗi đọc serial: {e}")
-                    time.sleep(0.2)
-
-        self.received_thread = threading.Thread(target=_read_loop, daemon=True)
-        self.received_thread.start()
+                if not chunk:
+                    continue
+
+                self._rx(chunk)
+
+            except Exception as e:
+                logger.error(f"Lỗi đọc serial: {e}")
+                time.sleep(0.2)
 
     # ================= Waypoints & Commands =================
     def update_waypoints(self, new_waypoints: List[Dict[str, Any]]) -> None:
@@ -382,53 +740,73 @@ class GroundController:
                 self.waypoints.append(wp)
             except (KeyError, ValueError) as e:
                 logger.error(f"Lỗi xử lý waypoint {i + 1}: {e}")
-        print(f"Cập nhật {len(self.waypoints)} waypoint.")
+        for problem in validate_waypoints(self.waypoints):
+            logger.warning(f"Waypoint {problem}")
+        logger.info(f"Cập nhật {len(self.waypoints)} waypoint.")
 
     def remove_waypoint_by_index(self, index: int):
         if not self.waypoints:
-            print("Danh sách waypoint rỗng.")
+            logger.warning("Danh sách waypoint rỗng.")
             return
         if index < 1 or index > len(self.waypoints):
-            print(f"Không có waypoint với index = {index}")
+            logger.warning(f"Không có waypoint với index = {index}")
             return
         del self.waypoints[index - 1]
-        print("Đã xoá.")
+        logger.info("Đã xoá.")
 
     def send_waypoints_to_drone(self):
         if not (self.ser and self.ser.is_open):
-            print("Chưa kết nối serial.")
+            logger.warning("Chưa kết nối serial.")
             return
         if not self.waypoints:
-            print("Không có waypoint để gửi.")
+            logger.warning("Không có waypoint để gửi.")
             return
+        if self.geofence is not None:
+            breaches = self.geofence.check_mission(self.waypoints)
+            if breaches:
+                for br in breaches:
+                    logger.error(f"Geofence: {br}")
+                logger.error(f"Không gửi mission: {len(breaches)} chặng vi phạm geofence")
+                self._emit_geofence(dict(breaches[0].as_dict(), source="mission", active=True,
+                                         breaches=[b.as_dict() for b in breaches]))
+                return None
         try:
-            self.write_json({"waypoints": self.waypoints})
-            print(f"Đã gửi {len(self.waypoints)} waypoint tới drone")
+            if self.mission_upload == MISSION_LEGACY:
+                fut = self.send_command({"waypoints": [asdict(wp) for wp in self.waypoints]}, PRIO_MISSION)
+            else:
+                fut = self.mission.upload(self.waypoints)
+            logger.info(f"Đã gửi {len(self.waypoints)} waypoint tới drone")
+            return fut
         except Exception as e:
-            print(f"Lỗi gửi waypoint: {e}")
+            logger.error(f"Lỗi gửi waypoint: {e}")
 
-    def land_req(self):
+    def land_req(self) -> Optional[CommandFuture]:
         if self.ser and self.ser.is_open:
             try:
-                self.write_json({"cmd": "land"})
-                print("[INFO] Gửi LAND")
+                fut = self.send_command({"cmd": "land"}, PRIO_SAFETY)
+                logger.info("Gửi LAND")
+                return fut
             except Exception as e:
-                print(f"Lỗi gửi LAND: {e}")
+                logger.error(f"Lỗi gửi LAND: {e}")
         else:
-            print("Serial chưa mở.")
+            logger.warning("Serial chưa mở.")
 
-    def offboard_req(self):
+    def offboard_req(self) -> Optional[CommandFuture]:
         if self.ser and self.ser.is_open:
             try:
-                self.write_json({"cmd": "offboard"})
-                print("[INFO] Gửi OFFBOARD")
+                fut = self.send_command({"cmd": "offboard"}, PRIO_MISSION)
+                logger.info("Gửi OFFBOARD")
+                return fut
             except Exception as e:
-                print(f"Lỗi gửi OFFBOARD: {e}")
+                logger.error(f"Lỗi gửi OFFBOARD: {e}")
         else:
-            print("Serial chưa mở.")
+            logger.warning("Serial chưa mở.")
 
 
 def main():
+    from app.log import setup_logging
+    setup_logging()
+
     # Cho Windows: để None để tự tìm COM; hoặc set thẳng 'COM5'
     controller = GroundController(port=None, baudrate=9600)
     controller.start()
@@ -438,7 +816,7 @@ def main():
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        print("Dừng bằng Ctrl+C")
+        logger.info("Dừng bằng Ctrl+C")
     finally:
         controller.stop()
 
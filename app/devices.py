@@ -0,0 +1,302 @@
+"""
+Theo dõi cổng serial cắm/rút ở thread nền, giữ chỉ mục tra cứu tức thì.
+
+``list_ports.comports()`` đi qua toàn bộ thiết bị mỗi lần gọi (chậm trên máy nhiều
+USB, và trước đây chạy trên GUI thread). ``DeviceWatcher`` quét 1 lần rồi cập nhật
+từng phần:
+- Linux + pyudev: nhận sự kiện add/remove của subsystem tty
+- Linux không có pyudev: mỗi ``poll_interval`` s liệt kê tên trong /dev (rẻ), chỉ đọc
+  sysfs cho cổng mới xuất hiện
+- OS khác: comports() mỗi ``poll_interval`` s rồi so khác biệt
+
+Chỉ mục theo tên cổng và theo khoá vật lý ``(vid, pid, serial_number)`` để nhận lại
+đúng radio khi cắm lại (kể cả khi đổi /dev/ttyUSB0 -> /dev/ttyUSB1 hay COM3 -> COM7).
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from serial.tools import list_ports
+
+try:
+    import pyudev
+except ImportError:  # pyudev là tuỳ chọn; không có thì polling
+    pyudev = None
+
+if sys.platform.startswith("linux"):
+    from serial.tools.list_ports_linux import SysFS
+else:
+    SysFS = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_ADD = "add"
+EVENT_REMOVE = "remove"
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Giống glob trong serial.tools.list_ports_linux.comports()
+_LINUX_PREFIXES = ("ttyS", "ttyUSB", "ttyXRUSB", "ttyACM", "ttyAMA", "rfcomm", "ttyAP")
+
+# Flight controller: VID đã biết + từ khoá trong description/manufacturer/product
+BOARD_VIDS = {
+    0x26AC,     # 3D Robotics / PX4
+    0x1209,     # pid.codes (ArduPilot ChibiOS)
+    0x2DAE,     # CubePilot / Hex
+    0x3162,     # Holybro
+    0x0483,     # STMicroelectronics VCP (nhiều board F4/F7/H7)
+}
+BOARD_PATTERN = re.compile(r"pixhawk|px4|ardupilot|cube|f4|f7|h7", re.IGNORECASE)
+
+Key = Tuple[int, int, Optional[str]]
+
+
+@dataclass(frozen=True)
+class PortInfo:
+    device: str
+    description: str = ""
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    manufacturer: Optional[str] = None
+    product: Optional[str] = None
+    location: Optional[str] = None
+    hwid: str = ""
+
+    @classmethod
+    def from_list_port(cls, p) -> "PortInfo":
+        return cls(p.device, p.description or "", p.vid, p.pid, p.serial_number,
+                   p.manufacturer, p.product, p.location, p.hwid or "")
+
+    @property
+    def key(self) -> Optional[Key]:
+        """Khoá vật lý (chỉ thiết bị USB có VID/PID)."""
+        if self.vid is None or self.pid is None:
+            return None
+        return (self.vid, self.pid, self.serial_number)
+
+    def is_board(self) -> bool:
+        if self.vid in BOARD_VIDS:
+            return True
+        text = " ".join(filter(None, (self.description, self.manufacturer, self.product)))
+        return bool(BOARD_PATTERN.search(text))
+
+    def as_dict(self) -> Dict:
+        return {"name": self.description, "port": self.device, "vid": self.vid, "pid": self.pid,
+                "serial": self.serial_number}
+
+
+class DeviceWatcher:
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL, use_udev: bool = True):
+        self.poll_interval = poll_interval
+        self.use_udev = use_udev and pyudev is not None and SysFS is not None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._ports: Dict[str, PortInfo] = {}
+        self._by_key: Dict[Key, PortInfo] = {}
+        self._ignored: Set[str] = set()        # /dev/ttyS* không có phần cứng (subsystem platform)
+        self._listeners: List[Callable[[str, PortInfo], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"scans": 0, "events": 0, "mode": None}
+
+    # ---- lifecycle ----
+    def start(self) -> "DeviceWatcher":
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="device-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def subscribe(self, callback: Callable[[str, PortInfo], None]):
+        """callback(event, info) ở thread watcher; event = "add" | "remove"."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    # ---- tra cứu (không chạm phần cứng) ----
+    def ports(self) -> List[PortInfo]:
+        with self._lock:
+            return sorted(self._ports.values(), key=lambda p: p.device)
+
+    def get(self, device: str) -> Optional[PortInfo]:
+        with self._lock:
+            return self._ports.get(device)
+
+    def find_key(self, key: Key) -> Optional[PortInfo]:
+        with self._lock:
+            return self._by_key.get(key)
+
+    def find(self, vid: Optional[int] = None, pid: Optional[int] = None,
+             serial_number: Optional[str] = None) -> List[PortInfo]:
+        with self._lock:
+            if vid is not None and pid is not None and serial_number is not None:
+                p = self._by_key.get((vid, pid, serial_number))
+                return [p] if p else []
+            return [p for p in self._ports.values()
+                    if (vid is None or p.vid == vid) and (pid is None or p.pid == pid)
+                    and (serial_number is None or p.serial_number == serial_number)]
+
+    def boards(self) -> List[PortInfo]:
+        return [p for p in self.ports() if p.is_board()]
+
+    def first_available(self, candidates: Iterable[str] = ()) -> Optional[str]:
+        """Cổng đầu tiên trong candidates đang có; không có thì ưu tiên cổng USB."""
+        with self._lock:
+            for c in candidates:
+                if c in self._ports:
+                    return c
+            ports = sorted(self._ports.values(), key=lambda p: (p.key is None, p.device))
+        return ports[0].device if ports else None
+
+    # ---- cập nhật chỉ mục ----
+    def _add(self, info: PortInfo):
+        with self._lock:
+            old = self._ports.get(info.device)
+            if old == info:
+                return
+            self._ports[info.device] = info
+            if info.key is not None:
+                self._by_key[info.key] = info
+            listeners = list(self._listeners)
+        self.stats["events"] += 1
+        if self.ready.is_set():
+            logger.info(f"Cắm cổng {info.device}: {info.description}")
+        self._notify(listeners, EVENT_ADD, info)
+
+    def _remove(self, device: str):
+        with self._lock:
+            info = self._ports.pop(device, None)
+            if info is None:
+                return
+            if info.key is not None and self._by_key.get(info.key) is info:
+                del self._by_key[info.key]
+            listeners = list(self._listeners)
+        self.stats["events"] += 1
+        logger.info(f"Rút cổng {device}")
+        self._notify(listeners, EVENT_REMOVE, info)
+
+    def _notify(self, listeners, event, info):
+        if not self.ready.is_set():
+            return
+        for cb in listeners:
+            try:
+                cb(event, info)
+            except Exception as e:
+                logger.error(f"Device listener error: {e}")
+
+    # ---- quét ----
+    def _probe_linux(self, device: str) -> Optional[PortInfo]:
+        try:
+            sys_info = SysFS(device)
+        except Exception:
+            return None
+        if sys_info.subsystem == "platform":
+            self._ignored.add(device)
+            return None
+        return PortInfo.from_list_port(sys_info)
+
+    def _scan_linux(self):
+        """Chỉ liệt kê tên trong /dev; chỉ đọc sysfs cho tên mới."""
+        try:
+            names = {f"/dev/{n}" for n in os.listdir("/dev") if n.startswith(_LINUX_PREFIXES)}
+        except OSError:
+            return
+        self.stats["scans"] += 1
+        with self._lock:
+            known = set(self._ports)
+        self._ignored &= names
+        for dev in known - names:
+            self._remove(dev)
+        for dev in sorted(names - known - self._ignored):
+            info = self._probe_linux(dev)
+            if info is not None:
+                self._add(info)
+
+    def _scan_full(self):
+        self.stats["scans"] += 1
+        found = {p.device: PortInfo.from_list_port(p) for p in list_ports.comports()}
+        with self._lock:
+            gone = set(self._ports) - set(found)
+        for dev in gone:
+            self._remove(dev)
+        for info in found.values():
+            self._add(info)
+
+    def rescan(self):
+        """Quét lại ngay (vd. khi người dùng bấm Scan)."""
+        if SysFS is not None:
+            self._scan_linux()
+        else:
+            self._scan_full()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            self.rescan()
+        except Exception as e:
+            logger.error(f"Quét cổng serial lỗi: {e}")
+        self.ready.set()
+        logger.debug("Device index: %d cổng sau %.1f ms", len(self._ports), (time.perf_counter() - t0) * 1e3)
+
+        if self.use_udev:
+            try:
+                self.stats["mode"] = "udev"
+                self._run_udev()
+                return
+            except Exception as e:
+                logger.warning(f"udev monitor lỗi ({e}); chuyển sang polling")
+        self.stats["mode"] = "poll"
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.rescan()
+            except Exception as e:
+                logger.error(f"Quét cổng serial lỗi: {e}")
+
+    def _run_udev(self):
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by(subsystem="tty")
+        monitor.start()
+        while not self._stop.is_set():
+            dev = monitor.poll(timeout=0.5)
+            if dev is None or not dev.device_node:
+                continue
+            if dev.action == "remove":
+                self._remove(dev.device_node)
+            elif dev.action == "add":
+                info = self._probe_linux(dev.device_node)
+                if info is not None:
+                    self._add(info)
+
+
+# ================= Watcher dùng chung =================
+_watcher: Optional[DeviceWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher(poll_interval: float = DEFAULT_POLL_INTERVAL) -> DeviceWatcher:
+    """Watcher dùng chung của tiến trình (khởi động ở lần gọi đầu)."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = DeviceWatcher(poll_interval).start()
+        return _watcher
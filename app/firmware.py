@@ -0,0 +1,586 @@
+"""
+Nạp firmware cho flight controller: cache theo nội dung, tải stream, nạp từng block.
+
+Quy trình (chạy ở thread "firmware", không bao giờ trên GUI thread):
+
+1. download: đọc ``manifest.json`` của (stack, channel, vehicle) từ mirror; ảnh có
+   sha256 đã nằm trong cache thì bỏ qua tải, không thì tải stream từng khối 64 KB
+   vào cache (vừa ghi vừa hash, sai sha256 thì bỏ)
+2. erase: bootloader PX4 (cũng dùng cho ArduPilot .apj) xoá flash
+3. program: 1 thread đọc/giải nén block kế tiếp + cộng dồn CRC trong khi thread
+   chính ghi block hiện tại qua PROG_MULTI (hàng đợi giới hạn ``PREFETCH`` block)
+4. verify: CRC bootloader tính trên toàn flash so với CRC cộng dồn lúc nạp (đệm 0xFF)
+
+Mirror là thư mục cục bộ hoặc URL http(s) cùng cấu trúc::
+
+    <mirror>/<stack>/<channel>/<vehicle|default>/manifest.json  {"name", "sha256", "size", "version"?}
+    <mirror>/<stack>/<channel>/<vehicle|default>/<name>
+
+Cache: ``<cache_dir>/blobs/<sha256>`` + ``index.json`` (khoá stack/channel/vehicle -> sha256),
+ảnh giống nhau giữa các kênh chỉ lưu 1 lần.
+
+    python -m app.firmware --mirror firmware-mirror --stack px4 --channel stable --port /dev/ttyACM0
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+import serial
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK = 64 * 1024
+PREFETCH = 8                    # số block đọc trước khi đang ghi
+HTTP_TIMEOUT = 30.0
+
+STAGE_DOWNLOAD = "download"
+STAGE_ERASE = "erase"
+STAGE_PROGRAM = "program"
+STAGE_VERIFY = "verify"
+STAGE_DONE = "done"
+STAGE_ERROR = "error"
+
+# % tổng tiến độ: (bắt đầu, độ rộng) mỗi pha
+_STAGE_SPAN = {STAGE_DOWNLOAD: (0, 30), STAGE_ERASE: (30, 10), STAGE_PROGRAM: (40, 50), STAGE_VERIFY: (90, 10)}
+
+
+class FirmwareError(RuntimeError):
+    """Lỗi tải / nạp / kiểm tra firmware (thông điệp hiện cho người dùng)."""
+
+
+class FirmwareCancelled(FirmwareError):
+    pass
+
+
+@dataclass(frozen=True)
+class FirmwareSpec:
+    stack: str = "px4"
+    channel: str = "stable"
+    vehicle: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.stack}/{self.channel}/{self.vehicle or 'default'}"
+
+
+# ================= CRC kiểu bootloader PX4 =================
+def px4_crc(data, state: int = 0) -> int:
+    """CRC32 bảng chuẩn nhưng không đảo bit đầu/cuối (px_uploader.crc32); cộng dồn được."""
+    return zlib.crc32(data, state ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+
+def px4_crc_pad(state: int, length: int, flash_size: int) -> int:
+    """Cộng phần flash trống (0xFF) sau ảnh dài ``length`` tới hết ``flash_size``."""
+    pad = flash_size - length
+    if pad <= 0:
+        return state
+    block = b"\xff" * min(pad, 64 * 1024)
+    while pad > 0:
+        n = min(pad, len(block))
+        state = px4_crc(block[:n] if n < len(block) else block, state)
+        pad -= n
+    return state
+
+
+# ================= Cache theo nội dung =================
+class FirmwareCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, "index.json")
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, "blobs", sha256)
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._read_index().get(key)
+        if entry and os.path.exists(self.blob_path(entry["sha256"])):
+            return entry
+        return None
+
+    def has(self, sha256: str) -> bool:
+        return os.path.exists(self.blob_path(sha256))
+
+    def bind(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            index = self._read_index()
+            index[key] = entry
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(tmp, self._index_path)
+
+    def store(self, chunks, expect_sha256: Optional[str] = None,
+              progress: Optional[Callable[[int], None]] = None) -> Tuple[str, int]:
+        """Ghi stream vào blobs/<sha256> (hash trong lúc ghi); -> (sha256, size)."""
+        os.makedirs(os.path.join(self.directory, "blobs"), exist_ok=True)
+        h = hashlib.sha256()
+        size = 0
+        tmp = os.path.join(self.directory, "blobs", f".incoming-{os.getpid()}-{threading.get_ident()}")
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    h.update(chunk)
+                    size += len(chunk)
+                    if progress:
+                        progress(size)
+            sha = h.hexdigest()
+            if expect_sha256 and sha != expect_sha256.lower():
+                raise FirmwareError(f"sha256 không khớp manifest ({sha[:12]} != {expect_sha256[:12]})")
+            os.replace(tmp, self.blob_path(sha))
+            return sha, size
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+# ================= Mirror (thư mục hoặc HTTP) =================
+class Mirror:
+    def __init__(self, base: str):
+        self.base = base.rstrip("/")
+        self.remote = urllib.parse.urlparse(base).scheme in ("http", "https")
+
+    def _url(self, spec: FirmwareSpec, name: str) -> str:
+        parts = (spec.stack, spec.channel, spec.vehicle or "default", name)
+        if self.remote:
+            return "/".join([self.base] + [urllib.parse.quote(p) for p in parts])
+        return os.path.join(self.base, *parts)
+
+    def _open(self, path: str) -> BinaryIO:
+        try:
+            if self.remote:
+                return urllib.request.urlopen(path, timeout=HTTP_TIMEOUT)
+            return open(path, "rb")
+        except (OSError, ValueError) as e:
+            raise FirmwareError(f"không mở được {path}: {e}") from None
+
+    def manifest(self, spec: FirmwareSpec) -> Dict[str, Any]:
+        with self._open(self._url(spec, "manifest.json")) as f:
+            try:
+                m = json.loads(f.read())
+            except ValueError as e:
+                raise FirmwareError(f"manifest hỏng cho {spec.key}: {e}") from None
+        if not m.get("name") or not m.get("sha256"):
+            raise FirmwareError(f"manifest {spec.key} thiếu name/sha256")
+        return m
+
+    def stream(self, spec: FirmwareSpec, name: str, chunk: int = DOWNLOAD_CHUNK) -> Iterator[bytes]:
+        with self._open(self._url(spec, name)) as f:
+            while True:
+                data = f.read(chunk)
+                if not data:
+                    return
+                yield data
+
+
+def _file_chunks(path: str, chunk: int = DOWNLOAD_CHUNK) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk)
+            if not data:
+                return
+            yield data
+
+
+# ================= Ảnh firmware =================
+class FirmwareImage:
+    """.bin (ảnh thô) hoặc .px4/.apj (JSON + ảnh zlib/base64); đọc ra từng block đã đệm 4 byte."""
+
+    def __init__(self, path: str, name: str = ""):
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self.board_id: Optional[int] = None
+        self._packed: Optional[bytes] = None
+        with open(path, "rb") as f:
+            head = f.read(1)
+        if head == b"{":
+            with open(path, "r", encoding="utf-8") as f:
+                desc = json.load(f)
+            self.board_id = desc.get("board_id")
+            self.size = int(desc["image_size"])
+            self._packed = base64.b64decode(desc["image"])
+        else:
+            self.size = os.path.getsize(path)
+        self.padded_size = (self.size + 3) & ~3
+
+    def blocks(self, block_size: int) -> Iterator[bytes]:
+        if self._packed is not None:
+            raw = self._inflate()
+        else:
+            raw = _file_chunks(self.path)
+        buf = bytearray()
+        sent = 0
+        for data in raw:
+            buf += data
+            while len(buf) >= block_size:
+                sent += block_size
+                yield bytes(buf[:block_size])
+                del buf[:block_size]
+        if sent + len(buf) != self.size:
+            raise FirmwareError(f"ảnh {self.name} dài {sent + len(buf)} byte, header ghi {self.size}")
+        if buf:
+            buf += b"\xff" * (-len(buf) % 4)
+            yield bytes(buf)
+
+    def _inflate(self) -> Iterator[bytes]:
+        d = zlib.decompressobj()
+        packed = self._packed
+        for i in range(0, len(packed), DOWNLOAD_CHUNK):
+            out = d.decompress(packed[i:i + DOWNLOAD_CHUNK])
+            if out:
+                yield out
+        tail = d.flush()
+        if tail:
+            yield tail
+
+
+# ================= Bootloader PX4 (px_uploader) =================
+class Px4Bootloader:
+    INSYNC, EOC = 0x12, 0x20
+    OK, FAILED, INVALID = 0x10, 0x11, 0x13
+    GET_SYNC, GET_DEVICE, CHIP_ERASE, PROG_MULTI, GET_CRC, REBOOT = 0x21, 0x22, 0x23, 0x27, 0x29, 0x30
+    INFO_BL_REV, INFO_BOARD_ID, INFO_BOARD_REV, INFO_FLASH_SIZE = 0x01, 0x02, 0x03, 0x04
+    PROG_MULTI_MAX = 252
+    ERASE_TIMEOUT = 30.0
+
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 2.0):
+        try:
+            self.ser = serial.Serial(port, baudrate, timeout=timeout)
+        except serial.SerialException as e:
+            raise FirmwareError(f"không mở được bootloader {port}: {e}") from None
+        self.timeout = timeout
+
+    def close(self):
+        self.ser.close()
+
+    def _recv(self, n: int) -> bytes:
+        data = self.ser.read(n)
+        if len(data) != n:
+            raise FirmwareError("bootloader không trả lời")
+        return data
+
+    def _sync(self):
+        insync, status = self._recv(2)
+        if insync != self.INSYNC:
+            raise FirmwareError(f"bootloader mất đồng bộ (0x{insync:02x})")
+        if status == self.INVALID:
+            raise FirmwareError("bootloader: lệnh không hợp lệ")
+        if status != self.OK:
+            raise FirmwareError(f"bootloader báo lỗi 0x{status:02x}")
+
+    def _int(self) -> int:
+        return struct.unpack("<I", self._recv(4))[0]
+
+    def sync(self, attempts: int = 3):
+        for i in range(attempts):
+            self.ser.reset_input_buffer()
+            self.ser.write(bytes([self.GET_SYNC, self.EOC]))
+            try:
+                self._sync()
+                return
+            except FirmwareError:
+                if i == attempts - 1:
+                    raise
+
+    def info(self, param: int) -> int:
+        self.ser.write(bytes([self.GET_DEVICE, param, self.EOC]))
+        v = self._int()
+        self._sync()
+        return v
+
+    def erase(self):
+        self.ser.write(bytes([self.CHIP_ERASE, self.EOC]))
+        self.ser.timeout = self.ERASE_TIMEOUT
+        try:
+            self._sync()
+        finally:
+            self.ser.timeout = self.timeout
+
+    def program(self, block: bytes):
+        self.ser.write(bytes([self.PROG_MULTI, len(block)]) + block + bytes([self.EOC]))
+        self._sync()
+
+    def crc(self) -> int:
+        self.ser.write(bytes([self.GET_CRC, self.EOC]))
+        self.ser.timeout = self.ERASE_TIMEOUT
+        try:
+            v = self._int()
+            self._sync()
+        finally:
+            self.ser.timeout = self.timeout
+        return v
+
+    def reboot(self, sync: bool = True):
+        """sync: chờ xác nhận REBOOT (chỉ bootloader rev >= 3 trả lời; báo lỗi nếu ghi word đầu tiên hỏng)."""
+        self.ser.write(bytes([self.REBOOT, self.EOC]))
+        self.ser.flush()
+        if sync:
+            self._sync()
+
+
+# ================= Pipeline =================
+class FirmwareFlasher:
+    def __init__(self, cache_dir: str, mirror: Optional[str] = None,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 open_bootloader: Callable[[str], Px4Bootloader] = Px4Bootloader, prefetch: int = PREFETCH):
+        """
+        cache_dir       -> thư mục cache ảnh firmware (theo sha256)
+        mirror          -> thư mục hoặc URL http(s) chứa manifest + ảnh
+        on_progress     -> callback(dict) ở thread firmware: {"stage", "pct", "message", "bytes"?, "total"?}
+        open_bootloader -> port -> Px4Bootloader (thay được khi test)
+        prefetch        -> số block đọc trước khi đang ghi; 0 = đọc rồi ghi tuần tự (để so sánh)
+        """
+        self.cache = FirmwareCache(cache_dir)
+        self.mirror = Mirror(mirror) if mirror else None
+        self.on_progress = on_progress
+        self.open_bootloader = open_bootloader
+        self.prefetch = prefetch
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._last_emit = 0.0
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, spec: FirmwareSpec, port: str, custom_path: Optional[str] = None) -> bool:
+        """Chạy flash() ở thread nền; False nếu đang nạp."""
+        if self.busy:
+            return False
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, args=(spec, port, custom_path),
+                                        name="firmware", daemon=True)
+        self._thread.start()
+        return True
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, spec, port, custom_path):
+        try:
+            self.last_result = self.flash(spec, port, custom_path)
+        except Exception as e:
+            logger.error(f"Nạp firmware lỗi: {e}")
+            self.last_result = {"ok": False, "error": str(e)}
+            self._progress(STAGE_ERROR, 0.0, f"Error: {e}", force=True, error=str(e))
+
+    def _progress(self, stage: str, frac: float, message: str = "", force: bool = False, **extra):
+        """frac 0..1 trong pha -> pct tổng; cập nhật liên tục bị gộp còn ~10 lần/giây."""
+        if self._cancel.is_set() and stage not in (STAGE_ERROR, STAGE_DONE):
+            raise FirmwareCancelled("đã huỷ")
+        now = time.monotonic()
+        if not force and not message and now - self._last_emit < 0.1:
+            return
+        self._last_emit = now
+        if stage in _STAGE_SPAN:
+            start, width = _STAGE_SPAN[stage]
+            pct = round(start + width * min(max(frac, 0.0), 1.0), 1)
+        else:
+            pct = 100 if stage == STAGE_DONE else None
+        info = dict({"stage": stage, "pct": pct, "message": message}, **extra)
+        if message:
+            logger.info(f"Firmware [{stage}] {message}")
+        if self.on_progress:
+            try:
+                self.on_progress(info)
+            except Exception as e:
+                logger.error(f"Firmware progress callback error: {e}")
+
+    # ---- 1) tải / lấy từ cache ----
+    def fetch(self, spec: FirmwareSpec, custom_path: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """-> (đường dẫn blob trong cache, entry)."""
+        if custom_path:
+            if not os.path.isfile(custom_path):
+                raise FirmwareError(f"không thấy file {custom_path}")
+            total = os.path.getsize(custom_path)
+            sha, size = self.cache.store(_file_chunks(custom_path), progress=lambda n: self._progress(
+                STAGE_DOWNLOAD, n / max(total, 1), bytes=n, total=total))
+            entry = {"sha256": sha, "size": size, "name": os.path.basename(custom_path), "source": custom_path}
+            self.cache.bind(f"custom/{entry['name']}", entry)
+            self._progress(STAGE_DOWNLOAD, 1.0, f"Loaded {entry['name']} ({size} bytes)")
+            return self.cache.blob_path(sha), entry
+
+        cached = self.cache.lookup(spec.key)
+        if self.mirror is None:
+            if cached is None:
+                raise FirmwareError("chưa cấu hình firmware mirror và cache trống")
+            self._progress(STAGE_DOWNLOAD, 1.0, f"Offline: using cached {cached['name']}")
+            return self.cache.blob_path(cached["sha256"]), cached
+
+        try:
+            manifest = self.mirror.manifest(spec)
+        except FirmwareError as e:
+            if cached is None:
+                raise
+            self._progress(STAGE_DOWNLOAD, 1.0, f"Mirror unavailable ({e}); using cached {cached['name']}")
+            return self.cache.blob_path(cached["sha256"]), cached
+
+        entry = {"sha256": manifest["sha256"].lower(), "size": manifest.get("size"), "name": manifest["name"],
+                 "version": manifest.get("version")}
+        if self.cache.has(entry["sha256"]):
+            self.cache.bind(spec.key, entry)
+            self._progress(STAGE_DOWNLOAD, 1.0, f"{entry['name']} {entry.get('version') or ''} already cached")
+            return self.cache.blob_path(entry["sha256"]), entry
+
+        total = entry["size"] or 0
+        self._progress(STAGE_DOWNLOAD, 0.0, f"Downloading {entry['name']}...")
+        sha, size = self.cache.store(self.mirror.stream(spec, entry["name"]), expect_sha256=entry["sha256"],
+                                     progress=lambda n: self._progress(STAGE_DOWNLOAD, n / total if total else 0.0,
+                                                                       bytes=n, total=total))
+        entry["size"] = size
+        self.cache.bind(spec.key, entry)
+        self._progress(STAGE_DOWNLOAD, 1.0, f"Download complete ({size} bytes)")
+        return self.cache.blob_path(sha), entry
+
+    # ---- 2..4) erase / program / verify ----
+    def flash(self, spec: FirmwareSpec, port: str, custom_path: Optional[str] = None) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        path, entry = self.fetch(spec, custom_path)
+        image = FirmwareImage(path, entry.get("name", ""))
+
+        bl = self.open_bootloader(port)
+        try:
+            bl.sync()
+            bl_rev = bl.info(bl.INFO_BL_REV)
+            board_id = bl.info(bl.INFO_BOARD_ID)
+            flash_size = bl.info(bl.INFO_FLASH_SIZE)
+            if image.board_id is not None and image.board_id != board_id:
+                raise FirmwareError(f"firmware cho board {image.board_id}, board đang cắm là {board_id}")
+            if image.padded_size > flash_size:
+                raise FirmwareError(f"ảnh {image.size} byte lớn hơn flash {flash_size} byte")
+
+            self._progress(STAGE_ERASE, 0.0, "Erasing previous program...", force=True)
+            bl.erase()
+            self._progress(STAGE_ERASE, 1.0, "Erase complete", force=True)
+
+            crc, written, t_prog = self._program(bl, image)
+            self._progress(STAGE_VERIFY, 0.0, "Verifying program...", force=True)
+            expect = px4_crc_pad(crc, written, flash_size)
+            got = bl.crc()
+            if got != expect:
+                raise FirmwareError(f"CRC sai sau khi nạp (board 0x{got:08x}, mong đợi 0x{expect:08x})")
+            # như px_uploader: bootloader cũ (rev < 3) reboot luôn, không trả INSYNC/OK
+            bl.reboot(sync=bl_rev >= 3)
+        finally:
+            bl.close()
+        result = {"ok": True, "name": image.name, "bytes": written, "sha256": entry["sha256"],
+                  "crc": f"0x{expect:08x}", "program_s": round(t_prog, 2), "elapsed_s": round(time.monotonic() - t0, 2)}
+        self._progress(STAGE_DONE, 1.0, f"Upgrade complete ({written} bytes, {result['elapsed_s']} s)",
+                       force=True, result=result)
+        return result
+
+    def _program(self, bl: Px4Bootloader, image: FirmwareImage) -> Tuple[int, int, float]:
+        """Thread đọc giải nén + cộng CRC block kế tiếp trong khi block hiện tại đang ghi."""
+        if self.prefetch <= 0:
+            return self._program_serial(bl, image)
+        blocks: "queue.Queue" = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        crc_box = {"crc": 0}
+
+        def put(item) -> bool:
+            """Đưa item vào hàng đợi; False nếu luồng ghi đã dừng (hàng đợi đầy mãi không ai lấy)."""
+            while not stop.is_set():
+                try:
+                    blocks.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader():
+            crc = 0
+            try:
+                for block in image.blocks(bl.PROG_MULTI_MAX):
+                    crc = px4_crc(block, crc)
+                    if not put(block):
+                        return
+                crc_box["crc"] = crc
+                put(None)
+            except Exception as e:
+                put(e)
+
+        th = threading.Thread(target=reader, name="firmware-read", daemon=True)
+        th.start()
+        written = 0
+        t0 = time.monotonic()
+        self._progress(STAGE_PROGRAM, 0.0, "Programming new version...", force=True)
+        try:
+            while True:
+                block = blocks.get()
+                if block is None:
+                    break
+                if isinstance(block, Exception):
+                    raise block
+                bl.program(block)
+                written += len(block)
+                self._progress(STAGE_PROGRAM, written / image.padded_size, bytes=written, total=image.padded_size)
+        finally:
+            stop.set()
+            th.join(timeout=2.0)
+        dt = time.monotonic() - t0
+        self._progress(STAGE_PROGRAM, 1.0, f"Programmed {written} bytes in {dt:.1f} s", force=True)
+        return crc_box["crc"], written, dt
+
+    def _program_serial(self, bl: Px4Bootloader, image: FirmwareImage) -> Tuple[int, int, float]:
+        crc = written = 0
+        t0 = time.monotonic()
+        self._progress(STAGE_PROGRAM, 0.0, "Programming new version...", force=True)
+        for block in image.blocks(bl.PROG_MULTI_MAX):
+            crc = px4_crc(block, crc)
+            bl.program(block)
+            written += len(block)
+            self._progress(STAGE_PROGRAM, written / image.padded_size, bytes=written, total=image.padded_size)
+        dt = time.monotonic() - t0
+        self._progress(STAGE_PROGRAM, 1.0, f"Programmed {written} bytes in {dt:.1f} s", force=True)
+        return crc, written, dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mirror")
+    ap.add_argument("--cache", default="cache/firmware")
+    ap.add_argument("--stack", default="px4")
+    ap.add_argument("--channel", default="stable")
+    ap.add_argument("--vehicle")
+    ap.add_argument("--file", help="ảnh .px4/.apj/.bin cục bộ thay cho mirror")
+    ap.add_argument("--port", required=True)
+    args = ap.parse_args()
+
+    from app.log import setup_logging
+    setup_logging()
+    flasher = FirmwareFlasher(args.cache, args.mirror)
+    try:
+        print(json.dumps(flasher.flash(FirmwareSpec(args.stack, args.channel, args.vehicle), args.port, args.file)))
+    except FirmwareError as e:
+        raise SystemExit(f"Lỗi: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Nhiều drone cùng lúc: mỗi drone 1 radio LoRa / 1 GroundController, dùng chung 1 pipeline ingest.
+
+- Mỗi cổng serial vẫn có 1 reader riêng (thread hoặc asyncio) nhưng reader chỉ đọc chunk
+  thô rồi ``IngestPipeline.submit()``; tách frame, decode và dispatch chạy ở ``workers``
+  thread dùng chung (chia shard theo vehicle nên thứ tự bản ghi của từng drone được giữ)
+- Mọi ``TelemetryRecord`` mang ``vehicle``; GUI nhận ``vehicleFrame`` gộp theo từng drone,
+  signal cũ (positionUpdated, telemetryFrame...) chỉ theo drone đang chọn
+- Lệnh đi theo vehicle: ``send_command(vid, ...)``, ``land(vid)``, ``upload_mission(vid, wps)``
+
+Cấu hình (settings.toml)::
+
+    [[vehicles]]
+    id = 1
+    port = "/dev/ttyUSB0"
+
+    [[vehicles]]
+    id = 2
+    port = "/dev/ttyUSB1"
+    baudrate = 57600
+
+Không có ``[[vehicles]]`` thì dùng port/baudrate cấp trên làm drone id 1 (như trước).
+Benchmark: ``python -m bench.bench_fleet``.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.commands import PRIO_MISSION, CommandFuture
+from app.control import GroundController
+from app.metrics import Registry, get_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 1
+LATENCY_WINDOW = 4096
+
+
+class IngestPipeline:
+    """Decode/dispatch dùng chung cho mọi controller; chunk của 1 controller luôn vào cùng 1 worker."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, metrics: Optional[Registry] = None):
+        self.workers = max(1, int(workers))
+        self._queues: List[queue.SimpleQueue] = [queue.SimpleQueue() for _ in range(self.workers)]
+        self._threads: List[threading.Thread] = []
+        self._shard: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._lat = deque(maxlen=LATENCY_WINDOW)        # thời gian chờ trong hàng (s)
+        self._chunks = 0
+        self._bytes = 0
+        self._errors = 0
+        reg = metrics or get_registry()
+        self._m_wait = reg.histogram("gcs_ingest_queue_seconds", "Thời gian chunk chờ trong hàng ingest")
+        reg.counter_fn("gcs_ingest_chunks_total", lambda: self._chunks, "Chunk đã decode/dispatch")
+        reg.counter_fn("gcs_ingest_errors_total", lambda: self._errors, "Chunk lỗi khi decode/dispatch")
+        reg.gauge_fn("gcs_ingest_depth", lambda: sum(q.qsize() for q in self._queues), "Chunk đang chờ")
+
+    def start(self) -> "IngestPipeline":
+        if self._threads:
+            return self
+        for i, q in enumerate(self._queues):
+            th = threading.Thread(target=self._run, args=(q,), name=f"ingest-{i}", daemon=True)
+            th.start()
+            self._threads.append(th)
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        for q in self._queues:
+            q.put(None)
+        for th in self._threads:
+            th.join(timeout=timeout)
+        self._threads = []
+
+    def _queue_for(self, ctl) -> queue.SimpleQueue:
+        key = id(ctl)
+        i = self._shard.get(key)
+        if i is None:
+            with self._lock:
+                i = self._shard.setdefault(key, len(self._shard) % self.workers)
+        return self._queues[i]
+
+    def submit(self, ctl, chunk: bytes):
+        """Gọi từ thread đọc của controller: chỉ xếp hàng, không decode."""
+        self._queue_for(ctl).put((ctl, chunk, time.perf_counter()))
+
+    def flush(self, ctl, timeout: float = 1.0) -> bool:
+        """Chờ worker xử lý hết chunk của ``ctl`` đã submit trước lời gọi này; False nếu quá timeout."""
+        if not self._threads or threading.current_thread() in self._threads:
+            return True
+        done = threading.Event()
+        self._queue_for(ctl).put(done)
+        return done.wait(timeout)
+
+    def _run(self, q: queue.SimpleQueue):
+        lat = self._lat
+        observe = self._m_wait.observe
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):   # mốc của flush()
+                item.set()
+                continue
+            ctl, chunk, t_in = item
+            wait = time.perf_counter() - t_in
+            lat.append(wait)
+            observe(wait)
+            self._chunks += 1
+            self._bytes += len(chunk)
+            try:
+                ctl._on_rx_chunk(chunk)
+            except Exception as e:
+                self._errors += 1
+                logger.error(f"Ingest lỗi (vehicle {getattr(ctl, 'vehicle_id', None)}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """chunks/bytes đã xử lý, depth = chunk đang chờ, queue_ms_p50/p99 = thời gian chờ trong hàng."""
+        lat = sorted(self._lat)
+        out = {"workers": self.workers, "chunks": self._chunks, "bytes": self._bytes,
+               "errors": self._errors, "depth": sum(q.qsize() for q in self._queues)}
+        if lat:
+            out["queue_ms_p50"] = lat[len(lat) // 2] * 1e3
+            out["queue_ms_p99"] = lat[min(len(lat) - 1, int(0.99 * len(lat)))] * 1e3
+        return out
+
+
+class VehicleBridge:
+    """gui_bridge của 1 controller: gắn vehicle id rồi chuyển sang LoraBridge.
+
+    Telemetry/link của mọi drone -> ``bridge.update_vehicle(vid, kênh, giá trị)``; drone đang
+    chọn còn đi tiếp qua các update_* cũ. Kết quả lệnh, mission, geofence của drone nào cũng
+    chuyển tiếp (kèm "vehicle") vì người vận hành cần thấy ngay.
+    """
+
+    def __init__(self, bridge, vid: int, fleet: "VehicleManager"):
+        self.bridge = bridge
+        self.vid = vid
+        self.fleet = fleet
+
+    def _is_active(self) -> bool:
+        return self.fleet.active == self.vid
+
+    def _vehicle(self, channel: str, value):
+        if hasattr(self.bridge, "update_vehicle"):
+            self.bridge.update_vehicle(self.vid, channel, value)
+
+    def update_position(self, x, y, z):
+        self._vehicle("local", [x, y, z])
+        if self._is_active():
+            self.bridge.update_position(x, y, z)
+
+    def update_global_position(self, lat, lon, alt):
+        self._vehicle("gps", [lat, lon, alt])
+        if self._is_active():
+            self.bridge.update_global_position(lat, lon, alt)
+
+    def update_battery(self, percent, voltage):
+        self._vehicle("battery", [percent, voltage])
+        if self._is_active():
+            self.bridge.update_battery(percent, voltage)
+
+    def update_speed(self, spd):
+        self._vehicle("speed", spd)
+        if self._is_active():
+            self.bridge.update_speed(spd)
+
+    def update_link(self, ok: bool):
+        self._vehicle("ok", bool(ok))
+        if self._is_active():
+            self.bridge.update_link(ok)
+
+    def update_link_stats(self, stats: dict):
+        self._vehicle("link", stats)
+        if self._is_active():
+            self.bridge.update_link_stats(dict(stats, vehicle=self.vid))
+
+    def update_command_result(self, result: dict):
+        self.bridge.update_command_result(dict(result, vehicle=self.vid))
+
+    def update_mission_progress(self, info: dict):
+        self.bridge.update_mission_progress(dict(info, vehicle=self.vid))
+
+    def update_geofence_breach(self, info: dict):
+        self.bridge.update_geofence_breach(dict(info, vehicle=self.vid))
+
+
+class VehicleManager:
+    def __init__(self, bridge=None, workers: int = DEFAULT_WORKERS, stream=None, **defaults):
+        """
+        bridge   -> LoraBridge (hoặc None khi chạy headless / benchmark)
+        workers  -> số thread decode/dispatch dùng chung
+        stream   -> TelemetryStream: WebSocket phát telemetry của drone đang chọn
+        defaults -> tham số GroundController chung cho mọi drone (protocol, transport, frame, geofence...)
+        """
+        self.bridge = bridge
+        self.stream = stream
+        self.defaults = defaults
+        self.ingest = IngestPipeline(workers).start()
+        self._vehicles: Dict[int, GroundController] = {}
+        self._lock = threading.Lock()
+        self.active: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], bridge=None, stream=None, **defaults) -> "VehicleManager":
+        vehicles = config.get("vehicles") or [{"id": 1, "port": config.get("port"),
+                                               "baudrate": config.get("baudrate", 9600)}]
+        fleet = cls(bridge, workers=config.get("ingest_workers", DEFAULT_WORKERS), stream=stream, **defaults)
+        for v in vehicles:
+            fleet.add(int(v["id"]), v.get("port"), v.get("baudrate", config.get("baudrate", 9600)))
+        if len(vehicles) > 1 and any(v.get("port") is None for v in vehicles):
+            logger.warning("Nhiều drone nhưng có drone không khai báo port: các drone có thể dò trùng cổng")
+        return fleet
+
+    # ---- quản lý drone ----
+    def add(self, vid: int, port: Optional[str], baudrate: int = 9600, **kw) -> GroundController:
+        with self._lock:
+            if vid in self._vehicles:
+                raise ValueError(f"vehicle {vid} đã tồn tại")
+        opts = dict(self.defaults, **kw)
+        ctl = GroundController(port=port, baudrate=baudrate, vehicle_id=vid, ingest=self.ingest, **opts)
+        if self.bridge is not None:
+            ctl.set_gui_bridge(VehicleBridge(self.bridge, vid, self))
+        with self._lock:
+            self._vehicles[vid] = ctl
+            first = self.active is None
+        if first:
+            self.select(vid)
+        logger.info(f"Thêm vehicle {vid} ({port or 'tự dò cổng'})")
+        return ctl
+
+    def remove(self, vid: int):
+        with self._lock:
+            ctl = self._vehicles.pop(vid, None)
+        if ctl is None:
+            return
+        ctl.stop()
+        if ctl.devices is not None:
+            ctl.devices.unsubscribe(ctl._on_device_event)
+        get_registry().remove(vehicle=str(vid))
+        if self.active == vid:
+            self.active = None
+            if self._vehicles:
+                self.select(next(iter(self._vehicles)))
+
+    def get(self, vid: int) -> Optional[GroundController]:
+        with self._lock:
+            return self._vehicles.get(vid)
+
+    def ids(self) -> List[int]:
+        with self._lock:
+            return sorted(self._vehicles)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._vehicles.items())
+
+    def __len__(self) -> int:
+        return len(self._vehicles)
+
+    def _require(self, vid: int) -> GroundController:
+        ctl = self.get(vid)
+        if ctl is None:
+            raise KeyError(f"không có vehicle {vid}")
+        return ctl
+
+    def select(self, vid: int) -> GroundController:
+        """Đổi drone đang chọn: signal cũ + WebSocket telemetry đi theo drone này."""
+        ctl = self._require(vid)
+        old = self.get(self.active) if self.active is not None else None
+        if old is not None and old is not ctl:
+            old.set_stream(None)
+        self.active = vid
+        ctl.set_stream(self.stream)
+        return ctl
+
+    @property
+    def controller(self) -> Optional[GroundController]:
+        return self.get(self.active) if self.active is not None else None
+
+    # ---- kết nối ----
+    def _targets(self, vid: Optional[int]) -> List[GroundController]:
+        return [self._require(vid)] if vid is not None else [c for _, c in self.items()]
+
+    def connect(self, vid: Optional[int] = None):
+        for ctl in self._targets(vid):
+            ctl.connect()
+
+    def start(self, vid: Optional[int] = None):
+        for ctl in self._targets(vid):
+            ctl.start()
+            ctl.read_position_from_drone()
+
+    def stop(self, vid: Optional[int] = None):
+        for ctl in self._targets(vid):
+            ctl.stop()
+
+    def close(self):
+        self.stop()
+        self.ingest.stop()
+
+    # ---- lệnh theo vehicle ----
+    def send_command(self, vid: int, obj: dict, priority: int = PRIO_MISSION, **kw) -> CommandFuture:
+        return self._require(vid).send_command(obj, priority, **kw)
+
+    def land(self, vid: int) -> Optional[CommandFuture]:
+        return self._require(vid).land_req()
+
+    def land_all(self) -> Dict[int, Optional[CommandFuture]]:
+        return {vid: ctl.land_req() for vid, ctl in self.items()}
+
+    def offboard(self, vid: int) -> Optional[CommandFuture]:
+        return self._require(vid).offboard_req()
+
+    def upload_mission(self, vid: int, waypoints) -> Optional[CommandFuture]:
+        ctl = self._require(vid)
+        ctl.update_waypoints(waypoints)
+        return ctl.send_waypoints_to_drone()
+
+    # ---- trạng thái ----
+    def vehicles(self) -> List[Dict[str, Any]]:
+        return [{"id": vid, "port": ctl.port, "active": vid == self.active, "link": ctl.link_ok}
+                for vid, ctl in self.items()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ingest": self.ingest.stats(),
+            "vehicles": {vid: {"port": ctl.port, "link": ctl.link.stats(), "rx": ctl.rx_stats(),
+                               "tx": ctl.command_stats()} for vid, ctl in self.items()},
+        }
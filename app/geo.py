@@ -0,0 +1,203 @@
+"""
+Geodesy quanh 1 gốc cố định (origin_lat/origin_lon trong settings.toml).
+
+ENU <-> lat/lon/alt bằng phép chiếu phẳng tại gốc: hằng số (m/độ theo bắc và đông)
+tính 1 lần khi tạo ``LocalFrame``, mỗi điểm chỉ còn 1 phép trừ và 1 phép nhân.
+- model "sphere": R = 6378137 như ``latLonToENU``/``enuToLatLon`` trong web/js/utils.js
+  (mặc định, để Python và web UI cho cùng toạ độ)
+- model "wgs84": bán kính cong kinh tuyến/vòng thẳng đứng của ellipsoid WGS84 tại gốc
+
+Hàm ``*_many`` nhận mảng (cả mission hoặc cột lat/lon/alt của FlightLog) và đổi
+trong 1 lần gọi NumPy; không có NumPy thì lặp từng điểm và trả list.
+"""
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tuỳ chọn; hàm *_many sẽ lặp từng điểm
+    np = None
+
+SPHERE_R = 6378137.0
+WGS84_A = 6378137.0
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+
+MODEL_SPHERE = "sphere"
+MODEL_WGS84 = "wgs84"
+
+DEFAULT_ORIGIN = (11.052939, 106.666123)
+
+# Giới hạn mặc định cho validate_waypoints
+MIN_ALT = 0.0
+MAX_ALT = 120.0
+CRUISE_SPEED = 5.0          # m/s ngang
+CLIMB_RATE = 2.0            # m/s đứng
+
+
+class LocalFrame:
+    """Khung ENU cố định tại (lat0, lon0, alt0)."""
+
+    def __init__(self, lat0: float = DEFAULT_ORIGIN[0], lon0: float = DEFAULT_ORIGIN[1],
+                 alt0: float = 0.0, model: str = MODEL_SPHERE):
+        if model not in (MODEL_SPHERE, MODEL_WGS84):
+            raise ValueError(f"Unknown geodesy model: {model}")
+        self.lat0 = float(lat0)
+        self.lon0 = float(lon0)
+        self.alt0 = float(alt0)
+        self.model = model
+
+        phi = math.radians(self.lat0)
+        if model == MODEL_SPHERE:
+            r_north = r_east = SPHERE_R
+        else:
+            w = 1.0 - WGS84_E2 * math.sin(phi) ** 2
+            r_north = WGS84_A * (1.0 - WGS84_E2) / w ** 1.5 + self.alt0
+            r_east = WGS84_A / math.sqrt(w) + self.alt0
+        # m trên 1 độ
+        self.k_north = r_north * math.pi / 180.0
+        self.k_east = r_east * math.cos(phi) * math.pi / 180.0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "LocalFrame":
+        config = config or {}
+        return cls(config.get("origin_lat", DEFAULT_ORIGIN[0]), config.get("origin_lon", DEFAULT_ORIGIN[1]),
+                   config.get("origin_alt", 0.0), config.get("geodesy_model", MODEL_SPHERE))
+
+    def __repr__(self):
+        return f"LocalFrame({self.lat0}, {self.lon0}, {self.alt0}, model={self.model!r})"
+
+    # ---- 1 điểm ----
+    def to_enu(self, lat: float, lon: float, alt: float = 0.0) -> Tuple[float, float, float]:
+        return ((lon - self.lon0) * self.k_east, (lat - self.lat0) * self.k_north, alt - self.alt0)
+
+    def to_geodetic(self, east: float, north: float, up: float = 0.0) -> Tuple[float, float, float]:
+        return (self.lat0 + north / self.k_north, self.lon0 + east / self.k_east, up + self.alt0)
+
+    # ---- nhiều điểm ----
+    def to_enu_many(self, lat, lon, alt=None):
+        """lat, lon, alt: dãy cùng độ dài -> mảng (N, 3) east/north/up."""
+        if np is None:
+            alt = alt if alt is not None else [0.0] * len(lat)
+            return [self.to_enu(a, b, c) for a, b, c in zip(lat, lon, alt)]
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        out = np.empty((lat.shape[0], 3), dtype=np.float64)
+        np.multiply(lon - self.lon0, self.k_east, out=out[:, 0])
+        np.multiply(lat - self.lat0, self.k_north, out=out[:, 1])
+        if alt is None:
+            out[:, 2] = -self.alt0
+        else:
+            np.subtract(np.asarray(alt, dtype=np.float64), self.alt0, out=out[:, 2])
+        return out
+
+    def to_geodetic_many(self, enu):
+        """Mảng (N, 2|3) east/north[/up] -> mảng (N, 3) lat/lon/alt."""
+        if np is None:
+            return [self.to_geodetic(*p) for p in enu]
+        enu = np.asarray(enu, dtype=np.float64)
+        out = np.empty((enu.shape[0], 3), dtype=np.float64)
+        np.divide(enu[:, 1], self.k_north, out=out[:, 0])
+        out[:, 0] += self.lat0
+        np.divide(enu[:, 0], self.k_east, out=out[:, 1])
+        out[:, 1] += self.lon0
+        if enu.shape[1] > 2:
+            np.add(enu[:, 2], self.alt0, out=out[:, 2])
+        else:
+            out[:, 2] = self.alt0
+        return out
+
+
+# ================= Mission geometry =================
+def as_points(waypoints: Sequence) -> Any:
+    """Waypoint / dict x,y,z / tuple -> mảng (N, 3) (list tuple nếu không có NumPy)."""
+    if np is not None and isinstance(waypoints, np.ndarray):
+        return np.asarray(waypoints, dtype=np.float64).reshape(-1, 3)
+    pts = []
+    for wp in waypoints:
+        if isinstance(wp, dict):
+            pts.append((float(wp["x"]), float(wp["y"]), float(wp.get("z", 0.0))))
+        elif isinstance(wp, (tuple, list)):
+            pts.append(tuple(float(v) for v in wp[:3]))
+        else:
+            pts.append((float(wp.x), float(wp.y), float(wp.z)))
+    if np is None:
+        return pts
+    return np.asarray(pts, dtype=np.float64).reshape(-1, 3)
+
+
+def leg_lengths(points, horizontal: bool = False):
+    """Độ dài từng chặng (N-1) giữa các điểm ENU liên tiếp."""
+    if np is None:
+        dims = 2 if horizontal else 3
+        return [math.dist(a[:dims], b[:dims]) for a, b in zip(points, points[1:])]
+    p = np.asarray(points, dtype=np.float64)
+    d = np.diff(p[:, :2] if horizontal else p, axis=0)
+    return np.sqrt(np.einsum("ij,ij->i", d, d))
+
+
+def path_length(points, horizontal: bool = False) -> float:
+    legs = leg_lengths(points, horizontal)
+    return float(legs.sum() if np is not None else sum(legs))
+
+
+def leg_times(points, speed: float = CRUISE_SPEED, climb_rate: float = CLIMB_RATE):
+    """Thời gian ước lượng mỗi chặng: chậm hơn giữa bay ngang (speed) và lên/xuống (climb_rate)."""
+    if np is None:
+        return [max(math.dist(a[:2], b[:2]) / speed, abs(b[2] - a[2]) / climb_rate)
+                for a, b in zip(points, points[1:])]
+    p = np.asarray(points, dtype=np.float64)
+    d = np.diff(p, axis=0)
+    return np.maximum(np.hypot(d[:, 0], d[:, 1]) / speed, np.abs(d[:, 2]) / climb_rate)
+
+
+def mission_time(points, speed: float = CRUISE_SPEED, climb_rate: float = CLIMB_RATE) -> float:
+    legs = leg_times(points, speed, climb_rate)
+    return float(legs.sum() if np is not None else sum(legs))
+
+
+def validate_waypoints(waypoints: Sequence, min_alt: float = MIN_ALT, max_alt: float = MAX_ALT,
+                       max_leg: Optional[float] = None, max_range: Optional[float] = None) -> List[str]:
+    """
+    Kiểm tra mission ENU; trả danh sách lỗi dạng "#<index 1-based>: <lý do>" (rỗng = hợp lệ).
+
+    - toạ độ không hữu hạn, độ cao ngoài [min_alt, max_alt]
+    - 2 điểm liên tiếp trùng nhau, chặng dài hơn max_leg
+    - điểm xa gốc hơn max_range (ngang)
+    """
+    pts = as_points(waypoints)
+    if len(pts) == 0:
+        return []
+    problems = []
+    if np is None:
+        for i, (x, y, z) in enumerate(pts, 1):
+            if not all(math.isfinite(v) for v in (x, y, z)):
+                problems.append(f"#{i}: non-finite coordinate")
+            elif not min_alt <= z <= max_alt:
+                problems.append(f"#{i}: altitude {z:.2f} m outside [{min_alt:g}, {max_alt:g}]")
+            elif max_range is not None and math.hypot(x, y) > max_range:
+                problems.append(f"#{i}: {math.hypot(x, y):.0f} m from origin (max {max_range:g})")
+        for i, d in enumerate(leg_lengths(pts), 2):
+            if d == 0.0:
+                problems.append(f"#{i}: duplicates previous waypoint")
+            elif max_leg is not None and d > max_leg:
+                problems.append(f"#{i}: leg {d:.0f} m longer than {max_leg:g} m")
+        return problems
+    else:
+        finite = np.isfinite(pts).all(axis=1)
+        z = pts[:, 2]
+        rng = np.hypot(pts[:, 0], pts[:, 1])
+        for i in np.flatnonzero(~finite):
+            problems.append(f"#{i + 1}: non-finite coordinate")
+        for i in np.flatnonzero(finite & ((z < min_alt) | (z > max_alt))):
+            problems.append(f"#{i + 1}: altitude {z[i]:.2f} m outside [{min_alt:g}, {max_alt:g}]")
+        if max_range is not None:
+            for i in np.flatnonzero(finite & (rng > max_range)):
+                problems.append(f"#{i + 1}: {rng[i]:.0f} m from origin (max {max_range:g})")
+        legs = leg_lengths(pts)
+        for i in np.flatnonzero(legs == 0.0):
+            problems.append(f"#{i + 2}: duplicates previous waypoint")
+        if max_leg is not None:
+            for i in np.flatnonzero(legs > max_leg):
+                problems.append(f"#{i + 2}: leg {legs[i]:.0f} m longer than {max_leg:g} m")
+    return problems
@@ -0,0 +1,260 @@
+"""
+Geofence: vùng cho phép (include), vùng cấm bay (exclude) và trần độ cao.
+
+Mọi phép kiểm tra làm trong khung ENU của ``LocalFrame`` (m). Các zone được đưa vào
+1 lưới đều (``cell`` m/ô): mỗi ô giữ sẵn các zone chạm vào nó và đánh dấu ô nằm trọn
+trong zone, nên mỗi mẫu telemetry chỉ tốn 1 lần tra dict + point-in-polygon cho
+những zone có biên đi qua ô đó (vài µs kể cả khi có hàng trăm zone).
+
+Cấu hình trong settings.toml:
+
+    [geofence]
+    enabled = true
+    ceiling = 120.0          # trần chung (m, so với gốc)
+    cell = 50.0              # kích thước ô lưới (m)
+
+    [[geofence.zones]]
+    name = "field"
+    type = "include"         # bay trong hợp các vùng include (nếu có vùng include nào)
+    ceiling = 60.0           # trần riêng của vùng include
+    points = [[11.0529, 106.6661], [11.0540, 106.6661], [11.0540, 106.6675]]   # lat, lon
+
+    [[geofence.zones]]
+    name = "tower"
+    type = "exclude"         # cấm bay trong khoảng [floor, ceiling] (mặc định mọi độ cao)
+    enu = [[120, 40], [160, 40], [160, 80], [120, 80]]                          # hoặc x/y ENU (m)
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.geo import LocalFrame, as_points
+
+logger = logging.getLogger(__name__)
+
+ZONE_INCLUDE = "include"
+ZONE_EXCLUDE = "exclude"
+
+BREACH_OUTSIDE = "outside"      # ra ngoài mọi vùng include
+BREACH_NOFLY = "nofly"          # vào vùng exclude
+BREACH_CEILING = "ceiling"      # vượt trần (chung hoặc của vùng include)
+
+DEFAULT_CELL = 50.0
+
+
+@dataclass
+class Zone:
+    name: str
+    kind: str
+    polygon: List[Tuple[float, float]]
+    floor: Optional[float] = None
+    ceiling: Optional[float] = None
+    bbox: Tuple[float, float, float, float] = field(init=False)
+
+    def __post_init__(self):
+        if self.kind not in (ZONE_INCLUDE, ZONE_EXCLUDE):
+            raise ValueError(f"Zone {self.name!r}: unknown type {self.kind!r}")
+        if len(self.polygon) < 3:
+            raise ValueError(f"Zone {self.name!r}: polygon needs at least 3 points")
+        if self.polygon[0] == self.polygon[-1]:
+            self.polygon = self.polygon[:-1]
+        xs = [p[0] for p in self.polygon]
+        ys = [p[1] for p in self.polygon]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def include(self) -> bool:
+        return self.kind == ZONE_INCLUDE
+
+    def edges(self) -> Iterable[Tuple[float, float, float, float]]:
+        pts = self.polygon
+        for i in range(len(pts)):
+            (ax, ay), (bx, by) = pts[i - 1], pts[i]
+            yield ax, ay, bx, by
+
+    def contains(self, x: float, y: float) -> bool:
+        """Ray casting (điểm trên biên có thể rơi về 1 trong 2 phía)."""
+        inside = False
+        pts = self.polygon
+        ax, ay = pts[-1]
+        for bx, by in pts:
+            if (by > y) != (ay > y) and x < (ax - bx) * (y - by) / (ay - by) + bx:
+                inside = not inside
+            ax, ay = bx, by
+        return inside
+
+    def applies_at(self, z: float) -> bool:
+        """Vùng exclude có hiệu lực ở độ cao z."""
+        return (self.floor is None or z >= self.floor) and (self.ceiling is None or z <= self.ceiling)
+
+
+@dataclass
+class Breach:
+    kind: str
+    zone: Optional[str]
+    x: float
+    y: float
+    z: float
+    leg: Optional[int] = None       # index chặng (1-based) khi kiểm mission
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "zone": self.zone, "x": self.x, "y": self.y, "z": self.z, "leg": self.leg}
+
+    def __str__(self):
+        where = f"leg {self.leg}: " if self.leg is not None else ""
+        zone = f" '{self.zone}'" if self.zone else ""
+        return f"{where}{self.kind}{zone} at ({self.x:.1f}, {self.y:.1f}, {self.z:.1f})"
+
+
+def _segment_hits_rect(ax, ay, bx, by, x0, y0, x1, y1) -> bool:
+    """Liang-Barsky: đoạn AB có cắt (hoặc nằm trong) hình chữ nhật không."""
+    t0, t1 = 0.0, 1.0
+    dx, dy = bx - ax, by - ay
+    for p, q in ((-dx, ax - x0), (dx, x1 - ax), (-dy, ay - y0), (dy, y1 - ay)):
+        if p == 0.0:
+            if q < 0.0:
+                return False
+            continue
+        r = q / p
+        if p < 0.0:
+            if r > t1:
+                return False
+            t0 = max(t0, r)
+        else:
+            if r < t0:
+                return False
+            t1 = min(t1, r)
+    return t0 <= t1
+
+
+def _segments_cross(ax, ay, bx, by, cx, cy, dx, dy) -> bool:
+    def orient(px, py, qx, qy, rx, ry):
+        return (qx - px) * (ry - py) - (qy - py) * (rx - px)
+
+    d1 = orient(cx, cy, dx, dy, ax, ay)
+    d2 = orient(cx, cy, dx, dy, bx, by)
+    d3 = orient(ax, ay, bx, by, cx, cy)
+    d4 = orient(ax, ay, bx, by, dx, dy)
+    return (d1 > 0) != (d2 > 0) and (d3 > 0) != (d4 > 0)
+
+
+class Geofence:
+    def __init__(self, zones: Sequence[Zone] = (), ceiling: Optional[float] = None,
+                 cell: float = DEFAULT_CELL, leg_step: Optional[float] = None):
+        """
+        ceiling  -> trần chung (None = không giới hạn)
+        cell     -> cạnh ô lưới chỉ mục (m)
+        leg_step -> khoảng lấy mẫu dọc chặng khi kiểm mission (mặc định cell / 4)
+        """
+        self.zones = list(zones)
+        self.ceiling = ceiling
+        self.cell = float(cell)
+        self.leg_step = float(leg_step or self.cell / 4.0)
+        self.has_include = any(z.include for z in self.zones)
+        self._build_index()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], frame: Optional[LocalFrame] = None) -> Optional["Geofence"]:
+        """Đọc bảng [geofence]; None nếu không bật."""
+        if not config or not config.get("enabled", True):
+            return None
+        frame = frame or LocalFrame()
+        zones = []
+        for i, zc in enumerate(config.get("zones", [])):
+            name = zc.get("name") or f"zone{i + 1}"
+            if "enu" in zc:
+                poly = [(float(p[0]), float(p[1])) for p in zc["enu"]]
+            else:
+                poly = [frame.to_enu(float(p[0]), float(p[1]))[:2] for p in zc["points"]]
+            zones.append(Zone(name, zc.get("type", ZONE_EXCLUDE), poly, zc.get("floor"), zc.get("ceiling")))
+        fence = cls(zones, config.get("ceiling"), config.get("cell", DEFAULT_CELL), config.get("leg_step"))
+        logger.info(f"Geofence: {len(zones)} zone, trần {fence.ceiling}, {len(fence._cells)} ô lưới")
+        return fence
+
+    # ---- spatial index ----
+    def _build_index(self):
+        """Ô -> ((zone index, ô nằm trọn trong zone), ...); ô không có zone nào thì không lưu."""
+        cells: Dict[Tuple[int, int], List[Tuple[int, bool]]] = {}
+        c = self.cell
+        for zi, zone in enumerate(self.zones):
+            bx0, by0, bx1, by1 = zone.bbox
+            edges = list(zone.edges())
+            for ix in range(math.floor(bx0 / c), math.floor(bx1 / c) + 1):
+                x0, x1 = ix * c, (ix + 1) * c
+                for iy in range(math.floor(by0 / c), math.floor(by1 / c) + 1):
+                    y0, y1 = iy * c, (iy + 1) * c
+                    if any(_segment_hits_rect(*e, x0, y0, x1, y1) for e in edges):
+                        cells.setdefault((ix, iy), []).append((zi, False))
+                    elif zone.contains(x0 + c / 2, y0 + c / 2):
+                        cells.setdefault((ix, iy), []).append((zi, True))
+        self._cells = {k: tuple(v) for k, v in cells.items()}
+
+    # ---- kiểm tra ----
+    def check(self, x: float, y: float, z: float) -> Optional[Breach]:
+        """Vi phạm đầu tiên tại điểm ENU (x, y, z) hoặc None."""
+        zones = self.zones
+        inside = False
+        under = False
+        inc_name = None
+        for zi, full in self._cells.get((math.floor(x / self.cell), math.floor(y / self.cell)), ()):
+            zone = zones[zi]
+            if not full and not zone.contains(x, y):
+                continue
+            if zone.include:
+                inside = True
+                inc_name = zone.name
+                if zone.ceiling is None or z <= zone.ceiling:
+                    under = True
+            elif zone.applies_at(z):
+                return Breach(BREACH_NOFLY, zone.name, x, y, z)
+        if self.has_include:
+            if not inside:
+                return Breach(BREACH_OUTSIDE, None, x, y, z)
+            if not under:
+                return Breach(BREACH_CEILING, inc_name, x, y, z)
+        if self.ceiling is not None and z > self.ceiling:
+            return Breach(BREACH_CEILING, None, x, y, z)
+        return None
+
+    def check_leg(self, a: Sequence[float], b: Sequence[float], leg: Optional[int] = None) -> Optional[Breach]:
+        """
+        Chặng thẳng A->B: cắt biên vùng exclude được kiểm chính xác,
+        phần còn lại (include/trần) lấy mẫu mỗi ``leg_step`` m.
+        """
+        ax, ay, az = a[0], a[1], a[2]
+        bx, by, bz = b[0], b[1], b[2]
+        zlo, zhi = min(az, bz), max(az, bz)
+        lx0, ly0, lx1, ly1 = min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)
+        for zone in self.zones:
+            if zone.include:
+                continue
+            zx0, zy0, zx1, zy1 = zone.bbox
+            if zx0 > lx1 or zx1 < lx0 or zy0 > ly1 or zy1 < ly0:
+                continue
+            if (zone.floor is not None and zhi < zone.floor) or (zone.ceiling is not None and zlo > zone.ceiling):
+                continue
+            for e in zone.edges():
+                if _segments_cross(ax, ay, bx, by, *e):
+                    return Breach(BREACH_NOFLY, zone.name, (ax + bx) / 2, (ay + by) / 2, (az + bz) / 2, leg)
+        n = max(1, math.ceil(math.hypot(bx - ax, by - ay) / self.leg_step))
+        for k in range(n + 1):
+            t = k / n
+            br = self.check(ax + (bx - ax) * t, ay + (by - ay) * t, az + (bz - az) * t)
+            if br is not None:
+                br.leg = leg
+                return br
+        return None
+
+    def check_mission(self, waypoints: Sequence) -> List[Breach]:
+        """Mỗi chặng vi phạm 1 Breach (mission 1 điểm thì kiểm điểm đó)."""
+        pts = [tuple(map(float, p)) for p in as_points(waypoints)]
+        if len(pts) == 1:
+            br = self.check(*pts[0])
+            return [br] if br is not None else []
+        out = []
+        for i in range(1, len(pts)):
+            br = self.check_leg(pts[i - 1], pts[i], i)
+            if br is not None:
+                out.append(br)
+        return out
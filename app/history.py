@@ -0,0 +1,340 @@
+"""
+Lịch sử telemetry trong bộ nhớ cho vệt bay và biểu đồ (không cần JS tự đệm).
+
+Mỗi kênh (local, gps, battery, voltage, speed) có nhiều mức, mỗi mức là ring buffer
+``array('d')`` theo cột, dung lượng cố định:
+
+- ``raw``: từng mẫu nhận được
+- ``1s``, ``10s``: bucket gộp sẵn (trung bình / min / max) cập nhật dần khi ghi, nên giữ được
+  hàng giờ bay với vài chục nghìn điểm
+
+``query(kênh, t0, t1, max_points)`` chọn mức mịn nhất còn phủ ``t0`` mà số điểm không quá
+``OVERSAMPLE * max_points``, rồi rút gọn giữ hình dạng: vệt bay (local/gps) dùng LTTB trên mặt
+phẳng (x, y) / (lat, lon), kênh vô hướng dùng min-max (giữ nguyên đỉnh và đáy).
+
+Thời gian là giây Unix (``time.time()``), đổi từ ``rec.t`` (monotonic) khi ghi.
+Benchmark: ``python -m bench.bench_history``.
+"""
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_RAW_POINTS = 36000
+DEFAULT_LEVELS = ((1.0, 21600), (10.0, 8640))      # (giây mỗi bucket, số bucket giữ lại)
+DEFAULT_MAX_POINTS = 2000
+OVERSAMPLE = 4
+
+TRACK = "track"
+SCALAR = "scalar"
+
+# kênh -> (tên cột, kiểu rút gọn)
+CHANNELS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "local": (("x", "y", "z"), TRACK),
+    "gps": (("lat", "lon", "alt"), TRACK),
+    "battery": (("percent",), SCALAR),
+    "voltage": (("voltage",), SCALAR),
+    "speed": (("speed",), SCALAR),
+}
+
+
+class _Ring:
+    """Ring buffer theo cột; chỉ số logic 0 = mẫu cũ nhất. Thời gian tăng dần nên tìm bằng bisect."""
+
+    def __init__(self, capacity: int, ncols: int):
+        self.capacity = max(1, int(capacity))
+        zeros = bytes(8 * self.capacity)
+        self.t = array("d", zeros)
+        self.cols = [array("d", zeros) for _ in range(ncols)]
+        self.start = 0
+        self.n = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> float:
+        # cho bisect: thời gian tại chỉ số logic i
+        return self.t[(self.start + i) % self.capacity]
+
+    def append(self, t: float, values: Sequence[float]):
+        cap = self.capacity
+        if self.n < cap:
+            i = (self.start + self.n) % cap
+            self.n += 1
+        else:
+            i = self.start
+            self.start = (self.start + 1) % cap
+        self.t[i] = t
+        for col, v in zip(self.cols, values):
+            col[i] = v
+
+    def first(self) -> Optional[float]:
+        return self.t[self.start] if self.n else None
+
+    def last(self) -> Optional[float]:
+        return self.t[(self.start + self.n - 1) % self.capacity] if self.n else None
+
+    def span(self, t0: float, t1: float) -> Tuple[int, int]:
+        return bisect_left(self, t0), bisect_right(self, t1)
+
+    def slice(self, i0: int, i1: int) -> Tuple[List[float], List[List[float]]]:
+        """Sao chép [i0, i1) ra list (gọi trong lock; phần rút gọn chạy ngoài lock)."""
+        cap = self.capacity
+        a, b = (self.start + i0) % cap, (self.start + i1) % cap
+        if i1 <= i0:
+            return [], [[] for _ in self.cols]
+        if a < b:
+            return self.t[a:b].tolist(), [c[a:b].tolist() for c in self.cols]
+        return (self.t[a:].tolist() + self.t[:b].tolist(),
+                [c[a:].tolist() + c[:b].tolist() for c in self.cols])
+
+
+class _Level:
+    """Mức gộp ``period`` giây: cột = mean(d), min(d), max(d); bucket đang mở nằm trong bộ cộng dồn."""
+
+    def __init__(self, name: str, period: float, capacity: int, dims: int):
+        self.name = name
+        self.period = period
+        self.dims = dims
+        self.ring = _Ring(capacity, 3 * dims)
+        self._key: Optional[int] = None
+        self._n = 0
+        self._sum = [0.0] * dims
+        self._lo = [math.inf] * dims
+        self._hi = [-math.inf] * dims
+
+    def add(self, t: float, mean: Sequence[float], lo: Sequence[float], hi: Sequence[float], n: int = 1):
+        """-> bucket vừa đóng (t, mean, lo, hi, n) để đẩy tiếp lên mức thô hơn, hoặc None."""
+        key = int(t // self.period)
+        closed = None
+        if key != self._key:
+            closed = self._flush()
+            self._key = key
+        self._n += n
+        for i in range(self.dims):
+            self._sum[i] += mean[i] * n
+            if lo[i] < self._lo[i]:
+                self._lo[i] = lo[i]
+            if hi[i] > self._hi[i]:
+                self._hi[i] = hi[i]
+        return closed
+
+    def _flush(self):
+        if self._key is None or not self._n:
+            return None
+        t = self._key * self.period
+        mean = [s / self._n for s in self._sum]
+        lo, hi, n = list(self._lo), list(self._hi), self._n
+        self.ring.append(t, mean + lo + hi)
+        self._n = 0
+        self._sum = [0.0] * self.dims
+        self._lo = [math.inf] * self.dims
+        self._hi = [-math.inf] * self.dims
+        return t, mean, lo, hi, n
+
+    def pending(self) -> Optional[Tuple[float, List[float]]]:
+        """Bucket đang mở (chưa vào ring), cùng bố cục cột với ring."""
+        if self._key is None or not self._n:
+            return None
+        return self._key * self.period, [s / self._n for s in self._sum] + list(self._lo) + list(self._hi)
+
+
+class _Series:
+    def __init__(self, fields: Tuple[str, ...], mode: str, raw_points: int, levels):
+        self.fields = fields
+        self.mode = mode
+        self.raw = _Ring(raw_points, len(fields))
+        self.levels = [_Level(_level_name(p), p, cap, len(fields)) for p, cap in levels]
+
+    def append(self, t: float, values: Sequence[float]) -> bool:
+        last = self.raw.last()
+        if last is not None and t < last:
+            return False
+        self.raw.append(t, values)
+        item = (t, values, values, values, 1)
+        for lvl in self.levels:
+            item = lvl.add(*item)
+            if item is None:
+                break
+        return True
+
+
+def _level_name(period: float) -> str:
+    return f"{period:g}s"
+
+
+# ================= Rút gọn giữ hình dạng =================
+def lttb(xs: Sequence[float], ys: Sequence[float], n_out: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets trên toạ độ (xs, ys); trả về chỉ số điểm được giữ (luôn có đầu/cuối)."""
+    n = len(xs)
+    if n_out >= n or n_out < 3:
+        return list(range(n)) if n_out >= n else [0, n - 1][:max(n_out, 1)]
+    out = [0]
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        # trung bình bucket kế tiếp làm đỉnh thứ 3
+        n0 = int((i + 1) * every) + 1
+        n1 = max(min(int((i + 2) * every) + 1, n), n0 + 1)
+        cnt = n1 - n0
+        cx = sum(xs[n0:n1]) / cnt
+        cy = sum(ys[n0:n1]) / cnt
+        b0 = int(i * every) + 1
+        b1 = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = b0, -1.0
+        for j in range(b0, b1):
+            area = abs((ax - cx) * (ys[j] - ay) - (ax - xs[j]) * (cy - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(best)
+        a = best
+    out.append(n - 1)
+    return out
+
+
+def minmax(ts: Sequence[float], lo: Sequence[float], hi: Sequence[float], n_out: int) -> List[Tuple[float, float]]:
+    """Chia đều theo chỉ số thành n_out/2 nhóm; mỗi nhóm giữ min và max theo đúng thứ tự thời gian."""
+    n = len(ts)
+    groups = max(1, n_out // 2)
+    out: List[Tuple[float, float]] = []
+    for g in range(groups):
+        i0, i1 = g * n // groups, (g + 1) * n // groups
+        if i0 >= i1:
+            continue
+        jlo = min(range(i0, i1), key=lo.__getitem__)
+        jhi = max(range(i0, i1), key=hi.__getitem__)
+        if jlo == jhi and lo[jlo] == hi[jhi]:
+            out.append((ts[jlo], lo[jlo]))
+        elif jlo <= jhi:
+            out.append((ts[jlo], lo[jlo]))
+            out.append((ts[jhi], hi[jhi]))
+        else:
+            out.append((ts[jhi], hi[jhi]))
+            out.append((ts[jlo], lo[jlo]))
+    return out
+
+
+class TelemetryHistory:
+    def __init__(self, raw_points: int = DEFAULT_RAW_POINTS, levels=DEFAULT_LEVELS):
+        """
+        raw_points -> số mẫu thô giữ lại mỗi kênh (ở 10 Hz: 36000 = 1 giờ)
+        levels     -> [(giây mỗi bucket, số bucket)] từ mịn tới thô
+        """
+        self.raw_points = int(raw_points)
+        self.level_spec = tuple((float(p), int(c)) for p, c in sorted(levels))
+        self._series = {ch: _Series(fields, mode, self.raw_points, self.level_spec)
+                        for ch, (fields, mode) in CHANNELS.items()}
+        self._lock = threading.Lock()
+        self._wall = time.time() - time.monotonic()
+        self.stats = {"samples": 0, "out_of_order": 0, "queries": 0}
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> Optional["TelemetryHistory"]:
+        cfg = cfg or {}
+        if not cfg.get("enabled", True):
+            return None
+        return cls(cfg.get("raw_points", DEFAULT_RAW_POINTS), cfg.get("levels", DEFAULT_LEVELS))
+
+    # ---- ghi (thread RX / ingest) ----
+    def record(self, rec):
+        """Nhận TelemetryRecord từ GroundController._dispatch_record."""
+        t = rec.t + self._wall
+        if rec.local is not None:
+            self.append("local", t, rec.local)
+        if rec.gps is not None:
+            self.append("gps", t, rec.gps)
+        if rec.battery_percent is not None:
+            self.append("battery", t, (rec.battery_percent,))
+        if rec.battery_voltage is not None:
+            self.append("voltage", t, (rec.battery_voltage,))
+        if rec.speed is not None:
+            self.append("speed", t, (rec.speed,))
+
+    def append(self, channel: str, t: float, values: Sequence[float]):
+        with self._lock:
+            if self._series[channel].append(t, values):
+                self.stats["samples"] += 1
+            else:
+                self.stats["out_of_order"] += 1
+
+    # ---- truy vấn (GUI thread) ----
+    def query(self, channel: str, t0: Optional[float] = None, t1: Optional[float] = None,
+              max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, Any]:
+        """
+        -> {"channel", "fields", "level", "t0", "t1", "total", "points": [[t, giá trị...], ...]}
+        total = số điểm của mức được chọn trong khoảng (trước khi rút gọn).
+        """
+        series = self._series.get(channel)
+        if series is None:
+            raise KeyError(f"không có kênh lịch sử {channel!r}")
+        max_points = max(2, int(max_points))
+        t0 = -math.inf if t0 is None else t0
+        t1 = math.inf if t1 is None else t1
+        with self._lock:
+            self.stats["queries"] += 1
+            name, ts, cols, total = self._pick(series, t0, t1, max_points)
+        points = self._reduce(series, name, ts, cols, max_points)
+        return {"channel": channel, "fields": list(series.fields), "level": name,
+                "t0": ts[0] if ts else None, "t1": ts[-1] if ts else None, "total": total, "points": points}
+
+    def _pick(self, series: _Series, t0: float, t1: float, max_points: int):
+        """Mức mịn nhất phủ được t0 với không quá OVERSAMPLE*max_points điểm.
+
+        Không mức nào vừa đủ thì lấy mức thô nhất còn phủ t0; không mức nào phủ thì lấy mức thô nhất có dữ liệu.
+        """
+        best = None
+        for name, ring, lvl in [("raw", series.raw, None)] + [(l.name, l.ring, l) for l in series.levels]:
+            i0, i1 = ring.span(t0, t1)
+            pend = lvl is not None and _pending_in(lvl, t0, t1)
+            n = i1 - i0 + pend
+            if n == 0:
+                continue
+            # ring chưa đầy = chưa bỏ mẫu nào, coi như phủ từ đầu
+            covers = ring.n < ring.capacity or ring.first() <= t0 + (lvl.period if lvl else 0.0)
+            cand = (covers, name, ring, lvl, i0, i1, n, pend)
+            if covers or best is None or not best[0]:
+                best = cand
+            if covers and n <= OVERSAMPLE * max_points:
+                break
+        if best is None:
+            return "raw", [], [], 0
+        _, name, ring, lvl, i0, i1, n, pend = best
+        ts, cols = ring.slice(i0, i1)
+        if pend:
+            t, vals = lvl.pending()
+            ts.append(t)
+            for c, v in zip(cols, vals):
+                c.append(v)
+        return name, ts, cols, n
+
+    def _reduce(self, series: _Series, level: str, ts, cols, max_points: int) -> List[List[float]]:
+        d = len(series.fields)
+        agg = level != "raw"
+        if series.mode == TRACK:
+            vals = cols[:d]         # mức gộp: dùng trung bình
+            idx = lttb(vals[0], vals[1], max_points) if len(ts) > max_points else range(len(ts))
+            return [[ts[i]] + [c[i] for c in vals] for i in idx]
+        lo, hi = (cols[d], cols[2 * d]) if agg else (cols[0], cols[0])
+        if not agg and len(ts) <= max_points:
+            return [[t, v] for t, v in zip(ts, lo)]
+        return [[t, v] for t, v in minmax(ts, lo, hi, max_points)]
+
+    def channels(self) -> List[str]:
+        return list(CHANNELS)
+
+    def info(self) -> Dict[str, Any]:
+        """Khoảng thời gian và số điểm đang giữ ở từng mức của từng kênh."""
+        with self._lock:
+            out = {}
+            for ch, s in self._series.items():
+                levels = [("raw", s.raw)] + [(lvl.name, lvl.ring) for lvl in s.levels]
+                out[ch] = {name: {"points": len(r), "t0": r.first(), "t1": r.last()} for name, r in levels}
+            return dict(out, stats=dict(self.stats))
+
+
+def _pending_in(lvl: _Level, t0: float, t1: float) -> bool:
+    p = lvl.pending()
+    return p is not None and t0 <= p[0] <= t1
@@ -0,0 +1,207 @@
+"""
+Link supervisor: heartbeat deadline + thống kê chất lượng link.
+
+Mỗi heartbeat dời deadline = t_hb + timeout; link rớt đúng lúc deadline qua
+(không có grace × interval, không nhấp nháy). Chỉ có 1 timer: thread riêng
+(transport thread) hoặc loop.call_at (transport asyncio). Timer đồng thời
+phát thống kê định kỳ:
+
+    ok, hb_interval_ms, hb_jitter_ms, rate_hz, decode_fail_ratio, loss
+"""
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LinkSupervisor:
+    STATS_INTERVAL = 1.0
+    HB_WINDOW = 32
+
+    def __init__(self, timeout: float = 6.0,
+                 on_change: Optional[Callable[[bool], None]] = None,
+                 on_stats: Optional[Callable[[Dict], None]] = None,
+                 stats_interval: float = STATS_INTERVAL):
+        self.timeout = timeout
+        self.on_change = on_change
+        self.on_stats = on_stats
+        self.stats_interval = stats_interval
+
+        self.ok = False
+        self.last_hb = 0.0
+        self._lock = threading.RLock()
+        self._intervals: deque = deque(maxlen=self.HB_WINDOW)
+
+        # bộ đếm trong cửa sổ thống kê hiện tại + tổng
+        self._win_start = time.monotonic()
+        self._win_good = 0
+        self._win_bad = 0
+        self.frames_good = 0
+        self.frames_bad = 0
+        self.last_stats: Dict = {}
+
+        self._running = False
+        self._cond = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._loop = None
+        self._loop_thread: Optional[int] = None
+        self._handle = None
+
+    # ---- inputs (RX path) ----
+    def heartbeat(self, t: Optional[float] = None):
+        t = t or time.monotonic()
+        with self._lock:
+            if not self._running:
+                return              # đã stop (hoặc chưa start): không có timer nào hạ link xuống lại
+            if self.last_hb > 0:
+                self._intervals.append(t - self.last_hb)
+            self.last_hb = t
+            if not self.ok:
+                self._set_ok(True)
+                self._wake()
+
+    def _wake(self):
+        # link vừa lên: deadline mới có thể sớm hơn lần thức kế tiếp của timer
+        loop = self._loop
+        if loop is not None:
+            # heartbeat có thể tới từ thread ingest: timer của loop chỉ được đụng trên loop thread
+            if threading.get_ident() == self._loop_thread:
+                self._reschedule()
+            else:
+                try:
+                    loop.call_soon_threadsafe(self._reschedule)
+                except RuntimeError:
+                    pass  # loop đã đóng
+        else:
+            self._cond.notify()
+
+    def frames(self, good: int, bad: int = 0):
+        """RX báo số frame decode được / hỏng (gọi 1 lần mỗi chunk)."""
+        with self._lock:
+            self._win_good += good
+            self._win_bad += bad
+            self.frames_good += good
+            self.frames_bad += bad
+
+    # ---- state ----
+    def _set_ok(self, ok: bool):
+        self.ok = ok
+        logger.info("Link %s", "up" if ok else "down")
+        if self.on_change:
+            try:
+                self.on_change(ok)
+            except Exception as e:
+                logger.error(f"Link callback error: {e}")
+
+    def deadline(self) -> Optional[float]:
+        return self.last_hb + self.timeout if self.ok else None
+
+    def _tick(self, now: float) -> float:
+        """Kiểm tra deadline/thống kê; trả về thời điểm cần thức dậy kế tiếp."""
+        with self._lock:
+            dl = self.deadline()
+            if dl is not None and now >= dl:
+                self._set_ok(False)
+                dl = None
+            if now - self._win_start >= self.stats_interval:
+                self._publish(now)
+            nxt = self._win_start + self.stats_interval
+            return min(nxt, dl) if dl is not None else nxt
+
+    def _publish(self, now: float):
+        st = self.stats(now)
+        self._win_start = now
+        self._win_good = self._win_bad = 0
+        self.last_stats = st
+        if self.on_stats:
+            try:
+                self.on_stats(st)
+            except Exception as e:
+                logger.error(f"Link stats callback error: {e}")
+
+    def stats(self, now: Optional[float] = None) -> Dict:
+        now = now or time.monotonic()
+        with self._lock:
+            dt = max(1e-6, now - self._win_start)
+            total = self._win_good + self._win_bad
+            iv = list(self._intervals)
+            out = {
+                "ok": self.ok,
+                "rate_hz": round(total / dt, 2),
+                "decode_fail_ratio": round(self._win_bad / total, 4) if total else 0.0,
+                "hb_interval_ms": None,
+                "hb_jitter_ms": None,
+                "loss": None,
+                "hb_age_ms": round((now - self.last_hb) * 1e3, 1) if self.last_hb else None,
+            }
+            if iv:
+                expected = statistics.median(iv)
+                out["hb_interval_ms"] = round(expected * 1e3, 1)
+                out["hb_jitter_ms"] = round(statistics.pstdev(iv) * 1e3, 1) if len(iv) > 1 else 0.0
+                if expected > 0:
+                    # khoảng trống gấp k lần chu kỳ => mất k-1 heartbeat
+                    missed = sum(max(0, round(g / expected) - 1) for g in iv)
+                    out["loss"] = round(missed / (len(iv) + missed), 4)
+            return out
+
+    # ---- drivers ----
+    def start(self):
+        """Chạy timer bằng 1 thread (transport thread)."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._win_start = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="link-supervisor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                wake = self._tick(now)
+                self._cond.wait(max(0.0, wake - now))
+
+    def attach_loop(self, loop):
+        """Chạy timer bằng loop.call_at (transport asyncio). Gọi trên loop thread."""
+        self._running = True
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._win_start = time.monotonic()
+        self._schedule()
+
+    def _reschedule(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._schedule()
+
+    def _schedule(self):
+        if not self._running or self._loop is None:
+            return
+        wake = self._tick(time.monotonic())
+        self._handle = self._loop.call_at(wake, self._schedule)
+
+    def stop(self):
+        """Dừng timer; nếu link đang up thì báo down."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            if self._handle is not None:
+                try:
+                    self._loop.call_soon_threadsafe(self._handle.cancel)
+                except RuntimeError:
+                    pass  # loop đã đóng
+                self._handle = None
+            self._loop = None
+            if self.ok:
+                self._set_ok(False)
+            self.last_hb = 0.0
+            self._intervals.clear()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
@@ -0,0 +1,68 @@
+"""
+Logging setup: QueueHandler -> QueueListener để thread RX/GUI không bao giờ
+chờ ghi console/file.
+
+Cấu hình trong config/settings.toml:
+
+    [logging]
+    level = "INFO"                 # level gốc
+    file = "gcs.log"               # tuỳ chọn, ghi thêm ra file
+    [logging.levels]
+    "app.control" = "DEBUG"        # level riêng theo logger
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+from typing import Any, Dict, Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _level(value: Any, default: int = logging.INFO) -> int:
+    if isinstance(value, int):
+        return value
+    lvl = logging.getLevelName(str(value).upper())
+    return lvl if isinstance(lvl, int) else default
+
+
+def setup_logging(config: Optional[Dict[str, Any]] = None) -> logging.handlers.QueueListener:
+    """Cài QueueHandler cho root logger (gọi 1 lần lúc khởi động; gọi lại sẽ thay cấu hình cũ)."""
+    global _listener
+    cfg = (config or {}).get("logging", {})
+
+    if _listener is not None:
+        _listener.stop()
+
+    handlers = [logging.StreamHandler()]
+    if cfg.get("file"):
+        handlers.append(logging.FileHandler(cfg["file"], encoding="utf-8"))
+    fmt = logging.Formatter(cfg.get("format", LOG_FORMAT))
+    for h in handlers:
+        h.setFormatter(fmt)
+
+    q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(logging.handlers.QueueHandler(q))
+    root.setLevel(_level(cfg.get("level", "INFO")))
+    for name, lvl in cfg.get("levels", {}).items():
+        logging.getLogger(name).setLevel(_level(lvl))
+
+    _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Xả hàng đợi log còn lại rồi dừng listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
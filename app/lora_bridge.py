@@ -1,7 +1,11 @@
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+import logging
 import threading
 import os
 import time
+
+logger = logging.getLogger(__name__)
+
 class LoraBridge(QObject):
     positionUpdated = pyqtSignal(float, float, float)
     positionUpdatedLocal = pyqtSignal(float, float, float)
@@ -9,96 +13,332 @@ class LoraBridge(QObject):
     batteryUpdated = pyqtSignal(float, float)
     speedUpdated = pyqtSignal(float)
     linkUpdated = pyqtSignal(bool) 
+    # {"ok", "rate_hz", "decode_fail_ratio", "hb_interval_ms", "hb_jitter_ms", "loss", "hb_age_ms"}, ~1 Hz
+    linkStats = pyqtSignal(dict)
+    # Kết quả lệnh cần ACK: {"rid", "cmd", "ok", "latency_ms", "attempts"}
+    commandResult = pyqtSignal(dict)
+    # Tiến độ upload mission: {"id", "sent", "total", "bytes", "delta", "waypoints", "ok"?, "error"?}
+    missionProgress = pyqtSignal(dict)
+    # Geofence: {"source": "telemetry"|"mission", "active", "kind"?, "zone"?, "x", "y", "z", "leg"?}
+    geofenceBreach = pyqtSignal(dict)
+    # Gộp telemetry: {"seq", "local"?, "gps"?, "battery"?, "speed"?}, phát tối đa telemetry_rate_hz lần/giây
+    telemetryFrame = pyqtSignal(dict)
+    # Nhiều drone: {"vehicle", "seq", "local"?, "gps"?, "battery"?, "speed"?, "ok"?, "link"?}, gộp theo từng drone
+    vehicleFrame = pyqtSignal(dict)
+    # Tham số: {"state", "fw", "count", "pending", "changed"?: [{"name", "value", "type"}], "removed"?, "error"?}
+    parametersUpdated = pyqtSignal(dict)
+    # Nạp firmware: {"stage": download|erase|program|verify|done|error, "pct", "message", "bytes"?, "total"?, "result"?, "error"?}
+    firmwareProgress = pyqtSignal(dict)
+    # Metrics định kỳ cho panel chẩn đoán: {name: {"type", "help", "series": [{"labels", "value"|"count","sum","p50","p99"}]}}
+    metricsUpdated = pyqtSignal(dict)
+    # Thử động cơ: {"state": streaming|idle|stopped|deadman, "outputs": [pwm...], "reason"?, "vehicle"?}
+    motorStatus = pyqtSignal(dict)
 
-    def __init__(self):
+    DEFAULT_TELEMETRY_RATE_HZ = 25.0
+
+    def __init__(self, telemetry_rate_hz: float = DEFAULT_TELEMETRY_RATE_HZ):
+        """
+        telemetry_rate_hz > 0 -> gộp telemetry thành telemetryFrame theo nhịp cố định
+        telemetry_rate_hz <= 0 -> phát từng signal riêng ngay lập tức (kiểu cũ)
+        """
         super().__init__()
         self.controller = None
-        self._rx_thread = None
+        self.fleet = None
+        self.firmware = None
+        self.metrics = None
+        self._metrics_timer = None
+        self._conn_lock = threading.Lock()
+
+        # Coalescing: chỉ giữ giá trị mới nhất của mỗi kênh tới lần flush kế tiếp
+        self._pending = {}
+        self._vehicle_pending = {}
+        self._pending_lock = threading.Lock()
+        self._frame_seq = 0
+        self._tel_stats = {"updates": 0, "frames": 0, "merged": 0, "dropped": 0}
+        self._flush_timer = None
+        self.telemetry_rate_hz = float(telemetry_rate_hz)
+        if self.telemetry_rate_hz > 0:
+            self._flush_timer = QTimer(self)
+            self._flush_timer.setInterval(max(1, int(round(1000.0 / self.telemetry_rate_hz))))
+            self._flush_timer.timeout.connect(self.flush_telemetry)
+            self._flush_timer.start()
 
     def set_controller(self, controller):
         self.controller = controller
         if hasattr(self.controller, "set_gui_bridge"):
             self.controller.set_gui_bridge(self)
 
+    def set_fleet(self, fleet):
+        """VehicleManager: slot cũ (landConnect, receivedTargetWaypoint...) đi theo drone đang chọn."""
+        self.fleet = fleet
+        self.controller = fleet.controller
+
+    def set_metrics(self, registry, interval_s: float = 2.0):
+        """Phát registry.snapshot() qua metricsUpdated mỗi interval_s giây (0 = chỉ dùng getMetrics)."""
+        self.metrics = registry
+        st = self._tel_stats
+        for key in ("updates", "frames", "dropped"):
+            registry.counter_fn(f"gcs_bridge_telemetry_{key}_total", lambda k=key: st[k],
+                                f"Gộp telemetry sang web UI: {key}")
+        if interval_s > 0:
+            self._metrics_timer = QTimer(self)
+            self._metrics_timer.setInterval(int(interval_s * 1000))
+            self._metrics_timer.timeout.connect(lambda: self.metricsUpdated.emit(registry.snapshot()))
+            self._metrics_timer.start()
+
+    @pyqtSlot(result=dict)
+    def getMetrics(self):
+        return self.metrics.snapshot() if self.metrics is not None else {}
+
+    # ================= Telemetry coalescing =================
+    def _queue(self, channel, value):
+        """Lưu giá trị mới nhất của kênh; trả False nếu đang ở chế độ phát trực tiếp."""
+        if self._flush_timer is None:
+            return False
+        with self._pending_lock:
+            st = self._tel_stats
+            st["updates"] += 1
+            if channel in self._pending:
+                st["dropped"] += 1
+            elif self._pending:
+                st["merged"] += 1
+            self._pending[channel] = value
+        return True
+
+    def update_vehicle(self, vid, channel, value):
+        """Telemetry đã gắn vehicle id (từ app.fleet); gộp theo drone như telemetryFrame."""
+        if self._flush_timer is None:
+            self.vehicleFrame.emit({"vehicle": vid, channel: value})
+            return
+        with self._pending_lock:
+            self._vehicle_pending.setdefault(vid, {})[channel] = value
+
+    @pyqtSlot()
+    def flush_telemetry(self):
+        """Phát 1 telemetryFrame chứa giá trị mới nhất của mọi kênh đang chờ (+ 1 vehicleFrame mỗi drone)."""
+        with self._pending_lock:
+            frame, self._pending = self._pending, {}
+            vehicles, self._vehicle_pending = self._vehicle_pending, {}
+            if frame:
+                self._frame_seq += 1
+                self._tel_stats["frames"] += 1
+                frame["seq"] = self._frame_seq
+            seq = self._frame_seq
+        if frame:
+            self.telemetryFrame.emit(frame)
+        for vid, vframe in vehicles.items():
+            vframe["vehicle"] = vid
+            vframe["seq"] = seq
+            self.vehicleFrame.emit(vframe)
+
+    @pyqtSlot(result=dict)
+    def getTelemetryStats(self):
+        """updates: số update nhận; frames: số frame đã phát;
+        merged: update đi chung frame với kênh khác; dropped: update bị giá trị mới hơn ghi đè."""
+        with self._pending_lock:
+            return dict(self._tel_stats, rate_hz=self.telemetry_rate_hz)
+
+    @pyqtSlot(str, float, float, int, result=dict)
+    def getHistory(self, channel, t0, t1, maxPoints):
+        """Lịch sử của drone đang chọn (local/gps/battery/voltage/speed), đã rút gọn còn <= ~maxPoints điểm.
+
+        t0, t1: giây Unix (Date.now()/1000); t1 <= 0 = tới hiện tại; t0 < 0 = tương đối so với t1
+        (vd. -600 = 10 phút gần nhất); t0 == 0 = từ đầu.
+        -> {"channel", "fields", "level", "t0", "t1", "total", "points": [[t, ...], ...]}
+        """
+        history = getattr(self.controller, "history", None)
+        if history is None:
+            return {"channel": channel, "points": [], "error": "history disabled"}
+        end = t1 if t1 > 0 else time.time()
+        start = end + t0 if t0 < 0 else (t0 if t0 > 0 else None)
+        try:
+            return history.query(channel, start, end, maxPoints if maxPoints > 0 else 2000)
+        except KeyError as e:
+            logger.warning(f"getHistory: {e.args[0]}")
+            return {"channel": channel, "points": [], "error": e.args[0]}
+
     @pyqtSlot(float, float, float)
     def update_position(self, x, y, z):
-        print(f"[Bridge] Sending LOCAL to JS (legacy): x={x}, y={y}, z={z}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending LOCAL to JS (legacy): x=%s, y=%s, z=%s", x, y, z)
+        if self._queue("local", [x, y, z]):
+            return
         self.positionUpdated.emit(x, y, z)
         self.positionUpdatedLocal.emit(x, y, z)
 
     @pyqtSlot(float, float, float)
     def update_local_position(self, x, y, z):
-        print(f"[Bridge] Sending LOCAL to JS: x={x}, y={y}, z={z}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending LOCAL to JS: x=%s, y=%s, z=%s", x, y, z)
+        if self._queue("local", [x, y, z]):
+            return
         self.positionUpdatedLocal.emit(x, y, z)
         self.positionUpdated.emit(x, y, z)
 
     @pyqtSlot(float, float, float)
     def update_global_position(self, lat, lon, alt):
-        print(f"[Bridge] Sending GPS to JS: lat={lat}, lon={lon}, alt={alt}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending GPS to JS: lat=%s, lon=%s, alt=%s", lat, lon, alt)
+        if self._queue("gps", [lat, lon, alt]):
+            return
         self.positionUpdatedGPS.emit(lat, lon, alt)
 
+    def _run_connection(self, fn, name):
+        """Dò cổng / mở / đóng serial có thể mất hàng trăm ms -> chạy ngoài GUI thread, lần lượt."""
+        def run():
+            with self._conn_lock:
+                try:
+                    fn()
+                except Exception as e:
+                    logger.error(f"{name} error: {e}")
+        threading.Thread(target=run, name=name, daemon=True).start()
+
     @pyqtSlot()
     def startConnection(self):
         if not self.controller:
-            print("No controller attached.")
+            logger.warning("No controller attached.")
             return
-        print("GUI yêu cầu START kết nối LoRa")
+        logger.info("GUI yêu cầu START kết nối LoRa")
+        self._run_connection(self._start_connection, "serial-start")
+
+    def _start_connection(self):
         self.controller.start()
-        if hasattr(self.controller, "set_gui_bridge"):
+        if self.fleet is None and hasattr(self.controller, "set_gui_bridge"):
             self.controller.set_gui_bridge(self)
-        if not self._rx_thread or not self._rx_thread.is_alive():
-            self._rx_thread = threading.Thread(
-                target=self.controller.read_position_from_drone, daemon=True
-            )
-            self._rx_thread.start()
+        # read_position_from_drone chỉ khởi động reader (thread hoặc asyncio) rồi trả về ngay
+        self.controller.read_position_from_drone()
 
     @pyqtSlot()
     def stopConnection(self):
         if self.controller:
-            print("GUI yêu cầu STOP kết nối LoRa")
-            self.controller.stop()
+            logger.info("GUI yêu cầu STOP kết nối LoRa")
+            self._run_connection(self.controller.stop, "serial-stop")
         else:
-            print("No controller attached.")
+            logger.warning("No controller attached.")
 
     @pyqtSlot()
     def landConnect(self):
         if self.controller:
-            print("Đã gửi yêu cầu LAND đến Lora")
+            logger.info("Đã gửi yêu cầu LAND đến Lora")
             self.controller.land_req()
         else:
-            print("No controller attached.")
+            logger.warning("No controller attached.")
 
     @pyqtSlot()
     def offBoardConnect(self):
         if self.controller:
-            print("Đã gửi yêu cầu OFFBOARD đến Lora")
+            logger.info("Đã gửi yêu cầu OFFBOARD đến Lora")
             self.controller.offboard_req()
         else:
-            print("No controller attached.")
+            logger.warning("No controller attached.")
 
     @pyqtSlot(list)
     def receivedTargetWaypoint(self, waypoints):
         if not self.controller:
-            print("No controller attached.")
+            logger.warning("No controller attached.")
             return
-        print(f"Nhận {len(waypoints)} waypoint từ JS:")
-        for i, wp in enumerate(waypoints, 1):
-            print(f"  {i}: {wp}")
+        logger.info(f"Nhận {len(waypoints)} waypoint từ JS")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, wp in enumerate(waypoints, 1):
+                logger.debug("  %d: %s", i, wp)
         self.controller.update_waypoints(waypoints)
         self.controller.send_waypoints_to_drone()
 
     @pyqtSlot(float, float)
     def update_battery(self, percent, voltage):
+        if self._queue("battery", [percent, voltage]):
+            return
         self.batteryUpdated.emit(percent, voltage)
 
     
     @pyqtSlot(float)
     def update_speed(self, spd):
+        if self._queue("speed", spd):
+            return
         self.speedUpdated.emit(spd)
 
     def update_link(self, ok:bool):
-        print(f"[Bridge] Link: {'Connected' if ok else 'Disconnected'}")
+        logger.info("Link: %s", "Connected" if ok else "Disconnected")
         self.linkUpdated.emit(bool(ok))
+
+    def update_link_stats(self, stats: dict):
+        self.linkStats.emit(stats)
+
+    @pyqtSlot(result=dict)
+    def getLinkStats(self):
+        if self.controller and hasattr(self.controller, "link"):
+            return self.controller.link.stats()
+        return {}
+
+    def update_command_result(self, result: dict):
+        self.commandResult.emit(result)
+
+    def update_mission_progress(self, info: dict):
+        self.missionProgress.emit(info)
+
+    def update_geofence_breach(self, info: dict):
+        self.geofenceBreach.emit(info)
+
+    @pyqtSlot(result=dict)
+    def getCommandStats(self):
+        """submitted/writes/acked/failed/retries/queued/inflight + latency_ms_p50/p90/p99/max."""
+        if self.controller and hasattr(self.controller, "command_stats"):
+            return self.controller.command_stats()
+        return {}
+
+    # ===== Multi-vehicle =====
+
+    @pyqtSlot(result=list)
+    def getVehicles(self):
+        """[{"id", "port", "active", "link"}]; 1 drone khi không chạy VehicleManager."""
+        if self.fleet is None:
+            return []
+        return self.fleet.vehicles()
+
+    @pyqtSlot(int, result=bool)
+    def selectVehicle(self, vid):
+        if self.fleet is None:
+            return False
+        prev = self._actuators()
+        try:
+            self.controller = self.fleet.select(vid)
+        except KeyError as e:
+            logger.warning(f"selectVehicle: {e}")
+            return False
+        if prev is not None and prev.active and prev is not self._actuators():
+            # slider giờ điều khiển drone khác: không để drone cũ quay tới khi dead-man
+            prev.stop_all("vehicle_changed")
+        logger.info(f"Chọn vehicle {vid}")
+        return True
+
+    @pyqtSlot(int, str, result=bool)
+    def vehicleCommand(self, vid, name):
+        """name: "land" | "offboard" | "start" | "stop" cho đúng drone vid."""
+        if self.fleet is None or self.fleet.get(vid) is None:
+            logger.warning(f"vehicleCommand: không có vehicle {vid}")
+            return False
+        logger.info(f"GUI yêu cầu {name.upper()} cho vehicle {vid}")
+        if name == "land":
+            return self.fleet.land(vid) is not None
+        if name == "offboard":
+            return self.fleet.offboard(vid) is not None
+        if name == "start":
+            self._run_connection(lambda: self.fleet.start(vid), f"serial-start-{vid}")
+            return True
+        if name == "stop":
+            self._run_connection(lambda: self.fleet.stop(vid), f"serial-stop-{vid}")
+            return True
+        logger.warning(f"vehicleCommand: lệnh không hỗ trợ {name!r}")
+        return False
+
+    @pyqtSlot(int, list)
+    def sendVehicleWaypoints(self, vid, waypoints):
+        if self.fleet is None or self.fleet.get(vid) is None:
+            logger.warning(f"sendVehicleWaypoints: không có vehicle {vid}")
+            return
+        logger.info(f"Nhận {len(waypoints)} waypoint từ JS cho vehicle {vid}")
+        self.fleet.upload_mission(vid, waypoints)
+
     @pyqtSlot(result=str)
     def getMapKey(self) -> str:
         return os.environ.get("AZURE_MAPS_KEY", "")
@@ -108,29 +348,15 @@ class LoraBridge(QObject):
     @pyqtSlot(result=list)
     def scanBoards(self):
         """Scan for available flight controller boards in bootloader mode"""
-        print("[Bridge] Scanning for boards...")
+        logger.info("Scanning for boards...")
         try:
-            # This would typically use pyserial to scan for devices
-            # For demo purposes, return a mock board
-            import serial.tools.list_ports
-            
-            boards = []
-            try:
-                ports = serial.tools.list_ports.comports()
-                
-                for port in ports:
-                    # Look for common flight controller identifiers
-                    if any(identifier in port.description.lower() for identifier in 
-                           ['pixhawk', 'px4', 'ardupilot', 'f4', 'f7', 'h7']):
-                        boards.append({
-                            'name': port.description,
-                            'port': port.device,
-                            'vid': port.vid,
-                            'pid': port.pid
-                        })
-            except Exception as port_error:
-                print(f"[Bridge] Port scanning error: {port_error}")
-            
+            # Tra chỉ mục của DeviceWatcher (quét nền, cập nhật khi cắm/rút) thay vì comports()
+            from app.devices import get_watcher
+            watcher = get_watcher()
+            if not watcher.wait_ready(1.0):
+                logger.warning("Device watcher chưa quét xong")
+            boards = [p.as_dict() for p in watcher.boards()]
+
             # Demo: return a mock board if none found
             if not boards:
                 boards = [{
@@ -140,63 +366,68 @@ class LoraBridge(QObject):
                     'pid': 17
                 }]
             
-            print(f"[Bridge] Found {len(boards)} board(s): {boards}")
+            logger.info(f"Found {len(boards)} board(s): {boards}")
             return boards
             
         except Exception as e:
-            print(f"[Bridge] Error scanning boards: {e}")
+            logger.error(f"Error scanning boards: {e}")
             return []
 
+    def set_firmware(self, flasher):
+        """FirmwareFlasher: tiến độ nạp (thread "firmware") -> firmwareProgress."""
+        self.firmware = flasher
+        flasher.on_progress = self.firmwareProgress.emit
+
+    def _bootloader_port(self, config):
+        port = config.get('port')
+        if port:
+            return port
+        from app.devices import get_watcher
+        boards = get_watcher().boards()
+        return boards[0].device if boards else None
+
+    @pyqtSlot(result=bool)
+    def isBootloaderConnected(self):
+        try:
+            from app.devices import get_watcher
+            return bool(get_watcher().boards())
+        except Exception as e:
+            logger.error(f"Error checking bootloader: {e}")
+            return False
+
     @pyqtSlot(dict, result=bool)
     def flashFirmware(self, config):
-        """Flash firmware to the connected board"""
-        print(f"[Bridge] Flashing firmware with config: {config}")
-        
+        """Bắt đầu nạp firmware ở thread nền, trả về ngay; tiến độ/kết quả qua firmwareProgress."""
+        logger.info(f"Flashing firmware with config: {config}")
+        if self.firmware is None:
+            logger.warning("No firmware flasher attached.")
+            return False
+        from app.firmware import FirmwareSpec
+        spec = FirmwareSpec(config.get('stack') or 'px4', config.get('channel') or 'stable',
+                            config.get('vehicle') or None)
         try:
-            # Parse config
-            stack = config.get('stack', 'px4')
-            channel = config.get('channel', 'stable')
-            vehicle = config.get('vehicle')
-            custom_path = config.get('customPath')
-            
-            print(f"[Bridge] Firmware: {stack} {channel} {vehicle} {custom_path}")
-            
-            # This would typically:
-            # 1. Download firmware from official repositories
-            # 2. Put board in bootloader mode
-            # 3. Flash using appropriate tools (px_uploader, etc.)
-            # 4. Verify flash
-            
-            # For demo, simulate the process
-            import time
-            
-            # Simulate download
-            time.sleep(1)
-            print("[Bridge] Downloading firmware...")
-            
-            # Simulate erase
-            time.sleep(1)
-            print("[Bridge] Erasing previous firmware...")
-            
-            # Simulate flash
-            time.sleep(2)
-            print("[Bridge] Programming new firmware...")
-            
-            # Simulate verify
-            time.sleep(1)
-            print("[Bridge] Verifying firmware...")
-            
-            print("[Bridge] Firmware flash completed successfully")
-            return True
-            
+            port = self._bootloader_port(config)
         except Exception as e:
-            print(f"[Bridge] Error flashing firmware: {e}")
+            logger.error(f"Error locating bootloader: {e}")
+            port = None
+        if not port:
+            self.firmwareProgress.emit({"stage": "error", "pct": 0, "message": "No board in bootloader found",
+                                        "error": "no board"})
+            return False
+        if not self.firmware.start(spec, port, config.get('customPath') or None):
+            logger.warning("Firmware flash already in progress")
             return False
+        return True
+
+    @pyqtSlot()
+    def cancelFirmware(self):
+        if self.firmware is not None:
+            self.firmware.cancel()
 
     @pyqtSlot(str, str, result=bool)
     def applyAirframe(self, frameClass, frameType):
         """Apply airframe configuration"""
-        print(f"[Bridge] Applying airframe: {frameClass} - {frameType}")
+        logger.info(f"Applying airframe: {frameClass} - {frameType}")
         
         try:
             # This would typically:
@@ -205,17 +436,17 @@ class LoraBridge(QObject):
             # 3. Verify configuration
             
             # For demo, just log the action
-            print(f"[Bridge] Airframe {frameClass} {frameType} applied successfully")
+            logger.info(f"Airframe {frameClass} {frameType} applied successfully")
             return True
             
         except Exception as e:
-            print(f"[Bridge] Error applying airframe: {e}")
+            logger.error(f"Error applying airframe: {e}")
             return False
 
     @pyqtSlot(result=bool)
     def calibrateRadio(self):
         """Start radio calibration process"""
-        print("[Bridge] Starting radio calibration...")
+        logger.info("Starting radio calibration...")
         
         try:
             # This would typically:
@@ -223,17 +454,17 @@ class LoraBridge(QObject):
             # 2. Guide user through stick movements
             # 3. Save calibration data
             
-            print("[Bridge] Radio calibration completed")
+            logger.info("Radio calibration completed")
             return True
             
         except Exception as e:
-            print(f"[Bridge] Error calibrating radio: {e}")
+            logger.error(f"Error calibrating radio: {e}")
             return False
 
     @pyqtSlot(result=bool)
     def calibrateSensors(self):
         """Start sensor calibration process"""
-        print("[Bridge] Starting sensor calibration...")
+        logger.info("Starting sensor calibration...")
         
         try:
             # This would typically:
@@ -242,142 +473,127 @@ class LoraBridge(QObject):
             # 3. Calibrate gyroscope
             # 4. Save calibration data
             
-            print("[Bridge] Sensor calibration completed")
+            logger.info("Sensor calibration completed")
             return True
             
         except Exception as e:
-            print(f"[Bridge] Error calibrating sensors: {e}")
+            logger.error(f"Error calibrating sensors: {e}")
             return False
 
     # ===== Motor Control Methods =====
     
+    def _actuators(self):
+        return getattr(self.controller, "actuators", None)
+
+    def update_motor_status(self, info: dict):
+        """Từ ActuatorStreamer (thread bất kỳ); chỉ chuyển tiếp trạng thái của drone đang chọn."""
+        if self.fleet is not None and info.get("vehicle") not in (None, self.fleet.active):
+            return
+        self.motorStatus.emit(info)
+
     @pyqtSlot(int, float)
     def setMotorOutput(self, motorIndex, output):
-        """Set individual motor output (0-100%)"""
-        print(f"[Bridge] Setting motor {motorIndex} to {output}%")
-        
+        """Set individual motor output (0-100%); gửi theo nhịp stream, không gửi mỗi lần gọi"""
+        streamer = self._actuators()
+        if streamer is None:
+            logger.warning("No actuator streamer attached.")
+            return
         try:
-            # Convert percentage to PWM value (typically 1000-2000 μs)
-            pwmValue = 1000 + (output / 100.0) * 1000
-            
-            # Here you would send the motor command to the vehicle
-            if self.controller:
-                # Example: self.controller.set_motor_output(motorIndex, pwmValue)
-                print(f"[Bridge] Motor {motorIndex} PWM: {pwmValue:.0f} μs")
-            
+            pwm = streamer.set_output(motorIndex, output)
+            logger.debug("Motor %s -> %s%% (%s μs)", motorIndex, output, pwm)
         except Exception as e:
-            print(f"[Bridge] Error setting motor output: {e}")
+            logger.error(f"Error setting motor output: {e}")
+
+    @pyqtSlot()
+    def refreshMotors(self):
+        """UI vẫn mở màn hình Motors với slider khác 0: gia hạn dead-man"""
+        streamer = self._actuators()
+        if streamer is not None:
+            streamer.refresh()
 
     @pyqtSlot()
     def stopAllMotors(self):
-        """Stop all motors"""
-        print("[Bridge] Stopping all motors")
-        
+        """Stop all motors (vượt mọi frame stream đang chờ)"""
+        logger.info("Stopping all motors")
+        streamer = self._actuators()
+        if streamer is None:
+            logger.warning("No actuator streamer attached.")
+            return
         try:
-            # Here you would send stop command to all motors
-            if self.controller:
-                # Example: self.controller.stop_all_motors()
-                print("[Bridge] All motors stopped")
-            
+            streamer.stop_all()
         except Exception as e:
-            print(f"[Bridge] Error stopping motors: {e}")
+            logger.error(f"Error stopping motors: {e}")
+
+    @pyqtSlot(result=dict)
+    def getMotorStatus(self):
+        streamer = self._actuators()
+        return streamer.status() if streamer is not None else {}
 
     # ===== Parameter Management Methods =====
     
+    def _params(self):
+        return getattr(self.controller, "params", None)
+
+    def update_parameters(self, info: dict):
+        """Từ ParamManager (thread "params"); chỉ chuyển tiếp tham số của drone đang chọn."""
+        if self.fleet is not None and info.get("vehicle") not in (None, self.fleet.active):
+            return
+        self.parametersUpdated.emit(info)
+
     @pyqtSlot(result=list)
     def getParameters(self):
-        """Get all vehicle parameters"""
-        print("[Bridge] Getting vehicle parameters...")
-        
-        try:
-            # This would typically query the vehicle for all parameters
-            # For demo, return sample parameters
-            sampleParams = [
-                {"name": "SYSID_MYGCS", "value": "255", "type": "INT32"},
-                {"name": "ARMING_CHECK", "value": "1", "type": "INT32"},
-                {"name": "BATT_MONITOR", "value": "4", "type": "INT32"},
-                {"name": "BATT_CAPACITY", "value": "3300", "type": "INT32"},
-                {"name": "COMPASS_ENABLE", "value": "1", "type": "INT32"},
-                {"name": "GPS_TYPE", "value": "1", "type": "INT32"},
-                {"name": "MOT_PWM_TYPE", "value": "0", "type": "INT32"},
-                {"name": "MOT_PWM_RATE", "value": "400", "type": "INT32"},
-                {"name": "RATE_ROLL_P", "value": "0.15", "type": "FLOAT"},
-                {"name": "RATE_ROLL_I", "value": "0.15", "type": "FLOAT"},
-                {"name": "RATE_ROLL_D", "value": "0.003", "type": "FLOAT"},
-                {"name": "PILOT_SPEED_UP", "value": "500", "type": "INT32"},
-                {"name": "PILOT_SPEED_DN", "value": "300", "type": "INT32"},
-                {"name": "RTL_ALT", "value": "1000", "type": "INT32"},
-                {"name": "RTL_SPEED", "value": "500", "type": "INT32"},
-                {"name": "WPNAV_SPEED", "value": "500", "type": "INT32"},
-                {"name": "WPNAV_ACCEL", "value": "100", "type": "INT32"},
-                {"name": "RC1_MIN", "value": "1100", "type": "INT32"},
-                {"name": "RC1_MAX", "value": "1900", "type": "INT32"},
-                {"name": "RC1_TRIM", "value": "1500", "type": "INT32"},
-                {"name": "RC2_MIN", "value": "1100", "type": "INT32"},
-                {"name": "RC2_MAX", "value": "1900", "type": "INT32"},
-                {"name": "RC2_TRIM", "value": "1500", "type": "INT32"},
-                {"name": "RC3_MIN", "value": "1100", "type": "INT32"},
-                {"name": "RC3_MAX", "value": "1900", "type": "INT32"},
-                {"name": "RC3_TRIM", "value": "1500", "type": "INT32"},
-                {"name": "RC4_MIN", "value": "1100", "type": "INT32"},
-                {"name": "RC4_MAX", "value": "1900", "type": "INT32"},
-                {"name": "RC4_TRIM", "value": "1500", "type": "INT32"}
-            ]
-            
-            print(f"[Bridge] Retrieved {len(sampleParams)} parameters")
-            return sampleParams
-            
-        except Exception as e:
-            print(f"[Bridge] Error getting parameters: {e}")
+        """Trả ngay bảng tham số trong cache; đồng bộ với vehicle chạy nền (kết quả qua parametersUpdated)."""
+        params = self._params()
+        if params is None:
+            logger.warning("No parameter manager attached.")
             return []
+        if params.state != params.STATE_SYNCED:
+            params.sync()
+        rows = params.snapshot()
+        logger.info(f"Trả {len(rows)} tham số từ cache ({params.state})")
+        return rows
 
     @pyqtSlot(str, str, result=bool)
     def setParameter(self, name, value):
-        """Set a single parameter"""
-        print(f"[Bridge] Setting parameter {name} = {value}")
-        
+        """Gom thay đổi; chỉ gửi khi saveParameters() (1 lần commit cho cả lô)."""
+        params = self._params()
+        if params is None:
+            return False
         try:
-            # Here you would send the parameter to the vehicle
-            if self.controller:
-                # Example: self.controller.set_parameter(name, value)
-                print(f"[Bridge] Parameter {name} set to {value}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"[Bridge] Error setting parameter: {e}")
+            v = params.stage(name, value)
+        except ValueError as e:
+            logger.warning(f"Giá trị không hợp lệ cho {name}: {value!r} ({e})")
             return False
+        logger.info(f"Gom tham số {name} = {v} ({len(params.pending)} chờ commit)")
+        return True
 
     @pyqtSlot(result=bool)
     def saveParameters(self):
-        """Save parameters to vehicle"""
-        print("[Bridge] Saving parameters to vehicle...")
-        
-        try:
-            # Here you would save parameters to the vehicle
-            if self.controller:
-                # Example: self.controller.save_parameters()
-                print("[Bridge] Parameters saved successfully")
-            
-            return True
-            
-        except Exception as e:
-            print(f"[Bridge] Error saving parameters: {e}")
+        """Commit mọi thay đổi đang gom tới vehicle (chạy nền)."""
+        params = self._params()
+        if params is None:
             return False
+        logger.info(f"Commit {len(params.pending)} tham số tới vehicle")
+        params.commit()
+        return True
 
     @pyqtSlot(result=bool)
     def loadParameters(self):
-        """Load parameters from vehicle"""
-        print("[Bridge] Loading parameters from vehicle...")
-        
-        try:
-            # Here you would load parameters from the vehicle
-            if self.controller:
-                # Example: self.controller.load_parameters()
-                print("[Bridge] Parameters loaded successfully")
-            
-            return True
-            
-        except Exception as e:
-            print(f"[Bridge] Error loading parameters: {e}")
-            return False
\ No newline at end of file
+        """Tải lại toàn bộ bảng tham số từ vehicle (bỏ qua hash)."""
+        params = self._params()
+        if params is None:
+            return False
+        logger.info("Tải lại tham số từ vehicle...")
+        params.sync(force=True)
+        return True
+
+    @pyqtSlot()
+    def discardParameters(self):
+        params = self._params()
+        if params is not None:
+            params.discard()
+
+    @pyqtSlot(result=dict)
+    def getParameterStatus(self):
+        params = self._params()
+        return params.status() if params is not None else {}
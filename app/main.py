@@ -1,75 +1,113 @@
 # app/main.py
-import sys, os, subprocess
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout
-from PyQt6 import uic
-from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtCore import QUrl, QTimer
-from PyQt6.QtWebChannel import QWebChannel
+# Khởi động nhanh: chỉ import Qt + dựng cửa sổ trước, phần còn lại (web server, browser,
+# controller, geodesy/NumPy, pyserial) chạy sau frame đầu; kết nối serial chạy ở thread riêng.
+# Đo: python -m app.startup (hoặc python -m app.main --profile-startup)
+from app.startup import PROFILE_FLAG, StartupProfile
+
+import sys, os, logging, threading
 
-from app.lora_bridge import LoraBridge
-from app.control import GroundController
+from PyQt6.QtCore import QCoreApplication, Qt, QTimer, QUrl
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 WEB_DIR = os.path.join(BASE_DIR, "web")
+UI_FILE = os.path.join(BASE_DIR, "app", "ui", "main.ui")
+CONFIG_PATH = os.path.join(BASE_DIR, "config", "settings.toml")
 
 os.environ["QTWEBENGINE_DICTIONARIES_PATH"] = "/dev/null"
 
-# Nên load config từ file thay vì hardcode
-import tomllib
-from pathlib import Path
+logger = logging.getLogger(__name__)
+
+# Chế độ profile: thoát sau khi trang load xong (hoặc sau ngần này ms)
+PROFILE_EXIT_TIMEOUT_MS = 15000
+
 
 def load_config():
-    config_path = Path(__file__).parent.parent / "config" / "settings.toml"
-    if config_path.exists():
-        with open(config_path, "rb") as f:
-            return tomllib.load(f)
-    return {}
-
-config = load_config()
-port = config.get("port", "COM5")
-baudrate = config.get("baudrate", 9600)
-
-# Nên dùng context manager cho HTTP server
-from contextlib import contextmanager
-
-@contextmanager
-def http_server(web_dir, port=8000):
-    process = subprocess.Popen(
-        [sys.executable, "-m", "http.server", str(port)],
-        cwd=web_dir,
-        stdout=subprocess.DEVNULL, 
-        stderr=subprocess.DEVNULL
-    )
-    try:
-        yield process
-    finally:
-        process.terminate()
-        process.wait(timeout=2)
+    if not os.path.exists(CONFIG_PATH):
+        return {}
+    import tomllib
+    with open(CONFIG_PATH, "rb") as f:
+        return tomllib.load(f)
+
+
+def _setup_ui(window):
+    """Class UI biên dịch sẵn (python -m app.ui.build); thiếu hoặc không khớp main.ui thì parse .ui."""
+    from app.ui.build import is_stale
+    if not is_stale(UI_FILE):
+        from app.ui.ui_main import Ui_GroundStation
+        window.ui = Ui_GroundStation()
+        window.ui.setupUi(window)
+        return
+    logger.warning("app/ui/ui_main.py thiếu hoặc không khớp main.ui (chạy python -m app.ui.build); dùng uic.loadUi")
+    from PyQt6 import uic
+    uic.loadUi(UI_FILE, window)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, config=None, profile=None):
         super().__init__()
-        uic.loadUi(os.path.join(BASE_DIR, "app", "ui", "main.ui"), self)
+        self.config = config or {}
+        self.profile = profile or StartupProfile()
+        self.web = None
+        self.stream = None
+        self.bridge = None
+        self.browser = None
+        self.fleet = None
+        self.firmware = None
+        self.controller = None
+        self.recorders = []
+        self._connect_thread = None
+
+        _setup_ui(self)
+
+        # Stretch
+        main_layout = self.centralWidget().layout()
+        if isinstance(main_layout, QHBoxLayout):
+            main_layout.setStretch(0, 0)
+            main_layout.setStretch(1, 10)
 
-        # 1) HTTP server phục vụ thư mục web/
-        self.http_process = subprocess.Popen(
-            [sys.executable, "-m", "http.server", "8000"],
-            cwd=WEB_DIR,
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
-        print("HTTP server at http://localhost:8000")
+    def finish_startup(self):
+        """Chạy ngay sau frame đầu (QTimer 0 sau show()): phần nặng của khởi động."""
+        config = self.config
+        self.profile.mark("first_frame")
+
+        # 0) Quét cổng serial ở thread nền, chạy song song với các bước dưới
+        from app.devices import get_watcher
+        devices = get_watcher(config.get("port_poll_interval", 1.0))
+
+        # 1) Web server nhúng phục vụ thư mục web/ (start() trả về khi đã listen)
+        from app.webserver import WebServer
+        from app.wsstream import WS_PATH, TelemetryStream
+        self.web = WebServer(WEB_DIR, host=config.get("http_host", "127.0.0.1"), port=config.get("http_port", 8000))
+        self.stream = TelemetryStream() if config.get("ws_telemetry", True) else None
+        if self.stream is not None:
+            self.web.add_route(WS_PATH, self.stream.handle)
+        # Prometheus: http://<http_host>:<http_port>/metrics
+        from app.metrics import get_registry
+        metrics = get_registry()
+        self.web.add_route("/metrics", metrics.handle)
+        web = self.web
+        for key in ("requests", "not_modified", "bytes_out"):
+            metrics.counter_fn(f"gcs_web_{key}_total", lambda k=key: web.stats[k], f"Web server: {key}")
+        self.web.start()
+        self.profile.mark("web_server")
 
         # 2) Bridge
-        self.bridge = LoraBridge()
+        from app.lora_bridge import LoraBridge
+        self.bridge = LoraBridge(telemetry_rate_hz=config.get("telemetry_rate_hz", 25.0))
+        self.bridge.set_metrics(metrics, config.get("metrics_interval", 2.0))
 
         # 3) Browser + channel
+        from PyQt6.QtWebChannel import QWebChannel
+        from PyQt6.QtWebEngineWidgets import QWebEngineView
         self.browser = QWebEngineView(self)
         self.channel = QWebChannel()
         self.channel.registerObject("bridge", self.bridge)
         self.browser.page().setWebChannel(self.channel)
+        self.browser.loadFinished.connect(self._on_page_loaded)
 
         # 4) Load login.html first
-        QTimer.singleShot(300, lambda: self.browser.load(QUrl("http://localhost:8000/login.html")))
+        self.browser.load(QUrl(f"{self.web.url}/login.html"))
 
         # 5) Replace placeholder
         placeholder = self.findChild(QWidget, "load_map_widget")
@@ -77,29 +115,121 @@ class MainWindow(QMainWindow):
             layout = placeholder.parent().layout()
             layout.replaceWidget(placeholder, self.browser)
             placeholder.deleteLater()
+        self.profile.mark("browser")
+
+        # 6) Controller cho từng drone (pyserial, NumPy qua app.geo chỉ được import từ đây)
+        from app.fleet import VehicleManager
+        from app.geo import LocalFrame
+        from app.geofence import Geofence
+        frame = LocalFrame.from_config(config)
+        geofence = Geofence.from_config(config.get("geofence"), frame)
+        # port None -> dò cổng trong thread kết nối, không chặn GUI
+        self.fleet = VehicleManager.from_config(config, bridge=self.bridge, stream=self.stream,
+                                                protocol=config.get("protocol", "json"),
+                                                transport=config.get("transport", "thread"),
+                                                hb_timeout=config.get("hb_timeout", 6.0),
+                                                mission_upload=config.get("mission_upload", "chunked"),
+                                                frame=frame, geofence=geofence,
+                                                devices=devices if config.get("auto_reconnect", True) else None)
+        self.bridge.set_fleet(self.fleet)
+        self.controller = self.fleet.controller
+
+        # 7) Flight recorder (1 file mỗi drone)
+        rec_cfg = config.get("recorder", {})
+        if rec_cfg.get("enabled", False):
+            from app.recorder import FlightRecorder
+            rec_dir = os.path.join(BASE_DIR, rec_cfg.get("dir", "logs"))
+            for vid, ctl in self.fleet.items():
+                prefix = "flight" if len(self.fleet) == 1 else f"flight-v{vid}"
+                recorder = FlightRecorder.open_new(rec_dir, prefix=prefix)
+                ctl.set_recorder(recorder)
+                self.recorders.append((ctl, recorder))
+                logger.info(f"Ghi flight log vehicle {vid} vào {recorder.path}")
+
+        # 8) Tham số: cache trên đĩa theo (vehicle, firmware), đồng bộ nền khi mở màn hình Parameters
+        from app.params import ParamManager
+        param_dir = os.path.join(BASE_DIR, config.get("param_cache_dir", "cache/params"))
+        for vid, ctl in self.fleet.items():
+            ctl.set_params(ParamManager(ctl, param_dir, on_update=lambda info, vid=vid:
+                                        self.bridge.update_parameters(dict(info, vehicle=vid))))
+
+        # Lịch sử telemetry trong bộ nhớ (vệt bay, biểu đồ) cho từng drone
+        from app.history import TelemetryHistory
+        for _, ctl in self.fleet.items():
+            ctl.set_history(TelemetryHistory.from_config(config.get("history")))
+
+        # Thử động cơ: stream gộp theo nhịp cố định + dead-man (bảng [motors])
+        from app.actuators import ActuatorStreamer
+        for vid, ctl in self.fleet.items():
+            ctl.set_actuators(ActuatorStreamer.from_config(
+                ctl, config.get("motors"),
+                on_status=lambda info, vid=vid: self.bridge.update_motor_status(dict(info, vehicle=vid))))
+
+        # Firmware: tải/nạp ở thread nền, tiến độ qua firmwareProgress
+        from app.firmware import FirmwareFlasher
+        fw_cfg = config.get("firmware") or {}
+        self.firmware = FirmwareFlasher(os.path.join(BASE_DIR, fw_cfg.get("cache_dir", "cache/firmware")),
+                                        mirror=fw_cfg.get("mirror"))
+        self.bridge.set_firmware(self.firmware)
+        self.profile.mark("controller")
+
+        # 9) Dò cổng + mở serial ngoài GUI thread
+        self._connect_thread = threading.Thread(target=self._connect, name="serial-connect", daemon=True)
+        self._connect_thread.start()
+
+    def _connect(self):
+        self.fleet.connect()
+        self.profile.mark("serial_connect")
+
+    def _on_page_loaded(self, ok):
+        self.profile.mark("page_loaded")
+        if self.profile.enabled:
+            self.profile.finish()
+            self.close()
 
-        # 6) Stretch
-        main_layout = self.centralWidget().layout()
-        if isinstance(main_layout, QHBoxLayout):
-            main_layout.setStretch(0, 0)
-            main_layout.setStretch(1, 10)
+    def closeEvent(self, event):
+        if self._connect_thread is not None:
+            self._connect_thread.join(timeout=2.0)
+        for ctl, recorder in self.recorders:
+            ctl.set_recorder(None)
+            recorder.close()
+        if self.fleet is not None:
+            for _, ctl in self.fleet.items():
+                if ctl.params is not None:
+                    ctl.params.close()
+                if ctl.actuators is not None:
+                    ctl.actuators.close()
+            self.fleet.close()
+        if self.firmware is not None:
+            self.firmware.cancel()
+        if self.web is not None:
+            self.web.stop()
+        event.accept()
 
-        # 7) Controller
-        self.controller = GroundController(port='COM5', baudrate=9600, gui_bridge=self.bridge)
 
-        self.bridge.set_controller(self.controller)
-        self.controller.connect()
-        
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    config = load_config()
+    from app.log import setup_logging
+    setup_logging(config)
+    profile = StartupProfile(PROFILE_FLAG in argv, config.get("startup_budget_ms", 1500.0))
+    profile.mark("config")
 
-    def closeEvent(self, event):
-        if hasattr(self, 'http_process'):
-            self.http_process.terminate()
-            try: self.http_process.wait(timeout=2)
-            except Exception: self.http_process.kill()
-        event.accept()
+    # QtWebEngine yêu cầu cờ này trước khi tạo QApplication (vì chưa import QtWebEngineWidgets)
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication([a for a in argv if a != PROFILE_FLAG])
+    profile.mark("qapplication")
 
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    w = MainWindow()
+    w = MainWindow(config, profile)
+    profile.mark("window")
     w.show()
-    sys.exit(app.exec())
+    QTimer.singleShot(0, w.finish_startup)
+    if profile.enabled:
+        QTimer.singleShot(PROFILE_EXIT_TIMEOUT_MS, lambda: (profile.finish(), w.close()))
+    code = app.exec()
+    profile.finish()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Metrics của trạm mặt đất: counter, gauge, histogram bucket cố định.
+
+- Cập nhật rẻ cho đường nóng: ``Counter.inc()`` / ``Histogram.observe()`` chỉ cộng số trên
+  object đã tạo sẵn, không khoá, không tra dict (mỗi series thường chỉ 1 thread ghi:
+  reader/ingest của 1 drone hoặc thread TX; lệch vài đơn vị khi 2 thread cùng ghi là chấp nhận được)
+- Số liệu module khác đã tự đếm (RxBuffer, LinkMonitor, TxScheduler, IngestPipeline...) đăng ký
+  bằng ``counter_fn`` / ``gauge_fn``: chỉ đọc lúc snapshot, đường nóng không tốn thêm gì
+- Xuất: ``render_prometheus()`` (route ``/metrics`` trên WebServer) và ``snapshot()`` (dict,
+  LoraBridge phát định kỳ qua ``metricsUpdated`` cho panel chẩn đoán)
+
+    reg = get_registry()
+    rx = reg.counter("gcs_rx_bytes_total", "Bytes đọc từ serial", vehicle="1")
+    rx.inc(len(chunk))
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Giây; hợp với decode/dispatch (µs..ms) lẫn ACK qua LoRa (vài trăm ms..giây)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("labels", "value")
+
+    def __init__(self, labels: LabelKey):
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, n: float = 1):
+        self.value += n
+
+
+class Gauge:
+    __slots__ = ("labels", "value")
+
+    def __init__(self, labels: LabelKey):
+        self.labels = labels
+        self.value = 0.0
+
+    def set(self, v: float):
+        self.value = v
+
+    def inc(self, n: float = 1):
+        self.value += n
+
+    def dec(self, n: float = 1):
+        self.value -= n
+
+
+class Histogram:
+    __slots__ = ("labels", "bounds", "counts", "sum", "count")
+
+    def __init__(self, labels: LabelKey, bounds: Sequence[float]):
+        self.labels = labels
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)      # bucket cuối = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v: float):
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Ước lượng phân vị (nội suy tuyến tính trong bucket, như histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                if i == len(self.bounds):
+                    return self.bounds[-1] if self.bounds else None
+                upper = self.bounds[i]
+                return lower + (upper - lower) * (rank - seen) / c
+            seen += c
+            if i < len(self.bounds):
+                lower = self.bounds[i]
+        return self.bounds[-1] if self.bounds else None
+
+
+class _FuncSeries:
+    __slots__ = ("labels", "fn")
+
+    def __init__(self, labels: LabelKey, fn: Callable[[], Optional[float]]):
+        self.labels = labels
+        self.fn = fn
+
+    @property
+    def value(self) -> Optional[float]:
+        try:
+            return self.fn()
+        except Exception:
+            return None
+
+
+class _Family:
+    def __init__(self, name: str, kind: str, help: str):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.series: Dict[LabelKey, Any] = {}
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, kind: str, help: str, labels: Dict[str, Any], factory):
+        key = _key(labels)
+        with self._lock:
+            fam = self._families.get(name)
+            if fam is None:
+                fam = self._families[name] = _Family(name, kind, help)
+            elif fam.kind != kind:
+                raise ValueError(f"metric {name} đã đăng ký kiểu {fam.kind}")
+            s = fam.series.get(key)
+            if s is None or isinstance(s, _FuncSeries):
+                s = fam.series[key] = factory(key)
+            return s
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get(name, COUNTER, help, labels, Counter)
+
+    def gauge(self, name: str, help: str = "", **labels) -> Gauge:
+        return self._get(name, GAUGE, help, labels, Gauge)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  **labels) -> Histogram:
+        return self._get(name, HISTOGRAM, help, labels, lambda key: Histogram(key, buckets))
+
+    def counter_fn(self, name: str, fn: Callable[[], Optional[float]], help: str = "", **labels):
+        """Counter đọc từ số liệu có sẵn lúc snapshot (fn trả None = bỏ qua series)."""
+        return self._get(name, COUNTER, help, labels, lambda key: _FuncSeries(key, fn))
+
+    def gauge_fn(self, name: str, fn: Callable[[], Optional[float]], help: str = "", **labels):
+        return self._get(name, GAUGE, help, labels, lambda key: _FuncSeries(key, fn))
+
+    def remove(self, **labels):
+        """Bỏ mọi series có đủ các nhãn này (vd. vehicle="2" khi gỡ drone)."""
+        want = set(_key(labels))
+        with self._lock:
+            for fam in self._families.values():
+                for key in [k for k in fam.series if want <= set(k)]:
+                    del fam.series[key]
+
+    def _families_copy(self) -> List[Tuple[_Family, List[Any]]]:
+        with self._lock:
+            return [(f, list(f.series.values())) for _, f in sorted(self._families.items())]
+
+    # ---- xuất ----
+    def snapshot(self) -> Dict[str, Any]:
+        """{name: {"type", "help", "series": [{"labels", "value"} | {"labels", "count", "sum", "p50", "p99"}]}}"""
+        out: Dict[str, Any] = {}
+        for fam, series in self._families_copy():
+            rows = []
+            for s in series:
+                labels = dict(s.labels)
+                if isinstance(s, Histogram):
+                    p50, p99 = s.quantile(0.5), s.quantile(0.99)
+                    rows.append({"labels": labels, "count": s.count, "sum": s.sum,
+                                 "p50": p50, "p99": p99})
+                else:
+                    v = s.value
+                    if v is not None:
+                        rows.append({"labels": labels, "value": v})
+            out[fam.name] = {"type": fam.kind, "help": fam.help, "series": rows}
+        return out
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for fam, series in self._families_copy():
+            if fam.help:
+                lines.append(f"# HELP {fam.name} {_escape_help(fam.help)}")
+            lines.append(f"# TYPE {fam.name} {fam.kind}")
+            for s in series:
+                if isinstance(s, Histogram):
+                    cum = 0
+                    for bound, c in zip(s.bounds + (math.inf,), s.counts):
+                        cum += c
+                        le = "+Inf" if bound == math.inf else repr(float(bound))
+                        lines.append(f"{fam.name}_bucket{_labels(s.labels, ('le', le))} {cum}")
+                    lines.append(f"{fam.name}_sum{_labels(s.labels)} {_num(s.sum)}")
+                    lines.append(f"{fam.name}_count{_labels(s.labels)} {s.count}")
+                else:
+                    v = s.value
+                    if v is not None:
+                        lines.append(f"{fam.name}{_labels(s.labels)} {_num(v)}")
+        return "\n".join(lines) + "\n"
+
+    def handle(self, request):
+        """Route WebServer: ``server.add_route("/metrics", registry.handle)``."""
+        if request.method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        return 200, {"Content-Type": CONTENT_TYPE, "Cache-Control": "no-store"}, \
+            self.render_prometheus().encode("utf-8")
+
+
+def _escape_help(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+
+def _escape_label(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v: float) -> str:
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    if isinstance(v, int):
+        return str(v)
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+_registry: Optional[Registry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> Registry:
+    """Registry dùng chung của tiến trình."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = Registry()
+        return _registry
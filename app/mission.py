@@ -0,0 +1,409 @@
+"""
+Mission upload theo chunk: resume được, gửi delta, waypoint lượng tử hoá.
+
+Waypoint được lượng tử hoá về cm và mã hoá zigzag-varint theo hiệu với điểm trước
+(~6-8 byte/điểm thay vì ~40 byte JSON). Mission mới được so với mission drone đã
+xác nhận gần nhất; nếu delta (giữ/xoá/chèn) nhỏ hơn bản đầy đủ thì chỉ gửi delta.
+
+Blob (full hoặc delta) được cắt thành chunk cố định ``chunk_size`` byte, mỗi chunk
+có CRC-16 riêng và được ACK riêng qua TX scheduler (gửi lại từng chunk khi mất).
+Trình tự trên dây (JSON hoặc MSG_MISSION khi binary):
+
+    begin {id, size, chunks, crc, base}   -> ACK
+    chunk {id, i, data, crc} x N          -> ACK từng chunk (cửa sổ ``window`` chunk)
+    end   {id, crc}                       -> ACK khi drone ráp + kiểm CRC mission OK
+
+Upload lỗi giữa chừng giữ lại chunk đã ACK; gọi lại ``upload`` với cùng mission
+sẽ gửi tiếp từ chunk chưa ACK đầu tiên.
+"""
+import base64
+import concurrent.futures
+import difflib
+import logging
+import threading
+import time
+import zlib
+from binascii import crc_hqx
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.commands import PRIO_BULK
+
+logger = logging.getLogger(__name__)
+
+QUANT = 100                 # 1 đơn vị = 1 cm
+CHUNK_SIZE = 96             # byte dữ liệu / chunk (vừa 1 gói LoRa kể cả header + base64)
+WINDOW = 4                  # số chunk chờ ACK cùng lúc
+MAX_MISSION_ID = 0xFFFF
+
+BLOB_FULL = 0
+BLOB_DELTA = 1
+
+OP_KEEP = 0
+OP_DELETE = 1
+OP_INSERT = 2
+
+QPoint = Tuple[int, int, int]
+
+
+# ================= Quantized waypoint encoding =================
+def quantize(waypoints: Sequence) -> List[QPoint]:
+    """Waypoint / dict x,y,z / tuple -> [(x_cm, y_cm, z_cm)]."""
+    out = []
+    for wp in waypoints:
+        if isinstance(wp, dict):
+            x, y, z = wp["x"], wp["y"], wp.get("z", 3.5)
+        elif isinstance(wp, (tuple, list)):
+            x, y, z = wp
+        else:
+            x, y, z = wp.x, wp.y, wp.z
+        out.append((int(round(float(x) * QUANT)), int(round(float(y) * QUANT)), int(round(float(z) * QUANT))))
+    return out
+
+
+def dequantize(points: Sequence[QPoint]) -> List[Tuple[float, float, float]]:
+    return [(x / QUANT, y / QUANT, z / QUANT) for x, y, z in points]
+
+
+def _put_varint(out: bytearray, v: int):
+    while v >= 0x80:
+        out.append((v & 0x7F) | 0x80)
+        v >>= 7
+    out.append(v)
+
+
+def _get_varint(buf: bytes, i: int) -> Tuple[int, int]:
+    v = shift = 0
+    while True:
+        if i >= len(buf):
+            raise ValueError("truncated varint")
+        b = buf[i]
+        i += 1
+        v |= (b & 0x7F) << shift
+        if b < 0x80:
+            return v, i
+        shift += 7
+
+
+def _zz(v: int) -> int:
+    return (v << 1) ^ (v >> 63)
+
+
+def _unzz(v: int) -> int:
+    return (v >> 1) ^ -(v & 1)
+
+
+def _put_points(out: bytearray, points: Sequence[QPoint], prev: QPoint = (0, 0, 0)):
+    px, py, pz = prev
+    for x, y, z in points:
+        _put_varint(out, _zz(x - px))
+        _put_varint(out, _zz(y - py))
+        _put_varint(out, _zz(z - pz))
+        px, py, pz = x, y, z
+
+
+def _get_points(buf: bytes, i: int, n: int, prev: QPoint = (0, 0, 0)) -> Tuple[List[QPoint], int]:
+    px, py, pz = prev
+    out = []
+    for _ in range(n):
+        dx, i = _get_varint(buf, i)
+        dy, i = _get_varint(buf, i)
+        dz, i = _get_varint(buf, i)
+        px, py, pz = px + _unzz(dx), py + _unzz(dy), pz + _unzz(dz)
+        out.append((px, py, pz))
+    return out, i
+
+
+def encode_full(points: Sequence[QPoint]) -> bytes:
+    out = bytearray([BLOB_FULL])
+    _put_varint(out, len(points))
+    _put_points(out, points)
+    return bytes(out)
+
+
+def encode_delta(base: Sequence[QPoint], points: Sequence[QPoint]) -> bytes:
+    """Chuỗi op giữ/xoá/chèn biến ``base`` thành ``points`` (sửa 1 điểm = xoá 1 + chèn 1)."""
+    out = bytearray([BLOB_DELTA])
+    _put_varint(out, len(base))
+    sm = difflib.SequenceMatcher(None, base, points, autojunk=False)
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag == "equal":
+            out.append(OP_KEEP)
+            _put_varint(out, i2 - i1)
+            continue
+        if i2 > i1:
+            out.append(OP_DELETE)
+            _put_varint(out, i2 - i1)
+        if j2 > j1:
+            out.append(OP_INSERT)
+            _put_varint(out, j2 - j1)
+            # điểm chèn mã hoá theo hiệu với điểm đứng trước trong mission mới
+            _put_points(out, points[j1:j2], points[j1 - 1] if j1 else (0, 0, 0))
+    return bytes(out)
+
+
+def decode_blob(blob: bytes, base: Optional[Sequence[QPoint]] = None) -> List[QPoint]:
+    """Giải blob full/delta; delta cần đúng mission ``base`` đã dùng khi mã hoá."""
+    if not blob:
+        raise ValueError("empty mission blob")
+    kind, i = blob[0], 1
+    if kind == BLOB_FULL:
+        n, i = _get_varint(blob, i)
+        points, i = _get_points(blob, i, n)
+    elif kind == BLOB_DELTA:
+        n_base, i = _get_varint(blob, i)
+        if base is None or len(base) != n_base:
+            raise ValueError("delta does not match base mission")
+        points, src = [], 0
+        while i < len(blob):
+            op = blob[i]
+            n, i = _get_varint(blob, i + 1)
+            if op == OP_KEEP:
+                points.extend(base[src:src + n])
+                src += n
+            elif op == OP_DELETE:
+                src += n
+            elif op == OP_INSERT:
+                new, i = _get_points(blob, i, n, points[-1] if points else (0, 0, 0))
+                points.extend(new)
+            else:
+                raise ValueError(f"bad delta op {op}")
+        if src != n_base:
+            raise ValueError("delta does not consume base mission")
+    else:
+        raise ValueError(f"bad mission blob kind {kind}")
+    if i != len(blob):
+        raise ValueError("trailing bytes in mission blob")
+    return points
+
+
+def mission_crc(points: Sequence[QPoint]) -> int:
+    """CRC-32 của bản full => 2 đầu so mission sau khi ráp (full hoặc delta)."""
+    return zlib.crc32(encode_full(points))
+
+
+def chunk_crc(data: bytes) -> int:
+    return crc_hqx(data, 0xFFFF)
+
+
+def split_chunks(blob: bytes, size: int = CHUNK_SIZE) -> List[bytes]:
+    return [blob[i:i + size] for i in range(0, len(blob), size)] or [b""]
+
+
+def chunk_data(msg: Dict) -> bytes:
+    """Dữ liệu chunk: bytes (frame binary) hoặc base64 (dòng JSON)."""
+    data = msg.get("data", b"")
+    return data if isinstance(data, (bytes, bytearray)) else base64.b64decode(data)
+
+
+# ================= Upload =================
+class MissionUpload:
+    """Trạng thái 1 lần upload; giữ lại sau lỗi để resume."""
+
+    def __init__(self, mission_id: int, points: List[QPoint], blob: bytes, base_id: int, chunk_size: int):
+        self.id = mission_id
+        self.points = points
+        self.crc = mission_crc(points)
+        self.blob = blob
+        self.base_id = base_id
+        self.chunks = split_chunks(blob, chunk_size)
+        self.acked = [False] * len(self.chunks)
+        self.future: Optional[concurrent.futures.Future] = None
+        self.started = 0.0
+        self.attempt = 0
+        # con trỏ cửa sổ gửi; đặt lại mỗi lần begin được ACK
+        self.cursor = 0
+        self.inflight = 0
+        self.ending = False
+        # CommandFuture chưa xong của lần gửi hiện tại; _fail huỷ hết
+        self.pending: Set = set()
+
+    @property
+    def delta(self) -> bool:
+        return self.base_id != 0
+
+    @property
+    def acked_count(self) -> int:
+        return sum(self.acked)
+
+    def progress(self, **extra) -> Dict:
+        return dict({"id": self.id, "sent": self.acked_count, "total": len(self.chunks),
+                     "bytes": len(self.blob), "delta": self.delta, "waypoints": len(self.points)}, **extra)
+
+
+class MissionUploader:
+    """
+    Gửi mission qua ``send(msg, priority) -> CommandFuture`` (GroundController.send_command).
+
+    on_progress(dict) được gọi sau mỗi chunk ACK và khi xong/lỗi.
+    """
+
+    def __init__(self, send: Callable, chunk_size: int = CHUNK_SIZE, window: int = WINDOW,
+                 on_progress: Optional[Callable[[Dict], None]] = None):
+        self.send = send
+        self.chunk_size = chunk_size
+        self.window = window
+        self.on_progress = on_progress
+
+        self.acked_points: Optional[List[QPoint]] = None     # mission drone đang giữ
+        self.acked_id = 0
+        self._current: Optional[MissionUpload] = None
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+    def reset(self):
+        """Quên mission drone đang giữ (vd. đổi drone / drone khởi động lại) -> lần sau gửi full."""
+        with self._lock:
+            self.acked_points = None
+            self.acked_id = 0
+            self._current = None
+
+    def _new_id(self) -> int:
+        self._next_id = self._next_id % MAX_MISSION_ID + 1
+        if self._next_id == self.acked_id:
+            self._next_id = self._next_id % MAX_MISSION_ID + 1
+        return self._next_id
+
+    def upload(self, waypoints: Sequence) -> concurrent.futures.Future:
+        """Bắt đầu (hoặc tiếp tục) upload; Future -> dict tóm tắt, lỗi nếu hết lượt gửi lại."""
+        points = quantize(waypoints)
+        with self._lock:
+            cur = self._current
+            if cur is not None and cur.points == points:
+                if cur.future is not None and not cur.future.done():
+                    return cur.future               # đang gửi đúng mission này
+                cur.attempt += 1
+                logger.info(f"Resume mission #{cur.id} từ chunk {cur.acked_count}/{len(cur.chunks)}")
+            else:
+                fut = concurrent.futures.Future()
+                if points == self.acked_points:
+                    fut.set_result({"id": self.acked_id, "bytes": 0, "chunks": 0, "unchanged": True})
+                    return fut
+                full = encode_full(points)
+                blob, base_id = full, 0
+                if self.acked_points is not None:
+                    delta = encode_delta(self.acked_points, points)
+                    if len(delta) < len(full):
+                        blob, base_id = delta, self.acked_id
+                cur = self._current = MissionUpload(self._new_id(), points, blob, base_id, self.chunk_size)
+                logger.info(f"Mission #{cur.id}: {len(points)} waypoint, {len(blob)} byte "
+                            f"({'delta từ #%d' % base_id if base_id else 'full'}), {len(cur.chunks)} chunk")
+            cur.future = concurrent.futures.Future()
+            cur.started = time.monotonic()
+            fut = cur.future
+
+        begin = {"mission": "begin", "id": cur.id, "size": len(cur.blob), "chunks": len(cur.chunks),
+                 "crc": zlib.crc32(cur.blob), "base": cur.base_id}
+        self._step(cur, self.send(begin, PRIO_BULK), self._on_begin)
+        return fut
+
+    # ---- state machine (chạy trong callback của CommandFuture) ----
+    # Mỗi lần gửi (upload / resume) có Future riêng trong cur.future; callback mang theo Future của
+    # lần gửi đã tạo ra nó và bị bỏ qua nếu lần đó đã xong hoặc đã bị resume thay thế
+    # (ACK / timeout muộn của lần trước không được đụng vào cửa sổ của lần sau).
+    @staticmethod
+    def _stale(cur: MissionUpload, fut: concurrent.futures.Future) -> bool:
+        return fut is not cur.future or fut.done()
+
+    def _step(self, cur: MissionUpload, cmd_fut, then: Callable, *args):
+        fut = cur.future
+        if cmd_fut is None:
+            self._fail(cur, RuntimeError("serial is not open"), fut)
+            return
+        with self._lock:
+            if self._stale(cur, fut):
+                cmd_fut.cancel()
+                return
+            cur.pending.add(cmd_fut)
+
+        def _done(f):
+            with self._lock:
+                cur.pending.discard(f)
+                if self._stale(cur, fut):
+                    return
+            if f.cancelled() or f.exception() is not None:
+                self._fail(cur, f.exception() if not f.cancelled() else RuntimeError("cancelled"), fut)
+                return
+            then(cur, fut, *args)
+
+        cmd_fut.add_done_callback(_done)
+
+    def _on_begin(self, cur: MissionUpload, fut: concurrent.futures.Future):
+        with self._lock:
+            if self._stale(cur, fut):
+                return
+            cur.cursor = cur.inflight = 0
+            cur.ending = False
+        self._pump(cur, fut)
+
+    def _pump(self, cur: MissionUpload, fut: concurrent.futures.Future):
+        """Giữ tối đa ``window`` chunk chờ ACK; hết chunk thì gửi end."""
+        to_send = []
+        finish = False
+        with self._lock:
+            if self._stale(cur, fut):
+                return
+            while cur.inflight < self.window and cur.cursor < len(cur.chunks):
+                i = cur.cursor
+                cur.cursor += 1
+                if cur.acked[i]:
+                    continue
+                cur.inflight += 1
+                to_send.append(i)
+            if not to_send and cur.inflight == 0 and cur.cursor >= len(cur.chunks) and not cur.ending:
+                cur.ending = finish = True
+        for i in to_send:
+            data = cur.chunks[i]
+            msg = {"mission": "chunk", "id": cur.id, "i": i, "crc": chunk_crc(data),
+                   "data": base64.b64encode(data).decode("ascii")}
+            self._step(cur, self.send(msg, PRIO_BULK), self._on_chunk, i)
+        if finish:
+            self._step(cur, self.send({"mission": "end", "id": cur.id, "crc": cur.crc}, PRIO_BULK), self._on_end)
+
+    def _on_chunk(self, cur: MissionUpload, fut: concurrent.futures.Future, i: int):
+        with self._lock:
+            if self._stale(cur, fut):
+                return
+            cur.acked[i] = True
+            cur.inflight -= 1
+        self._progress(cur.progress())
+        self._pump(cur, fut)
+
+    def _on_end(self, cur: MissionUpload, fut: concurrent.futures.Future):
+        # future chỉ được hoàn tất trong lock: _fail (timeout / lỗi) có thể chạy cùng lúc ở thread khác
+        with self._lock:
+            if self._stale(cur, fut):
+                return
+            self.acked_points = cur.points
+            self.acked_id = cur.id
+            if self._current is cur:
+                self._current = None
+            summary = cur.progress(ok=True, elapsed_s=round(time.monotonic() - cur.started, 3),
+                                   resumed=cur.attempt)
+            logger.info(f"Mission #{cur.id} đã được drone xác nhận ({summary['bytes']} byte, {summary['elapsed_s']} s)")
+            self._progress(summary)
+            fut.set_result(summary)
+
+    def _fail(self, cur: MissionUpload, error: BaseException, fut: concurrent.futures.Future):
+        with self._lock:
+            if self._stale(cur, fut):
+                return
+            if (cur.ending or (cur.delta and not cur.acked_count)) and self._current is cur:
+                # drone không ráp được / không có base của delta -> lần sau gửi full từ đầu
+                self._current = None
+                self.acked_points = None
+                self.acked_id = 0
+            cur.ending = False
+            logger.warning(f"Upload mission #{cur.id} lỗi ({cur.acked_count}/{len(cur.chunks)} chunk): {error}")
+            self._progress(cur.progress(ok=False, error=str(error)))
+            fut.set_exception(error)
+            # chunk còn chờ ACK của lần này: bỏ khỏi hàng đợi TX (callback của chúng thấy fut đã xong)
+            pending, cur.pending = cur.pending, set()
+            for cmd_fut in pending:
+                cmd_fut.cancel()
+
+    def _progress(self, info: Dict):
+        if self.on_progress:
+            try:
+                self.on_progress(info)
+            except Exception as e:
+                logger.error(f"Mission progress callback error: {e}")
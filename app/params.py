@@ -0,0 +1,444 @@
+"""
+Tham số vehicle: cache trên đĩa + đồng bộ từng phần qua link chậm.
+
+Tải vài trăm tham số qua LoRa 9600 baud mất vài phút, nên:
+- Cache JSON theo (vehicle, firmware) trong ``param_cache_dir``; màn hình Parameters
+  đọc cache ngay lập tức, đồng bộ chạy nền rồi báo các tham số đổi qua ``on_update``
+- Drone trả hash cả bảng; khớp cache thì xong sau 1 round-trip. Không khớp thì so hash
+  từng bucket (tham số chia bucket theo crc32(tên) nên ổn định khi thêm/bớt tham số)
+  và chỉ tải bucket khác
+- Ghi theo lô: ``stage()`` gom thay đổi ở GCS, ``commit()`` gửi các message "set" cùng
+  ``tx`` rồi 1 "commit"; drone áp dụng cả lô một lần và trả hash mới
+
+Giao thức (dòng JSON; mọi message có rid, trả lời mang cùng rid nên cũng là ACK)::
+
+    {"param": "info"}                          -> {"param": {"op": "info", "fw", "uid"?, "count", "hash"}}
+    {"param": "hashes", "buckets": B}          -> {"param": {"op": "hashes", "buckets": B, "hashes": [..]}}
+    {"param": "get", "bucket": i, "buckets": B} -> {"param": {"op": "values", "bucket": i, "values": {..}}}
+    {"param": "set", "tx": n, "values": {..}}  -> ACK (drone chỉ giữ tạm)
+    {"param": "commit", "tx": n}               -> {"param": {"op": "commit", "tx": n, "hash", "applied": [..]}}
+
+Chưa có dạng frame binary: cần ``protocol = "json"``.
+"""
+import concurrent.futures
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.commands import PRIO_BULK
+
+logger = logging.getLogger(__name__)
+
+PARAMS_PER_BUCKET = 8       # ~8 tham số / bucket -> 1 reply "values" vừa 1 gói LoRa
+MAX_BUCKETS = 256
+SET_PER_MESSAGE = 8
+WINDOW = 4                  # số request chờ trả lời cùng lúc
+REPLY_TIMEOUT = 15.0
+REPLY_BYTES_PER_PARAM = 32  # ~"NAME": value, trong JSON trả lời
+CACHE_VERSION = 1
+
+
+# ================= Hash (drone và GCS tính giống nhau) =================
+def canonical(value) -> str:
+    """Dạng chuỗi để hash: int giữ nguyên, float theo độ chính xác float32."""
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return format(float(value), ".7g")
+
+
+def bucket_of(name: str, buckets: int) -> int:
+    return zlib.crc32(name.encode("utf-8")) % buckets
+
+
+def buckets_for(count: int) -> int:
+    """Số bucket (lũy thừa 2) sao cho mỗi bucket ~PARAMS_PER_BUCKET tham số."""
+    b = 1
+    while b < MAX_BUCKETS and b * PARAMS_PER_BUCKET < count:
+        b <<= 1
+    return b
+
+
+def _entries_crc(items: Iterable) -> int:
+    crc = 0
+    for name, value in sorted(items):
+        crc = zlib.crc32(f"{name}={canonical(value)}\n".encode("utf-8"), crc)
+    return crc
+
+
+def table_hash(values: Dict[str, Any]) -> int:
+    return _entries_crc(values.items())
+
+
+def bucket_hashes(values: Dict[str, Any], buckets: int) -> List[int]:
+    parts: List[List] = [[] for _ in range(buckets)]
+    for name, value in values.items():
+        parts[bucket_of(name, buckets)].append((name, value))
+    return [_entries_crc(p) for p in parts]
+
+
+def param_type(value) -> str:
+    return "FLOAT" if isinstance(value, float) else "INT32"
+
+
+def parse_value(text, like=None):
+    """Giá trị từ UI (chuỗi) -> int/float; theo kiểu của giá trị hiện tại nếu có."""
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        v = text
+    else:
+        s = str(text).strip()
+        v = float(s) if re.search(r"[.eE]|nan|inf", s) else int(s)
+    if isinstance(like, float):
+        return float(v)
+    if isinstance(like, int) and float(v).is_integer():
+        return int(v)
+    return v
+
+
+class ParamError(RuntimeError):
+    """Drone trả lời sai / không trả lời trong lúc đồng bộ hoặc commit."""
+
+
+# ================= Cache trên đĩa =================
+def _slug(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", s)[:64] or "unknown"
+
+
+class ParamCache:
+    """1 file JSON / (vehicle, firmware); ghi atomically (tmp + replace)."""
+
+    def __init__(self, directory: str, vehicle: str):
+        self.directory = directory
+        self.vehicle = _slug(vehicle)
+        self.fw: Optional[str] = None
+        self.uid: Optional[str] = None
+        self.values: Dict[str, Any] = {}
+        self.hash: Optional[int] = None
+        self.synced_at: Optional[float] = None
+
+    def path(self, fw: Optional[str] = None) -> str:
+        return os.path.join(self.directory, f"{self.vehicle}-{_slug(fw or self.fw or 'unknown')}.json")
+
+    def _read(self, path: str) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Bỏ qua cache tham số hỏng {path}: {e}")
+            return False
+        if data.get("version") != CACHE_VERSION or not isinstance(data.get("values"), dict):
+            return False
+        self.fw, self.uid = data.get("fw"), data.get("uid")
+        self.values = data["values"]
+        self.hash = data.get("hash")
+        self.synced_at = data.get("synced_at")
+        return True
+
+    def load_latest(self) -> bool:
+        """Cache mới nhất của vehicle (chưa biết firmware lúc khởi động)."""
+        files = sorted(glob.glob(os.path.join(self.directory, f"{glob.escape(self.vehicle)}-*.json")),
+                       key=os.path.getmtime, reverse=True)
+        return any(self._read(p) for p in files)
+
+    def load(self, fw: str) -> bool:
+        path = self.path(fw)
+        return os.path.exists(path) and self._read(path)
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "vehicle": self.vehicle, "fw": self.fw, "uid": self.uid,
+                       "hash": self.hash, "synced_at": self.synced_at, "values": self.values},
+                      f, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+# ================= Manager =================
+class ParamManager:
+    STATE_EMPTY = "empty"
+    STATE_CACHED = "cached"         # đang hiển thị cache, chưa đối chiếu với drone
+    STATE_SYNCING = "syncing"
+    STATE_SYNCED = "synced"
+    STATE_ERROR = "error"
+
+    def __init__(self, controller, cache_dir: str, vehicle: Optional[str] = None,
+                 on_update: Optional[Callable[[Dict], None]] = None, reply_timeout: float = REPLY_TIMEOUT):
+        """
+        controller -> GroundController (send_command + chuyển reply "param" về on_reply)
+        cache_dir  -> thư mục cache; vehicle -> khoá cache (mặc định "v<vehicle_id>")
+        on_update  -> callback(dict) khi trạng thái / giá trị đổi (chạy ở thread "params")
+        """
+        self.controller = controller
+        if vehicle is None:
+            vehicle = f"v{getattr(controller, 'vehicle_id', None) or 1}"
+        self.cache = ParamCache(cache_dir, vehicle)
+        self.on_update = on_update
+        self.reply_timeout = reply_timeout
+        self.state = self.STATE_CACHED if self.cache.load_latest() else self.STATE_EMPTY
+        self.pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # rid đang chờ trả lời -> message (None tới khi nhận); chỉ rid đã đăng ký mới được lưu
+        self._replies: Dict[int, Optional[Dict]] = {}
+        self._reply_lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="params")
+        self._sync_future: Optional[concurrent.futures.Future] = None
+        self._tx = 0
+        self.stats = {"syncs": 0, "requests": 0, "buckets_fetched": 0, "commits": 0, "last_sync_s": None}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---- đọc (không chạm link) ----
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            values = dict(self.cache.values)
+            pending = dict(self.pending)
+        out = []
+        for name in sorted(set(values) | set(pending)):
+            v = values.get(name)
+            row = {"name": name, "value": canonical(v) if v is not None else "",
+                   "type": param_type(v if v is not None else pending[name])}
+            if name in pending:
+                row["pending"] = canonical(pending[name])
+            out.append(row)
+        return out
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "fw": self.cache.fw, "count": len(self.cache.values),
+                    "pending": len(self.pending), "synced_at": self.cache.synced_at, **self.stats}
+
+    def _emit(self, **extra):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(dict(self.status(), **extra))
+        except Exception as e:
+            logger.error(f"Param update callback error: {e}")
+
+    # ---- reply từ drone (thread RX / ingest) ----
+    def on_reply(self, msg: Dict[str, Any], rid: Optional[int]):
+        if rid is None:
+            return
+        with self._reply_lock:
+            if rid in self._replies:                # trả lời muộn / của request đã bỏ: không giữ
+                self._replies[rid] = msg
+
+    def _ack_timeout(self, reply_bytes: int) -> Optional[float]:
+        """Hạn ACK đủ cho ``WINDOW`` trả lời dài xếp hàng trên link chậm (tránh gửi lại vô ích)."""
+        baud = getattr(self.controller, "baudrate", None)
+        tx = getattr(self.controller, "tx", None)
+        if not baud or tx is None:
+            return None
+        return tx.ack_timeout + WINDOW * reply_bytes * 10.0 / baud
+
+    def _request(self, msg: Dict[str, Any], reply_bytes: int = 0):
+        # đăng ký rid trước khi gửi: trả lời có thể về trước khi send_command trả Future
+        rid = self.controller.next_rid()
+        with self._reply_lock:
+            self._replies[rid] = None
+        try:
+            fut = self.controller.send_command(msg, PRIO_BULK, timeout=self._ack_timeout(reply_bytes), rid=rid)
+        except BaseException:
+            self._forget(rid)
+            raise
+        if fut is None:
+            self._forget(rid)
+            raise ParamError("serial chưa mở")
+        self.stats["requests"] += 1
+        return fut
+
+    def _forget(self, rid: int) -> Optional[Dict]:
+        with self._reply_lock:
+            return self._replies.pop(rid, None)
+
+    def _reply(self, fut, op: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            fut.result(timeout=self.reply_timeout)
+        except Exception as e:
+            raise ParamError(f"{fut.name or 'param'}: {e!r}") from None
+        finally:
+            reply = self._forget(fut.rid)
+        if op is not None and (reply is None or reply.get("op") != op):
+            raise ParamError(f"trả lời không hợp lệ cho {op}: {reply!r}")
+        return reply or {}
+
+    def _call(self, msg: Dict[str, Any], op: Optional[str] = None, reply_bytes: int = 0) -> Dict[str, Any]:
+        return self._reply(self._request(msg, reply_bytes), op)
+
+    def _call_many(self, msgs: List[Dict[str, Any]], op: Optional[str] = None,
+                   reply_bytes: int = 0) -> List[Dict[str, Any]]:
+        """Gửi lần lượt, giữ tối đa WINDOW request chờ trả lời."""
+        out, inflight = [], []
+        try:
+            for msg in msgs:
+                inflight.append(self._request(msg, reply_bytes))
+                if len(inflight) >= WINDOW:
+                    out.append(self._reply(inflight.pop(0), op))
+            while inflight:
+                out.append(self._reply(inflight.pop(0), op))
+        finally:
+            # 1 request lỗi -> bỏ cả lô: huỷ phần còn chờ, không giữ rid của chúng
+            for f in inflight:
+                f.cancel()
+                self._forget(f.rid)
+        return out
+
+    # ---- đồng bộ ----
+    def sync(self, force: bool = False) -> concurrent.futures.Future:
+        """Đồng bộ nền; gọi lại khi đang chạy trả về cùng Future. force -> tải lại mọi bucket."""
+        with self._lock:
+            if self._sync_future is not None and not self._sync_future.done():
+                return self._sync_future
+            self._sync_future = self._executor.submit(self._sync, force)
+            return self._sync_future
+
+    def _sync(self, force: bool) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        with self._lock:
+            self.state = self.STATE_SYNCING
+        self._emit()
+        try:
+            changed = self._sync_once(force)
+        except Exception as e:
+            with self._lock:
+                self.state = self.STATE_ERROR
+            logger.warning(f"Đồng bộ tham số lỗi: {e}")
+            self._emit(error=str(e))
+            raise
+        dt = time.monotonic() - t0
+        self.stats["syncs"] += 1
+        self.stats["last_sync_s"] = round(dt, 3)
+        with self._lock:
+            self.state = self.STATE_SYNCED
+            values = self.cache.values
+            rows = [{"name": n, "value": canonical(values[n]), "type": param_type(values[n])}
+                    for n in changed if n in values]
+            removed = [n for n in changed if n not in values]
+        logger.info(f"Đồng bộ {len(values)} tham số ({self.cache.fw}) trong {dt:.2f} s, {len(changed)} thay đổi")
+        self._emit(changed=rows, removed=removed)
+        return {"changed": len(changed), "elapsed_s": dt}
+
+    def _sync_once(self, force: bool) -> List[str]:
+        info = self._call({"param": "info"}, "info")
+        fw, uid, count, remote_hash = info.get("fw") or "unknown", info.get("uid"), info.get("count", 0), info.get("hash")
+
+        with self._lock:
+            cache = self.cache
+            if cache.fw != fw and not cache.load(fw):
+                logger.info(f"Chưa có cache tham số cho firmware {fw}")
+                cache.fw, cache.values, cache.hash = fw, {}, None
+            if uid is not None and cache.uid not in (None, uid):
+                logger.info(f"Drone khác (uid {cache.uid} -> {uid}): bỏ cache tham số")
+                cache.values, cache.hash = {}, None
+            cache.uid = uid
+            old = dict(cache.values)
+
+        if not force and old and remote_hash is not None and table_hash(old) == remote_hash:
+            self._save(old, remote_hash)
+            return []
+
+        buckets = buckets_for(count)
+        if force or not old:
+            need = list(range(buckets))
+        else:
+            remote = self._call({"param": "hashes", "buckets": buckets}, "hashes",
+                                reply_bytes=11 * buckets).get("hashes") or []
+            if len(remote) != buckets:
+                raise ParamError(f"drone trả {len(remote)} hash, cần {buckets}")
+            local = bucket_hashes(old, buckets)
+            need = [i for i in range(buckets) if remote[i] != local[i]]
+        logger.info(f"Tải {len(need)}/{buckets} bucket tham số")
+
+        refetch = set(need)
+        new = {n: v for n, v in old.items() if bucket_of(n, buckets) not in refetch}
+        per_bucket = REPLY_BYTES_PER_PARAM * max(1, -(-count // buckets))
+        replies = self._call_many([{"param": "get", "bucket": i, "buckets": buckets} for i in need], "values",
+                                  reply_bytes=per_bucket)
+        for i, rep in zip(need, replies):
+            if rep.get("bucket") != i:
+                raise ParamError(f"bucket {rep.get('bucket')} != {i}")
+            new.update(rep.get("values") or {})
+        self.stats["buckets_fetched"] += len(need)
+
+        if remote_hash is not None and table_hash(new) != remote_hash:
+            # tham số đổi trong lúc tải -> lần sync sau sẽ tải lại bucket lệch
+            logger.warning("Hash bảng tham số không khớp sau khi tải (drone vừa đổi tham số?)")
+            remote_hash = None
+        self._save(new, remote_hash)
+        return sorted(n for n in set(old) | set(new) if old.get(n) != new.get(n))
+
+    def _save(self, values: Dict[str, Any], remote_hash: Optional[int]):
+        with self._lock:
+            self.cache.values = values
+            self.cache.hash = remote_hash
+            self.cache.synced_at = time.time()
+        try:
+            self.cache.save()
+        except OSError as e:
+            logger.error(f"Không ghi được cache tham số: {e}")
+
+    # ---- ghi theo lô ----
+    def stage(self, name: str, value) -> Any:
+        """Gom 1 thay đổi (chưa gửi); trả giá trị đã chuẩn hoá."""
+        with self._lock:
+            v = parse_value(value, self.cache.values.get(name))
+            if self.cache.values.get(name) == v:
+                self.pending.pop(name, None)
+            else:
+                self.pending[name] = v
+        return v
+
+    def discard(self):
+        with self._lock:
+            self.pending.clear()
+        self._emit()
+
+    def commit(self) -> concurrent.futures.Future:
+        """Gửi mọi thay đổi đang gom trong 1 giao dịch (set x N + commit)."""
+        return self._executor.submit(self._commit)
+
+    def _commit(self) -> Dict[str, Any]:
+        with self._lock:
+            batch = dict(self.pending)
+        if not batch:
+            return {"applied": []}
+        self._tx = self._tx % 0xFFFF + 1
+        tx = self._tx
+        names = sorted(batch)
+        try:
+            sets = [{"param": "set", "tx": tx, "values": {n: batch[n] for n in names[i:i + SET_PER_MESSAGE]}}
+                    for i in range(0, len(names), SET_PER_MESSAGE)]
+            self._call_many(sets)
+            rep = self._call({"param": "commit", "tx": tx}, "commit")
+        except Exception as e:
+            logger.warning(f"Commit {len(batch)} tham số lỗi: {e}")
+            self._emit(error=str(e))
+            raise
+        applied = [n for n in rep.get("applied", names) if n in batch]
+        with self._lock:
+            values = dict(self.cache.values)
+            for n in applied:
+                values[n] = batch[n]
+                if self.pending.get(n) == batch[n]:
+                    del self.pending[n]
+        ok = rep.get("hash") == table_hash(values)
+        self._save(values, rep.get("hash") if ok else None)
+        self.stats["commits"] += 1
+        logger.info(f"Commit tx {tx}: {len(applied)}/{len(batch)} tham số")
+        rows = [{"name": n, "value": canonical(values[n]), "type": param_type(values[n])} for n in applied]
+        self._emit(changed=rows, committed=len(applied))
+        if not ok:
+            logger.warning("Hash sau commit khác cache -> đồng bộ lại")
+            with self._lock:
+                self._sync_future = self._executor.submit(self._sync, False)
+        return {"applied": applied, "tx": tx}
@@ -0,0 +1,309 @@
+"""
+Compact binary framing for the LoRa link (alternative to newline JSON).
+
+Frame trên dây:
+    COBS( version | type | payload | crc16 ) 0x00
+
+- version: PROTOCOL_VERSION (u8)
+- type: MSG_* (u8)
+- payload: struct cố định theo từng type (little-endian)
+- crc16: CRC-CCITT (binascii.crc_hqx, init 0xFFFF) trên version+type+payload
+
+COBS đảm bảo trong frame không có byte 0x00, nên 0x00 là delimiter duy nhất.
+Chế độ JSON vẫn là mặc định; binary chỉ bật sau khi drone trả lời
+``{"proto": PROTOCOL_VERSION}`` cho yêu cầu ``{"cmd": "proto", "ver": ...}``.
+"""
+import base64
+import math
+import struct
+from binascii import crc_hqx
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.telemetry import TelemetryRecord
+
+PROTOCOL_VERSION = 1
+FRAME_DELIMITER = b"\x00"
+
+PROTO_JSON = "json"
+PROTO_BINARY = "binary"
+
+# ---- Message types ----
+MSG_HEARTBEAT = 0x01
+MSG_POSE = 0x02
+MSG_GPS = 0x03
+MSG_BATTERY = 0x04
+MSG_SPEED = 0x05
+MSG_COMMAND = 0x10
+MSG_WAYPOINTS = 0x11
+MSG_MISSION = 0x12
+MSG_MOTORS = 0x13
+MSG_ACK = 0x20
+
+# ---- Command codes (MSG_COMMAND) ----
+CMD_LAND = 1
+CMD_OFFBOARD = 2
+COMMAND_CODES = {"land": CMD_LAND, "offboard": CMD_OFFBOARD}
+COMMAND_NAMES = {v: k for k, v in COMMAND_CODES.items()}
+
+# ---- Mission transfer ops (MSG_MISSION), xem app.mission ----
+MISSION_OPS = {"begin": 1, "chunk": 2, "end": 3}
+MISSION_OP_NAMES = {v: k for k, v in MISSION_OPS.items()}
+
+_HDR = struct.Struct("<BB")
+_CRC = struct.Struct("<H")
+_POSE = struct.Struct("<fff")             # x, y, z (m)
+_GPS = struct.Struct("<iif")              # lat*1e7, lon*1e7, alt (m)
+_BATTERY = struct.Struct("<hH")           # percent*100 (-1 = n/a), millivolt (0xFFFF = n/a)
+_SPEED = struct.Struct("<h")              # cm/s
+_COMMAND = struct.Struct("<B")
+_RID = struct.Struct("<H")                # request id (kèm sau payload lệnh, tuỳ chọn)
+_WP_COUNT = struct.Struct("<B")
+_WP = struct.Struct("<fff")
+_MISSION_HDR = struct.Struct("<BHH")      # op, mission id, rid (bắt buộc)
+_MISSION_BEGIN = struct.Struct("<IHIH")   # blob size, chunks, blob crc32, base mission id (0 = full)
+_MISSION_CHUNK = struct.Struct("<HH")     # chunk index, crc16 dữ liệu; dữ liệu theo sau
+_MISSION_END = struct.Struct("<I")        # crc32 mission sau khi ráp
+_MOTOR_COUNT = struct.Struct("<B")
+_PWM = struct.Struct("<H")                # µs, theo thứ tự động cơ 1..n
+
+MAX_WAYPOINTS_PER_FRAME = 255
+MAX_RID = 0xFFFF
+_MV_NONE = 0xFFFF
+
+
+class FrameError(ValueError):
+    """Frame hỏng: COBS sai, CRC sai, version/type không hỗ trợ."""
+
+
+# ================= COBS =================
+def cobs_encode(data: bytes) -> bytes:
+    out = bytearray()
+    for block in bytes(data).split(b"\x00"):
+        while len(block) >= 254:
+            out.append(0xFF)
+            out += block[:254]
+            block = block[254:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data: bytes) -> bytes:
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0:
+            raise FrameError("zero byte inside COBS frame")
+        j = i + code
+        if j > n:
+            raise FrameError("truncated COBS block")
+        out += data[i + 1:j]
+        i = j
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+# ================= Frames =================
+def encode_frame(msg_type: int, payload: bytes = b"") -> bytes:
+    body = _HDR.pack(PROTOCOL_VERSION, msg_type) + payload
+    return cobs_encode(body + _CRC.pack(crc_hqx(body, 0xFFFF))) + FRAME_DELIMITER
+
+
+def decode_frame(frame: bytes) -> Tuple[int, bytes]:
+    """Giải 1 frame (không kèm delimiter) -> (type, payload)."""
+    raw = cobs_decode(frame)
+    if len(raw) < _HDR.size + _CRC.size:
+        raise FrameError("frame too short")
+    body, (crc,) = raw[:-_CRC.size], _CRC.unpack_from(raw, len(raw) - _CRC.size)
+    if crc_hqx(body, 0xFFFF) != crc:
+        raise FrameError("CRC mismatch")
+    version, msg_type = _HDR.unpack_from(body)
+    if version != PROTOCOL_VERSION:
+        raise FrameError(f"unsupported protocol version {version}")
+    return msg_type, body[_HDR.size:]
+
+
+# ---- Telemetry encoders (phía drone / simulator) ----
+def encode_heartbeat() -> bytes:
+    return encode_frame(MSG_HEARTBEAT)
+
+
+def encode_pose(x: float, y: float, z: float) -> bytes:
+    return encode_frame(MSG_POSE, _POSE.pack(x, y, z))
+
+
+def encode_gps(lat: float, lon: float, alt: float) -> bytes:
+    return encode_frame(MSG_GPS, _GPS.pack(round(lat * 1e7), round(lon * 1e7), alt))
+
+
+def encode_battery(percent: Optional[float], voltage: Optional[float]) -> bytes:
+    p = -1 if percent is None or percent < 0 else min(int(round(percent * 100)), 0x7FFF)
+    if voltage is None or not math.isfinite(voltage):
+        mv = _MV_NONE
+    else:
+        mv = max(0, min(int(round(voltage * 1000)), _MV_NONE - 1))
+    return encode_frame(MSG_BATTERY, _BATTERY.pack(p, mv))
+
+
+def encode_speed(speed: float) -> bytes:
+    return encode_frame(MSG_SPEED, _SPEED.pack(max(-0x8000, min(int(round(speed * 100)), 0x7FFF))))
+
+
+def encode_ack(rid: int) -> bytes:
+    return encode_frame(MSG_ACK, _RID.pack(rid))
+
+
+# ---- Command encoders (phía ground) ----
+# rid (tuỳ chọn) được nối sau payload; drone trả MSG_ACK cùng rid.
+def _rid_suffix(rid: Optional[int]) -> bytes:
+    return _RID.pack(rid) if rid is not None else b""
+
+
+def encode_command(name: str, rid: Optional[int] = None) -> bytes:
+    return encode_frame(MSG_COMMAND, _COMMAND.pack(COMMAND_CODES[name]) + _rid_suffix(rid))
+
+
+def decode_command(payload: bytes) -> Tuple[Optional[str], Optional[int]]:
+    """-> (tên lệnh, rid hoặc None)."""
+    if len(payload) not in (_COMMAND.size, _COMMAND.size + _RID.size):
+        raise FrameError("command payload size mismatch")
+    rid = _RID.unpack_from(payload, _COMMAND.size)[0] if len(payload) > _COMMAND.size else None
+    return COMMAND_NAMES.get(payload[0]), rid
+
+
+def encode_waypoints(waypoints: Sequence[Any], rid: Optional[int] = None) -> bytes:
+    """waypoints: Waypoint hoặc dict có x/y/z (tối đa 255 điểm/frame)."""
+    if len(waypoints) > MAX_WAYPOINTS_PER_FRAME:
+        raise ValueError(f"at most {MAX_WAYPOINTS_PER_FRAME} waypoints per frame")
+    parts = [_WP_COUNT.pack(len(waypoints))]
+    for wp in waypoints:
+        if isinstance(wp, dict):
+            parts.append(_WP.pack(float(wp["x"]), float(wp["y"]), float(wp.get("z", 3.5))))
+        else:
+            parts.append(_WP.pack(wp.x, wp.y, wp.z))
+    parts.append(_rid_suffix(rid))
+    return encode_frame(MSG_WAYPOINTS, b"".join(parts))
+
+
+def encode_mission(msg: Dict[str, Any]) -> bytes:
+    """{"mission": "begin"|"chunk"|"end", "id", "rid", ...} -> MSG_MISSION frame."""
+    op = msg["mission"]
+    head = _MISSION_HDR.pack(MISSION_OPS[op], msg["id"], msg["rid"])
+    if op == "begin":
+        body = _MISSION_BEGIN.pack(msg["size"], msg["chunks"], msg["crc"], msg.get("base") or 0)
+    elif op == "chunk":
+        data = msg["data"]
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+        body = _MISSION_CHUNK.pack(msg["i"], msg["crc"]) + bytes(data)
+    else:
+        body = _MISSION_END.pack(msg["crc"])
+    return encode_frame(MSG_MISSION, head + body)
+
+
+def decode_mission(payload: bytes) -> Dict[str, Any]:
+    """Ngược lại của encode_mission; "data" của chunk là bytes."""
+    try:
+        op, mid, rid = _MISSION_HDR.unpack_from(payload)
+        name = MISSION_OP_NAMES[op]
+        off = _MISSION_HDR.size
+        msg: Dict[str, Any] = {"mission": name, "id": mid, "rid": rid}
+        if name == "begin":
+            msg["size"], msg["chunks"], msg["crc"], msg["base"] = _MISSION_BEGIN.unpack_from(payload, off)
+        elif name == "chunk":
+            msg["i"], msg["crc"] = _MISSION_CHUNK.unpack_from(payload, off)
+            msg["data"] = bytes(payload[off + _MISSION_CHUNK.size:])
+        else:
+            (msg["crc"],) = _MISSION_END.unpack_from(payload, off)
+    except (KeyError, struct.error) as e:
+        raise FrameError(f"bad mission payload: {e}")
+    return msg
+
+
+def encode_motors(pwms: Sequence[int], rid: Optional[int] = None) -> bytes:
+    if len(pwms) > 0xFF:
+        raise ValueError("at most 255 motors per frame")
+    body = _MOTOR_COUNT.pack(len(pwms)) + b"".join(_PWM.pack(max(0, min(int(p), 0xFFFF))) for p in pwms)
+    return encode_frame(MSG_MOTORS, body + _rid_suffix(rid))
+
+
+def decode_motors(payload: bytes) -> Tuple[List[int], Optional[int]]:
+    """-> (PWM từng động cơ, rid hoặc None)."""
+    (count,) = _MOTOR_COUNT.unpack_from(payload)
+    end = _MOTOR_COUNT.size + count * _PWM.size
+    if len(payload) - end not in (0, _RID.size):
+        raise FrameError("motors payload size mismatch")
+    pwms = [_PWM.unpack_from(payload, _MOTOR_COUNT.size + i * _PWM.size)[0] for i in range(count)]
+    return pwms, (_RID.unpack_from(payload, end)[0] if len(payload) > end else None)
+
+
+def encode_json_message(obj: Dict[str, Any]) -> Optional[bytes]:
+    """Map 1 message JSON (như write_json nhận) sang frame; None nếu không có dạng binary."""
+    if "mission" in obj:
+        return encode_mission(obj) if obj.get("rid") is not None else None
+    keys = set(obj)
+    rid = obj.get("rid")
+    if rid is not None:
+        if type(rid) is not int or not 0 <= rid <= MAX_RID:
+            return None
+        keys.discard("rid")
+    if keys == {"cmd"} and obj["cmd"] in COMMAND_CODES:
+        return encode_command(obj["cmd"], rid)
+    if keys == {"waypoints"} and len(obj["waypoints"]) <= MAX_WAYPOINTS_PER_FRAME:
+        return encode_waypoints(obj["waypoints"], rid)
+    if keys == {"motors"} and len(obj["motors"]) <= 0xFF:
+        return encode_motors(obj["motors"], rid)
+    return None
+
+
+def decode_waypoints(payload: bytes) -> Iterable[Tuple[float, float, float]]:
+    (count,) = _WP_COUNT.unpack_from(payload)
+    if len(payload) - _WP_COUNT.size - count * _WP.size not in (0, _RID.size):
+        raise FrameError("waypoint payload size mismatch")
+    return [_WP.unpack_from(payload, _WP_COUNT.size + i * _WP.size) for i in range(count)]
+
+
+def waypoints_rid(payload: bytes) -> Optional[int]:
+    (count,) = _WP_COUNT.unpack_from(payload)
+    end = _WP_COUNT.size + count * _WP.size
+    return _RID.unpack_from(payload, end)[0] if len(payload) == end + _RID.size else None
+
+
+class BinaryDecoder:
+    """Counterpart of TelemetryDecoder for COBS frames: ``decode(frame, t)``."""
+
+    def __init__(self):
+        # frame hỏng (COBS/CRC/độ dài) và loại message không biết
+        self.rejects = {"frame": 0, "unknown": 0}
+
+    def decode(self, frame: bytes, t: float = 0.0) -> Optional[TelemetryRecord]:
+        try:
+            msg_type, payload = decode_frame(frame)
+            if msg_type == MSG_HEARTBEAT:
+                return TelemetryRecord(t=t, hb=True)
+            if msg_type == MSG_POSE:
+                return TelemetryRecord(t=t, local=_POSE.unpack(payload))
+            if msg_type == MSG_GPS:
+                la, lo, alt = _GPS.unpack(payload)
+                return TelemetryRecord(t=t, gps=(la / 1e7, lo / 1e7, alt))
+            if msg_type == MSG_BATTERY:
+                p, mv = _BATTERY.unpack(payload)
+                return TelemetryRecord(
+                    t=t,
+                    battery_percent=None if p < 0 else p / 100.0,
+                    battery_voltage=None if mv == _MV_NONE else mv / 1000.0,
+                )
+            if msg_type == MSG_SPEED:
+                (cms,) = _SPEED.unpack(payload)
+                return TelemetryRecord(t=t, speed=cms / 100.0)
+            if msg_type == MSG_ACK:
+                (rid,) = _RID.unpack(payload)
+                return TelemetryRecord(t=t, ack=rid)
+        except (FrameError, struct.error):
+            self.rejects["frame"] += 1
+            return None
+        self.rejects["unknown"] += 1
+        return None
@@ -0,0 +1,273 @@
+"""
+Flight recorder: append-only binary log of decoded telemetry.
+
+File layout:
+    header (64 B): magic "GCSREC1\\0", u32 version, u32 record size, f8 wall-clock start, padding
+    records (64 B each, little-endian, xem RECORD_FIELDS)
+
+Giá trị không có trong message được ghi NaN và bit tương ứng trong ``flags`` = 0.
+Ghi qua thread nền theo lô nên thread RX chỉ tốn 1 lần put vào queue.
+Đọc bằng ``FlightLog`` (mmap); nếu có NumPy thì các cột là view không chép.
+"""
+import array
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.telemetry import TelemetryRecord
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tuỳ chọn, chỉ cần cho phân tích
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GCSREC1\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIId")
+HEADER_SIZE = 64
+
+# (name, struct code); padding dùng "x"
+RECORD_FIELDS = (
+    ("t", "d"),
+    ("flags", "I"),
+    ("_pad0", "4x"),
+    ("x", "f"),
+    ("y", "f"),
+    ("z", "f"),
+    ("alt", "f"),
+    ("lat", "d"),
+    ("lon", "d"),
+    ("percent", "f"),
+    ("voltage", "f"),
+    ("speed", "f"),
+    ("_pad1", "4x"),
+)
+RECORD = struct.Struct("<" + "".join(code for _, code in RECORD_FIELDS))
+RECORD_SIZE = RECORD.size
+COLUMNS = tuple(name for name, code in RECORD_FIELDS if not code.endswith("x"))
+
+# flags
+F_HB = 1 << 0
+F_LOCAL = 1 << 1
+F_GPS = 1 << 2
+F_PERCENT = 1 << 3
+F_VOLTAGE = 1 << 4
+F_SPEED = 1 << 5
+
+_NAN = float("nan")
+
+
+def _offsets() -> Dict[str, int]:
+    out, off = {}, 0
+    for name, code in RECORD_FIELDS:
+        size = struct.calcsize("<" + code)
+        if not code.endswith("x"):
+            out[name] = off
+        off += size
+    return out
+
+
+_OFFSETS = _offsets()
+
+if np is not None:
+    RECORD_DTYPE = np.dtype({
+        "names": list(COLUMNS),
+        "formats": ["<" + code for name, code in RECORD_FIELDS if name in COLUMNS],
+        "offsets": [_OFFSETS[n] for n in COLUMNS],
+        "itemsize": RECORD_SIZE,
+    })
+else:
+    RECORD_DTYPE = None
+
+
+def pack_record(rec: TelemetryRecord) -> bytes:
+    flags = 0
+    x = y = z = alt = percent = voltage = speed = _NAN
+    lat = lon = _NAN
+    if rec.hb:
+        flags |= F_HB
+    if rec.local is not None:
+        flags |= F_LOCAL
+        x, y, z = rec.local
+    if rec.gps is not None:
+        flags |= F_GPS
+        lat, lon, alt = rec.gps
+    if rec.battery_percent is not None:
+        flags |= F_PERCENT
+        percent = rec.battery_percent
+    if rec.battery_voltage is not None:
+        flags |= F_VOLTAGE
+        voltage = rec.battery_voltage
+    if rec.speed is not None:
+        flags |= F_SPEED
+        speed = rec.speed
+    return RECORD.pack(rec.t, flags, x, y, z, alt, lat, lon, percent, voltage, speed)
+
+
+def unpack_record(buf, offset: int = 0) -> TelemetryRecord:
+    t, flags, x, y, z, alt, lat, lon, percent, voltage, speed = RECORD.unpack_from(buf, offset)
+    return TelemetryRecord(
+        t=t,
+        hb=bool(flags & F_HB),
+        local=(x, y, z) if flags & F_LOCAL else None,
+        gps=(lat, lon, alt) if flags & F_GPS else None,
+        battery_percent=percent if flags & F_PERCENT else None,
+        battery_voltage=voltage if flags & F_VOLTAGE else None,
+        speed=speed if flags & F_SPEED else None,
+    )
+
+
+class FlightRecorder:
+    """
+    Ghi TelemetryRecord vào file qua thread nền.
+
+    ``record()`` an toàn khi gọi từ thread RX; ``close()`` xả hết queue rồi đóng file.
+    """
+
+    BATCH_MAX = 512
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records_written = 0
+        self._q: "queue.SimpleQueue[Optional[TelemetryRecord]]" = queue.SimpleQueue()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "ab")
+        if new_file:
+            self._f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE, time.time()).ljust(HEADER_SIZE, b"\x00"))
+        else:
+            # nối tiếp file cũ: cắt bản ghi dở dang (nếu lần trước bị tắt ngang)
+            _read_header(path)
+            size = os.path.getsize(path)
+            tail = (size - HEADER_SIZE) % RECORD_SIZE
+            if tail:
+                self._f.truncate(size - tail)
+        self._thread = threading.Thread(target=self._writer, name="flight-recorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def open_new(cls, directory: str, prefix: str = "flight") -> "FlightRecorder":
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime(f"{prefix}-%Y%m%d-%H%M%S.gcsrec")
+        return cls(os.path.join(directory, name))
+
+    def record(self, rec: TelemetryRecord):
+        self._q.put(rec)
+
+    def close(self, timeout: float = 2.0):
+        if self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join(timeout=timeout)
+
+    def _writer(self):
+        get = self._q.get
+        get_nowait = self._q.get_nowait
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            try:
+                item = get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                item = False
+            batch: List[bytes] = []
+            while item is not False:
+                if item is None:
+                    running = False
+                    break
+                batch.append(pack_record(item))
+                if len(batch) >= self.BATCH_MAX:
+                    break
+                try:
+                    item = get_nowait()
+                except queue.Empty:
+                    item = False
+            try:
+                if batch:
+                    self._f.write(b"".join(batch))
+                    self.records_written += len(batch)
+                now = time.monotonic()
+                if not running or now - last_flush >= self.FLUSH_INTERVAL:
+                    self._f.flush()
+                    last_flush = now
+            except OSError as e:
+                logger.error(f"Lỗi ghi flight log {self.path}: {e}")
+        self._f.close()
+
+
+def _read_header(path: str):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path}: file quá ngắn")
+    magic, version, rec_size, start = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != FORMAT_VERSION or rec_size != RECORD_SIZE:
+        raise ValueError(f"{path}: không phải flight log hợp lệ")
+    return start
+
+
+class FlightLog:
+    """
+    Đọc flight log bằng mmap.
+
+        log = FlightLog("logs/flight-....gcsrec")
+        t, x = log.column("t"), log.column("x")    # numpy view nếu có NumPy
+        rec = log[10]                              # TelemetryRecord
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start_wall_time = _read_header(path)
+        self._f = open(path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        self._n = (size - HEADER_SIZE) // RECORD_SIZE
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> TelemetryRecord:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return unpack_record(self._mm, HEADER_SIZE + i * RECORD_SIZE)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield unpack_record(self._mm, HEADER_SIZE + i * RECORD_SIZE)
+
+    def records(self):
+        """Toàn bộ bản ghi dạng numpy structured array (view, không chép)."""
+        if np is None:
+            raise RuntimeError("records() cần NumPy; dùng column() hoặc duyệt FlightLog")
+        return np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=self._n, offset=HEADER_SIZE)
+
+    def column(self, name: str):
+        """1 cột: numpy view nếu có NumPy, ngược lại array.array (bản chép)."""
+        if name not in _OFFSETS:
+            raise KeyError(name)
+        if np is not None:
+            return self.records()[name]
+        code = dict(RECORD_FIELDS)[name]
+        fmt = struct.Struct("<" + code)
+        off = HEADER_SIZE + _OFFSETS[name]
+        return array.array(code, (fmt.unpack_from(self._mm, off + i * RECORD_SIZE)[0] for i in range(self._n)))
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,181 @@
+"""
+Deterministic replay source thay cho serial.Serial.
+
+Dùng trong GroundController.connect() qua port dạng URL:
+
+    replay:<path>[?speed=1|4|max][&loop=1]
+
+- ``<path>.gcsrec``: flight log (app.recorder) -> phát lại thành dòng JSON theo timestamp gốc
+- file khác: raw byte stream đã capture (vd. ``cat /dev/ttyUSB0 > capture.bin``),
+  phát theo tốc độ baud (baudrate/10 byte/s ở 1x)
+- ``speed=max``: không chờ, đẩy dữ liệu nhanh nhất có thể (benchmark toàn pipeline)
+
+Lệnh ghi xuống (ON/OFF/land...) được giữ trong ``written`` để kiểm tra.
+"""
+import json
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.telemetry import TelemetryRecord
+
+REPLAY_PREFIX = "replay:"
+MAX_SPEED = float("inf")
+RAW_CHUNK = 64
+MAX_RELEASE = 64 * 1024
+
+Event = Tuple[float, bytes]
+
+
+def is_replay_port(port: Optional[str]) -> bool:
+    return bool(port) and port.startswith(REPLAY_PREFIX)
+
+
+def record_to_line(rec: TelemetryRecord) -> bytes:
+    """TelemetryRecord -> dòng JSON đúng định dạng drone gửi."""
+    obj = {}
+    if rec.hb:
+        obj["hb"] = 1
+    if rec.local is not None:
+        obj["x"], obj["y"], obj["z"] = rec.local
+    if rec.gps is not None:
+        obj["lat"], obj["lon"], obj["alt"] = rec.gps
+    if rec.has_battery:
+        obj["battery"] = {k: v for k, v in (("percent", rec.battery_percent),
+                                            ("voltage", rec.battery_voltage)) if v is not None}
+    if rec.speed is not None:
+        obj["speed"] = rec.speed
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+# ================= Sources =================
+def load_raw(path: str, baudrate: int = 9600, chunk: int = RAW_CHUNK) -> List[Event]:
+    """Raw capture -> các chunk với thời điểm theo tốc độ dây (8N1 = 10 bit/byte)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    bytes_per_s = baudrate / 10.0
+    return [(i / bytes_per_s, data[i:i + chunk]) for i in range(0, len(data), chunk)]
+
+
+def load_flight_log(path: str) -> List[Event]:
+    from app.recorder import FlightLog
+    with FlightLog(path) as log:
+        records = list(log)
+    if not records:
+        return []
+    t0 = records[0].t
+    return [(rec.t - t0, record_to_line(rec)) for rec in records]
+
+
+def load_source(path: str, baudrate: int = 9600) -> List[Event]:
+    if path.endswith(".gcsrec"):
+        return load_flight_log(path)
+    return load_raw(path, baudrate)
+
+
+class ReplaySerial:
+    """
+    Subset of serial.Serial used by GroundController: is_open, in_waiting,
+    read, write, flush, reset_*_buffer, close.
+    """
+
+    def __init__(self, events: Iterable[Event], speed: float = 1.0, loop: bool = False,
+                 timeout: Optional[float] = 0.2, port: str = "replay"):
+        if speed <= 0:
+            raise ValueError("speed must be > 0")
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self.timeout = timeout
+        self.is_open = True
+        self.written = bytearray()
+        self.bytes_read = 0
+        self.finished = threading.Event()
+
+        self._events = list(events)
+        self._idx = 0
+        self._buf = bytearray()
+        self._t_start = time.monotonic()
+
+    @classmethod
+    def from_url(cls, url: str, baudrate: int = 9600, timeout: Optional[float] = 0.2,
+                 write_timeout: Optional[float] = None) -> "ReplaySerial":
+        spec = url[len(REPLAY_PREFIX):] if url.startswith(REPLAY_PREFIX) else url
+        path, _, query = spec.partition("?")
+        opts = {k: v[-1] for k, v in parse_qs(query).items()}
+        speed_opt = opts.get("speed", "1")
+        speed = MAX_SPEED if speed_opt == "max" else float(speed_opt)
+        loop = opts.get("loop", "0") not in ("0", "false", "")
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return cls(load_source(path, baudrate), speed=speed, loop=loop, timeout=timeout, port=url)
+
+    # ---- pacing ----
+    def _release(self):
+        events = self._events
+        n = len(events)
+        if self._idx >= n:
+            if self.loop and n:
+                self._idx = 0
+                self._t_start = time.monotonic()
+            else:
+                self.finished.set()
+                return
+        if self.speed == MAX_SPEED:
+            while self._idx < n and len(self._buf) < MAX_RELEASE:
+                self._buf += events[self._idx][1]
+                self._idx += 1
+            return
+        elapsed = (time.monotonic() - self._t_start) * self.speed
+        while self._idx < n and events[self._idx][0] <= elapsed:
+            self._buf += events[self._idx][1]
+            self._idx += 1
+
+    def _next_due(self) -> Optional[float]:
+        """Thời điểm (monotonic) event kế tiếp tới hạn."""
+        if self._idx >= len(self._events):
+            return None
+        return self._t_start + self._events[self._idx][0] / self.speed
+
+    # ---- serial.Serial API ----
+    @property
+    def in_waiting(self) -> int:
+        self._release()
+        return len(self._buf)
+
+    def read(self, size: int = 1) -> bytes:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while self.is_open:
+            self._release()
+            if self._buf:
+                out = bytes(self._buf[:size])
+                del self._buf[:size]
+                self.bytes_read += len(out)
+                return out
+            now = time.monotonic()
+            due = self._next_due()
+            if deadline is not None and now >= deadline:
+                return b""
+            wake = due if due is not None else (deadline if deadline is not None else now + 0.1)
+            if deadline is not None:
+                wake = min(wake, deadline)
+            time.sleep(max(0.0, wake - now))
+        return b""
+
+    def write(self, data: bytes) -> int:
+        self.written += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._buf.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
@@ -0,0 +1,116 @@
+"""
+Bounded receive buffer for the serial RX path.
+
+Bộ đệm bytearray dung lượng cố định: chunk từ serial được chép vào một lần,
+frame được tách bằng ``find`` (không quét lại phần đã quét), và chỉ frame
+hoàn chỉnh mới được trả ra để decode. Frame dài hơn dung lượng bị bỏ và
+được đếm vào thống kê overflow.
+"""
+from typing import Dict, Iterator
+
+
+class RxBuffer:
+    def __init__(self, capacity: int = 8192, delimiter: bytes = b"\n"):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0      # đầu frame đang chờ
+        self._end = 0        # cuối dữ liệu hợp lệ
+        self._scan = 0       # vị trí đã tìm delimiter tới
+        self._discard = False
+        self._delimiter = delimiter
+
+        # Thống kê
+        self.bytes_in = 0
+        self.frames = 0
+        self.overflows = 0
+        self.dropped_bytes = 0
+
+    @property
+    def delimiter(self) -> bytes:
+        return self._delimiter
+
+    @delimiter.setter
+    def delimiter(self, value: bytes):
+        if value != self._delimiter:
+            self._delimiter = value
+            self._scan = self._start
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def clear(self):
+        self._start = self._end = self._scan = 0
+        self._discard = False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "bytes_in": self.bytes_in,
+            "frames": self.frames,
+            "overflows": self.overflows,
+            "dropped_bytes": self.dropped_bytes,
+            "pending": len(self),
+        }
+
+    def feed(self, chunk: bytes) -> Iterator[memoryview]:
+        """
+        Nạp chunk và lần lượt trả các frame hoàn chỉnh (không gồm delimiter).
+
+        Frame là memoryview trỏ vào bộ đệm, chỉ hợp lệ tới khi generator chạy tiếp;
+        caller phải decode/chép ngay. Đổi ``delimiter`` giữa chừng vẫn an toàn.
+        """
+        self.bytes_in += len(chunk)
+        src = memoryview(chunk)
+        while True:
+            yield from self._drain()
+            if not src:
+                return
+            free = self.capacity - self._end
+            if free < len(src) and self._start > 0:
+                self._compact()
+                free = self.capacity - self._end
+            if free == 0:
+                # đầy mà không có delimiter: frame quá dài -> bỏ tới delimiter kế tiếp
+                if not self._discard:
+                    self.overflows += 1
+                self.dropped_bytes += self._end - self._start
+                self.clear()
+                self._discard = True
+                free = self.capacity
+            n = min(free, len(src))
+            self._view[self._end:self._end + n] = src[:n]
+            self._end += n
+            src = src[n:]
+
+    def _drain(self) -> Iterator[memoryview]:
+        buf = self._buf
+        while True:
+            d = self._delimiter
+            i = buf.find(d, self._scan, self._end)
+            if i < 0:
+                self._scan = max(self._start, self._end - len(d) + 1)
+                if self._start == self._end:
+                    self._rewind()
+                return
+            start = self._start
+            self._start = self._scan = i + len(d)
+            if self._discard:
+                self._discard = False
+                self.dropped_bytes += i - start
+                continue
+            if i > start:
+                self.frames += 1
+                yield self._view[start:i]
+
+    def _rewind(self):
+        # bộ đệm rỗng: quay về đầu, không cần chép
+        self._start = self._end = self._scan = 0
+
+    def _compact(self):
+        n = self._end - self._start
+        self._view[0:n] = self._view[self._start:self._end]
+        self._scan -= self._start
+        self._start = 0
+        self._end = n
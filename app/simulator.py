@@ -0,0 +1,539 @@
+"""
+Drone simulator trên cặp pseudo-terminal (Linux/macOS).
+
+Đóng vai companion computer: phát heartbeat/pose/GPS/battery theo tần số cấu hình,
+thêm nhiễu đường truyền, và trả lời ON/OFF/land/offboard/waypoints/proto/param.
+Mỗi message JSON kèm ``seq`` và ``ts`` (time.monotonic() phía drone) để đo latency.
+
+    python -m app.simulator --pose 10 --gps 5 --noise 0.02
+    # in ra cổng, vd. /dev/pts/7 -> đặt port = "/dev/pts/7" trong settings.toml
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import select
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from app import mission
+from app import params as prm
+from app.geo import LocalFrame
+from app import protocol as proto
+from app.protocol import FRAME_DELIMITER, PROTO_BINARY, PROTO_JSON
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES = {"hb": 1.0, "pose": 10.0, "gps": 5.0, "battery": 1.0}
+SIM_FIRMWARE = "px4-1.14.0-sim"
+
+
+def default_params() -> Dict[str, object]:
+    """Bảng tham số giả (~300 tham số kiểu ArduPilot/PX4)."""
+    p = {"SYSID_THISMAV": 1, "SYSID_MYGCS": 255, "ARMING_CHECK": 1, "BATT_MONITOR": 4,
+         "BATT_CAPACITY": 3300, "COMPASS_ENABLE": 1, "GPS_TYPE": 1, "MOT_PWM_TYPE": 0, "MOT_PWM_RATE": 400,
+         "PILOT_SPEED_UP": 500, "PILOT_SPEED_DN": 300, "RTL_ALT": 1000, "RTL_SPEED": 500,
+         "WPNAV_SPEED": 500, "WPNAV_ACCEL": 100, "FENCE_ENABLE": 0, "FENCE_ALT_MAX": 100.0}
+    for axis in ("ROLL", "PITCH", "YAW"):
+        for term, v in (("P", 0.15), ("I", 0.15), ("D", 0.003), ("FF", 0.0), ("IMAX", 0.5), ("FLTT", 20.0)):
+            p[f"RATE_{axis}_{term}"] = v
+        p[f"ANGLE_{axis}_P"] = 4.5
+    for i in range(1, 17):
+        p.update({f"RC{i}_MIN": 1100, f"RC{i}_MAX": 1900, f"RC{i}_TRIM": 1500, f"RC{i}_REVERSED": 0,
+                  f"RC{i}_DZ": 20, f"RC{i}_OPTION": 0})
+        p.update({f"SERVO{i}_MIN": 1000, f"SERVO{i}_MAX": 2000, f"SERVO{i}_TRIM": 1500,
+                  f"SERVO{i}_FUNCTION": 32 + i if i <= 4 else 0})
+    for i in range(1, 4):
+        p.update({f"INS_ACC{i}OFFS_{a}": 0.0 for a in "XYZ"})
+        p.update({f"INS_GYR{i}OFFS_{a}": 0.0 for a in "XYZ"})
+        p.update({f"COMPASS_OFS{i if i > 1 else ''}_{a}": 0 for a in "XYZ"})
+    for i in range(1, 7):
+        p[f"FLTMODE{i}"] = 0
+    return p
+
+
+
+class DroneSimulator:
+    def __init__(self, rates: Optional[Dict[str, float]] = None, noise: float = 0.0,
+                 baudrate: Optional[int] = None, autostart: bool = False, seed: Optional[int] = None,
+                 origin=(11.052939, 106.666123)):
+        """
+        rates    -> Hz theo kênh: hb, pose, gps, battery (0 = tắt)
+        noise    -> xác suất mỗi message bị hỏng (cắt cụt, lật byte, chèn rác)
+        baudrate -> giới hạn tốc độ ghi như link thật (None = không giới hạn)
+        autostart-> phát telemetry ngay, không chờ lệnh ON
+        """
+        import pty
+        import tty
+
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.noise = noise
+        self.baudrate = baudrate
+        self.origin = origin
+        self.frame = LocalFrame(*origin)
+        self.streaming = autostart
+        self.protocol = PROTO_JSON
+        self.mode = "idle"
+        self.waypoints: List = []
+        self.mission_id = 0                 # mission đã ráp xong gần nhất
+        self._mission_q: Optional[List] = None
+        self._mission_rx: Dict[int, dict] = {}
+        self.commands: List[tuple] = []     # (monotonic recv time, command)
+        self.motors: List[int] = []         # PWM động cơ mới nhất (màn hình Motors)
+        self.motor_frames: List[tuple] = [] # (monotonic recv time, [pwm...])
+        self.sent = 0
+        self.seq = 0
+
+        self._rnd = random.Random(seed)
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._rx = bytearray()
+        self._t0 = time.monotonic()
+        self._battery = 100.0
+        self.params: Dict[str, object] = default_params()
+        self.firmware = SIM_FIRMWARE
+        self._param_tx: Dict[int, Dict[str, object]] = {}
+
+    # ---- lifecycle ----
+    def start(self) -> "DroneSimulator":
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="drone-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- main loop ----
+    def _run(self):
+        period = {k: 1.0 / v for k, v in self.rates.items() if v > 0}
+        due = {k: time.monotonic() for k in period}
+        while self._running:
+            now = time.monotonic()
+            wait = max(0.0, min(due.values()) - now) if (due and self.streaming) else 0.05
+            try:
+                ready, _, _ = select.select([self._master], [], [], wait)
+            except (OSError, ValueError):
+                break
+            if ready:
+                try:
+                    data = os.read(self._master, 4096)
+                except OSError:
+                    break
+                self._on_rx(data)
+            if not self.streaming:
+                continue
+            now = time.monotonic()
+            for ch, t_due in due.items():
+                if now >= t_due:
+                    self._emit(ch, now)
+                    due[ch] = t_due + period[ch] if now - t_due < period[ch] else now + period[ch]
+
+    # ---- TX (drone -> ground) ----
+    def _write(self, data: bytes):
+        if self.noise and self._rnd.random() < self.noise:
+            data = self._corrupt(data)
+        try:
+            os.write(self._master, data)
+        except OSError:
+            return
+        self.sent += 1
+        if self.baudrate:
+            time.sleep(len(data) * 10.0 / self.baudrate)
+
+    def _corrupt(self, data: bytes) -> bytes:
+        kind = self._rnd.randrange(3)
+        b = bytearray(data)
+        if kind == 0 and len(b) > 2:
+            del b[self._rnd.randrange(1, len(b) - 1):-1]          # cắt cụt
+        elif kind == 1 and len(b) > 1:
+            b[self._rnd.randrange(len(b) - 1)] ^= 1 << self._rnd.randrange(8)
+        else:
+            b[0:0] = bytes(self._rnd.randrange(1, 256) for _ in range(self._rnd.randint(1, 8)))
+        return bytes(b)
+
+    def send_json(self, obj: dict):
+        self.seq += 1
+        obj = dict(obj, seq=self.seq, ts=time.monotonic())
+        self._write((json.dumps(obj) + "\n").encode("utf-8"))
+
+    def _emit(self, channel: str, now: float):
+        t = now - self._t0
+        x, y = 10.0 * math.cos(t * 0.2), 10.0 * math.sin(t * 0.2)
+        z = 0.0 if self.mode == "land" else 3.5
+        if self.protocol == PROTO_BINARY:
+            if channel == "hb":
+                self._write(proto.encode_heartbeat())
+            elif channel == "pose":
+                self._write(proto.encode_pose(x, y, z))
+            elif channel == "gps":
+                self._write(proto.encode_gps(*self._to_gps(x, y), z))
+            elif channel == "battery":
+                self._battery = max(0.0, self._battery - 0.01)
+                self._write(proto.encode_battery(self._battery, 10.5 + 2.1 * self._battery / 100.0))
+            return
+        if channel == "hb":
+            self.send_json({"hb": 1})
+        elif channel == "pose":
+            self.send_json({"x": x, "y": y, "z": z, "speed": 2.0})
+        elif channel == "gps":
+            lat, lon = self._to_gps(x, y)
+            self.send_json({"lat": lat, "lon": lon, "alt": z})
+        elif channel == "battery":
+            self._battery = max(0.0, self._battery - 0.01)
+            self.send_json({"battery": {"percent": self._battery / 100.0,
+                                        "voltage": 10.5 + 2.1 * self._battery / 100.0}})
+
+    def _to_gps(self, east: float, north: float):
+        return self.frame.to_geodetic(east, north)[:2]
+
+    # ---- RX (ground -> drone) ----
+    def _on_rx(self, data: bytes):
+        self._rx += data
+        while True:
+            if self.protocol == PROTO_BINARY:
+                # binary: frame kết thúc bằng 0x00; ON/OFF vẫn là dòng text
+                i_off = self._rx.find(b"OFF\n")
+                if i_off >= 0:
+                    del self._rx[:i_off + 4]
+                    self._on_line("OFF")
+                    continue
+                i = self._rx.find(FRAME_DELIMITER)
+                if i < 0:
+                    return
+                frame = bytes(self._rx[:i])
+                del self._rx[:i + 1]
+                if frame:
+                    self._on_frame(frame)
+                continue
+            i = self._rx.find(b"\n")
+            if i < 0:
+                return
+            line = bytes(self._rx[:i])
+            del self._rx[:i + 1]
+            if line.strip():
+                self._on_line(line.decode("utf-8", errors="replace").strip())
+
+    def _on_line(self, line: str):
+        now = time.monotonic()
+        if line in ("ON", "OFF"):
+            self.commands.append((now, line))
+            self.streaming = line == "ON"
+            if line == "OFF":
+                self.protocol = PROTO_JSON
+            return
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(obj, dict):
+            return
+        if "mission" in obj:
+            if self._on_mission(obj, now):
+                self.send_json({"ack": "mission", "rid": obj.get("rid")})
+            return
+        if "param" in obj:
+            reply = self._on_param(obj)
+            if reply is not None:
+                self.send_json({"param": reply, "rid": obj.get("rid")})
+            return
+        if "motors" in obj:
+            self._on_motors(list(obj["motors"]), now)
+            if obj.get("rid") is not None:
+                self.send_json({"ack": "motors", "rid": obj.get("rid")})
+            return
+        if "waypoints" in obj:
+            self.waypoints = list(obj["waypoints"])
+            self.commands.append((now, "waypoints"))
+            self.send_json({"ack": "waypoints", "n": len(self.waypoints), "rid": obj.get("rid")})
+            return
+        cmd = obj.get("cmd")
+        if not cmd:
+            return
+        self.commands.append((now, cmd))
+        if cmd == "proto":
+            self.send_json({"proto": proto.PROTOCOL_VERSION})
+            self.protocol = PROTO_BINARY
+            return
+        if cmd in ("land", "offboard"):
+            self.mode = cmd
+        self.send_json({"ack": cmd, "rid": obj.get("rid")})
+
+    def _on_frame(self, frame: bytes):
+        try:
+            msg_type, payload = proto.decode_frame(frame)
+        except proto.FrameError:
+            return
+        now = time.monotonic()
+        try:
+            if msg_type == proto.MSG_COMMAND:
+                cmd, rid = proto.decode_command(payload)
+                if cmd:
+                    self.mode = cmd
+                    self.commands.append((now, cmd))
+            elif msg_type == proto.MSG_WAYPOINTS:
+                self.waypoints = list(proto.decode_waypoints(payload))
+                rid = proto.waypoints_rid(payload)
+                self.commands.append((now, "waypoints"))
+            elif msg_type == proto.MSG_MOTORS:
+                pwms, rid = proto.decode_motors(payload)
+                self._on_motors(pwms, now)
+            elif msg_type == proto.MSG_MISSION:
+                msg = proto.decode_mission(payload)
+                rid = msg["rid"] if self._on_mission(msg, now) else None
+            else:
+                return
+        except (proto.FrameError, struct.error):
+            return
+        if rid is not None:
+            self._write(proto.encode_ack(rid))
+
+    def _on_motors(self, pwms: List[int], now: float):
+        self.motors = pwms
+        self.motor_frames.append((now, pwms))
+
+    def _on_mission(self, msg: dict, now: float) -> bool:
+        """Ráp mission theo chunk; True => ACK. Chunk hỏng / mission sai CRC => im lặng (ground gửi lại)."""
+        op, mid = msg.get("mission"), msg.get("id")
+        if op == "begin":
+            # begin lặp lại cùng id (resume) giữ nguyên chunk đã nhận
+            base = msg.get("base") or 0
+            if base and base != self.mission_id:
+                return False                        # không có mission gốc cho delta
+            rx = self._mission_rx.get(mid)
+            if rx is None or rx["crc"] != msg.get("crc"):
+                self._mission_rx = {mid: {"size": msg["size"], "chunks": msg["chunks"], "crc": msg["crc"],
+                                          "base": base, "parts": {}}}
+            return True
+        rx = self._mission_rx.get(mid)
+        if op == "chunk":
+            if rx is None:
+                return mid == self.mission_id      # chunk lặp sau khi đã xong
+            try:
+                data = mission.chunk_data(msg)
+            except ValueError:
+                return False
+            if mission.chunk_crc(data) != msg.get("crc") or not 0 <= msg.get("i", -1) < rx["chunks"]:
+                return False
+            rx["parts"][msg["i"]] = data
+            return True
+        if op == "end":
+            if rx is None:
+                return mid == self.mission_id
+            if len(rx["parts"]) != rx["chunks"]:
+                return False
+            blob = b"".join(rx["parts"][i] for i in range(rx["chunks"]))
+            if len(blob) != rx["size"] or zlib.crc32(blob) != rx["crc"]:
+                return False
+            base = self._mission_q if rx["base"] and rx["base"] == self.mission_id else None
+            try:
+                points = mission.decode_blob(blob, base)
+            except ValueError as e:
+                logger.warning(f"Mission #{mid} không ráp được: {e}")
+                return False
+            if mission.mission_crc(points) != msg.get("crc"):
+                return False
+            self._mission_q = points
+            self.mission_id = mid
+            self.waypoints = mission.dequantize(points)
+            del self._mission_rx[mid]
+            self.commands.append((now, "mission"))
+            return True
+        return False
+
+
+    def _on_param(self, msg: dict) -> Optional[dict]:
+        """Giao thức tham số của app.params; set chỉ giữ tạm tới khi commit cùng tx."""
+        op = msg.get("param")
+        if op == "info":
+            return {"op": "info", "fw": self.firmware, "count": len(self.params),
+                    "hash": prm.table_hash(self.params)}
+        if op == "hashes":
+            b = int(msg.get("buckets", 1))
+            return {"op": "hashes", "buckets": b, "hashes": prm.bucket_hashes(self.params, b)}
+        if op == "get":
+            b, i = int(msg.get("buckets", 1)), msg.get("bucket")
+            return {"op": "values", "bucket": i,
+                    "values": {n: v for n, v in self.params.items() if prm.bucket_of(n, b) == i}}
+        if op == "set":
+            self._param_tx.setdefault(msg.get("tx"), {}).update(msg.get("values") or {})
+            return {"op": "set", "tx": msg.get("tx")}
+        if op == "commit":
+            staged = self._param_tx.pop(msg.get("tx"), {})
+            applied = sorted(n for n in staged if n in self.params)
+            for n in applied:
+                self.params[n] = staged[n]
+            self.commands.append((time.monotonic(), "param_commit"))
+            return {"op": "commit", "tx": msg.get("tx"), "applied": applied,
+                    "hash": prm.table_hash(self.params)}
+        return None
+
+
+class BootloaderSimulator:
+    """Bootloader PX4 giả trên pty: GET_SYNC/GET_DEVICE/CHIP_ERASE/PROG_MULTI/GET_CRC/REBOOT, flash trong RAM."""
+
+    def __init__(self, board_id: int = 50, flash_size: int = 2 * 1024 * 1024,
+                 program_delay: float = 0.0, erase_delay: float = 0.0, bl_rev: int = 5):
+        """
+        program_delay -> giây mỗi lần ghi PROG_MULTI (giả thời gian ghi flash)
+        erase_delay   -> giây cho CHIP_ERASE
+        bl_rev        -> INFO_BL_REV; < 3 thì REBOOT không trả lời (như bootloader cũ)
+        """
+        import pty
+        import tty
+
+        self.board_id = board_id
+        self.flash_size = flash_size
+        self.program_delay = program_delay
+        self.erase_delay = erase_delay
+        self.bl_rev = bl_rev
+        self.flash = bytearray(b"\xff" * flash_size)
+        self.addr = 0
+        self.rebooted = False
+        self.commands: List[int] = []
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._rx = bytearray()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "BootloaderSimulator":
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="bootloader-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def image(self) -> bytes:
+        return bytes(self.flash[:self.addr])
+
+    def _run(self):
+        while self._running:
+            try:
+                ready, _, _ = select.select([self._master], [], [], 0.05)
+                if ready:
+                    self._rx += os.read(self._master, 4096)
+            except (OSError, ValueError):
+                break
+            while self._rx and self._step():
+                pass
+
+    def _reply(self, payload: bytes = b"", status: int = 0x10):
+        try:
+            os.write(self._master, payload + bytes([0x12, status]))
+        except OSError:
+            pass
+
+    def _step(self) -> bool:
+        """Xử lý 1 lệnh hoàn chỉnh đầu buffer; False nếu còn thiếu byte."""
+        from app.firmware import Px4Bootloader as BL, px4_crc
+
+        rx = self._rx
+        cmd = rx[0]
+        need = {BL.GET_DEVICE: 3, BL.PROG_MULTI: (rx[1] + 3) if len(rx) > 1 else 2}.get(cmd, 2)
+        if len(rx) < need:
+            return False
+        frame = bytes(rx[:need])
+        del rx[:need]
+        self.commands.append(cmd)
+        if frame[-1] != BL.EOC:
+            self._reply(status=BL.INVALID)
+        elif cmd == BL.GET_SYNC:
+            self._reply()
+        elif cmd == BL.GET_DEVICE:
+            value = {BL.INFO_BL_REV: self.bl_rev, BL.INFO_BOARD_ID: self.board_id, BL.INFO_BOARD_REV: 0,
+                     BL.INFO_FLASH_SIZE: self.flash_size}.get(frame[1])
+            if value is None:
+                self._reply(status=BL.INVALID)
+            else:
+                self._reply(struct.pack("<I", value))
+        elif cmd == BL.CHIP_ERASE:
+            time.sleep(self.erase_delay)
+            self.flash[:] = b"\xff" * self.flash_size
+            self.addr = 0
+            self._reply()
+        elif cmd == BL.PROG_MULTI:
+            data = frame[2:-1]
+            if len(data) % 4 or self.addr + len(data) > self.flash_size:
+                self._reply(status=BL.FAILED)
+            else:
+                if self.program_delay:
+                    time.sleep(self.program_delay)
+                self.flash[self.addr:self.addr + len(data)] = data
+                self.addr += len(data)
+                self._reply()
+        elif cmd == BL.GET_CRC:
+            self._reply(struct.pack("<I", px4_crc(self.flash)))
+        elif cmd == BL.REBOOT:
+            self.rebooted = True
+            if self.bl_rev >= 3:
+                self._reply()
+        else:
+            self._reply(status=BL.INVALID)
+        return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for ch, hz in DEFAULT_RATES.items():
+        ap.add_argument(f"--{ch}", type=float, default=hz, help=f"{ch} rate Hz (mặc định {hz})")
+    ap.add_argument("--noise", type=float, default=0.0)
+    ap.add_argument("--baud", type=int, default=None, help="giới hạn tốc độ như link thật (vd. 9600)")
+    ap.add_argument("--autostart", action="store_true", help="phát ngay không chờ ON")
+    args = ap.parse_args()
+
+    from app.log import setup_logging
+    setup_logging()
+
+    rates = {ch: getattr(args, ch) for ch in DEFAULT_RATES}
+    sim = DroneSimulator(rates, noise=args.noise, baudrate=args.baud, autostart=args.autostart).start()
+    logger.info(f"Drone simulator tại {sim.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
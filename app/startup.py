@@ -0,0 +1,155 @@
+"""
+Đo thời gian khởi động (time-to-first-frame) của app.main.
+
+- ``StartupProfile``: đánh dấu các pha (config, QApplication, cửa sổ, frame đầu, web server,
+  trang web load xong, serial kết nối...) theo perf_counter tính từ lúc import app.main
+- ``python -m app.startup``: chạy ``python -X importtime -m app.main --profile-startup``,
+  in bảng pha + top import chậm nhất (cộng dồn theo package), so với ngân sách
+  ``startup_budget_ms`` (mặc định 1500 ms)
+
+    python -m app.startup --runs 3 --top 15
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_PREFIX = "STARTUP_PROFILE "
+DEFAULT_BUDGET_MS = 1500.0
+
+# Mốc được import sớm nhất (app.main import module này đầu tiên)
+T0 = time.perf_counter()
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class StartupProfile:
+    def __init__(self, enabled: bool = False, budget_ms: float = DEFAULT_BUDGET_MS):
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.marks: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+        self._done = False
+
+    def mark(self, name: str):
+        """Ghi mốc (thread-safe; mốc trùng tên chỉ giữ lần đầu)."""
+        t = (time.perf_counter() - T0) * 1e3
+        with self._lock:
+            if any(n == name for n, _ in self.marks):
+                return
+            self.marks.append((name, t))
+        logger.debug("startup %-18s %8.1f ms", name, t)
+
+    def elapsed(self, name: str) -> Optional[float]:
+        with self._lock:
+            return next((t for n, t in self.marks if n == name), None)
+
+    def report(self) -> Dict:
+        with self._lock:
+            marks = list(self.marks)
+        first = next((t for n, t in marks if n == "first_frame"), None)
+        out = {"marks": marks, "first_frame_ms": first, "budget_ms": self.budget_ms}
+        if first is not None:
+            msg = f"Time-to-first-frame {first:.0f} ms (ngân sách {self.budget_ms:.0f} ms)"
+            (logger.warning if first > self.budget_ms else logger.info)(msg)
+        return out
+
+    def finish(self):
+        """In kết quả 1 lần; ở chế độ profile in thêm dòng JSON cho ``python -m app.startup``."""
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        rep = self.report()
+        if self.enabled:
+            print(PROFILE_PREFIX + json.dumps(rep), flush=True)
+
+
+# ================= Phân tích -X importtime =================
+def parse_importtime(text: str) -> List[Tuple[str, int, int, int]]:
+    """Dòng ``import time: self | cumulative | name`` -> (name, self_us, cum_us, depth)."""
+    rows = []
+    for line in text.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def summarize_imports(rows, top: int = 15):
+    """Top module theo thời gian cộng dồn và tổng self-time theo package gốc."""
+    by_pkg: Dict[str, int] = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        by_pkg[root] = by_pkg.get(root, 0) + self_us
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+    packages = sorted(by_pkg.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return slowest, packages
+
+
+def run_profile(timeout: float, extra_env=None) -> Tuple[Optional[Dict], str]:
+    env = dict(os.environ, **(extra_env or {}))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "app.main", PROFILE_FLAG],
+                          capture_output=True, text=True, timeout=timeout, env=env,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    report = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(PROFILE_PREFIX):
+            report = json.loads(line[len(PROFILE_PREFIX):])
+    if report is None:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        print(f"app.main không trả kết quả profile (exit {proc.returncode}):\n{tail}", file=sys.stderr)
+    return report, proc.stderr
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=1)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--budget-ms", type=float, default=None, help="mặc định startup_budget_ms trong settings.toml")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    reports, stderr = [], ""
+    for _ in range(args.runs):
+        rep, stderr = run_profile(args.timeout)
+        if rep is None:
+            raise SystemExit(1)
+        reports.append(rep)
+
+    budget = args.budget_ms or reports[-1]["budget_ms"]
+    names = [n for n, _ in reports[0]["marks"]]
+    print(f"Pha khởi động (ms từ lúc import app.main, {args.runs} lần chạy, min / median)")
+    for name in names:
+        ts = sorted(t for rep in reports for n, t in rep["marks"] if n == name)
+        if ts:
+            print(f"  {name:<20} {ts[0]:9.1f} {ts[len(ts) // 2]:9.1f}")
+
+    slowest, packages = summarize_imports(parse_importtime(stderr), args.top)
+    print("\nImport chậm nhất (cộng dồn, lần chạy cuối)")
+    for name, self_us, cum_us, depth in slowest:
+        print(f"  {cum_us / 1e3:8.1f} ms  {'  ' * depth}{name}")
+    print("\nSelf-time theo package")
+    for pkg, us in packages:
+        print(f"  {us / 1e3:8.1f} ms  {pkg}")
+
+    firsts = sorted(r["first_frame_ms"] for r in reports if r["first_frame_ms"] is not None)
+    if firsts:
+        med = firsts[len(firsts) // 2]
+        verdict = "OK" if med <= budget else "VƯỢT NGÂN SÁCH"
+        print(f"\nTime-to-first-frame median {med:.0f} ms / ngân sách {budget:.0f} ms: {verdict}")
+        if med > budget:
+            raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Schema-driven telemetry decoder.
+
+Mỗi dòng JSON từ drone được giải mã một lần, duyệt các key một lượt duy nhất
+và đổ vào ``TelemetryRecord``. Các alias (``battery``/``percent``/``volt``/``vel``)
+được giải quyết khi compile schema chứ không phải trên từng dòng. Dòng không chứa key
+alias nào (pose, GPS, heartbeat, ACK — phần lớn telemetry) đi fast path: ghi thẳng slot,
+không so priority.
+
+    python -m bench.bench_decoder      # so với logic if/else cũ
+"""
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class TelemetryRecord:
+    t: float = 0.0
+    hb: bool = False
+    local: Optional[Tuple[float, float, float]] = None
+    gps: Optional[Tuple[float, float, float]] = None
+    battery_percent: Optional[float] = None
+    battery_voltage: Optional[float] = None
+    speed: Optional[float] = None
+    proto: Optional[int] = None
+    ack: Optional[int] = None               # rid của lệnh drone vừa xác nhận
+    vehicle: Optional[int] = None           # id drone (VehicleManager gắn khi dispatch)
+    param: Optional[Dict[str, Any]] = None  # trả lời giao thức tham số (app.params)
+
+    @property
+    def has_battery(self) -> bool:
+        return self.battery_percent is not None or self.battery_voltage is not None
+
+
+# ================= Converters =================
+# Trả về None nếu giá trị không hợp lệ; json.loads chỉ sinh int/float/bool/str/None/list/dict.
+_isfinite = math.isfinite
+
+
+def _as_float(v) -> Optional[float]:
+    t = type(v)
+    if t is float:
+        return v if _isfinite(v) else None
+    if t is int or t is bool:
+        try:
+            return float(v)
+        except OverflowError:
+            return None
+    return None
+
+
+def _as_percent(v) -> Optional[float]:
+    pv = _as_float(v)
+    if pv is None:
+        return None
+    return pv * 100.0 if pv <= 1.0 else pv
+
+
+def _as_int(v) -> Optional[int]:
+    return v if type(v) is int else None
+
+
+def _as_dict(v) -> Optional[dict]:
+    return v if type(v) is dict else None
+
+
+def _as_flag(v) -> Optional[bool]:
+    try:
+        return True if int(v) == 1 else None
+    except Exception:
+        return None
+
+
+def clean_json_str(s: str) -> str:
+    """Cắt phần {...} ngoài cùng của dòng, bỏ rác trước/sau."""
+    start = s.find("{")
+    end = s.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        return s[start:end + 1]
+    return ""
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    One schema entry.
+
+    Args:
+        path: JSON key, nested keys separated by '.' (e.g. "battery.percent")
+        slot: Record slot the value is written to
+        priority: Lower wins when several aliases fill the same slot
+        conv: Converter returning the value or None when invalid
+    """
+    path: str
+    slot: str
+    priority: int = 0
+    conv: Callable[[Any], Any] = _as_float
+
+
+DEFAULT_FIELDS: Tuple[Field, ...] = (
+    Field("hb", "hb", conv=_as_flag),
+    Field("x", "x"),
+    Field("y", "y"),
+    Field("z", "z"),
+    Field("lat", "lat"),
+    Field("lon", "lon"),
+    Field("alt", "alt"),
+    Field("battery.percent", "percent", 0, _as_percent),
+    Field("percent", "percent", 1, _as_percent),
+    Field("battery", "percent", 2, _as_percent),
+    Field("battery.voltage", "voltage", 0),
+    Field("voltage", "voltage", 1),
+    Field("volt", "voltage", 2),
+    Field("speed", "speed", 0),
+    Field("vel", "speed", 1),
+    Field("proto", "proto", conv=_as_int),
+    Field("rid", "ack", conv=_as_int),
+    Field("param", "param", conv=_as_dict),
+)
+
+_SLOTS = ("hb", "x", "y", "z", "lat", "lon", "alt", "percent", "voltage", "speed", "proto", "ack", "param")
+
+
+class TelemetrySchema:
+    """Compiled lookup tables: key -> ((slot_index, priority, conv), ...)."""
+
+    def __init__(self, fields: Iterable[Field] = DEFAULT_FIELDS):
+        self.fields = tuple(fields)
+        slot_index = {s: i for i, s in enumerate(_SLOTS)}
+        top: Dict[str, List[tuple]] = {}
+        nested: Dict[str, Dict[str, List[tuple]]] = {}
+        for f in self.fields:
+            if f.slot not in slot_index:
+                raise ValueError(f"Unknown telemetry slot: {f.slot}")
+            entry = (slot_index[f.slot], f.priority, f.conv)
+            parts = f.path.split(".")
+            if len(parts) == 1:
+                top.setdefault(parts[0], []).append(entry)
+            elif len(parts) == 2:
+                nested.setdefault(parts[0], {}).setdefault(parts[1], []).append(entry)
+            else:
+                raise ValueError(f"Field path too deep: {f.path}")
+        self.top = {k: tuple(v) for k, v in top.items()}
+        self.nested = {k: {kk: tuple(vv) for kk, vv in v.items()} for k, v in nested.items()}
+        # Fast path: key phẳng là nguồn duy nhất của slot (không alias, không lồng) -> ghi thẳng,
+        # không cần so priority. Dòng không chạm key nào trong ``aliased`` (pose, gps, hb, ack...) đi đường này.
+        sources: Dict[int, int] = {}
+        for f in self.fields:
+            sources[slot_index[f.slot]] = sources.get(slot_index[f.slot], 0) + 1
+        self.flat = {k: v[0][::2] for k, v in self.top.items()
+                     if len(v) == 1 and sources[v[0][0]] == 1 and k not in self.nested}
+        self.aliased = frozenset(set(self.top) - set(self.flat)) | frozenset(self.nested)
+
+
+class TelemetryDecoder:
+    """
+    Decode one telemetry line into a ``TelemetryRecord``.
+
+    Subclass or pass another ``TelemetrySchema`` to plug in extra keys;
+    ``GroundController`` only relies on ``decode(line, t)``.
+    """
+
+    _NO_PRIO = 1 << 30
+
+    def __init__(self, schema: Optional[TelemetrySchema] = None):
+        self.schema = schema or TelemetrySchema()
+        # clean_json_str đã cắt đúng {...}: gọi thẳng scanner C, bỏ 2 lần regex khoảng trắng
+        # của JSONDecoder.decode (~2x nhanh hơn trên dòng telemetry ngắn)
+        self._scan = json.JSONDecoder().scan_once
+        # Lý do loại dòng (chỉ tăng trên nhánh lỗi): không có {...}, JSON hỏng, không phải object
+        self.rejects = {"no_json": 0, "invalid_json": 0, "not_object": 0}
+
+    def decode(self, line: str, t: float = 0.0) -> Optional[TelemetryRecord]:
+        """Return a record, or None if the line is not a JSON object."""
+        clean = clean_json_str(line)
+        if not clean:
+            self.rejects["no_json"] += 1
+            return None
+        try:
+            data, end = self._scan(clean, 0)
+        except (ValueError, StopIteration):
+            end = -1
+        if end != len(clean):           # JSON hỏng hoặc còn dữ liệu sau object (như "Extra data")
+            self.rejects["invalid_json"] += 1
+            return None
+        if type(data) is not dict:
+            self.rejects["not_object"] += 1
+            return None
+        return self.decode_obj(data, t)
+
+    def decode_obj(self, data: Dict[str, Any], t: float = 0.0) -> TelemetryRecord:
+        schema = self.schema
+        if data.keys().isdisjoint(schema.aliased):
+            return self._decode_flat(data, t)
+        no_prio = self._NO_PRIO
+        vals: List[Any] = [None] * len(_SLOTS)
+        prio = [no_prio] * len(_SLOTS)
+        top = self.schema.top
+        nested = self.schema.nested
+
+        for key, raw in data.items():
+            if type(raw) is dict:
+                sub = nested.get(key)
+                if sub is not None:
+                    for k2, raw2 in raw.items():
+                        entries = sub.get(k2)
+                        if entries is None:
+                            continue
+                        for idx, p, conv in entries:
+                            if p < prio[idx]:
+                                v = conv(raw2)
+                                if v is not None:
+                                    vals[idx] = v
+                                    prio[idx] = p
+                    continue
+            entries = top.get(key)
+            if entries is None:
+                continue
+            for idx, p, conv in entries:
+                if p < prio[idx]:
+                    v = conv(raw)
+                    if v is not None:
+                        vals[idx] = v
+                        prio[idx] = p
+
+        return self._record(vals, t)
+
+    def _decode_flat(self, data: Dict[str, Any], t: float) -> TelemetryRecord:
+        """Mọi key đều là nguồn duy nhất của slot (hoặc không biết): 1 lookup + 1 convert mỗi key."""
+        vals: List[Any] = [None] * len(_SLOTS)
+        flat = self.schema.flat
+        for key, raw in data.items():
+            entry = flat.get(key)
+            if entry is not None:
+                vals[entry[0]] = entry[1](raw)
+        return self._record(vals, t)
+
+    @staticmethod
+    def _record(vals: List[Any], t: float) -> TelemetryRecord:
+        hb, x, y, z, lat, lon, alt, percent, voltage, speed, proto, ack, param = vals
+        # positional theo thứ tự field của TelemetryRecord: rẻ hơn ~2x so với keyword trên đường nóng
+        return TelemetryRecord(
+            t,
+            bool(hb),
+            (x, y, z) if x is not None and y is not None and z is not None else None,
+            (lat, lon, alt) if lat is not None and lon is not None and alt is not None else None,
+            percent,
+            voltage,
+            speed,
+            proto,
+            ack,
+            None,           # vehicle: VehicleManager gắn khi dispatch
+            param,
+        )
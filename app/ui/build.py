@@ -0,0 +1,69 @@
+"""
+Biên dịch app/ui/*.ui thành class Python (ui_<tên>.py) để lúc chạy không phải parse XML.
+
+    python -m app.ui.build            # biên dịch file .ui đã đổi so với bản .py
+    python -m app.ui.build --force
+
+Dòng đầu bản biên dịch ghi sha256 của file .ui nguồn; git không giữ mtime nên so nội dung,
+không so thời gian sửa file.
+"""
+import argparse
+import hashlib
+import io
+import os
+
+UI_DIR = os.path.dirname(os.path.abspath(__file__))
+STAMP = "# ui-sha256: "
+
+
+def compiled_path(ui_path: str) -> str:
+    name = os.path.splitext(os.path.basename(ui_path))[0]
+    return os.path.join(os.path.dirname(ui_path), f"ui_{name}.py")
+
+
+def ui_digest(ui_path: str) -> str:
+    with open(ui_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def is_stale(ui_path: str) -> bool:
+    """Bản biên dịch thiếu hoặc không sinh từ đúng nội dung file .ui hiện tại."""
+    try:
+        with open(compiled_path(ui_path), "r", encoding="utf-8") as f:
+            first = f.readline().rstrip("\n")
+        return first != STAMP + ui_digest(ui_path)
+    except OSError:
+        return True
+
+
+def build(force: bool = False):
+    from PyQt6 import uic
+
+    built = []
+    for name in sorted(os.listdir(UI_DIR)):
+        if not name.endswith(".ui"):
+            continue
+        src = os.path.join(UI_DIR, name)
+        if not force and not is_stale(src):
+            continue
+        buf = io.StringIO()
+        uic.compileUi(src, buf)
+        # header của pyuic ghi đường dẫn tuyệt đối -> đổi về đường dẫn trong repo
+        code = buf.getvalue().replace(src, f"app/ui/{name}", 1)
+        code = f"{STAMP}{ui_digest(src)}\n{code}"
+        with open(compiled_path(src), "w", encoding="utf-8") as f:
+            f.write(code)
+        built.append(name)
+    return built
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    built = build(args.force)
+    print(f"Đã biên dịch: {', '.join(built)}" if built else "Không có file .ui nào cần biên dịch")
+
+
+if __name__ == "__main__":
+    main()
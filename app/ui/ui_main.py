@@ -0,0 +1,51 @@
+# ui-sha256: da703563eab15db6acf804a5b23fa421202b7cf4f71b1e3168a401e9bef7ecb7
+# Form implementation generated from reading ui file 'app/ui/main.ui'
+#
+# Created by: PyQt6 UI code generator 6.7.1
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_GroundStation(object):
+    def setupUi(self, GroundStation):
+        GroundStation.setObjectName("GroundStation")
+        GroundStation.resize(1772, 1384)
+        self.centralwidget = QtWidgets.QWidget(parent=GroundStation)
+        self.centralwidget.setObjectName("centralwidget")
+        self.horizontalLayout = QtWidgets.QHBoxLayout(self.centralwidget)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.left_frame = QtWidgets.QFrame(parent=self.centralwidget)
+        self.left_frame.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.left_frame.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.left_frame.setObjectName("left_frame")
+        self.horizontalLayout.addWidget(self.left_frame)
+        self.right_frame = QtWidgets.QFrame(parent=self.centralwidget)
+        self.right_frame.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.right_frame.setFrameShadow(QtWidgets.QFrame.Shadow.Raised)
+        self.right_frame.setObjectName("right_frame")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.right_frame)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.load_map_widget = QtWidgets.QWidget(parent=self.right_frame)
+        self.load_map_widget.setStyleSheet("")
+        self.load_map_widget.setObjectName("load_map_widget")
+        self.verticalLayout.addWidget(self.load_map_widget)
+        self.horizontalLayout.addWidget(self.right_frame)
+        GroundStation.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(parent=GroundStation)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1772, 22))
+        self.menubar.setObjectName("menubar")
+        GroundStation.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(parent=GroundStation)
+        self.statusbar.setObjectName("statusbar")
+        GroundStation.setStatusBar(self.statusbar)
+
+        self.retranslateUi(GroundStation)
+        QtCore.QMetaObject.connectSlotsByName(GroundStation)
+
+    def retranslateUi(self, GroundStation):
+        _translate = QtCore.QCoreApplication.translate
+        GroundStation.setWindowTitle(_translate("GroundStation", "MainWindow"))
@@ -0,0 +1,400 @@
+"""
+Web server nhúng trong tiến trình GUI: phục vụ web/ + API nhỏ, chạy trên 1 event loop nền.
+
+Thay cho tiến trình con ``python -m http.server``:
+- HTTP/1.1 keep-alive, GET/HEAD, nhiều kết nối đồng thời (asyncio)
+- ETag + Last-Modified -> 304 khi trình duyệt đã có bản mới nhất
+- nén: ưu tiên file nén sẵn cạnh file gốc (``x.js.br`` / ``x.js.gz``, tạo bằng
+  ``python -m app.webserver --precompress``); không có thì gzip 1 lần rồi giữ trong RAM
+- ``start()`` chỉ trả về khi socket đã listen (``ready``), GUI load trang ngay sau đó
+
+API: ``add_route(path, handler)``; handler(request) -> (status, headers, body) hoặc coroutine.
+"""
+import argparse
+import asyncio
+import email.utils
+import gzip
+import logging
+import mimetypes
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn: chỉ dùng để tạo .br khi precompress
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+COMPRESS_MIN_SIZE = 1024
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+CACHE_VENDOR = "public, max-age=86400"
+CACHE_DEFAULT = "no-cache"                      # luôn hỏi lại, nhưng 304 nếu ETag khớp
+MAX_HEADER_BYTES = 16 * 1024
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/javascript", ".mjs")
+mimetypes.add_type("text/css", ".css")
+
+_REASONS = {200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden",
+            404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: str
+    version: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    reader: Optional[asyncio.StreamReader] = None
+    writer: Optional[asyncio.StreamWriter] = None
+
+
+Response = Tuple[int, Dict[str, str], bytes]
+Handler = Callable[[Request], Union[Response, Awaitable[Response], None]]
+
+
+@dataclass
+class _Entry:
+    """File tĩnh đã đọc; ``variants`` là bản nén theo encoding."""
+    key: Tuple[int, int]
+    etag: str
+    last_modified: str
+    ctype: str
+    body: bytes
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+
+def _accepts(header: str, coding: str) -> bool:
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() != coding:
+            continue
+        q = params.replace(" ", "").partition("q=")[2]
+        try:
+            return not q or float(q) > 0
+        except ValueError:
+            return True
+    return False
+
+
+class WebServer:
+    def __init__(self, root: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """port=0 -> cổng bất kỳ; cổng bận thì tự lùi về cổng bất kỳ."""
+        self.root = os.path.realpath(root)
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Handler] = {}
+        self.ready = threading.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._cache: Dict[str, _Entry] = {}
+        self.stats = {"requests": 0, "not_modified": 0, "compressed": 0, "bytes_out": 0}
+
+    @property
+    def url(self) -> str:
+        host = "127.0.0.1" if self.host in ("", "0.0.0.0") else self.host
+        return f"http://{host}:{self.port}"
+
+    def add_route(self, path: str, handler: Handler):
+        self.routes[path] = handler
+
+    # ---- lifecycle ----
+    def start(self, timeout: float = 5.0) -> "WebServer":
+        """Chạy loop nền; trả về khi đã listen (raise nếu không mở được socket)."""
+        if self._thread and self._thread.is_alive():
+            return self
+        self.ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="web-server", daemon=True)
+        self._thread.start()
+        if not self.ready.wait(timeout):
+            raise RuntimeError("web server did not start in time")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            try:
+                self._server = self.loop.run_until_complete(self._listen())
+            except BaseException as e:
+                self._error = e
+                self.ready.set()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            logger.info(f"Web server at {self.url} (root {self.root})")
+            self.ready.set()
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _listen(self):
+        try:
+            return await asyncio.start_server(self._client, self.host, self.port, reuse_address=True)
+        except OSError as e:
+            if not self.port:
+                raise
+            logger.warning(f"Cổng {self.port} bận ({e}); dùng cổng bất kỳ")
+            return await asyncio.start_server(self._client, self.host, 0, reuse_address=True)
+
+    async def _shutdown(self):
+        """Đóng socket listen, huỷ mọi kết nối (kể cả WebSocket) và chờ chúng đóng xong."""
+        if self._server is not None:
+            self._server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)      # cho transport.close() kịp chạy connection_lost
+        self.loop.stop()
+
+    # ---- HTTP ----
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                req = await self._read_request(reader, writer)
+                if req is None:
+                    break
+                self.stats["requests"] += 1
+                keep = await self._handle(req)
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except asyncio.CancelledError:
+            pass        # stop(): kết thúc êm (Python 3.11 log lỗi nếu task client bị huỷ)
+        except Exception as e:
+            logger.error(f"Web server error: {e}")
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _read_request(self, reader, writer) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        if len(head) > MAX_HEADER_BYTES:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, _, v = line.partition(":")
+                headers[k.strip().lower()] = v.strip()
+        # bỏ body (không hỗ trợ upload)
+        n = int(headers.get("content-length", "0") or 0)
+        if n:
+            await reader.readexactly(n)
+        parts = urlsplit(target)
+        return Request(method.upper(), unquote(parts.path), parts.query, version, headers, reader, writer)
+
+    async def _handle(self, req: Request) -> bool:
+        keep = req.version == "HTTP/1.1" and req.headers.get("connection", "").lower() != "close"
+        handler = self.routes.get(req.path)
+        if handler is not None:
+            try:
+                res = handler(req)
+                if asyncio.iscoroutine(res):
+                    res = await res
+            except Exception as e:
+                logger.error(f"Route {req.path} error: {e}")
+                res = (500, {"Content-Type": "text/plain"}, b"internal error")
+            if res is None:         # handler đã tự xử lý kết nối (vd. WebSocket)
+                return False
+            status, headers, body = res
+            await self._send(req, status, headers, body, keep)
+            return keep
+        if req.method not in ("GET", "HEAD"):
+            await self._send(req, 405, {"Allow": "GET, HEAD"}, b"", keep)
+            return keep
+        await self._static(req, keep)
+        return keep
+
+    async def _send(self, req: Request, status: int, headers: Dict[str, str], body: bytes, keep: bool):
+        out = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+               f"Date: {email.utils.formatdate(usegmt=True)}",
+               f"Connection: {'keep-alive' if keep else 'close'}"]
+        if status != 304:
+            out.append(f"Content-Length: {len(body)}")
+        out.extend(f"{k}: {v}" for k, v in headers.items())
+        w = req.writer
+        w.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1"))
+        if body and req.method != "HEAD" and status != 304:
+            w.write(body)
+            self.stats["bytes_out"] += len(body)
+        await w.drain()
+
+    # ---- static files ----
+    def _resolve(self, path: str) -> Optional[str]:
+        full = os.path.realpath(os.path.join(self.root, path.lstrip("/")))
+        if full != self.root and not full.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(full):
+            full = os.path.join(full, "index.html")
+        return full if os.path.isfile(full) else None
+
+    def _entry(self, full: str) -> _Entry:
+        st = os.stat(full)
+        key = (st.st_mtime_ns, st.st_size)
+        ent = self._cache.get(full)
+        if ent is not None and ent.key == key:
+            return ent
+        with open(full, "rb") as f:
+            body = f.read()
+        ctype = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ctype == "application/javascript":
+            ctype += "; charset=utf-8"
+        ent = _Entry(key, f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+                     email.utils.formatdate(st.st_mtime, usegmt=True), ctype, body)
+        # file nén sẵn (chỉ dùng khi không cũ hơn file gốc)
+        for coding, ext in (("br", ".br"), ("gzip", ".gz")):
+            try:
+                pst = os.stat(full + ext)
+            except OSError:
+                continue
+            if pst.st_mtime_ns >= st.st_mtime_ns:
+                with open(full + ext, "rb") as f:
+                    ent.variants[coding] = f.read()
+        self._cache[full] = ent
+        return ent
+
+    def _not_modified(self, req: Request, ent: _Entry) -> bool:
+        inm = req.headers.get("if-none-match")
+        if inm is not None:
+            return any(tag.strip().removeprefix("W/") == ent.etag for tag in inm.split(",")) or inm.strip() == "*"
+        ims = req.headers.get("if-modified-since")
+        if ims:
+            try:
+                return email.utils.parsedate_to_datetime(ims).timestamp() >= ent.key[0] // 10 ** 9
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def _static(self, req: Request, keep: bool):
+        full = self._resolve(req.path)
+        if full is None:
+            await self._send(req, 404, {"Content-Type": "text/plain"}, b"not found", keep)
+            return
+        try:
+            ent = self._entry(full)
+        except OSError:
+            await self._send(req, 403, {"Content-Type": "text/plain"}, b"forbidden", keep)
+            return
+        rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+        headers = {
+            "ETag": ent.etag,
+            "Last-Modified": ent.last_modified,
+            "Cache-Control": CACHE_VENDOR if rel.startswith("assets/vendor/") else CACHE_DEFAULT,
+        }
+        if self._not_modified(req, ent):
+            self.stats["not_modified"] += 1
+            await self._send(req, 304, headers, b"", keep)
+            return
+        headers["Content-Type"] = ent.ctype
+        body = ent.body
+        compressible = len(ent.body) >= COMPRESS_MIN_SIZE and ent.ctype.startswith(COMPRESSIBLE)
+        if compressible or ent.variants:
+            headers["Vary"] = "Accept-Encoding"
+            accept = req.headers.get("accept-encoding", "")
+            coding = next((c for c in ("br", "gzip") if c in ent.variants and _accepts(accept, c)), None)
+            if coding is None and compressible and _accepts(accept, "gzip"):
+                # nén 1 lần trong executor (không chặn loop), giữ theo ETag hiện tại
+                ent.variants["gzip"] = await asyncio.get_running_loop().run_in_executor(
+                    None, gzip.compress, ent.body, 6)
+                coding = "gzip"
+            if coding is not None:
+                body = ent.variants[coding]
+                headers["Content-Encoding"] = coding
+                self.stats["compressed"] += 1
+        await self._send(req, 200, headers, body, keep)
+
+
+# ================= Precompress =================
+def precompress(root: str, min_size: int = COMPRESS_MIN_SIZE) -> Dict[str, int]:
+    """Tạo x.gz (và x.br nếu có module brotli) cạnh các file text lớn; bỏ qua file đã mới."""
+    made = {"gzip": 0, "br": 0, "skipped": 0}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.endswith((".gz", ".br")):
+                continue
+            full = os.path.join(dirpath, name)
+            ctype = mimetypes.guess_type(full)[0] or ""
+            st = os.stat(full)
+            if st.st_size < min_size or not ctype.startswith(COMPRESSIBLE):
+                continue
+            data = None
+            for coding, ext, fn in (("gzip", ".gz", lambda d: gzip.compress(d, 9, mtime=0)),
+                                    ("br", ".br", brotli.compress if brotli else None)):
+                if fn is None:
+                    continue
+                try:
+                    if os.stat(full + ext).st_mtime_ns >= st.st_mtime_ns:
+                        made["skipped"] += 1
+                        continue
+                except OSError:
+                    pass
+                if data is None:
+                    with open(full, "rb") as f:
+                        data = f.read()
+                with open(full + ext, "wb") as f:
+                    f.write(fn(data))
+                made[coding] += 1
+    return made
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--root", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web"))
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--precompress", action="store_true", help="tạo .gz/.br cạnh asset rồi thoát")
+    args = ap.parse_args()
+
+    from app.log import setup_logging
+    setup_logging()
+
+    if args.precompress:
+        t0 = time.perf_counter()
+        made = precompress(args.root)
+        logger.info(f"Precompress {args.root}: {made} ({time.perf_counter() - t0:.2f} s)")
+        return
+    server = WebServer(args.root, args.host, args.port).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Telemetry qua WebSocket cho trình duyệt ngoài Qt (web/ chạy bằng nginx, Dockerfile.web).
+
+Gắn vào ``WebServer`` bằng ``server.add_route(WS_PATH, stream.handle)``; GroundController
+đẩy từng ``TelemetryRecord`` đã giải mã qua ``publish_record`` (thread đọc serial).
+
+- kênh: pose, gps, battery, speed, link; mỗi client tự chọn kênh
+  (``?channels=pose,gps`` hoặc gửi ``{"subscribe": [...]}``); giá trị sai -> 400 lúc bắt tay,
+  hoặc frame ``{"type": "error"}`` với message subscribe
+- định dạng: json (text), binary (struct, xem ``encode_binary``) hoặc msgpack (nếu cài)
+- mỗi kênh của mỗi client chỉ giữ giá trị mới nhất chưa gửi: client chậm bị bỏ frame cũ
+  (đếm ``dropped``) chứ không dồn hàng đợi; ``rate_hz`` giới hạn tần số gửi từng client
+- mỗi frame được mã hoá 1 lần cho mọi client cùng định dạng
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+from urllib.parse import parse_qs
+
+try:
+    import msgpack
+except ImportError:  # msgpack là tuỳ chọn; client xin msgpack sẽ nhận json
+    msgpack = None
+
+from app.telemetry import TelemetryRecord
+
+logger = logging.getLogger(__name__)
+
+WS_PATH = "/ws/telemetry"
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+CH_POSE = "pose"
+CH_GPS = "gps"
+CH_BATTERY = "battery"
+CH_SPEED = "speed"
+CH_LINK = "link"
+CHANNELS = (CH_POSE, CH_GPS, CH_BATTERY, CH_SPEED, CH_LINK)
+
+FMT_JSON = "json"
+FMT_BINARY = "binary"
+FMT_MSGPACK = "msgpack"
+FORMATS = (FMT_JSON, FMT_BINARY, FMT_MSGPACK)
+
+# Binary: header <BHd (channel id, seq & 0xFFFF, t) + giá trị theo struct của kênh (thiếu = NaN)
+_BIN_HEADER = struct.Struct("<BHd")
+_BIN_BODY = {
+    CH_POSE: struct.Struct("<3f"),          # x, y, z (m)
+    CH_GPS: struct.Struct("<2df"),          # lat, lon (độ, float64), alt (m)
+    CH_BATTERY: struct.Struct("<2f"),       # percent, voltage
+    CH_SPEED: struct.Struct("<f"),
+    CH_LINK: struct.Struct("<B3f"),         # ok, rate_hz, loss, hb_age_ms
+}
+_CH_ID = {ch: i for i, ch in enumerate(CHANNELS)}
+
+OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_CLIENT_FRAME = 64 * 1024
+# Bộ đệm gửi nhỏ để client chậm làm drain() chặn sớm (=> bỏ frame cũ) thay vì dồn trong kernel
+SEND_BUFFER = 4 * 1024
+DEFAULT_MAX_CLIENTS = 256
+
+
+def ws_frame(opcode: int, payload: bytes) -> bytes:
+    """Frame server -> client (FIN, không mask)."""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def _nan(v) -> float:
+    return float("nan") if v is None else float(v)
+
+
+def encode_binary(channel: str, seq: int, t: float, value) -> bytes:
+    if channel == CH_LINK:
+        body = _BIN_BODY[CH_LINK].pack(1 if value.get("ok") else 0, _nan(value.get("rate_hz")),
+                                       _nan(value.get("loss")), _nan(value.get("hb_age_ms")))
+    elif channel == CH_SPEED:
+        body = _BIN_BODY[CH_SPEED].pack(_nan(value))
+    else:
+        body = _BIN_BODY[channel].pack(*map(_nan, value))
+    return _BIN_HEADER.pack(_CH_ID[channel], seq & 0xFFFF, t) + body
+
+
+class _Msg:
+    """1 giá trị của 1 kênh; frame mã hoá theo định dạng được cache dùng chung."""
+    __slots__ = ("ch", "seq", "t", "value", "_frames")
+
+    def __init__(self, ch: str, seq: int, t: float, value):
+        self.ch = ch
+        self.seq = seq
+        self.t = t
+        self.value = value
+        self._frames: Dict[str, bytes] = {}
+
+    def frame(self, fmt: str) -> bytes:
+        f = self._frames.get(fmt)
+        if f is None:
+            if fmt == FMT_BINARY:
+                f = ws_frame(OP_BINARY, encode_binary(self.ch, self.seq, self.t, self.value))
+            elif fmt == FMT_MSGPACK:
+                f = ws_frame(OP_BINARY, msgpack.packb({"ch": self.ch, "seq": self.seq, "t": self.t, "v": self.value}))
+            else:
+                f = ws_frame(OP_TEXT, json.dumps({"ch": self.ch, "seq": self.seq, "t": self.t, "v": self.value},
+                                                 separators=(",", ":")).encode("utf-8"))
+            self._frames[fmt] = f
+        return f
+
+
+class _Client:
+    __slots__ = ("id", "writer", "channels", "fmt", "interval", "pending", "wake", "sent", "dropped", "bytes")
+
+    def __init__(self, cid: int, writer: asyncio.StreamWriter):
+        self.id = cid
+        self.writer = writer
+        self.channels: Set[str] = set(CHANNELS)
+        self.fmt = FMT_JSON
+        self.interval = 0.0
+        self.pending: Dict[str, _Msg] = {}
+        self.wake = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.bytes = 0
+
+    def configure(self, channels: Optional[Iterable[str]] = None, fmt: Optional[str] = None,
+                  rate_hz: Optional[float] = None):
+        if channels is not None:
+            self.channels = {c for c in channels if c in CHANNELS}
+        if fmt in FORMATS:
+            self.fmt = FMT_JSON if fmt == FMT_MSGPACK and msgpack is None else fmt
+        if rate_hz is not None and math.isfinite(rate_hz):
+            self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+
+    def hello(self) -> bytes:
+        return ws_frame(OP_TEXT, json.dumps({"type": "hello", "channels": sorted(self.channels), "format": self.fmt,
+                                             "rate_hz": round(1.0 / self.interval, 3) if self.interval else 0}
+                                            ).encode("utf-8"))
+
+
+def check_options(channels=None, fmt=None, rate_hz=None):
+    """Kiểm tra (channels, format, rate_hz) từ query string hoặc message subscribe; ValueError nếu sai."""
+    if channels is not None:
+        if not isinstance(channels, list) or not all(isinstance(c, str) for c in channels):
+            raise ValueError("subscribe must be a list of channel names")
+        unknown = [c for c in channels if c not in CHANNELS]
+        if unknown:
+            raise ValueError(f"unknown channel(s): {', '.join(unknown)}")
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+    if rate_hz is not None:
+        if isinstance(rate_hz, bool) or not isinstance(rate_hz, (int, float)) \
+                or not math.isfinite(rate_hz) or rate_hz < 0:
+            raise ValueError(f"invalid rate_hz: {rate_hz}")
+    return channels, fmt, None if rate_hz is None else float(rate_hz)
+
+
+def parse_options(query: str):
+    """``?channels=&format=&rate_hz=`` -> (channels, format, rate_hz); ValueError nếu giá trị sai (trả 400)."""
+    q = parse_qs(query or "")
+    channels = fmt = rate_hz = None
+    if "channels" in q:
+        channels = [c for c in q["channels"][0].split(",") if c]
+    if "format" in q:
+        fmt = q["format"][0]
+    if "rate_hz" in q:
+        try:
+            rate_hz = float(q["rate_hz"][0])
+        except ValueError:
+            raise ValueError(f"invalid rate_hz: {q['rate_hz'][0]}")
+    return check_options(channels, fmt, rate_hz)
+
+
+class TelemetryStream:
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self.clients: Dict[int, _Client] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._next_id = 0
+        self._seq = 0
+        # Gộp phía thread gọi: giữ giá trị mới nhất mỗi kênh, chỉ 1 lần call_soon_threadsafe/đợt
+        self._lock = threading.Lock()
+        self._latest: Dict[str, _Msg] = {}
+        self._scheduled = False
+        self._wall = time.time() - time.monotonic()
+        self.stats = {"published": 0, "fanouts": 0, "connects": 0}
+
+    # ---- phía producer (thread bất kỳ) ----
+    def publish(self, channel: str, value, t: Optional[float] = None):
+        if not self.clients or self.loop is None:
+            return
+        with self._lock:
+            self._seq += 1
+            self._latest[channel] = _Msg(channel, self._seq, time.time() if t is None else t, value)
+            self.stats["published"] += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self.loop.call_soon_threadsafe(self._fanout)
+        except RuntimeError:        # loop đã đóng
+            self._scheduled = False
+
+    def publish_record(self, rec: TelemetryRecord):
+        if not self.clients:
+            return
+        # rec.t là monotonic: đổi sang Unix giây như publish_link / TelemetryHistory
+        t = rec.t + self._wall if rec.t else time.time()
+        if rec.local is not None:
+            self.publish(CH_POSE, list(rec.local), t)
+        if rec.gps is not None:
+            self.publish(CH_GPS, list(rec.gps), t)
+        if rec.has_battery:
+            self.publish(CH_BATTERY, [rec.battery_percent, rec.battery_voltage], t)
+        if rec.speed is not None:
+            self.publish(CH_SPEED, rec.speed, t)
+
+    def publish_link(self, stats: Dict[str, Any]):
+        # NaN không hợp lệ trong JSON
+        self.publish(CH_LINK, {k: (None if isinstance(v, float) and not math.isfinite(v) else v)
+                               for k, v in stats.items()})
+
+    # ---- phía event loop ----
+    def _fanout(self):
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            self._scheduled = False
+        self.stats["fanouts"] += 1
+        for c in self.clients.values():
+            for ch, msg in latest.items():
+                if ch in c.channels:
+                    if ch in c.pending:
+                        c.dropped += 1
+                    c.pending[ch] = msg
+            if c.pending:
+                c.wake.set()
+
+    def client_stats(self):
+        return [{"id": c.id, "format": c.fmt, "channels": sorted(c.channels), "sent": c.sent,
+                 "dropped": c.dropped, "bytes": c.bytes} for c in list(self.clients.values())]
+
+    async def handle(self, req):
+        """Route handler cho WebServer: bắt tay rồi giữ kết nối tới khi client đóng."""
+        key = req.headers.get("sec-websocket-key")
+        if req.headers.get("upgrade", "").lower() != "websocket" or not key:
+            return 400, {"Content-Type": "text/plain"}, b"websocket upgrade required"
+        if len(self.clients) >= self.max_clients:
+            return 503, {"Content-Type": "text/plain", "Retry-After": "5"}, b"too many clients"
+        try:
+            channels, fmt, rate_hz = parse_options(req.query)
+        except ValueError as e:
+            return 400, {"Content-Type": "text/plain"}, str(e).encode("utf-8")
+        self.loop = asyncio.get_running_loop()
+        w = req.writer
+        w.transport.set_write_buffer_limits(high=SEND_BUFFER)
+        sock = w.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+            except OSError:
+                pass
+        w.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 f"Sec-WebSocket-Accept: {ws_accept_key(key)}\r\n\r\n").encode("ascii"))
+
+        self._next_id += 1
+        client = _Client(self._next_id, w)
+        client.configure(channels, fmt, rate_hz)
+        w.write(client.hello())
+        self.clients[client.id] = client
+        self.stats["connects"] += 1
+        peer = w.get_extra_info("peername")
+        logger.info(f"WS client #{client.id} {peer} {client.fmt} {sorted(client.channels)}")
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            await self._recv_loop(client, req.reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.pop(client.id, None)
+            sender.cancel()
+            logger.info(f"WS client #{client.id} đóng (sent {client.sent}, dropped {client.dropped})")
+        return None
+
+    async def _send_loop(self, c: _Client):
+        w = c.writer
+        try:
+            while True:
+                await c.wake.wait()
+                c.wake.clear()
+                batch, c.pending = c.pending, {}
+                data = b"".join(msg.frame(c.fmt) for msg in batch.values())
+                w.write(data)
+                c.sent += len(batch)
+                c.bytes += len(data)
+                # trong lúc chờ drain, giá trị mới ghi đè giá trị cũ trong c.pending
+                await w.drain()
+                if c.interval:
+                    await asyncio.sleep(c.interval)
+        except (ConnectionError, RuntimeError):
+            w.close()
+
+    async def _recv_loop(self, c: _Client, reader: asyncio.StreamReader):
+        buf = b""
+        while True:
+            b0, b1 = await reader.readexactly(2)
+            op, fin = b0 & 0x0F, b0 & 0x80
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            if n > MAX_CLIENT_FRAME:
+                c.writer.write(ws_frame(OP_CLOSE, struct.pack("!H", 1009)))
+                return
+            mask = await reader.readexactly(4) if b1 & 0x80 else b"\0\0\0\0"
+            data = bytes(b ^ mask[i & 3] for i, b in enumerate(await reader.readexactly(n)))
+            if op == OP_CLOSE:
+                c.writer.write(ws_frame(OP_CLOSE, data[:2]))
+                return
+            if op == OP_PING:
+                c.writer.write(ws_frame(OP_PONG, data))
+                continue
+            if op == OP_PONG:
+                continue
+            buf += data
+            if not fin:
+                continue
+            text, buf = buf, b""
+            self._on_message(c, text)
+
+    def _on_message(self, c: _Client, text: bytes):
+        """{"subscribe": [...], "format": "...", "rate_hz": N}; trả lại hello với cấu hình mới.
+
+        Giá trị sai (như query string bị 400) -> frame {"type": "error"}, giữ nguyên cấu hình cũ.
+        """
+        try:
+            msg = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(msg, dict):
+            return
+        try:
+            channels, fmt, rate_hz = check_options(msg.get("subscribe"), msg.get("format"), msg.get("rate_hz"))
+        except ValueError as e:
+            c.writer.write(ws_frame(OP_TEXT, json.dumps({"type": "error", "error": str(e)}).encode("utf-8")))
+            return
+        c.configure(channels, fmt, rate_hz)
+        c.pending = {ch: m for ch, m in c.pending.items() if ch in c.channels}
+        c.writer.write(c.hello())
@@ -0,0 +1,137 @@
+"""
+Micro-benchmark: legacy per-line branching vs. schema-driven TelemetryDecoder.
+
+Chạy từ thư mục gốc:
+    python -m bench.bench_decoder [--lines 200000]
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+from app.telemetry import TelemetryDecoder
+
+
+# ---- Bản sao logic cũ trong GroundController._read_loop (để so sánh) ----
+def _is_num(x) -> bool:
+    try:
+        return isinstance(x, (int, float)) and math.isfinite(float(x))
+    except Exception:
+        return False
+
+
+def _clean_json_str(s: str) -> str:
+    start = s.find("{")
+    end = s.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        return s[start:end + 1]
+    return ""
+
+
+def legacy_decode(line: str):
+    clean_line = _clean_json_str(line)
+    if not clean_line:
+        return None
+    try:
+        data = json.loads(clean_line)
+    except json.JSONDecodeError:
+        return None
+    out = {}
+    try:
+        if int(data.get("hb", 0)) == 1:
+            out["hb"] = True
+    except Exception:
+        pass
+    if all(k in data for k in ("x", "y", "z")) and _is_num(data["x"]) and _is_num(data["y"]) and _is_num(data["z"]):
+        out["local"] = (float(data["x"]), float(data["y"]), float(data["z"]))
+    if all(k in data for k in ("lat", "lon", "alt")) and _is_num(data["lat"]) and _is_num(data["lon"]) and _is_num(data["alt"]):
+        out["gps"] = (float(data["lat"]), float(data["lon"]), float(data["alt"]))
+    percent = None
+    voltage = None
+    if "battery" in data and isinstance(data["battery"], dict):
+        b = data["battery"]
+        if "percent" in b and _is_num(b["percent"]):
+            pv = float(b["percent"])
+            percent = pv * 100.0 if pv <= 1.0 else pv
+        if "voltage" in b and _is_num(b["voltage"]):
+            voltage = float(b["voltage"])
+    if percent is None and "percent" in data and _is_num(data["percent"]):
+        pv = float(data["percent"])
+        percent = pv * 100.0 if pv <= 1.0 else pv
+    if percent is None and "battery" in data and _is_num(data["battery"]):
+        pv = float(data["battery"])
+        percent = pv * 100.0 if pv <= 1.0 else pv
+    if voltage is None and "voltage" in data and _is_num(data["voltage"]):
+        voltage = float(data["voltage"])
+    if voltage is None and "volt" in data and _is_num(data["volt"]):
+        voltage = float(data["volt"])
+    if percent is not None or voltage is not None:
+        out["battery"] = (percent, voltage)
+    spd = None
+    if "speed" in data and _is_num(data["speed"]):
+        spd = float(data["speed"])
+    elif "vel" in data and _is_num(data["vel"]):
+        spd = float(data["vel"])
+    if spd is not None:
+        out["speed"] = spd
+    return out
+
+
+def make_corpus(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(n):
+        kind = i % 5
+        if kind == 0:
+            obj = {"hb": 1}
+        elif kind == 1:
+            obj = {"x": rnd.uniform(-50, 50), "y": rnd.uniform(-50, 50), "z": rnd.uniform(0, 10)}
+        elif kind == 2:
+            obj = {"lat": 11.05 + rnd.random() * 1e-3, "lon": 106.66 + rnd.random() * 1e-3, "alt": rnd.uniform(0, 30)}
+        elif kind == 3:
+            obj = rnd.choice([
+                {"battery": {"percent": rnd.random(), "voltage": rnd.uniform(10, 12.6)}},
+                {"percent": rnd.uniform(0, 100), "volt": rnd.uniform(10, 12.6)},
+                {"battery": rnd.random()},
+            ])
+        else:
+            obj = {"x": rnd.random(), "y": rnd.random(), "z": rnd.random(), "vel": rnd.uniform(0, 8), "hb": 1}
+        line = json.dumps(obj)
+        if rnd.random() < 0.05:
+            line = "#garbage#" + line[:-3]
+        lines.append(line)
+    return lines
+
+
+def _once(fn, lines) -> float:
+    t0 = time.perf_counter()
+    for ln in lines:
+        fn(ln)
+    return time.perf_counter() - t0
+
+
+def _run(fns, lines, repeat):
+    """Chạy xen kẽ các hàm mỗi lượt (máy bị throttle thì cả hai cùng chịu), lấy lượt nhanh nhất."""
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            best[i] = min(best[i], _once(fn, lines))
+    return [len(lines) / b for b in best]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    lines = make_corpus(args.lines)
+    decoder = TelemetryDecoder()
+    legacy, new = _run([legacy_decode, decoder.decode], lines, args.repeat)
+    print(f"legacy  : {legacy:12,.0f} lines/s")
+    print(f"decoder : {new:12,.0f} lines/s  ({new / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Nạp firmware: mirror HTTP (WebServer) -> cache -> BootloaderSimulator (pty).
+
+So sánh đọc/giải nén block kế tiếp song song với ghi (``--prefetch``) với đọc rồi ghi tuần tự,
+và lần nạp thứ 2 (ảnh đã có trong cache, bỏ qua tải).
+
+    python -m bench.bench_firmware --size 1500000 --program-delay 0.002
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+from app.firmware import FirmwareFlasher, FirmwareSpec
+from app.simulator import BootloaderSimulator
+from app.webserver import WebServer
+
+
+def make_mirror(size: int, seed: int = 1) -> str:
+    """Ảnh .px4 nén được một phần (giống code thật hơn byte ngẫu nhiên)."""
+    rnd = random.Random(seed)
+    words = [rnd.randbytes(4) for _ in range(4096)]
+    raw = b"".join(rnd.choice(words) for _ in range(size // 4))
+    px4 = json.dumps({"board_id": 50, "image_size": len(raw),
+                      "image": base64.b64encode(zlib.compress(raw, 9)).decode("ascii")}).encode("utf-8")
+    root = tempfile.mkdtemp(prefix="fw-mirror-")
+    d = os.path.join(root, "px4", "stable", "default")
+    os.makedirs(d)
+    with open(os.path.join(d, "bench.px4"), "wb") as f:
+        f.write(px4)
+    with open(os.path.join(d, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": "bench.px4", "sha256": hashlib.sha256(px4).hexdigest(), "size": len(px4),
+                   "version": "bench"}, f)
+    return root
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--size", type=int, default=1_500_000, help="kích thước ảnh (byte)")
+    ap.add_argument("--program-delay", type=float, default=0.002, help="giây ghi flash mỗi block 252 byte")
+    ap.add_argument("--prefetch", type=int, default=8)
+    args = ap.parse_args()
+
+    if sys.platform.startswith("win"):
+        raise SystemExit("bench_firmware cần pty (Linux/macOS)")
+
+    web = WebServer(make_mirror(args.size), port=0).start()
+    try:
+        print(f"ảnh {args.size} byte, ghi {args.program_delay * 1e3:g} ms/block, mirror {web.url}")
+        print(f"{'chế độ':<22} {'tổng s':>8} {'nạp s':>8} {'tải':>10}")
+        for name, prefetch in (("tuần tự", 0), (f"prefetch {args.prefetch}", args.prefetch)):
+            cache = tempfile.mkdtemp(prefix="fw-cache-")
+            for run in ("nguội", "cache"):
+                events = []
+                flasher = FirmwareFlasher(cache, web.url, on_progress=events.append, prefetch=prefetch)
+                with BootloaderSimulator(program_delay=args.program_delay) as bl:
+                    t0 = time.perf_counter()
+                    res = flasher.flash(FirmwareSpec(), bl.port)
+                    dt = time.perf_counter() - t0
+                cached = any("already cached" in e["message"] for e in events)
+                print(f"{name + ' / ' + run:<22} {dt:>8.2f} {res['program_s']:>8.2f} "
+                      f"{'bỏ qua' if cached else 'có':>10}")
+    finally:
+        web.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Scaling nhiều drone: N DroneSimulator (pty) -> VehicleManager -> pipeline ingest dùng chung.
+
+Mỗi số lượng drone chạy ``--duration`` giây, đo:
+- record/s tổng đã decode + dispatch và số record gắn đúng vehicle id
+- ingest latency: ``ts`` lúc drone ghi -> lúc decode (p50/p99, gồm thời gian chờ trong pipeline)
+- queue p99: riêng phần chờ trong hàng của IngestPipeline
+
+``--mode inline`` để so với kiểu cũ (mỗi reader tự decode, không pipeline).
+
+    python -m bench.bench_fleet --vehicles 1 2 4 8 16 --pose 50 --duration 5
+    python -m bench.bench_fleet --vehicles 8 --workers 1 2 4 --json fleet.json
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.fleet import VehicleManager
+from app.simulator import DroneSimulator
+from bench.bench_latency import StampingDecoder, percentiles
+
+
+class CountingBridge:
+    """Thay LoraBridge: đếm record theo vehicle id nhận qua update_vehicle."""
+
+    def __init__(self):
+        self.by_vehicle = Counter()
+        self._lock = threading.Lock()
+
+    def update_vehicle(self, vid, channel, value):
+        with self._lock:
+            self.by_vehicle[vid] += 1
+
+    def __getattr__(self, name):
+        # update_position, update_link... của drone đang chọn: bỏ qua
+        return lambda *a, **kw: None
+
+
+def run(n, workers, mode, rates, duration):
+    sims = [DroneSimulator(rates, seed=i).start() for i in range(n)]
+    bridge = CountingBridge()
+    fleet = VehicleManager(bridge, workers=workers)
+    decoders = {}
+    for i, sim in enumerate(sims, 1):
+        decoders[i] = StampingDecoder()
+        ctl = fleet.add(i, sim.port, 115200, decoder=decoders[i])
+        if mode == "inline":
+            ctl.ingest = None
+    try:
+        fleet.start()
+        time.sleep(0.5)                 # bỏ giai đoạn khởi động
+        for dec in decoders.values():
+            dec.ingest.clear()
+        bridge.by_vehicle.clear()
+        t0 = time.perf_counter()
+        cpu0 = time.process_time()
+        time.sleep(duration)
+        elapsed = time.perf_counter() - t0
+        cpu = time.process_time() - cpu0
+        ingest = fleet.ingest.stats()
+    finally:
+        fleet.close()
+        for sim in sims:
+            sim.stop()
+
+    lat = [x for dec in decoders.values() for x in dec.ingest]
+    records = len(lat)
+    return {
+        "vehicles": n, "workers": workers, "mode": mode,
+        "records_s": records / elapsed,
+        "tagged_ok": all(bridge.by_vehicle[i] > 0 for i in decoders) and set(bridge.by_vehicle) <= set(decoders),
+        "ingest_ms": percentiles(lat),
+        "queue_ms_p99": ingest.get("queue_ms_p99"),
+        "cpu_pct": 100.0 * cpu / elapsed,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1])
+    ap.add_argument("--mode", nargs="+", choices=("pipeline", "inline"), default=["pipeline"])
+    ap.add_argument("--pose", type=float, default=50.0)
+    ap.add_argument("--gps", type=float, default=10.0)
+    ap.add_argument("--duration", type=float, default=3.0)
+    ap.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = ap.parse_args()
+
+    if sys.platform.startswith("win"):
+        raise SystemExit("bench_fleet cần pty (Linux/macOS)")
+
+    rates = {"hb": 2.0, "pose": args.pose, "gps": args.gps, "battery": 1.0}
+    print(f"pose {args.pose:g} Hz + gps {args.gps:g} Hz mỗi drone, {args.duration:g} s")
+    print(f"{'mode':>8} {'veh':>4} {'wrk':>4} {'rec/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} "
+          f"{'queue99':>8} {'cpu %':>6} {'tag':>4}")
+    results = []
+    for mode in args.mode:
+        for workers in (args.workers if mode == "pipeline" else [0]):
+            for n in args.vehicles:
+                r = run(n, max(1, workers), mode, rates, args.duration)
+                r["workers"] = workers
+                results.append(r)
+                st = r["ingest_ms"] or {"p50": float("nan"), "p99": float("nan"), "max": float("nan")}
+                q = r["queue_ms_p99"]
+                print(f"{mode:>8} {n:>4} {workers:>4} {r['records_s']:>8.0f} {st['p50']:>7.2f} {st['p99']:>7.2f} "
+                      f"{st['max']:>7.2f} {q if q is not None else float('nan'):>8.3f} {r['cpu_pct']:>6.1f} "
+                      f"{'ok' if r['tagged_ok'] else 'SAI':>4}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
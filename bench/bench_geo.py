@@ -0,0 +1,82 @@
+"""
+app.geo: đổi cả mission/track 1 lần bằng NumPy so với công thức từng điểm
+(cách latLonToENU/enuToLatLon trong web/js/utils.js đang làm cho mỗi step).
+
+    python -m bench.bench_geo --points 100000 --repeat 5
+"""
+import argparse
+import math
+import random
+import time
+
+from app import geo
+
+
+def scalar_to_enu(lat, lon, lat0, lon0):
+    """Bản Python của latLonToENU trong web/js/utils.js (lượng giác mỗi điểm)."""
+    r = 6378137.0
+    lat_r, lon_r = math.radians(lat), math.radians(lon)
+    o_lat, o_lon = math.radians(lat0), math.radians(lon0)
+    return (lon_r - o_lon) * r * math.cos(o_lat), (lat_r - o_lat) * r
+
+
+def scalar_to_geodetic(east, north, lat0, lon0):
+    r = 6378137.0
+    o_lat = math.radians(lat0)
+    return lat0 + math.degrees(north / r), lon0 + math.degrees(east / (r * math.cos(o_lat)))
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--points", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    if geo.np is None:
+        raise SystemExit("bench_geo cần NumPy")
+    np = geo.np
+
+    frame = geo.LocalFrame()
+    rnd = random.Random(1)
+    lat = [frame.lat0 + rnd.uniform(-0.02, 0.02) for _ in range(args.points)]
+    lon = [frame.lon0 + rnd.uniform(-0.02, 0.02) for _ in range(args.points)]
+    alt = [rnd.uniform(0, 100) for _ in range(args.points)]
+    lat_a, lon_a, alt_a = np.array(lat), np.array(lon), np.array(alt)
+
+    enu = frame.to_enu_many(lat_a, lon_a, alt_a)
+    ref = np.array([scalar_to_enu(a, b, frame.lat0, frame.lon0) for a, b in zip(lat, lon)])
+    err_enu = float(np.abs(enu[:, :2] - ref).max())
+    back = frame.to_geodetic_many(enu)
+    err_rt = float(np.abs(back[:, :2] - np.column_stack([lat_a, lon_a])).max())
+
+    rows = [
+        ("ll->enu scalar", _best(lambda: [scalar_to_enu(a, b, frame.lat0, frame.lon0)
+                                          for a, b in zip(lat, lon)], args.repeat)),
+        ("ll->enu LocalFrame.to_enu", _best(lambda: [frame.to_enu(a, b, c)
+                                                     for a, b, c in zip(lat, lon, alt)], args.repeat)),
+        ("ll->enu to_enu_many", _best(lambda: frame.to_enu_many(lat_a, lon_a, alt_a), args.repeat)),
+        ("enu->ll scalar", _best(lambda: [scalar_to_geodetic(e, n, frame.lat0, frame.lon0)
+                                          for e, n, _ in enu.tolist()], args.repeat)),
+        ("enu->ll to_geodetic_many", _best(lambda: frame.to_geodetic_many(enu), args.repeat)),
+        ("path_length", _best(lambda: geo.path_length(enu), args.repeat)),
+        ("validate_waypoints", _best(lambda: geo.validate_waypoints(enu, max_alt=1e9), args.repeat)),
+    ]
+    base = {"ll->enu": rows[0][1], "enu->ll": rows[3][1]}
+    print(f"{args.points:,} points, best of {args.repeat}")
+    for name, t in rows:
+        ref_t = base.get(name.split(" ")[0])
+        speedup = f"  x{ref_t / t:6.1f}" if ref_t else ""
+        print(f"{name:<28} {t * 1e3:9.2f} ms  {args.points / t / 1e6:8.2f} Mpts/s{speedup}")
+    print(f"max |enu - scalar| = {err_enu:.2e} m, round-trip |dlat/dlon| = {err_rt:.2e} deg")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Chi phí Geofence.check trên mỗi mẫu telemetry theo số zone (lưới chỉ mục vs duyệt tuần tự).
+
+    python -m bench.bench_geofence --zones 10 100 500 --samples 200000
+"""
+import argparse
+import math
+import random
+import time
+
+from app.geofence import Geofence, Zone
+
+
+def make_zones(n, rnd, extent=2000.0):
+    """1 vùng include bao quanh + n vùng cấm đa giác ngẫu nhiên (6-12 đỉnh, bán kính 10-60 m)."""
+    zones = [Zone("field", "include", [(-extent, -extent), (extent, -extent), (extent, extent), (-extent, extent)],
+                  ceiling=100.0)]
+    for i in range(n):
+        cx, cy = rnd.uniform(-extent, extent), rnd.uniform(-extent, extent)
+        r = rnd.uniform(10, 60)
+        k = rnd.randint(6, 12)
+        poly = [(cx + r * math.cos(2 * math.pi * j / k) * rnd.uniform(0.7, 1.0),
+                 cy + r * math.sin(2 * math.pi * j / k) * rnd.uniform(0.7, 1.0)) for j in range(k)]
+        zones.append(Zone(f"nfz{i}", "exclude", poly, ceiling=rnd.choice([None, 50.0])))
+    return zones
+
+
+def linear_check(zones, x, y, z):
+    """Tham chiếu không chỉ mục: bbox + point-in-polygon mọi zone."""
+    for zone in zones:
+        x0, y0, x1, y1 = zone.bbox
+        if x0 <= x <= x1 and y0 <= y <= y1 and zone.contains(x, y):
+            if not zone.include and zone.applies_at(z):
+                return zone.name
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--zones", type=int, nargs="+", default=[10, 100, 500])
+    ap.add_argument("--samples", type=int, default=200_000)
+    ap.add_argument("--cell", type=float, default=50.0)
+    args = ap.parse_args()
+
+    rnd = random.Random(1)
+    samples = [(rnd.uniform(-2000, 2000), rnd.uniform(-2000, 2000), rnd.uniform(0, 90))
+               for _ in range(args.samples)]
+    for n in args.zones:
+        zones = make_zones(n, rnd)
+        t0 = time.perf_counter()
+        fence = Geofence(zones, ceiling=120.0, cell=args.cell)
+        t_build = time.perf_counter() - t0
+
+        check = fence.check
+        t0 = time.perf_counter()
+        hits = sum(1 for s in samples if check(*s) is not None)
+        t_idx = time.perf_counter() - t0
+
+        sub = samples[: max(1, args.samples // 10)]
+        t0 = time.perf_counter()
+        ref_hits = sum(1 for s in sub if linear_check(zones, *s) is not None)
+        t_lin = (time.perf_counter() - t0) * len(samples) / len(sub)
+
+        mismatch = sum(1 for s in sub if (linear_check(zones, *s) is not None)
+                       != (check(*s) is not None and check(*s).kind == "nofly"))
+        print(f"zones={n:<5} build={t_build * 1e3:7.1f} ms  cells={len(fence._cells):<6} "
+              f"index={t_idx / len(samples) * 1e6:6.2f} us/sample  linear={t_lin / len(samples) * 1e6:7.2f} us/sample  "
+              f"breaches={hits} (ref {ref_hits}/{len(sub)})  mismatch={mismatch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Lịch sử telemetry: chi phí ghi mỗi bản ghi và thời gian truy vấn theo độ dài khoảng.
+
+Ghi 1 chuyến bay giả (vòng tròn + pin giảm dần có vài gai) ``--minutes`` phút ở ``--rate`` Hz,
+rồi truy vấn các khoảng 1 phút -> cả chuyến với ``--max-points``; so với rút gọn thẳng trên
+toàn bộ mẫu thô (không có mức gộp sẵn).
+
+    python -m bench.bench_history --rate 20 --minutes 60 --max-points 2000
+"""
+import argparse
+import math
+import time
+from bisect import bisect_left
+
+from app.history import TelemetryHistory, lttb, minmax
+from app.telemetry import TelemetryRecord
+
+
+def flight(rate: float, minutes: float):
+    n = int(rate * minutes * 60)
+    t0 = time.monotonic() - minutes * 60
+    for i in range(n):
+        t = i / rate
+        pct = 100.0 - 70.0 * i / n - (15.0 if i % 7919 == 0 else 0.0)
+        yield TelemetryRecord(t=t0 + t, local=(80 * math.cos(t / 90), 80 * math.sin(t / 90), 20.0),
+                              battery_percent=pct, battery_voltage=12.6 * pct / 100, speed=5.0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rate", type=float, default=20.0)
+    ap.add_argument("--minutes", type=float, default=60.0)
+    ap.add_argument("--max-points", type=int, default=2000)
+    args = ap.parse_args()
+
+    hist = TelemetryHistory()
+    raw_t, raw_x, raw_y, raw_pct = [], [], [], []
+    recs = list(flight(args.rate, args.minutes))
+    t0 = time.perf_counter()
+    for rec in recs:
+        hist.record(rec)
+    dt = time.perf_counter() - t0
+    wall = hist._wall
+    for rec in recs:                    # bản sao thô để so sánh
+        raw_t.append(rec.t + wall)
+        raw_x.append(rec.local[0])
+        raw_y.append(rec.local[1])
+        raw_pct.append(rec.battery_percent)
+    print(f"{len(recs)} bản ghi ({args.rate:g} Hz, {args.minutes:g} phút): ghi {dt / len(recs) * 1e6:.1f} µs/bản ghi")
+
+    end = raw_t[-1]
+    print(f"{'khoảng':>8} {'kênh':>8} {'mức':>5} {'điểm mức':>9} {'trả về':>7} {'ms':>7} {'thô ms':>8}")
+    for span in (60, 600, 1800, args.minutes * 60):
+        for ch in ("local", "battery"):
+            t = time.perf_counter()
+            res = hist.query(ch, end - span, end, args.max_points)
+            q_ms = (time.perf_counter() - t) * 1e3
+            # không có mức gộp: rút gọn thẳng trên toàn bộ mẫu thô trong khoảng
+            t = time.perf_counter()
+            i0 = bisect_left(raw_t, end - span)
+            if ch == "local":
+                lttb(raw_x[i0:], raw_y[i0:], args.max_points)
+            else:
+                minmax(raw_t[i0:], raw_pct[i0:], raw_pct[i0:], args.max_points)
+            raw_ms = (time.perf_counter() - t) * 1e3
+            print(f"{span:>7g}s {ch:>8} {res['level']:>5} {res['total']:>9} {len(res['points']):>7} "
+                  f"{q_ms:>7.1f} {raw_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
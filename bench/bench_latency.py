@@ -0,0 +1,110 @@
+"""
+End-to-end latency qua serial thật (pty) với app.simulator.DroneSimulator.
+
+- telemetry ingest: ``ts`` lúc drone ghi -> lúc GroundController decode dòng đó
+- command round-trip: send_command() -> ACK cùng rid (latency do TX scheduler đo, gồm cả xếp hàng/gửi lại)
+
+    python -m bench.bench_latency --duration 10 --pose 50 --baud 9600 --json out.json
+    python -m bench.bench_latency --transport asyncio
+"""
+import argparse
+import json
+import sys
+import time
+
+from app.control import GroundController
+from app.simulator import DroneSimulator
+from app.telemetry import TelemetryDecoder
+
+
+class StampingDecoder(TelemetryDecoder):
+    """Decoder ghi lại latency ingest theo trường ts mà simulator gắn vào message."""
+
+    def __init__(self):
+        super().__init__()
+        self.ingest = []
+
+    def decode_obj(self, data, t=0.0):
+        ts = data.get("ts")
+        if "ack" not in data and isinstance(ts, float):
+            self.ingest.append(t - ts)
+        return super().decode_obj(data, t)
+
+
+def percentiles(samples, ps=(50, 90, 99)):
+    if not samples:
+        return {}
+    s = sorted(samples)
+    out = {f"p{p}": s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))] * 1e3 for p in ps}
+    out["max"] = s[-1] * 1e3
+    out["n"] = len(s)
+    return out
+
+
+def _fmt(name, st):
+    if not st:
+        return f"{name:<18} (no samples)"
+    return (f"{name:<18} n={st['n']:<6} p50={st['p50']:7.2f} ms  p90={st['p90']:7.2f} ms  "
+            f"p99={st['p99']:7.2f} ms  max={st['max']:7.2f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--pose", type=float, default=20.0)
+    ap.add_argument("--gps", type=float, default=5.0)
+    ap.add_argument("--noise", type=float, default=0.0)
+    ap.add_argument("--baud", type=int, default=None, help="giả lập giới hạn băng thông link")
+    ap.add_argument("--cmd-rate", type=float, default=5.0, help="lệnh/giây để đo round-trip")
+    ap.add_argument("--transport", choices=("thread", "asyncio"), default="thread")
+    ap.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = ap.parse_args()
+
+    if sys.platform.startswith("win"):
+        raise SystemExit("bench_latency cần pty (Linux/macOS)")
+
+    sim = DroneSimulator({"hb": 2.0, "pose": args.pose, "gps": args.gps, "battery": 1.0},
+                         noise=args.noise, baudrate=args.baud, seed=1).start()
+    dec = StampingDecoder()
+    ctl = GroundController(port=sim.port, baudrate=args.baud or 115200, decoder=dec,
+                           transport=args.transport)
+    ctl.start()
+    ctl.read_position_from_drone()
+
+    lost = 0
+    sent = 0
+    rtt = []
+    t_end = time.monotonic() + args.duration
+    try:
+        while time.monotonic() < t_end:
+            sent += 1
+            fut = ctl.send_command({"cmd": "land" if sent % 2 else "offboard"}, retries=0)
+            try:
+                rtt.append(fut.result(timeout=2.0))
+            except Exception:
+                lost += 1
+            time.sleep(1.0 / args.cmd_rate)
+        tx = ctl.command_stats()
+    finally:
+        ctl.stop()
+        sim.stop()
+
+    result = {
+        "ingest_ms": percentiles(dec.ingest),
+        "command_rtt_ms": percentiles(rtt),
+        "commands_sent": sent,
+        "commands_lost": lost,
+        "tx": tx,
+        "rx": ctl.rx_stats(),
+        "config": vars(args),
+    }
+    print(_fmt("telemetry ingest", result["ingest_ms"]))
+    print(_fmt("command rtt", result["command_rtt_ms"]))
+    print(f"commands lost: {lost}/{sent}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
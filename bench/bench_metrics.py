@@ -0,0 +1,52 @@
+"""
+Chi phí metrics: cập nhật trên đường nóng (ns/lần) và snapshot / xuất Prometheus theo số drone.
+
+    python -m bench.bench_metrics --vehicles 1 8 32
+"""
+import argparse
+import time
+
+from app.control import GroundController
+from app.metrics import Registry
+
+
+def per_call_ns(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("-n", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    reg = Registry()
+    c = reg.counter("bench_total")
+    h = reg.histogram("bench_seconds")
+    base = per_call_ns(lambda: None, args.n)
+    print(f"Counter.inc         {per_call_ns(c.inc, args.n) - base:6.0f} ns")
+    print(f"Histogram.observe   {per_call_ns(lambda: h.observe(0.0012), args.n) - base:6.0f} ns")
+    print(f"time.monotonic()    {per_call_ns(time.monotonic, args.n) - base:6.0f} ns  (mỗi frame đã gọi sẵn)")
+
+    print(f"\n{'drone':>6} {'series':>7} {'snapshot ms':>12} {'prometheus ms':>14} {'bytes':>8}")
+    for n in args.vehicles:
+        reg = Registry()
+        ctls = [GroundController(port=None, vehicle_id=i, metrics=reg) for i in range(1, n + 1)]
+        for ctl in ctls:
+            for _ in range(1000):
+                ctl._m_dispatch.observe(0.0004)
+        series = sum(len(f["series"]) for f in reg.snapshot().values())
+        t0 = time.perf_counter()
+        reg.snapshot()
+        t_snap = (time.perf_counter() - t0) * 1e3
+        t0 = time.perf_counter()
+        body = reg.render_prometheus()
+        t_prom = (time.perf_counter() - t0) * 1e3
+        print(f"{n:>6} {series:>7} {t_snap:>12.2f} {t_prom:>14.2f} {len(body):>8}")
+
+
+if __name__ == "__main__":
+    main()
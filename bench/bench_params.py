@@ -0,0 +1,54 @@
+"""
+Đồng bộ tham số qua link chậm: tải nguội (chưa có cache) vs cache còn đúng vs vài tham số đổi.
+
+    python -m bench.bench_params --baud 9600 --changed 3
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+from app.control import GroundController
+from app.params import ParamManager
+from app.simulator import DroneSimulator
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--baud", type=int, default=9600)
+    ap.add_argument("--changed", type=int, default=3, help="số tham số drone đổi trước lần sync cuối")
+    ap.add_argument("--pose", type=float, default=0.0, help="telemetry chạy song song (Hz)")
+    args = ap.parse_args()
+
+    if sys.platform.startswith("win"):
+        raise SystemExit("bench_params cần pty (Linux/macOS)")
+
+    sim = DroneSimulator({"hb": 1.0, "pose": args.pose, "gps": 0.0, "battery": 0.0}, baudrate=args.baud).start()
+    ctl = GroundController(port=sim.port, baudrate=args.baud)
+    ctl.start()
+    ctl.read_position_from_drone()
+    pm = ParamManager(ctl, tempfile.mkdtemp(prefix="params-"))
+    ctl.set_params(pm)
+
+    def run(name):
+        req0, bkt0 = pm.stats["requests"], pm.stats["buckets_fetched"]
+        t0 = time.perf_counter()
+        res = pm.sync().result(timeout=600)
+        dt = time.perf_counter() - t0
+        print(f"{name:<22} {dt:8.2f} s  {pm.stats['requests'] - req0:4d} request  "
+              f"{pm.stats['buckets_fetched'] - bkt0:4d} bucket  {res['changed']:4d} đổi")
+
+    try:
+        print(f"{len(sim.params)} tham số @ {args.baud} baud")
+        run("nguội (không cache)")
+        run("cache khớp")
+        for name in sorted(sim.params)[:args.changed]:
+            sim.params[name] = sim.params[name] + 1
+        run(f"{args.changed} tham số đổi")
+    finally:
+        ctl.stop()
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
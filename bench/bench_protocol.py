@@ -0,0 +1,62 @@
+"""
+So sánh newline JSON và binary framing (app.protocol) trên link 9600 baud.
+
+In ra bytes/message, messages/s lý thuyết ở 9600 baud 8N1 (10 bit/byte)
+và tốc độ encode/decode CPU của từng đường.
+
+    python -m bench.bench_protocol [--baud 9600]
+"""
+import argparse
+import json
+import time
+
+from app import protocol as proto
+from app.telemetry import TelemetryDecoder
+
+SAMPLES = [
+    ("heartbeat", {"hb": 1}, proto.encode_heartbeat()),
+    ("pose", {"x": 12.345678, "y": -7.654321, "z": 3.5}, proto.encode_pose(12.345678, -7.654321, 3.5)),
+    ("gps", {"lat": 11.0529391, "lon": 106.6661234, "alt": 12.75},
+     proto.encode_gps(11.0529391, 106.6661234, 12.75)),
+    ("battery", {"battery": {"percent": 0.87, "voltage": 11.92}}, proto.encode_battery(87.0, 11.92)),
+    ("speed", {"speed": 4.27}, proto.encode_speed(4.27)),
+    ("cmd land", {"cmd": "land"}, proto.encode_command("land")),
+    ("10 waypoints", {"waypoints": [{"x": i * 1.5, "y": i * -2.25, "z": 3.5} for i in range(10)]},
+     proto.encode_waypoints([{"x": i * 1.5, "y": i * -2.25, "z": 3.5} for i in range(10)])),
+]
+
+
+def _rate(fn, items, repeat=20000):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for it in items:
+            fn(it)
+    return repeat * len(items) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--baud", type=int, default=9600)
+    args = ap.parse_args()
+    bytes_per_s = args.baud / 10.0
+
+    print(f"{'message':<14}{'json B':>8}{'bin B':>8}{'json msg/s':>12}{'bin msg/s':>12}{'ratio':>8}")
+    for name, obj, frame in SAMPLES:
+        jb = len((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+        bb = len(frame)
+        print(f"{name:<14}{jb:>8}{bb:>8}{bytes_per_s / jb:>12.1f}{bytes_per_s / bb:>12.1f}{jb / bb:>7.1f}x")
+
+    telemetry = SAMPLES[:5]
+    lines = [json.dumps(obj) for _, obj, _ in telemetry]
+    frames = [frame[:-1] for _, _, frame in telemetry]
+    jdec = TelemetryDecoder()
+    bdec = proto.BinaryDecoder()
+    print()
+    print(f"json decode   : {_rate(jdec.decode, lines):12,.0f} msg/s")
+    print(f"binary decode : {_rate(bdec.decode, frames):12,.0f} msg/s")
+    print(f"json encode   : {_rate(lambda o: json.dumps(o).encode(), [o for _, o, _ in telemetry]):12,.0f} msg/s")
+    print(f"binary encode : {_rate(lambda a: proto.encode_pose(*a), [(1.0, 2.0, 3.0)]):12,.0f} msg/s (pose)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Throughput của toàn bộ ingest pipeline bằng replay tốc độ tối đa:
+ReplaySerial -> GroundController._read_loop -> decoder -> LoraBridge (QCoreApplication headless).
+
+    python -m bench.bench_replay                       # corpus tổng hợp
+    python -m bench.bench_replay --source capture.bin  # raw capture hoặc .gcsrec
+    python -m bench.bench_replay --speed 4             # phát lại 4x thay vì max
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from bench.bench_decoder import make_corpus
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", help="raw capture hoặc flight log .gcsrec")
+    ap.add_argument("--lines", type=int, default=200_000, help="số dòng corpus tổng hợp")
+    ap.add_argument("--speed", default="max")
+    ap.add_argument("--no-bridge", action="store_true", help="bỏ LoraBridge/Qt, chỉ đo RX + decode")
+    args = ap.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from app.control import GroundController
+
+    path = args.source
+    if not path:
+        fd, path = tempfile.mkstemp(suffix=".bin")
+        with os.fdopen(fd, "wb") as f:
+            f.write(("\n".join(make_corpus(args.lines)) + "\n").encode("utf-8"))
+    total = os.path.getsize(path)
+
+    app = bridge = None
+    if not args.no_bridge:
+        from PyQt6.QtCore import QCoreApplication
+        from app.lora_bridge import LoraBridge
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        bridge = LoraBridge()
+
+    ctl = GroundController(port=f"replay:{path}?speed={args.speed}", gui_bridge=bridge)
+    ctl.connect()
+    ser = ctl.ser
+    t0 = time.perf_counter()
+    ctl.read_position_from_drone()
+
+    def _done():
+        return ser.finished.is_set() and ser.bytes_read >= total and ctl.rx_buffer is not None \
+            and len(ctl.rx_buffer) == 0
+
+    while not _done():
+        if app is not None:
+            app.processEvents()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - t0
+    ctl.received = False
+
+    st = ctl.rx_stats()
+    print(f"source  : {path} ({total:,} bytes, speed={args.speed})")
+    print(f"elapsed : {elapsed:.3f} s")
+    print(f"frames  : {st['frames']:,}  ->  {st['frames'] / elapsed:,.0f} lines/s, {total / elapsed / 1e6:.2f} MB/s")
+    if bridge is not None:
+        app.processEvents()
+        print(f"bridge  : {bridge.getTelemetryStats()}")
+    if not args.source:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
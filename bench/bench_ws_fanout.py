@@ -0,0 +1,152 @@
+"""
+Fan-out WebSocket telemetry: 1 ground station phục vụ được bao nhiêu người xem cùng lúc.
+
+Publisher phát pose/gps/battery/speed ở ``--rate`` Hz (như thread đọc serial), N client
+WebSocket (cùng tiến trình, loop riêng) nhận và đo: số frame nhận, frame bị bỏ vì client
+chậm, độ trễ publish -> nhận (p50/p99), byte/s. ``--slow`` client ngủ giữa các lần đọc
+để thấy backpressure bỏ frame cũ thay vì dồn hàng đợi.
+
+    python -m bench.bench_ws_fanout --clients 1 10 50 200 --rate 50 --seconds 3 --format json binary
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import statistics
+import struct
+import threading
+import time
+
+from app.telemetry import TelemetryRecord
+from app.webserver import WebServer
+from app.wsstream import _BIN_HEADER, WS_PATH, TelemetryStream
+
+
+async def _client(host, port, fmt, slow, stop, out):
+    if slow:
+        # client chậm: bộ đệm nhận nhỏ để server thực sự bị nghẽn (như mạng yếu)
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2048)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=1024)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET {WS_PATH}?format={fmt}&channels=pose,gps,battery,speed HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b"\r\n\r\n")
+    got, nbytes, lat = 0, 0, []
+    try:
+        while not stop.is_set():
+            b0, b1 = await reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            data = await reader.readexactly(n)
+            nbytes += n + 2
+            if b0 & 0x0F == 0x2:
+                t = _BIN_HEADER.unpack_from(data)[2]
+            else:
+                m = json.loads(data)
+                if "ch" not in m:
+                    continue
+                t = m["t"]
+            got += 1
+            lat.append(time.time() - t)
+            if slow:
+                await asyncio.sleep(slow)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        out.append((got, nbytes, lat))
+
+
+def _publisher(stream, rate, seconds, ready):
+    ready.wait()
+    period = 1.0 / rate
+    n = 0
+    t_end = time.perf_counter() + seconds
+    nxt = time.perf_counter()
+    while time.perf_counter() < t_end:
+        n += 1
+        stream.publish_record(TelemetryRecord(t=time.time(), local=(n * 0.01, 2.0, 10.0),
+                                              gps=(11.05 + n * 1e-7, 106.66, 10.0),
+                                              battery_percent=80.0, battery_voltage=15.9, speed=4.2))
+        nxt += period
+        time.sleep(max(0.0, nxt - time.perf_counter()))
+    return n
+
+
+def run(n_clients, fmt, rate, seconds, slow_frac, slow_delay):
+    server = WebServer(os.path.dirname(__file__), port=0)
+    stream = TelemetryStream(max_clients=n_clients + 1)
+    server.add_route(WS_PATH, stream.handle)
+    server.start()
+
+    results = []
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    connected = threading.Event()
+    snapshot = []
+
+    async def clients():
+        n_slow = int(n_clients * slow_frac)
+        tasks = [asyncio.create_task(_client(server.host, server.port, fmt, slow_delay if i < n_slow else 0.0,
+                                             stop, results)) for i in range(n_clients)]
+        while len(stream.clients) < n_clients:
+            await asyncio.sleep(0.01)
+        connected.set()
+        await asyncio.sleep(seconds + 0.3)
+        stop.set()
+        snapshot.extend(stream.client_stats())
+        server.stop()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    pub = {}
+    th = threading.Thread(target=lambda: pub.setdefault("n", _publisher(stream, rate, seconds, connected)))
+    th.start()
+    loop.run_until_complete(clients())
+    th.join()
+    loop.close()
+
+    expected = pub["n"] * 4 * n_clients
+    got = sum(r[0] for r in results)
+    nbytes = sum(r[1] for r in results)
+    lat = sorted(x for r in results for x in r[2])
+    dropped = sum(c["dropped"] for c in snapshot)
+    p = (lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1e3) if lat else (lambda q: float("nan"))
+    return {
+        "clients": n_clients, "format": fmt, "delivered": got / expected if expected else 0.0,
+        "dropped": dropped, "msgs_s": got / seconds, "kB_s": nbytes / seconds / 1e3,
+        "p50_ms": p(0.5), "p99_ms": p(0.99), "mean_ms": statistics.fmean(lat) * 1e3 if lat else float("nan"),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50, 200])
+    ap.add_argument("--format", nargs="+", default=["json", "binary"])
+    ap.add_argument("--rate", type=float, default=50.0, help="record/s (mỗi record = 4 kênh)")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--slow", type=float, default=0.0, help="tỉ lệ client chậm (0..1)")
+    ap.add_argument("--slow-delay", type=float, default=0.01, help="client chậm ngủ bấy nhiêu giây mỗi frame")
+    args = ap.parse_args()
+
+    print(f"{args.rate:g} record/s x 4 kênh, {args.seconds:g} s, slow={args.slow:g}")
+    print(f"{'clients':>7} {'fmt':>7} {'deliv':>7} {'dropped':>8} {'msgs/s':>9} {'kB/s':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    for fmt in args.format:
+        for n in args.clients:
+            r = run(n, fmt, args.rate, args.seconds, args.slow, args.slow_delay)
+            print(f"{r['clients']:>7} {r['format']:>7} {r['delivered']:>7.1%} {r['dropped']:>8} "
+                  f"{r['msgs_s']:>9.0f} {r['kB_s']:>8.1f} {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
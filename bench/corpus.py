@@ -0,0 +1,150 @@
+"""
+Corpus telemetry tổng hợp (tất định theo seed) cho bench.suite, giống dữ liệu ghi từ radio thật.
+
+- ``clean``: heartbeat / pose / GPS / battery / speed như DroneSimulator phát (kèm seq, ts)
+- ``noisy``: như clean nhưng ~10% dòng hỏng: cắt cụt, lật bit, rác đầu dòng, byte nhị phân, dòng rỗng
+- ``aliases``: mọi cách viết pin/tốc độ decoder chấp nhận (battery{}, percent/volt, battery số, vel...)
+- ``bursts``: dòng clean nhưng đến theo chunk to nhỏ thất thường (1 byte .. 4 KB), như khi
+  radio dồn gói sau một quãng mất sóng
+
+Mỗi corpus gồm ``lines`` (bytes, có ``\\n``) và ``chunks``: luồng byte đó cắt như khi ``read()``
+từ serial (64 byte/lần, riêng bursts cắt ngẫu nhiên).
+
+    python -m bench.corpus --dump /tmp/corpus     # ghi ra <tên>.jsonl để xem
+"""
+import argparse
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+RADIO_CHUNK = 64
+
+
+@dataclass
+class Corpus:
+    name: str
+    lines: List[bytes]
+    chunks: List[bytes]
+
+    @property
+    def bytes(self) -> int:
+        return sum(len(c) for c in self.chunks)
+
+
+def _message(i: int, rnd: random.Random) -> dict:
+    t = i * 0.02
+    kind = i % 10
+    if kind == 0:
+        obj = {"hb": 1}
+    elif kind in (1, 2, 3, 4, 5):
+        obj = {"x": round(rnd.uniform(-50, 50), 3), "y": round(rnd.uniform(-50, 50), 3),
+               "z": round(rnd.uniform(0, 10), 3)}
+    elif kind in (6, 7):
+        obj = {"lat": 11.052939 + rnd.random() * 1e-3, "lon": 106.666123 + rnd.random() * 1e-3,
+               "alt": round(rnd.uniform(0, 30), 2)}
+    elif kind == 8:
+        obj = {"battery": {"percent": round(rnd.uniform(0.2, 1.0), 3), "voltage": round(rnd.uniform(10.5, 12.6), 2)}}
+    else:
+        obj = {"speed": round(rnd.uniform(0, 8), 2)}
+    obj["seq"] = i + 1
+    obj["ts"] = round(1000.0 + t, 3)
+    return obj
+
+
+def _line(obj: dict) -> bytes:
+    return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _chunk(stream: bytes, size: int = RADIO_CHUNK) -> List[bytes]:
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def clean(n: int, seed: int = 1) -> Corpus:
+    rnd = random.Random(seed)
+    lines = [_line(_message(i, rnd)) for i in range(n)]
+    return Corpus("clean", lines, _chunk(b"".join(lines)))
+
+
+def noisy(n: int, seed: int = 2, ratio: float = 0.1) -> Corpus:
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(n):
+        line = bytearray(_line(_message(i, rnd)))
+        if rnd.random() < ratio:
+            kind = rnd.randrange(5)
+            if kind == 0:
+                line = line[:rnd.randrange(1, len(line) - 1)] + b"\n"             # cắt cụt
+            elif kind == 1:
+                j = rnd.randrange(len(line) - 1)
+                line[j] ^= 1 << rnd.randrange(7)                                  # lật bit
+                if line[j] == 0x0A:
+                    line[j] = 0x20
+            elif kind == 2:
+                line[0:0] = b"#garbage#"                                           # rác đầu dòng
+            elif kind == 3:
+                line = bytearray(rnd.randrange(256) for _ in range(rnd.randrange(4, 40))).replace(b"\n", b"") + b"\n"
+            else:
+                line = bytearray(b"\n")
+        lines.append(bytes(line))
+    return Corpus("noisy", lines, _chunk(b"".join(lines)))
+
+
+def aliases(n: int, seed: int = 3) -> Corpus:
+    rnd = random.Random(seed)
+    forms: List[Callable[[], dict]] = [
+        lambda: {"battery": {"percent": round(rnd.random(), 3), "voltage": round(rnd.uniform(10, 12.6), 2)}},
+        lambda: {"battery": {"percent": round(rnd.uniform(0, 100), 1)}},
+        lambda: {"percent": round(rnd.uniform(0, 100), 1), "volt": round(rnd.uniform(10, 12.6), 2)},
+        lambda: {"percent": round(rnd.random(), 3), "voltage": round(rnd.uniform(10, 12.6), 2)},
+        lambda: {"battery": round(rnd.random(), 3)},
+        lambda: {"voltage": round(rnd.uniform(10, 12.6), 2)},
+        lambda: {"x": rnd.random(), "y": rnd.random(), "z": rnd.random(), "vel": round(rnd.uniform(0, 8), 2), "hb": 1},
+        lambda: {"speed": "fast", "battery": {"percent": None}},                   # giá trị sai kiểu
+    ]
+    lines = []
+    for i in range(n):
+        obj = forms[i % len(forms)]()
+        obj["seq"] = i + 1
+        lines.append(_line(obj))
+    return Corpus("aliases", lines, _chunk(b"".join(lines)))
+
+
+def bursts(n: int, seed: int = 4) -> Corpus:
+    rnd = random.Random(seed)
+    lines = [_line(_message(i, rnd)) for i in range(n)]
+    stream = b"".join(lines)
+    chunks = []
+    i = 0
+    while i < len(stream):
+        # phần lớn chunk nhỏ, thỉnh thoảng dồn cả khối lớn
+        size = rnd.choice((1, 7, 64, 64, 64, 255)) if rnd.random() < 0.8 else rnd.randrange(1024, 4097)
+        chunks.append(stream[i:i + size])
+        i += size
+    return Corpus("bursts", lines, chunks)
+
+
+CORPORA: Dict[str, Callable[[int], Corpus]] = {
+    "clean": clean,
+    "noisy": noisy,
+    "aliases": aliases,
+    "bursts": bursts,
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, default=20000)
+    ap.add_argument("--dump", required=True, help="thư mục ghi <tên>.jsonl")
+    args = ap.parse_args()
+    os.makedirs(args.dump, exist_ok=True)
+    for name, make in CORPORA.items():
+        c = make(args.lines)
+        with open(os.path.join(args.dump, f"{name}.jsonl"), "wb") as f:
+            f.writelines(c.lines)
+        print(f"{name:<8} {len(c.lines):>7} dòng {c.bytes:>9} byte {len(c.chunks):>7} chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Bộ benchmark tái lập cho đường nóng của control.py / lora_bridge.py, kết quả JSON để so sánh giữa các lần chạy.
+
+Case (ops/s, corpus tổng hợp tất định trong bench.corpus: clean, noisy, aliases, bursts):
+  framing/<corpus>    RxBuffer.feed: tách dòng từ chunk serial
+  decode/<corpus>     TelemetryDecoder.decode từng dòng
+  rx/<corpus>         GroundController._on_rx_chunk: tách + decode + dispatch (bridge rỗng)
+  bridge/coalesced    _on_rx_chunk -> LoraBridge gộp telemetryFrame (flush mỗi 10 dòng), QCoreApplication headless
+  bridge/direct       _on_rx_chunk -> LoraBridge phát từng signal (telemetry_rate_hz = 0)
+  waypoints/<n>       update_waypoints với mission n điểm (waypoint/s)
+  write_json          write_json qua TX scheduler ra pty (message/s, chờ ghi xong)
+
+Mỗi case chạy 1 lần làm nóng rồi ``--repeat`` lần (tắt gc trong lúc đo); ghi best / median / độ lệch.
+So sánh dùng best (ít nhiễu nhất); case chậm hơn ``--threshold`` bị đánh dấu REGRESSION và thoát mã 1.
+
+    python -m bench.suite run --out base.json
+    python -m bench.suite run --out new.json --quick
+    python -m bench.suite compare base.json new.json --threshold 0.1
+    python -m bench.suite run --only decode/ framing/ --out d.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.control import GroundController
+from app.metrics import Registry
+from app.rxbuffer import RxBuffer
+from app.telemetry import TelemetryDecoder
+from bench.corpus import CORPORA, Corpus
+
+try:
+    import pty
+except ImportError:         # Windows
+    pty = None
+
+SCHEMA = 1
+
+
+class Skip(Exception):
+    """Case không chạy được ở môi trường này (thiếu PyQt6, không có pty...)."""
+
+
+@dataclass
+class Case:
+    name: str
+    unit: str
+    # setup() -> (run, ops, teardown): run() làm đúng ops đơn vị việc
+    setup: Callable[[], Tuple[Callable[[], None], int, Optional[Callable[[], None]]]]
+
+
+class _NullBridge:
+    """Bridge có đủ slot nhưng không làm gì: đo riêng phần control.py."""
+
+    def update_position(self, x, y, z):
+        pass
+
+    def update_global_position(self, lat, lon, alt):
+        pass
+
+    def update_battery(self, percent, voltage):
+        pass
+
+    def update_speed(self, spd):
+        pass
+
+
+def _controller(bridge=None) -> GroundController:
+    # Registry riêng: không lẫn series của bench vào registry chung
+    ctl = GroundController(port=None, gui_bridge=bridge, metrics=Registry())
+    ctl.rx_buffer = RxBuffer(GroundController.RX_BUFFER_SIZE)
+    return ctl
+
+
+# ---------------- case ----------------
+def _framing(corpus: Corpus):
+    def setup():
+        buf = RxBuffer(GroundController.RX_BUFFER_SIZE)
+        chunks = corpus.chunks
+
+        def run():
+            for chunk in chunks:
+                for _ in buf.feed(chunk):
+                    pass
+        return run, len(corpus.lines), None
+    return setup
+
+
+def _decode(corpus: Corpus):
+    def setup():
+        dec = TelemetryDecoder()
+        # control.py decode str (đã bỏ "\n" do RxBuffer)
+        lines = [str(line[:-1], "utf-8", "replace") for line in corpus.lines]
+
+        def run():
+            decode = dec.decode
+            now = time.monotonic()
+            for line in lines:
+                decode(line, now)
+        return run, len(lines), None
+    return setup
+
+
+def _rx(corpus: Corpus):
+    def setup():
+        ctl = _controller(_NullBridge())
+
+        def run():
+            for chunk in corpus.chunks:
+                ctl._on_rx_chunk(chunk)
+        return run, len(corpus.lines), None
+    return setup
+
+
+def _bridge(corpus: Corpus, coalesced: bool):
+    def setup():
+        try:
+            from PyQt6.QtCore import QCoreApplication
+        except ImportError:
+            raise Skip("không có PyQt6")
+        from app.lora_bridge import LoraBridge
+
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+        bridge = LoraBridge(telemetry_rate_hz=LoraBridge.DEFAULT_TELEMETRY_RATE_HZ if coalesced else 0)
+        if coalesced:
+            bridge._flush_timer.stop()      # flush do bench gọi, không phụ thuộc event loop
+        received = [0]
+
+        def slot(*_):
+            received[0] += 1
+        for sig in (bridge.telemetryFrame, bridge.positionUpdated, bridge.positionUpdatedLocal,
+                    bridge.positionUpdatedGPS, bridge.batteryUpdated, bridge.speedUpdated):
+            sig.connect(slot)
+        ctl = _controller(bridge)
+        # gộp mỗi 10 dòng ~ 50 Hz telemetry qua flush 25 Hz (drone gửi ~ 2 mẫu / nhịp)
+        groups = [b"".join(corpus.lines[i:i + 10]) for i in range(0, len(corpus.lines), 10)]
+
+        def run():
+            for group in groups:
+                ctl._on_rx_chunk(group)
+                if coalesced:
+                    bridge.flush_telemetry()
+            app.processEvents()
+
+        def teardown():
+            if not received[0]:
+                raise RuntimeError("bridge không phát signal nào")
+            bridge.deleteLater()
+            app.processEvents()
+        return run, len(corpus.lines), teardown
+    return setup
+
+
+def _waypoints(n: int):
+    def setup():
+        ctl = _controller()
+        mission = [{"x": (i % 100) * 5.0, "y": (i // 100) * 5.0, "z": 10.0 + (i % 7)} for i in range(n)]
+
+        def run():
+            ctl.update_waypoints(mission)
+        return run, n, None
+    return setup
+
+
+def _write_json(messages: int):
+    def setup():
+        if pty is None:
+            raise Skip("không có pty")
+        master, slave = pty.openpty()
+        import tty
+        tty.setraw(slave)
+        stop = threading.Event()
+
+        def drain():
+            while not stop.is_set():
+                try:
+                    if not os.read(master, 65536):
+                        break
+                except OSError:
+                    break
+        reader = threading.Thread(target=drain, name="bench-drain", daemon=True)
+        reader.start()
+
+        ctl = GroundController(port=os.ttyname(slave), metrics=Registry())
+        ctl.connect()
+        if not (ctl.ser and ctl.ser.is_open):
+            raise Skip("không mở được pty")
+        msg = {"cmd": "move", "x": 12.5, "y": -3.25, "z": 10.0}
+
+        def run():
+            futs = [ctl.write_json(msg) for _ in range(messages)]
+            for f in futs:
+                f.result(timeout=10)
+
+        def teardown():
+            ctl.tx.stop()
+            ctl._safe_close()
+            stop.set()
+            os.close(slave)
+            os.close(master)
+            reader.join(timeout=1)
+        return run, messages, teardown
+    return setup
+
+
+def build_cases(lines: int, missions: List[int], messages: int) -> List[Case]:
+    corpora = {name: make(lines) for name, make in CORPORA.items()}
+    cases: List[Case] = []
+    for name, corpus in corpora.items():
+        cases.append(Case(f"framing/{name}", "lines/s", _framing(corpus)))
+    for name, corpus in corpora.items():
+        cases.append(Case(f"decode/{name}", "lines/s", _decode(corpus)))
+    for name, corpus in corpora.items():
+        cases.append(Case(f"rx/{name}", "lines/s", _rx(corpus)))
+    cases.append(Case("bridge/coalesced", "lines/s", _bridge(corpora["clean"], True)))
+    cases.append(Case("bridge/direct", "lines/s", _bridge(corpora["clean"], False)))
+    for n in missions:
+        cases.append(Case(f"waypoints/{n}", "waypoints/s", _waypoints(n)))
+    cases.append(Case("write_json", "messages/s", _write_json(messages)))
+    return cases
+
+
+# ---------------- đo ----------------
+def _sample(run: Callable[[], None]) -> float:
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        run()
+        return time.perf_counter() - t0
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure(case: Case, repeat: int) -> Dict:
+    try:
+        run, ops, teardown = case.setup()
+    except Skip as e:
+        return {"name": case.name, "unit": case.unit, "skipped": str(e)}
+    try:
+        run()                                    # làm nóng: cache, JIT của re, cấp phát
+        times = [_sample(run) for _ in range(repeat)]
+    finally:
+        if teardown is not None:
+            teardown()
+    rates = [ops / t for t in times]
+    mean = statistics.fmean(rates)
+    return {
+        "name": case.name,
+        "unit": case.unit,
+        "ops": ops,
+        "repeat": repeat,
+        "best": max(rates),
+        "median": statistics.median(rates),
+        "spread_pct": (statistics.pstdev(rates) / mean * 100) if mean else 0.0,
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             timeout=5, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _meta(args) -> Dict:
+    return {
+        "schema": SCHEMA,
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "lines": args.lines,
+        "missions": args.missions,
+        "messages": args.messages,
+        "repeat": args.repeat,
+    }
+
+
+def _selected(cases: List[Case], only: Optional[List[str]]) -> Iterator[Case]:
+    for case in cases:
+        if not only or any(case.name.startswith(p) for p in only):
+            yield case
+
+
+def cmd_run(args) -> int:
+    if args.quick:
+        args.lines, args.missions, args.messages, args.repeat = 5000, [1000], 500, 3
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # log INFO/WARNING của update_waypoints... không được chiếm thời gian đo
+    logging.disable(logging.WARNING)
+
+    results = []
+    print(f"{'case':<20} {'best':>14} {'median':>14} {'±%':>6}  unit")
+    for case in _selected(build_cases(args.lines, args.missions, args.messages), args.only):
+        r = measure(case, args.repeat)
+        results.append(r)
+        if "skipped" in r:
+            print(f"{r['name']:<20} {'skip':>14} {'':>14} {'':>6}  {r['skipped']}")
+        else:
+            print(f"{r['name']:<20} {r['best']:>14,.0f} {r['median']:>14,.0f} {r['spread_pct']:>6.1f}  {r['unit']}")
+
+    doc = {"meta": _meta(args), "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+            f.write("\n")
+        print(f"-> {args.out}")
+    return 0
+
+
+def _load(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("meta", {}).get("schema") != SCHEMA:
+        raise SystemExit(f"{path}: schema không hỗ trợ")
+    return doc
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> Tuple[List[Dict], int]:
+    """Trả (hàng so sánh, số regression); so theo best của từng case có ở cả 2 file."""
+    before = {r["name"]: r for r in old["results"] if "best" in r}
+    rows, regressions = [], 0
+    for r in new["results"]:
+        o = before.get(r["name"])
+        if o is None or "best" not in r:
+            continue
+        delta = r["best"] / o["best"] - 1.0
+        if delta < -threshold:
+            status = "REGRESSION"
+            regressions += 1
+        elif delta > threshold:
+            status = "faster"
+        else:
+            status = ""
+        rows.append({"name": r["name"], "old": o["best"], "new": r["best"], "delta": delta,
+                     "status": status, "unit": r["unit"]})
+    return rows, regressions
+
+
+def cmd_compare(args) -> int:
+    old, new = _load(args.old), _load(args.new)
+    for key in ("python", "machine", "lines"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"cảnh báo: {key} khác nhau ({old['meta'].get(key)} vs {new['meta'].get(key)})")
+    rows, regressions = compare(old, new, args.threshold)
+    print(f"{old['meta'].get('git')} -> {new['meta'].get('git')}  (ngưỡng ±{args.threshold:.0%})")
+    print(f"{'case':<20} {'cũ':>14} {'mới':>14} {'Δ':>8}")
+    for row in rows:
+        print(f"{row['name']:<20} {row['old']:>14,.0f} {row['new']:>14,.0f} {row['delta']:>+8.1%}  {row['status']}")
+    missing = {r["name"] for r in old["results"]} - {r["name"] for r in new["results"]}
+    for name in sorted(missing):
+        print(f"{name:<20} không có trong {args.new}")
+    print(f"{regressions} regression" if regressions else "không có regression")
+    return 1 if regressions else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="chạy các case, ghi JSON")
+    run.add_argument("--out", help="file JSON kết quả")
+    run.add_argument("--lines", type=int, default=20000, help="số dòng mỗi corpus")
+    run.add_argument("--missions", type=int, nargs="+", default=[1000, 10000], help="kích thước mission")
+    run.add_argument("--messages", type=int, default=2000, help="số message mỗi lần đo write_json")
+    run.add_argument("--repeat", type=int, default=7)
+    run.add_argument("--quick", action="store_true", help="corpus nhỏ, 3 lần đo (kiểm tra nhanh)")
+    run.add_argument("--only", nargs="+", help="chỉ chạy case có tên bắt đầu bằng các tiền tố này")
+    run.set_defaults(fn=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="so 2 file kết quả, thoát 1 nếu có regression")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--threshold", type=float, default=0.10, help="tỉ lệ chậm đi coi là regression")
+    cmp_.set_defaults(fn=cmd_compare)
+
+    args = ap.parse_args()
+    sys.exit(args.fn(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,87 @@
+// Ngoài Qt (web/ chạy bằng nginx / trình duyệt thường): nhận telemetry qua WebSocket, chỉ xem.
+// URL: ?ws=... > __CONFIG__.TELEMETRY_WS > ws(s)://<host hiện tại>/ws/telemetry
+const WS_CHANNELS = ['pose', 'gps', 'battery', 'speed', 'link'];
+
+export function initTelemetrySocket(signalHandlers, opts = {}) {
+  if (!window.WebSocket || !signalHandlers) return null;
+  const { onLocal, onGPS, onBattery, onSpeed, onLink, onLinkStats } = signalHandlers;
+  const url = opts.url
+    || new URLSearchParams(location.search).get('ws')
+    || window.__CONFIG__?.TELEMETRY_WS
+    || `${location.protocol === 'https:' ? 'wss:' : 'ws:'}//${location.host}/ws/telemetry`;
+  const query = `channels=${WS_CHANNELS.join(',')}&format=json${opts.rateHz ? `&rate_hz=${opts.rateHz}` : ''}`;
+  let ws = null, retry = 500, closed = false, lastOk = null;
+
+  const handle = (m) => {
+    const v = m.v;
+    switch (m.ch) {
+      case 'pose':    onLocal   && onLocal(...v); break;
+      case 'gps':     onGPS     && onGPS(...v); break;
+      case 'battery': onBattery && onBattery(...v); break;
+      case 'speed':   onSpeed   && onSpeed(v); break;
+      case 'link':
+        if (v.ok !== lastOk) { lastOk = v.ok; onLink && onLink(!!v.ok); }
+        onLinkStats && onLinkStats(v);
+        break;
+    }
+  };
+
+  const open = () => {
+    ws = new WebSocket(`${url}${url.includes('?') ? '&' : '?'}${query}`);
+    ws.onopen = () => { retry = 500; };
+    ws.onmessage = (ev) => {
+      if (typeof ev.data !== 'string') return;
+      try {
+        const m = JSON.parse(ev.data);
+        if (m.ch) handle(m);
+      } catch {}
+    };
+    ws.onclose = () => {
+      if (lastOk) { lastOk = false; onLink && onLink(false); }
+      if (!closed) setTimeout(open, retry = Math.min(retry * 2, 10000));
+    };
+  };
+  open();
+  return { close: () => { closed = true; ws?.close(); } };
+}
+
 // Setup QWebChannel và expose các callback cập nhật UI
 export function initBridge(signalHandlers) {
   return new Promise((resolve) => {
-    if (!window.qt || !window.QWebChannel) return resolve(null);
+    if (!window.qt || !window.QWebChannel) {
+      initTelemetrySocket(signalHandlers);
+      return resolve(null);
+    }
     new QWebChannel(qt.webChannelTransport, (channel) => {
       const bridge = channel.objects?.bridge || null;
       if (!bridge) return resolve(null);
 
       // Wire signals nếu có
       if (signalHandlers) {
-        const { onLocal, onGPS, onBattery, onSpeed, onLink, onMode } = signalHandlers;
-        bridge.positionUpdated       && onLocal  && bridge.positionUpdated.connect(onLocal);
-        bridge.positionUpdatedLocal  && onLocal  && bridge.positionUpdatedLocal.connect(onLocal);
-        bridge.positionUpdatedGPS    && onGPS    && bridge.positionUpdatedGPS.connect(onGPS);
-        bridge.batteryUpdated        && onBattery&& bridge.batteryUpdated.connect(onBattery);
-        bridge.speedUpdated          && onSpeed  && bridge.speedUpdated.connect(onSpeed);
+        const { onLocal, onGPS, onBattery, onSpeed, onLink, onLinkStats, onCommandResult, onMissionProgress, onGeofence, onMode, onMetrics } = signalHandlers;
+        if (bridge.telemetryFrame) {
+          // Telemetry đã được gộp phía Python: 1 frame / chu kỳ, chỉ chứa kênh có giá trị mới
+          bridge.telemetryFrame.connect((f) => {
+            if (!f) return;
+            f.local   && onLocal   && onLocal(...f.local);
+            f.gps     && onGPS     && onGPS(...f.gps);
+            f.battery && onBattery && onBattery(...f.battery);
+            (f.speed !== undefined) && onSpeed && onSpeed(f.speed);
+          });
+        } else {
+          bridge.positionUpdated       && onLocal  && bridge.positionUpdated.connect(onLocal);
+          bridge.positionUpdatedLocal  && onLocal  && bridge.positionUpdatedLocal.connect(onLocal);
+          bridge.positionUpdatedGPS    && onGPS    && bridge.positionUpdatedGPS.connect(onGPS);
+          bridge.batteryUpdated        && onBattery&& bridge.batteryUpdated.connect(onBattery);
+          bridge.speedUpdated          && onSpeed  && bridge.speedUpdated.connect(onSpeed);
+        }
         bridge.linkUpdated           && onLink   && bridge.linkUpdated.connect(onLink);
+        bridge.linkStats             && onLinkStats && bridge.linkStats.connect(onLinkStats);
+        bridge.commandResult         && onCommandResult && bridge.commandResult.connect(onCommandResult);
+        bridge.missionProgress       && onMissionProgress && bridge.missionProgress.connect(onMissionProgress);
+        bridge.geofenceBreach        && onGeofence && bridge.geofenceBreach.connect(onGeofence);
         bridge.modeUpdated           && onMode   && bridge.modeUpdated.connect(onMode);
+        bridge.metricsUpdated        && onMetrics && bridge.metricsUpdated.connect(onMetrics);
       }
 
       // Wrapper action APIs (chỉ gọi nếu slot tồn tại)
@@ -40,12 +106,24 @@ export function initBridge(signalHandlers) {
         // Motor control methods
         setMotorOutput:  (...a)=> bridge.setMotorOutput?.(...a),
         stopAllMotors:   (...a)=> bridge.stopAllMotors?.(...a),
+        refreshMotors:   (...a)=> bridge.refreshMotors?.(...a),
+        getMotorStatus:  (...a)=> bridge.getMotorStatus?.(...a),
         
         // Parameter management methods
         getParameters:   (...a)=> bridge.getParameters?.(...a),
         setParameter:    (...a)=> bridge.setParameter?.(...a),
         saveParameters:  (...a)=> bridge.saveParameters?.(...a),
         loadParameters:  (...a)=> bridge.loadParameters?.(...a),
+
+        // Telemetry coalescing stats
+        getTelemetryStats: (...a)=> bridge.getTelemetryStats?.(...a),
+        getLinkStats:    (...a)=> bridge.getLinkStats?.(...a),
+        getCommandStats: (...a)=> bridge.getCommandStats?.(...a),
+
+        // Lịch sử telemetry (đã rút gọn) cho vệt bay / biểu đồ
+        getHistory:      (...a)=> bridge.getHistory?.(...a),
+        // Metrics (cùng số liệu với /metrics)
+        getMetrics:      (...a)=> bridge.getMetrics?.(...a),
       };
 
       // Trả về proxy: ưu tiên api, fallback sang bridge gốc
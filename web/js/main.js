@@ -315,7 +315,20 @@ function wireUI(mapInstance) {
         document.getElementById('hudMode')?.replaceChildren(mode);
         document.getElementById('fiMode')?.replaceChildren(mode); 
       },
-      onLink: tel.setConnected
+      onLink: tel.setConnected,
+      onLinkStats: tel.updateLinkStats,
+      onCommandResult: (r)=>{
+        if (!r) return;
+        if (r.ok) console.log(`Command ${r.cmd} #${r.rid} acked in ${r.latency_ms} ms (${r.attempts} attempt(s))`);
+        else console.warn(`Command ${r.cmd} #${r.rid} failed after ${r.attempts} attempt(s)`);
+      },
+      onMissionProgress: (p)=>{
+        if (!p) return;
+        if (p.ok === false) console.warn(`Mission #${p.id} upload failed at ${p.sent}/${p.total}: ${p.error}`);
+        else if (p.ok) console.log(`Mission #${p.id} uploaded: ${p.waypoints} wp, ${p.bytes} B${p.delta ? ' (delta)' : ''}`);
+      },
+      onGeofence: tel.updateGeofence,
+      onMetrics: tel.updateMetrics
     });
     console.log('Bridge initialized successfully');
 
@@ -8,6 +8,42 @@ export function setConnected(on){
   el.classList.toggle('tele__status--bad',!on);
 }
 
+export function updateLinkStats(s){
+  const el=document.getElementById('teleConn'); if(!el || !s) return;
+  const f=(v,d=0)=>(typeof v==='number' && isFinite(v))?v.toFixed(d):'—';
+  el.title=`${f(s.rate_hz,1)} msg/s • hb ${f(s.hb_interval_ms)}±${f(s.hb_jitter_ms)} ms • `+
+           `loss ${s.loss!=null?f(s.loss*100,1):'—'}% • decode fail ${f((s.decode_fail_ratio||0)*100,1)}%`;
+  if (typeof s.ok==='boolean') setConnected(s.ok);
+}
+
+// Panel chẩn đoán: 1 dòng / series; histogram hiện p50/p99 (ms)
+export function updateMetrics(m){
+  const el=document.getElementById('diagMetrics'); if(!el || !m) return;
+  const rows=[];
+  for (const [name, fam] of Object.entries(m)){
+    for (const s of fam.series || []){
+      const lbl=Object.entries(s.labels || {}).map(([k,v])=>`${k}=${v}`).join(' ');
+      const val = fam.type==='histogram'
+        ? (s.count ? `p50 ${(s.p50*1e3).toFixed(2)} ms • p99 ${(s.p99*1e3).toFixed(2)} ms • n=${s.count}` : '—')
+        : (Number.isInteger(s.value) ? String(s.value) : (+s.value).toFixed(3));
+      rows.push(`<tr title="${fam.help || ''}"><td>${name.replace(/^gcs_/,'')}</td><td class="muted">${lbl}</td><td>${val}</td></tr>`);
+    }
+  }
+  el.innerHTML = rows.join('') || '<tr><td class="muted">No metrics</td></tr>';
+}
+
+export function updateGeofence(b){
+  if (!b) return;
+  if (b.source === 'mission') {
+    const n = b.breaches?.length || 1;
+    alert(`⛔ Mission bị chặn bởi geofence: ${n} chặng vi phạm (chặng ${b.leg}: ${b.kind}${b.zone ? ' ' + b.zone : ''})`);
+    return;
+  }
+  const el=document.getElementById('teleConn');
+  if (el) el.classList.toggle('tele__status--fence', !!b.active);
+  if (b.active) console.warn(`Geofence ${b.kind}${b.zone ? ' ' + b.zone : ''} at (${b.x.toFixed(1)}, ${b.y.toFixed(1)}, ${b.z.toFixed(1)})`);
+}
+
 export function updateBattery(percent, voltage){
   const txt=document.getElementById('teleBattText');
   const p=Number.isFinite(percent)?Math.max(0,Math.min(100,+percent)):null;
@@ -38,7 +38,7 @@ export async function mount(root, ctx){
           </select>
         </div>
         <details class="adv"><summary>Advanced</summary>
-          <div class="row"><label class="lbl">Custom file</label><input type="file" id="fwFile" accept=".px4,.apj"></div>
+          <div class="row"><label class="lbl">Custom file</label><input type="file" id="fwFile" accept=".px4,.apj,.bin"></div>
         </details>
         <div class="row"><button id="fwStart" class="btn btn--primary" type="button">Load Firmware</button></div>
       </div>
@@ -72,14 +72,21 @@ export async function mount(root, ctx){
 
     if (!ctx?.bridge?.flashFirmware){ log('bridge.flashFirmware() not available'); return; }
 
+    // Nạp chạy nền phía Python; mỗi pha (download/erase/program/verify) báo qua firmwareProgress
     await new Promise(resolve=>{
-      ctx.bridge.flashFirmware(JSON.stringify({stack, channel, custom:file?.name}), (line, pct)=>{
-        if (line) log(line);
-        if (pct != null) prog.style.width = `${pct}%`;
-        if (pct === 100) resolve();
+      const onProgress = (p)=>{
+        if (p.message) log(p.message);
+        if (p.pct != null) prog.style.width = `${p.pct}%`;
+        if (p.stage === 'done' || p.stage === 'error'){
+          ctx.bridge.firmwareProgress?.disconnect?.(onProgress);
+          resolve();
+        }
+      };
+      ctx.bridge.firmwareProgress?.connect?.(onProgress);
+      ctx.bridge.flashFirmware({stack, channel, customPath:file?.name || null}, ok=>{
+        if (ok === false){ log('Firmware update not started'); ctx.bridge.firmwareProgress?.disconnect?.(onProgress); resolve(); }
       });
     });
-    log('Upgrade complete'); prog.style.width='100%';
   }
 
   root.querySelector('#fwRefresh').addEventListener('click', refresh);
@@ -75,6 +75,7 @@ export function initSetupOverlay(bridge) {
 
   function closeOverlay() {
     console.log('Closing setup overlay');
+    if (currentScreen === 'motors') bridge?.stopAllMotors?.();
     overlay.hidden = true;
     document.body.classList.remove('overlay-open');
     currentScreen = 'summary';
@@ -121,6 +122,9 @@ export function initSetupOverlay(bridge) {
     }
   }
 
+  let fwBound = false;
+  let fwProgressHandler = null;
+
   function initFirmwareScreen() {
     console.log('Initializing firmware screen...');
     
@@ -133,6 +137,7 @@ export function initSetupOverlay(bridge) {
     const file = document.getElementById('fwFile');
     const prog = document.getElementById('fwProg');
     const logEl = document.getElementById('fwLog');
+    const cancel = document.getElementById('fwCancel');
 
     if (!refresh || !start) {
       console.error('Firmware elements not found');
@@ -197,13 +202,25 @@ export function initSetupOverlay(bridge) {
 
       try {
         if (bridge && typeof bridge.flashFirmware === 'function') {
-          await bridge.flashFirmware(
-            { stack, channel, vehicle, customPath: custom },
-            (p, msg) => {
-              if (p != null) prog.style.width = `${Math.max(0, Math.min(100, p))}%`;
-              if (msg) log(msg);
-            }
-          );
+          // Nạp chạy nền phía Python; tiến độ từng pha về qua firmwareProgress
+          if (!fwBound && bridge.firmwareProgress?.connect) {
+            fwBound = true;
+            bridge.firmwareProgress.connect((p) => fwProgressHandler?.(p));
+          }
+          fwProgressHandler = (p) => {
+            if (p.pct != null) prog.style.width = `${Math.max(0, Math.min(100, p.pct))}%`;
+            if (p.message) log(p.message);
+            const done = p.stage === 'done' || p.stage === 'error';
+            start.disabled = !done;
+            if (cancel) cancel.hidden = done;
+          };
+          const ok = await bridge.flashFirmware({ stack, channel, vehicle, customPath: custom });
+          if (ok === false) {
+            log('Firmware update not started');
+          } else {
+            start.disabled = true;
+            if (cancel) cancel.hidden = false;
+          }
         } else {
           // Demo progress
           const steps = [
@@ -227,6 +244,11 @@ export function initSetupOverlay(bridge) {
       }
     });
 
+    cancel?.addEventListener('click', () => {
+      log('Cancelling...');
+      bridge?.cancelFirmware?.();
+    });
+
     // Auto-refresh on screen open
     setTimeout(() => {
       refresh.click();
@@ -397,12 +419,43 @@ export function initSetupOverlay(bridge) {
     }
   }
 
+  let motorsBound = false;
+
   function initMotorsScreen() {
     console.log('Initializing motors screen...');
+    // Mở lại màn hình không gắn listener lần nữa
+    if (motorsBound) return;
+    motorsBound = true;
     
+    const pane = document.getElementById('setup-screen-motors');
     const propsRemovedCheckbox = document.getElementById('propsRemoved');
     const motorSliders = document.querySelectorAll('.motor-slider');
     const motorValues = document.querySelectorAll('.motor-value');
+
+    const resetSliders = () => {
+      motorSliders.forEach(slider => {
+        slider.value = 0;
+      });
+      motorValues.forEach(value => {
+        value.textContent = '0%';
+      });
+    };
+    const anyRunning = () => Array.from(motorSliders).some(slider => Number(slider.value) > 0);
+
+    // Python chỉ stream khi UI còn "giữ" slider: báo định kỳ khi màn hình đang mở và có động cơ > 0%,
+    // im lặng quá deadman_s (tab treo, đóng overlay...) thì phía Python tự dừng mọi động cơ
+    setInterval(() => {
+      if (overlay.hidden || pane.hidden || !anyRunning()) return;
+      bridge?.refreshMotors?.();
+    }, 250);
+
+    // Dead-man / dừng từ nơi khác: kéo slider về 0 cho khớp với drone
+    bridge?.motorStatus?.connect?.((st) => {
+      if (st.state === 'deadman' || st.state === 'stopped') {
+        resetSliders();
+        if (st.reason === 'deadman') console.warn('Motors stopped: UI keep-alive timed out');
+      }
+    });
     
     // Enable/disable motor sliders based on checkbox
     propsRemovedCheckbox.addEventListener('change', (e) => {
@@ -410,15 +463,19 @@ export function initSetupOverlay(bridge) {
       motorSliders.forEach(slider => {
         slider.disabled = !enabled;
       });
+      if (!enabled && anyRunning()) {
+        resetSliders();
+        bridge?.stopAllMotors?.();
+      }
     });
     
     // Update motor values when sliders change
     motorSliders.forEach((slider, index) => {
       slider.addEventListener('input', (e) => {
-        const value = e.target.value;
+        const value = Number(e.target.value);
         motorValues[index].textContent = `${value}%`;
         
-        // Here you would send the motor command to the vehicle
+        // Chỉ đổi giá trị đích; Python gửi 1 frame gói mọi động cơ theo nhịp cố định
         if (bridge && typeof bridge.setMotorOutput === 'function') {
           bridge.setMotorOutput(index + 1, value);
         }
@@ -429,12 +486,7 @@ export function initSetupOverlay(bridge) {
     const stopAllMotorsBtn = document.getElementById('stopAllMotors');
     if (stopAllMotorsBtn) {
       stopAllMotorsBtn.addEventListener('click', () => {
-        motorSliders.forEach(slider => {
-          slider.value = 0;
-        });
-        motorValues.forEach(value => {
-          value.textContent = '0%';
-        });
+        resetSliders();
         
         if (bridge && typeof bridge.stopAllMotors === 'function') {
           bridge.stopAllMotors();
@@ -453,21 +505,17 @@ export function initSetupOverlay(bridge) {
         
         console.log('Testing all motors for 3 seconds...');
         
-        // Simulate motor test
-        motorSliders.forEach(slider => {
+        motorSliders.forEach((slider, index) => {
           slider.value = 50;
+          bridge?.setMotorOutput?.(index + 1, 50);
         });
         motorValues.forEach(value => {
           value.textContent = '50%';
         });
         
         setTimeout(() => {
-          motorSliders.forEach(slider => {
-            slider.value = 0;
-          });
-          motorValues.forEach(value => {
-            value.textContent = '0%';
-          });
+          resetSliders();
+          bridge?.stopAllMotors?.();
         }, 3000);
       });
     }
@@ -597,22 +645,66 @@ export function initSetupOverlay(bridge) {
     }
   }
 
+  // Metadata hiển thị (units/description/category) cho tham số hay dùng; tham số khác suy category theo tiền tố
+  const PARAM_META = {
+    SYSID_MYGCS:    { units: '', description: 'Ground station ID', category: 'advanced' },
+    ARMING_CHECK:   { units: '', description: 'Arming check enable', category: 'safety' },
+    BATT_MONITOR:   { units: '', description: 'Battery monitoring', category: 'safety' },
+    BATT_CAPACITY:  { units: 'mAh', description: 'Battery capacity', category: 'safety' },
+    COMPASS_ENABLE: { units: '', description: 'Compass enable', category: 'sensors' },
+    GPS_TYPE:       { units: '', description: 'GPS type', category: 'sensors' },
+    MOT_PWM_TYPE:   { units: '', description: 'Motor PWM type', category: 'motors' },
+    MOT_PWM_RATE:   { units: 'Hz', description: 'Motor PWM rate', category: 'motors' },
+    RATE_ROLL_P:    { units: '', description: 'Roll rate P gain', category: 'flight' },
+    RATE_ROLL_I:    { units: '', description: 'Roll rate I gain', category: 'flight' },
+    RATE_ROLL_D:    { units: '', description: 'Roll rate D gain', category: 'flight' },
+    PILOT_SPEED_UP: { units: 'cm/s', description: 'Pilot speed up', category: 'flight' },
+    PILOT_SPEED_DN: { units: 'cm/s', description: 'Pilot speed down', category: 'flight' },
+    RTL_ALT:        { units: 'cm', description: 'RTL altitude', category: 'navigation' },
+    RTL_SPEED:      { units: 'cm/s', description: 'RTL speed', category: 'navigation' },
+    WPNAV_SPEED:    { units: 'cm/s', description: 'Waypoint navigation speed', category: 'navigation' },
+    WPNAV_ACCEL:    { units: 'cm/s/s', description: 'Waypoint navigation acceleration', category: 'navigation' },
+  };
+  const PARAM_PREFIX_CATEGORY = [
+    [/^(RATE|ANGLE|PILOT|ATC|FLTMODE)_?/, 'flight'],
+    [/^(RTL|WPNAV|WP|FENCE|LAND)_/, 'navigation'],
+    [/^(INS|COMPASS|GPS|BARO|AHRS)_?/, 'sensors'],
+    [/^(MOT|SERVO)/, 'motors'],
+    [/^RC\d+_/, 'radio'],
+    [/^(ARMING|BATT|FS)_/, 'safety'],
+  ];
+
+  function paramMeta(name) {
+    const meta = PARAM_META[name];
+    if (meta) return meta;
+    const hit = PARAM_PREFIX_CATEGORY.find(([re]) => re.test(name));
+    const units = /^(RC|SERVO)\d+_(MIN|MAX|TRIM)$/.test(name) ? 'μs' : '';
+    return { units, description: '', category: hit ? hit[1] : 'advanced' };
+  }
+
+  const paramRows = new Map();   // name -> <tr>
+  let paramsBound = false;
+
   function initParamsScreen() {
     console.log('Initializing parameters screen...');
-    
-    // Load sample parameters
-    loadSampleParameters();
-    
+
+    // Bảng hiện ngay từ cache phía Python; đồng bộ với vehicle chạy nền -> parametersUpdated
+    requestParameters();
+    if (paramsBound) return;
+    paramsBound = true;
+
+    bridge?.parametersUpdated?.connect?.(onParametersUpdated);
+
     // Bind search functionality
     const searchParamsBtn = document.getElementById('searchParams');
     const paramSearchInput = document.getElementById('paramSearch');
-    
+
     if (searchParamsBtn && paramSearchInput) {
       searchParamsBtn.addEventListener('click', () => {
         const searchTerm = paramSearchInput.value.toLowerCase();
         filterParameters(searchTerm);
       });
-      
+
       paramSearchInput.addEventListener('keydown', (e) => {
         if (e.key === 'Enter') {
           const searchTerm = paramSearchInput.value.toLowerCase();
@@ -620,127 +712,144 @@ export function initSetupOverlay(bridge) {
         }
       });
     }
-    
+
     // Bind category buttons
     document.querySelectorAll('.category-btn').forEach(btn => {
       btn.addEventListener('click', (e) => {
         document.querySelectorAll('.category-btn').forEach(b => b.classList.remove('active'));
         e.target.classList.add('active');
-        
+
         const category = e.target.dataset.category;
         filterParametersByCategory(category);
       });
     });
-    
+
     // Bind parameter actions
     const refreshParamsBtn = document.getElementById('refreshParams');
     const saveParamsBtn = document.getElementById('saveParams');
     const loadParamsBtn = document.getElementById('loadParams');
     const resetParamsBtn = document.getElementById('resetParams');
-    
+
     if (refreshParamsBtn) {
       refreshParamsBtn.addEventListener('click', () => {
         console.log('Refreshing parameters...');
-        loadSampleParameters();
+        requestParameters();
       });
     }
-    
+
     if (saveParamsBtn) {
       saveParamsBtn.addEventListener('click', () => {
-        console.log('Saving parameters...');
-        alert('Parameters saved successfully!');
+        // Mọi thay đổi đã gom qua setParameter được gửi trong 1 lần commit
+        console.log('Committing staged parameters...');
+        if (!bridge?.saveParameters) return alert('Not connected to vehicle');
+        bridge.saveParameters();
+        setParamsStatus('Saving…');
       });
     }
-    
+
     if (loadParamsBtn) {
       loadParamsBtn.addEventListener('click', () => {
-        console.log('Loading parameters...');
-        alert('Parameters loaded successfully!');
+        console.log('Reloading all parameters from vehicle...');
+        if (!bridge?.loadParameters) return alert('Not connected to vehicle');
+        bridge.loadParameters();
+        setParamsStatus('Loading from vehicle…');
       });
     }
-    
+
     if (resetParamsBtn) {
       resetParamsBtn.addEventListener('click', () => {
-        if (confirm('Reset all parameters to default values?')) {
-          console.log('Resetting parameters...');
-          alert('Parameters reset to defaults!');
+        if (confirm('Discard all unsaved parameter changes?')) {
+          bridge?.discardParameters?.();
+          document.querySelectorAll('#paramsTableBody .param-value').forEach(input => {
+            input.value = input.dataset.original;
+            input.closest('tr').classList.remove('param-pending');
+          });
         }
       });
     }
   }
 
-  function loadSampleParameters() {
-    const sampleParams = [
-      { name: 'SYSID_MYGCS', value: '255', units: '', description: 'Ground station ID', category: 'system' },
-      { name: 'ARMING_CHECK', value: '1', units: '', description: 'Arming check enable', category: 'safety' },
-      { name: 'BATT_MONITOR', value: '4', units: '', description: 'Battery monitoring', category: 'power' },
-      { name: 'BATT_CAPACITY', value: '3300', units: 'mAh', description: 'Battery capacity', category: 'power' },
-      { name: 'COMPASS_ENABLE', value: '1', units: '', description: 'Compass enable', category: 'sensors' },
-      { name: 'GPS_TYPE', value: '1', units: '', description: 'GPS type', category: 'sensors' },
-      { name: 'MOT_PWM_TYPE', value: '0', units: '', description: 'Motor PWM type', category: 'motors' },
-      { name: 'MOT_PWM_RATE', value: '400', units: 'Hz', description: 'Motor PWM rate', category: 'motors' },
-      { name: 'RATE_ROLL_P', value: '0.15', units: '', description: 'Roll rate P gain', category: 'flight' },
-      { name: 'RATE_ROLL_I', value: '0.15', units: '', description: 'Roll rate I gain', category: 'flight' },
-      { name: 'RATE_ROLL_D', value: '0.003', units: '', description: 'Roll rate D gain', category: 'flight' },
-      { name: 'PILOT_SPEED_UP', value: '500', units: 'cm/s', description: 'Pilot speed up', category: 'flight' },
-      { name: 'PILOT_SPEED_DN', value: '300', units: 'cm/s', description: 'Pilot speed down', category: 'flight' },
-      { name: 'RTL_ALT', value: '1000', units: 'cm', description: 'RTL altitude', category: 'navigation' },
-      { name: 'RTL_SPEED', value: '500', units: 'cm/s', description: 'RTL speed', category: 'navigation' },
-      { name: 'WPNAV_SPEED', value: '500', units: 'cm/s', description: 'Waypoint navigation speed', category: 'navigation' },
-      { name: 'WPNAV_ACCEL', value: '100', units: 'cm/s/s', description: 'Waypoint navigation acceleration', category: 'navigation' },
-      { name: 'RC1_MIN', value: '1100', units: 'μs', description: 'RC channel 1 minimum', category: 'radio' },
-      { name: 'RC1_MAX', value: '1900', units: 'μs', description: 'RC channel 1 maximum', category: 'radio' },
-      { name: 'RC1_TRIM', value: '1500', units: 'μs', description: 'RC channel 1 trim', category: 'radio' },
-      { name: 'RC2_MIN', value: '1100', units: 'μs', description: 'RC channel 2 minimum', category: 'radio' },
-      { name: 'RC2_MAX', value: '1900', units: 'μs', description: 'RC channel 2 maximum', category: 'radio' },
-      { name: 'RC2_TRIM', value: '1500', units: 'μs', description: 'RC channel 2 trim', category: 'radio' },
-      { name: 'RC3_MIN', value: '1100', units: 'μs', description: 'RC channel 3 minimum', category: 'radio' },
-      { name: 'RC3_MAX', value: '1900', units: 'μs', description: 'RC channel 3 maximum', category: 'radio' },
-      { name: 'RC3_TRIM', value: '1500', units: 'μs', description: 'RC channel 3 trim', category: 'radio' },
-      { name: 'RC4_MIN', value: '1100', units: 'μs', description: 'RC channel 4 minimum', category: 'radio' },
-      { name: 'RC4_MAX', value: '1900', units: 'μs', description: 'RC channel 4 maximum', category: 'radio' },
-      { name: 'RC4_TRIM', value: '1500', units: 'μs', description: 'RC channel 4 trim', category: 'radio' }
-    ];
-    
+  function requestParameters() {
+    if (!bridge?.getParameters) {
+      renderParameters(Object.keys(PARAM_META).map(name => ({ name, value: '', type: '' })));
+      setParamsStatus('Offline: no vehicle bridge');
+      return;
+    }
+    bridge.getParameters((rows) => renderParameters(rows || []));
+  }
+
+  function setParamsStatus(text) {
+    const el = document.getElementById('paramsStatus');
+    if (el) el.textContent = text;
+  }
+
+  function onParametersUpdated(info) {
+    if (!info) return;
+    const label = { empty: 'No cache', cached: 'Cached', syncing: 'Syncing…', synced: 'Synced', error: 'Sync failed' };
+    setParamsStatus(`${label[info.state] || info.state} · ${info.count} params` +
+                    (info.fw ? ` · ${info.fw}` : '') + (info.pending ? ` · ${info.pending} unsaved` : '') +
+                    (info.error ? ` · ${info.error}` : ''));
+    (info.removed || []).forEach(name => { paramRows.get(name)?.remove(); paramRows.delete(name); });
+    (info.changed || []).forEach(p => {
+      const row = paramRows.get(p.name);
+      if (!row) return appendParameterRow(p);
+      const input = row.querySelector('.param-value');
+      input.dataset.original = p.value;
+      if (!row.classList.contains('param-pending') || input.value === p.value) {
+        input.value = p.value;
+        row.classList.remove('param-pending');
+      }
+    });
+  }
+
+  function renderParameters(params) {
     const tbody = document.getElementById('paramsTableBody');
-    if (tbody) {
-      tbody.innerHTML = '';
-      
-      sampleParams.forEach(param => {
-        const row = document.createElement('tr');
-        row.innerHTML = `
-          <td>${param.name}</td>
-          <td><input type="text" class="param-value" value="${param.value}" data-original="${param.value}"></td>
-          <td>${param.units}</td>
-          <td>${param.description}</td>
-          <td>
-            <button class="btn btn--ghost btn--sm param-reset" data-param="${param.name}">Reset</button>
-          </td>
-        `;
-        tbody.appendChild(row);
-      });
-      
-      // Bind parameter value changes
-      document.querySelectorAll('.param-value').forEach(input => {
-        input.addEventListener('change', (e) => {
-          const originalValue = e.target.dataset.original;
-          const newValue = e.target.value;
-          console.log(`Parameter ${e.target.closest('tr').cells[0].textContent} changed from ${originalValue} to ${newValue}`);
-        });
-      });
-      
-      // Bind reset buttons
-      document.querySelectorAll('.param-reset').forEach(btn => {
-        btn.addEventListener('click', (e) => {
-          const paramName = e.target.dataset.param;
-          const row = e.target.closest('tr');
-          const input = row.querySelector('.param-value');
-          const originalValue = input.dataset.original;
-          input.value = originalValue;
-          console.log(`Parameter ${paramName} reset to ${originalValue}`);
-        });
+    if (!tbody) return;
+    tbody.innerHTML = '';
+    paramRows.clear();
+    params.forEach(appendParameterRow);
+  }
+
+  function appendParameterRow(param) {
+    const tbody = document.getElementById('paramsTableBody');
+    if (!tbody) return;
+    const meta = paramMeta(param.name);
+    const row = document.createElement('tr');
+    row.dataset.category = meta.category;
+    const value = param.pending ?? param.value;
+    row.innerHTML = `
+      <td>${param.name}</td>
+      <td><input type="text" class="param-value" value="${value}" data-original="${param.value}"></td>
+      <td>${meta.units}</td>
+      <td>${meta.description}</td>
+      <td>
+        <button class="btn btn--ghost btn--sm param-reset" data-param="${param.name}">Reset</button>
+      </td>
+    `;
+    if (param.pending !== undefined) row.classList.add('param-pending');
+    tbody.appendChild(row);
+    paramRows.set(param.name, row);
+
+    // Chỉ gom thay đổi ở Python; Save Parameters commit cả lô
+    const input = row.querySelector('.param-value');
+    input.addEventListener('change', (e) => {
+      const newValue = e.target.value;
+      console.log(`Parameter ${param.name} changed from ${input.dataset.original} to ${newValue}`);
+      row.classList.toggle('param-pending', newValue !== input.dataset.original);
+      bridge?.setParameter?.(param.name, newValue, (ok) => {
+        if (ok === false) {
+          input.value = input.dataset.original;
+          row.classList.remove('param-pending');
+        }
       });
-    }
+    });
+
+    row.querySelector('.param-reset').addEventListener('click', () => {
+      input.value = input.dataset.original;
+      row.classList.remove('param-pending');
+      bridge?.setParameter?.(param.name, input.dataset.original);
+      console.log(`Parameter ${param.name} reset to ${input.dataset.original}`);
+    });
   }
 
   function filterParameters(searchTerm) {
@@ -748,7 +857,7 @@ export function initSetupOverlay(bridge) {
     rows.forEach(row => {
       const paramName = row.cells[0].textContent.toLowerCase();
       const description = row.cells[3].textContent.toLowerCase();
-      
+
       if (paramName.includes(searchTerm) || description.includes(searchTerm)) {
         row.style.display = '';
       } else {
@@ -760,23 +869,10 @@ export function initSetupOverlay(bridge) {
   function filterParametersByCategory(category) {
     const rows = document.querySelectorAll('#paramsTableBody tr');
     rows.forEach(row => {
-      const paramName = row.cells[0].textContent;
-      const param = findParameterByName(paramName);
-      
-      if (category === 'all' || (param && param.category === category)) {
-        row.style.display = '';
-      } else {
-        row.style.display = 'none';
-      }
+      row.style.display = (category === 'all' || row.dataset.category === category) ? '' : 'none';
     });
   }
 
-  function findParameterByName(name) {
-    // This would typically query the actual parameter list
-    // For demo purposes, return a mock parameter
-    return { name, category: 'system' };
-  }
-
   // Bind setup menu events
   const setupMenu = document.querySelector('#view-setup #setupMenu');
   console.log('Setup menu found:', !!setupMenu);